@@ -10,7 +10,14 @@ preserved.
 
 Default: only rows where `content IS NULL OR content = ''` are processed.
 Pass --all to also refresh rows that already have content (e.g. if the
-stored body is now stale).
+stored body is now stale), or --budget N to refresh only the N rows most
+likely to have changed: every fetch is recorded in the `page_changes`
+history, from which each page's change rate is estimated.
+
+Requests to different hosts run concurrently; each host only sees one
+request per POLITE_PAUSE (or its robots.txt Crawl-delay, if longer), with
+up to MAX_PER_HOST in flight while it answers quickly — fewer, and a
+longer pause, once it returns 429 / 503, times out or slows down.
 
 Run:
 
@@ -18,6 +25,7 @@ Run:
     python backfill_content.py           # only NULL / empty content
     python backfill_content.py --all      # every row
     python backfill_content.py --limit 5  # first 5 only (smoke test)
+    python backfill_content.py --budget 200  # nightly: 200 likeliest changed
 """
 
 from __future__ import annotations
@@ -28,20 +36,27 @@ import os
 import re
 import sqlite3
 import sys
-import time
 from pathlib import Path
 from urllib.parse import urlparse
 
 import requests
 from bs4 import BeautifulSoup
 
+from web_content_system.crawl.politeness import HostScheduler, RobotsCache
+from web_content_system.crawl.recrawl import ChangeHistory
+from web_content_system.crawl.urls import canonical_uid
+from web_content_system.database.raw_archive import RawArchive
+
 SCRIPT_DIR = Path(__file__).resolve().parent
 DB_PATH = SCRIPT_DIR / "web_content.db"
+ARCHIVE_DIR = SCRIPT_DIR / "raw_archive"
 ENV_PATH = SCRIPT_DIR.parent / ".env"
 
 MAX_CONTENT_LEN = 100_000
 REQUEST_TIMEOUT = 25
-POLITE_PAUSE = 0.5  # seconds between HTTP calls
+POLITE_PAUSE = 0.5  # seconds between HTTP calls to the same host
+WORKERS = 8         # concurrent HTTP calls over all hosts
+MAX_PER_HOST = 4    # upper bound of each host's adaptive concurrency
 
 HEADERS = {
     "User-Agent": (
@@ -115,17 +130,38 @@ def extract_title(soup: BeautifulSoup, url: str) -> str:
     return urlparse(url).netloc or url
 
 
-def fetch_page(url: str):
-    """Fetch URL and return (title, content) or (None, None) on failure."""
+def download(url: str) -> requests.Response | Exception:
+    """GET `url`; returns the exception instead of raising. Thread-safe."""
     try:
         resp = requests.get(url, headers=HEADERS, timeout=REQUEST_TIMEOUT, allow_redirects=True)
         resp.raise_for_status()
     except Exception as exc:
-        print(f"   ! HTTP error ({type(exc).__name__}): {exc}")
-        return None, None
-
+        return exc
     if not resp.encoding or resp.encoding.lower() == "iso-8859-1":
         resp.encoding = resp.apparent_encoding or "utf-8"
+    return resp
+
+
+def fetch_page(url: str, archive: RawArchive | None = None, resp=None):
+    """Fetch URL and return (title, content) or (None, None) on failure.
+
+    When `archive` is given the raw response body is stored there as well.
+    Pass `resp` (a download() result) when the page was already fetched.
+    """
+    if resp is None:
+        resp = download(url)
+    if isinstance(resp, Exception):
+        print(f"   ! HTTP error ({type(resp).__name__}): {resp}")
+        return None, None
+
+    if archive is not None:
+        archive.append(
+            url,
+            resp.content,
+            status=resp.status_code,
+            content_type=resp.headers.get("Content-Type", ""),
+            encoding=resp.encoding,
+        )
 
     soup = BeautifulSoup(resp.text, "html.parser")
     for tag in soup(["script", "style", "noscript", "iframe", "svg"]):
@@ -146,6 +182,13 @@ def main() -> int:
         action="store_true",
         help="Process every row, including those that already have content.",
     )
+    parser.add_argument(
+        "--budget",
+        type=int,
+        default=0,
+        help="Refresh the N rows most likely to have changed since their last "
+             "fetch, judged by their observed change rate.",
+    )
     parser.add_argument(
         "--limit",
         type=int,
@@ -155,7 +198,24 @@ def main() -> int:
     parser.add_argument(
         "--no-pause",
         action="store_true",
-        help="Disable the polite 0.5s pause between requests.",
+        help="Disable the polite per-host 0.5s pause between requests.",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=WORKERS,
+        help=f"Concurrent requests over all hosts (default {WORKERS}).",
+    )
+    parser.add_argument(
+        "--max-per-host",
+        type=int,
+        default=MAX_PER_HOST,
+        help=f"Upper bound of the adaptive per-host concurrency (default {MAX_PER_HOST}).",
+    )
+    parser.add_argument(
+        "--no-archive",
+        action="store_true",
+        help=f"Do not store raw responses in {ARCHIVE_DIR.name}/.",
     )
     args = parser.parse_args()
 
@@ -167,23 +227,48 @@ def main() -> int:
 
     print("=" * 60)
     print("Backfill content for web_content.db")
-    print(f"  Mode: {'all' if args.all else 'NULL/empty only'}")
+    if args.budget:
+        mode = f"recrawl budget {args.budget}"
+    else:
+        mode = "all" if args.all else "NULL/empty only"
+    print(f"  Mode: {mode}")
     print(f"  Limit: {args.limit or 'none'}")
-    print(f"  Polite pause: {'off' if args.no_pause else '0.5s'}")
+    print(f"  Polite pause: {'off' if args.no_pause else f'{POLITE_PAUSE}s per host'}")
+    print(f"  Workers: {args.workers}")
     print("=" * 60)
 
     conn = sqlite3.connect(DB_PATH)
     cur = conn.cursor()
-
-    if args.all:
+    history = ChangeHistory(conn)
+    history.seed_from_content_summary()
+
+    if args.budget:
+        picked = history.select(args.budget)
+        ids = {}
+        for candidate in picked:
+            cur.execute(
+                "SELECT id FROM content_summary WHERE uid = ?",
+                (canonical_uid(candidate.url),),
+            )
+            row = cur.fetchone()
+            if row:
+                ids[row[0]] = candidate.url
+        targets = list(ids.items())
+        if picked:
+            print(
+                f"Change probability of picked rows: "
+                f"{picked[-1].change_probability:.2f} – {picked[0].change_probability:.2f}"
+            )
+    elif args.all:
         cur.execute("SELECT id, original_url FROM content_summary ORDER BY id")
+        targets = cur.fetchall()
     else:
         cur.execute(
             "SELECT id, original_url FROM content_summary "
             "WHERE content IS NULL OR content = '' "
             "ORDER BY id"
         )
-    targets = cur.fetchall()
+        targets = cur.fetchall()
     if args.limit:
         targets = targets[: args.limit]
     print(f"Target rows: {len(targets)}")
@@ -193,18 +278,29 @@ def main() -> int:
         conn.close()
         return 0
 
+    archive = None if args.no_archive else RawArchive(ARCHIVE_DIR)
+    scheduler = HostScheduler(
+        0.0 if args.no_pause else POLITE_PAUSE,
+        robots=None if args.no_pause else RobotsCache(HEADERS["User-Agent"]),
+        max_per_host=args.max_per_host,
+    )
+    for row_id, url in targets:
+        scheduler.push(url, (row_id, url))
+
     updated = 0
     failed = 0
-    for i, (row_id, url) in enumerate(targets, start=1):
-        if not args.no_pause and i > 1:
-            time.sleep(POLITE_PAUSE)
+    results = scheduler.run(download, workers=args.workers)
+    for i, ((row_id, url), resp) in enumerate(results, start=1):
         print(f"\n[{i}/{len(targets)}] id={row_id} {url}")
-        title, content = fetch_page(url)
+        title, content = fetch_page(url, archive, resp)
         if not content:
             print("   ! no content fetched, skipping")
             failed += 1
             continue
 
+        if not history.observe(url, content) and args.budget:
+            print("   · unchanged")
+
         body = content
         if len(body) > MAX_CONTENT_LEN:
             body = body[:MAX_CONTENT_LEN] + "\n\n[…truncated at MAX_CONTENT_LEN]"
@@ -217,8 +313,12 @@ def main() -> int:
         updated += 1
 
     conn.close()
+    if archive is not None:
+        archive.close()
     print("\n" + "=" * 60)
     print(f"Done. updated={updated} failed={failed} target={len(targets)}")
+    for host, m in scheduler.metrics().items():
+        print(f"  {host}: limit {m['limit']}, delay {m['delay']}s, overloaded {m['overloads']}×")
     print("=" * 60)
     return 0
 
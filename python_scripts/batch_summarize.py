@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+"""
+Re-summarize stored rows offline through a provider's Batch API.
+
+Instead of one interactive request per row, the prompts of many rows are
+written as one JSONL file, uploaded, and run by the provider within its
+24 h window — at half the price and outside the interactive rate limits,
+so a bulk re-summarisation does not slow down the crawlers.
+
+    submit   pick rows, write llm_batches/batch-<id>.jsonl, upload, start
+    poll     check open batches; stream the results of finished ones back
+             into content_summary.summary (with --wait: until all are done)
+    run      submit, then poll --wait
+    status   open batches and item counts, no network
+
+Every batch and row is tracked in the llm_batches / llm_batch_items tables:
+an interrupted submit is sent again by the next poll, an interrupted poll
+re-reads the output and skips rows already written, and rows of failed or
+expired requests can be submitted again. Rows already re-summarized by a
+batch are not picked again unless --redo is given. Token usage is logged
+per row in llm_usage (source "batch").
+
+The batch endpoint of the provider's configured base URL is used
+(OPENAI_* or DEEPSEEK_* settings); the provider must implement the OpenAI
+Batch API (files + batches).
+
+Run:
+
+    cd python_scripts
+    python batch_summarize.py submit --limit 5000
+    python batch_summarize.py poll --wait
+    python batch_summarize.py run --tag subpage
+    python batch_summarize.py status
+"""
+
+from __future__ import annotations
+
+import argparse
+import itertools
+import sqlite3
+import sys
+import time
+from pathlib import Path
+
+from openai import OpenAIError
+
+import crawler_subpages
+from web_content_system.config import APIConfig
+from web_content_system.database.batch_store import APPLIED, BatchRecord, BatchStore
+from web_content_system.database.usage_log import UsageLog
+from web_content_system.llm_clients import BaseLLMClient, BatchClient
+from web_content_system.llm_clients.batch import MAX_REQUESTS
+
+BATCH_DIR = Path(__file__).resolve().parent / "llm_batches"
+BATCH_SIZE = 5000    # rows per batch
+POLL_INTERVAL = 60   # seconds between polls with --wait
+APPLY_CHUNK = 500    # results written back per transaction
+SOURCE = "batch"     # llm_usage.source of batch calls
+
+
+def select_uids(conn: sqlite3.Connection, store: BatchStore, limit: int, tag: str, redo: bool) -> list[str]:
+    """Uids of rows with stored content that no open (or, without `redo`, finished) batch covers."""
+    claimed = store.claimed_uids(include_done=not redo)
+    sql = "SELECT uid FROM content_summary WHERE content IS NOT NULL AND content <> ''"
+    params: tuple = ()
+    if tag:
+        sql += " AND tags LIKE ?"
+        params = (f"%{tag}%",)
+    uids = []
+    for (uid,) in conn.execute(sql + " ORDER BY id", params):
+        if uid in claimed:
+            continue
+        uids.append(uid)
+        if limit and len(uids) >= limit:
+            break
+    return uids
+
+
+def build_prompt(config: APIConfig, title: str, content: str) -> str:
+    """Summary prompt of one row, trimmed like an interactive call."""
+    max_tokens = config.chunk_tokens
+    if config.input_token_ceiling:
+        max_tokens = min(max_tokens, config.input_token_ceiling)
+    return BaseLLMClient.create_prompt(content, title or "", max_tokens)
+
+
+def send(conn, store: BatchStore, client: BatchClient, config: APIConfig, batch: BatchRecord) -> None:
+    """(Re)write a prepared batch's input file from the DB and submit it."""
+    def prompts():
+        for uid in store.uids(batch.id):
+            row = conn.execute("SELECT title, content FROM content_summary WHERE uid = ?", (uid,)).fetchone()
+            if row is not None:
+                yield store.custom_id(batch.id, uid), build_prompt(config, row[0], row[1] or "")
+
+    count = client.write_input(batch.input_path, prompts())
+    remote_id = client.submit(batch.input_path)
+    store.submitted(batch.id, remote_id)
+    print(f"  ✓ batch {batch.id}: {count} request(s) submitted as {remote_id}")
+
+
+def submit(conn, store: BatchStore, clients: dict, config: APIConfig, args) -> int:
+    """Create and submit batches for the selected rows; returns the batch count."""
+    client = get_client(clients, config, args.provider)
+    uids = select_uids(conn, store, args.limit, args.tag, args.redo)
+    print(f"Rows to re-summarize: {len(uids)}")
+    submitted = 0
+    for start in range(0, len(uids), args.size):
+        batch = store.create(client.provider, client.model, str(BATCH_DIR), uids[start:start + args.size])
+        send(conn, store, client, config, batch)
+        submitted += 1
+    return submitted
+
+
+def collect(conn, store: BatchStore, clients: dict, config: APIConfig, usage_log: UsageLog) -> int:
+    """Poll open batches and write back finished ones; returns how many are still running."""
+    running = 0
+    for batch in store.open_batches():
+        try:
+            client = get_client(clients, config, batch.provider)
+        except ValueError as exc:
+            print(f"  ! batch {batch.id}: {exc}")
+            running += 1
+            continue
+        try:
+            if batch.remote_id is None:
+                # Interrupted before the provider accepted it.
+                send(conn, store, client, config, batch)
+                running += 1
+                continue
+            status = client.status(batch.remote_id)
+        except ValueError as exc:
+            # The input can never be sent (e.g. too many requests): close the
+            # batch so its rows can be picked again.
+            released = store.release_pending(batch.id, f"not sent: {exc}")
+            store.set_status(batch.id, APPLIED, f"not sent: {exc}")
+            print(f"  ✗ batch {batch.id} dropped ({exc}); {released} row(s) can be resubmitted")
+            continue
+        except OpenAIError as exc:
+            print(f"  ! batch {batch.id}: {type(exc).__name__}: {exc}")
+            running += 1
+            continue
+        if not status.finished:
+            store.set_status(batch.id, status.status)
+            print(f"  · batch {batch.id} {status.status}: {status.completed}/{status.total or batch.requests}")
+            running += 1
+            continue
+
+        applied = failed = 0
+        cost = 0.0
+        for file_id in (status.output_file_id, status.error_file_id):
+            if not file_id:
+                continue
+            results = client.results(file_id)
+            while True:
+                chunk = list(itertools.islice(results, APPLY_CHUNK))
+                if not chunk:
+                    break
+                ok, bad, written = store.apply(chunk)
+                applied += ok
+                failed += bad
+                cost += usage_log.record_many(
+                    ((url, result.usage) for url, result in written if result.usage is not None), SOURCE,
+                )
+        released = store.release_pending(batch.id, f"no result (batch {status.status})")
+        store.set_status(batch.id, APPLIED, None if status.status == "completed" else status.status)
+        print(
+            f"  ✓ batch {batch.id} {status.status}: {applied} summary(ies) written, "
+            f"{failed + released} failed (can be resubmitted), ${cost:.4f}"
+        )
+    return running
+
+
+def get_client(clients: dict, config: APIConfig, provider: str) -> BatchClient:
+    """Batch client of a provider, created on first use."""
+    if provider not in clients:
+        clients[provider] = BatchClient.from_config(config, provider)
+    return clients[provider]
+
+
+def print_status(store: BatchStore) -> None:
+    batches = store.open_batches()
+    counts = store.counts()
+    print(f"Open batches: {len(batches)}")
+    for batch in batches:
+        items = ", ".join(f"{k} {v}" for k, v in sorted(counts.get(batch.id, {}).items()))
+        print(f"  [{batch.id}] {batch.provider}/{batch.model} {batch.status} "
+              f"{batch.remote_id or '(not submitted)'} — {items}")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Re-summarize stored rows through a Batch API.")
+    parser.add_argument("command", choices=["submit", "poll", "run", "status"])
+    parser.add_argument("--provider", choices=["openai", "deepseek"], default="openai",
+                        help="Provider whose batch endpoint new batches go to (default openai).")
+    parser.add_argument("--limit", type=int, default=0, help="Submit at most N rows (default all).")
+    parser.add_argument("--tag", default="", help="Only rows whose tags contain this.")
+    parser.add_argument("--redo", action="store_true",
+                        help="Also pick rows a batch already re-summarized.")
+    parser.add_argument("--size", type=int, default=BATCH_SIZE,
+                        help=f"Rows per batch (default {BATCH_SIZE}).")
+    parser.add_argument("--wait", action="store_true", help="poll: repeat until no batch is running.")
+    parser.add_argument("--interval", type=float, default=POLL_INTERVAL,
+                        help=f"Seconds between polls with --wait (default {POLL_INTERVAL}).")
+    args = parser.parse_args()
+    if not 1 <= args.size <= MAX_REQUESTS:
+        parser.error(f"--size must be between 1 and {MAX_REQUESTS} (the provider's limit per batch)")
+
+    crawler_subpages.load_env(crawler_subpages.ENV_PATH)
+    conn = crawler_subpages.ensure_schema(crawler_subpages.DB_PATH)
+    store = BatchStore(conn)
+    if args.command == "status":
+        print_status(store)
+        conn.close()
+        return 0
+
+    config = APIConfig.from_env()
+    usage_log = UsageLog(conn)
+    clients: dict = {}
+    try:
+        if args.command in ("submit", "run"):
+            try:
+                submitted = submit(conn, store, clients, config, args)
+            except ValueError as exc:
+                print(f"✗ {exc}")
+                return 1
+            except OpenAIError as exc:
+                print(f"✗ submission failed ({type(exc).__name__}): {exc}")
+                print("  prepared batches are submitted again by `batch_summarize.py poll`")
+                return 1
+            print(f"Submitted {submitted} batch(es)")
+        if args.command in ("poll", "run"):
+            while True:
+                running = collect(conn, store, clients, config, usage_log)
+                if not running or not (args.wait or args.command == "run"):
+                    break
+                print(f"  {running} batch(es) running; next poll in {args.interval:.0f}s")
+                time.sleep(args.interval)
+            print(f"{running} batch(es) still running" if running else "All batches collected")
+    finally:
+        conn.close()
+    return 0
+
+
+if __name__ == "__main__":
+    try:
+        sys.exit(main())
+    except KeyboardInterrupt:
+        print("\ninterrupted — run `python batch_summarize.py poll` to resume")
+        sys.exit(1)
@@ -0,0 +1,308 @@
+#!/usr/bin/env python3
+"""
+Extraction benchmark and regression harness.
+
+Runs every extraction engine against the stored HTML corpus in
+`benchmarks/fixtures/` and reports, per engine:
+
+    * pages/sec and p50 / p99 per-page time
+    * peak Python memory while extracting (tracemalloc)
+    * text overlap (token F1) against the golden extraction of each fixture
+
+Engines:
+
+    requests_scraper   RequestsScraper.parse_html → _extract_content + clean_content
+    crawler_subpages   crawler_subpages.parse_page → extract_main_text
+    clean_content      BaseScraper.clean_content on the raw document text
+
+Results are compared with `benchmarks/extraction_baseline.json`; the script
+exits with status 1 when accuracy, speed or memory regress beyond the
+tolerances. Speed and memory depend on the machine, so re-record the
+baseline (`--update-baseline`) when moving to new hardware.
+
+Run:
+
+    cd python_scripts
+    python benchmarks/bench_extraction.py                    # report + check
+    python benchmarks/bench_extraction.py --update-baseline  # accept results
+    python benchmarks/bench_extraction.py --skip-speed       # accuracy only
+    python benchmarks/bench_extraction.py --capture URL --name NAME --category blog
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import re
+import statistics
+import sys
+import time
+import tracemalloc
+from collections import Counter
+from pathlib import Path
+from typing import Callable
+
+BENCH_DIR = Path(__file__).resolve().parent
+SCRIPT_DIR = BENCH_DIR.parent
+FIXTURES_DIR = BENCH_DIR / "fixtures"
+MANIFEST_PATH = FIXTURES_DIR / "manifest.json"
+BASELINE_PATH = BENCH_DIR / "extraction_baseline.json"
+
+sys.path.insert(0, str(SCRIPT_DIR))
+
+from bs4 import BeautifulSoup, UnicodeDammit  # noqa: E402
+
+import crawler_subpages  # noqa: E402
+from web_content_system.scrapers import BaseScraper, RequestsScraper  # noqa: E402
+
+OVERLAP_TOLERANCE = 0.02  # absolute F1 drop allowed per fixture
+SPEED_TOLERANCE = 0.30    # relative pages/sec drop allowed per engine
+MEMORY_TOLERANCE = 0.50   # relative peak-memory growth allowed per engine
+
+TOKEN_RE = re.compile(r"[㐀-鿿豈-﫿]|[A-Za-z0-9]+")
+
+
+# ---------------------------------------------------------------------------
+# Corpus
+# ---------------------------------------------------------------------------
+def load_corpus() -> list[dict]:
+    """Load fixtures listed in the manifest, with raw bytes and golden text."""
+    manifest = json.loads(MANIFEST_PATH.read_text(encoding="utf-8"))
+    corpus = []
+    for entry in manifest:
+        name = entry["name"]
+        raw = (FIXTURES_DIR / f"{name}.html").read_bytes()
+        golden = (FIXTURES_DIR / f"{name}.golden.txt").read_text(encoding="utf-8")
+        encoding = entry.get("encoding")
+        dammit = UnicodeDammit(raw, [encoding] if encoding else [])
+        corpus.append({
+            **entry,
+            "raw": raw,
+            "html": dammit.unicode_markup,
+            "doc_text": BeautifulSoup(raw, "html.parser", from_encoding=encoding).get_text(),
+            "golden": golden,
+        })
+    return corpus
+
+
+# ---------------------------------------------------------------------------
+# Engines — each takes a corpus entry and returns extracted text. Decoding
+# and other inputs the real pipeline gets for free are prepared in
+# load_corpus(), outside the timed region.
+# ---------------------------------------------------------------------------
+def engine_requests_scraper(page: dict) -> str:
+    return RequestsScraper.parse_html(page["raw"], page["url"], page.get("encoding"))[1]
+
+
+def engine_crawler_subpages(page: dict) -> str:
+    return crawler_subpages.parse_page(page["html"], page["url"])[1]
+
+
+def engine_clean_content(page: dict) -> str:
+    return BaseScraper.clean_content(page["doc_text"])
+
+
+ENGINES: dict[str, Callable[[dict], str]] = {
+    "requests_scraper": engine_requests_scraper,
+    "crawler_subpages": engine_crawler_subpages,
+    "clean_content": engine_clean_content,
+}
+
+
+# ---------------------------------------------------------------------------
+# Metrics
+# ---------------------------------------------------------------------------
+def tokenize(text: str) -> Counter:
+    """CJK characters count as one token each; Latin words and numbers as one."""
+    return Counter(tok.lower() for tok in TOKEN_RE.findall(text))
+
+
+def overlap_f1(extracted: str, golden: str) -> float:
+    """Bag-of-tokens F1 between an extraction and the golden text."""
+    got, want = tokenize(extracted), tokenize(golden)
+    common = sum((got & want).values())
+    if not common:
+        return 0.0
+    precision = common / sum(got.values())
+    recall = common / sum(want.values())
+    return 2 * precision * recall / (precision + recall)
+
+
+def percentile(samples: list[float], pct: float) -> float:
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def run_engine(engine: Callable[[dict], str], corpus: list[dict], repeat: int) -> dict:
+    """Time, memory-profile and score one engine over the corpus."""
+    overlap = {page["name"]: round(overlap_f1(engine(page), page["golden"]), 4) for page in corpus}
+
+    timings: list[float] = []
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for page in corpus:
+            t0 = time.perf_counter()
+            engine(page)
+            timings.append(time.perf_counter() - t0)
+    elapsed = time.perf_counter() - started
+
+    tracemalloc.start()
+    for page in corpus:
+        engine(page)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "pages_per_sec": round(len(timings) / elapsed, 1),
+        "p50_ms": round(percentile(timings, 50) * 1000, 3),
+        "p99_ms": round(percentile(timings, 99) * 1000, 3),
+        "peak_kib": round(peak / 1024, 1),
+        "mean_overlap": round(statistics.mean(overlap.values()), 4),
+        "overlap": overlap,
+    }
+
+
+# ---------------------------------------------------------------------------
+# Reporting & regression check
+# ---------------------------------------------------------------------------
+def print_report(results: dict, corpus: list[dict]) -> None:
+    print(f"{'engine':<18} {'pages/s':>9} {'p50 ms':>8} {'p99 ms':>8} {'peak KiB':>9} {'overlap':>8}")
+    print("-" * 66)
+    for name, r in results.items():
+        print(
+            f"{name:<18} {r['pages_per_sec']:>9} {r['p50_ms']:>8} {r['p99_ms']:>8} "
+            f"{r['peak_kib']:>9} {r['mean_overlap']:>8}"
+        )
+
+    categories = sorted({page["category"] for page in corpus})
+    print(f"\n{'overlap by category':<18} " + " ".join(f"{c:>10}" for c in categories))
+    print("-" * (19 + 11 * len(categories)))
+    for name, r in results.items():
+        cells = []
+        for category in categories:
+            scores = [r["overlap"][p["name"]] for p in corpus if p["category"] == category]
+            cells.append(f"{statistics.mean(scores):>10.3f}")
+        print(f"{name:<18} " + " ".join(cells))
+
+
+def check_regressions(
+    results: dict,
+    baseline: dict,
+    *,
+    overlap_tol: float,
+    speed_tol: float,
+    memory_tol: float,
+    skip_speed: bool,
+) -> list[str]:
+    """Return human-readable regression messages (empty when all is well)."""
+    problems = []
+    for name, r in results.items():
+        base = baseline.get(name)
+        if not base:
+            continue
+        for fixture, score in r["overlap"].items():
+            before = base["overlap"].get(fixture)
+            if before is not None and score < before - overlap_tol:
+                problems.append(f"{name}: overlap on {fixture} fell {before:.3f} → {score:.3f}")
+        if skip_speed:
+            continue
+        if r["pages_per_sec"] < base["pages_per_sec"] * (1 - speed_tol):
+            problems.append(
+                f"{name}: throughput fell {base['pages_per_sec']} → {r['pages_per_sec']} pages/s"
+            )
+        if r["peak_kib"] > base["peak_kib"] * (1 + memory_tol):
+            problems.append(f"{name}: peak memory grew {base['peak_kib']} → {r['peak_kib']} KiB")
+    return problems
+
+
+# ---------------------------------------------------------------------------
+# Fixture capture
+# ---------------------------------------------------------------------------
+def capture_fixture(url: str, name: str, category: str) -> int:
+    """Download a live page into the corpus with a draft golden extraction.
+
+    The draft comes from the requests engine and MUST be reviewed by hand
+    (remove boilerplate, add missed paragraphs) before it is committed.
+    """
+    import requests
+
+    resp = requests.get(url, headers=crawler_subpages.HEADERS, timeout=crawler_subpages.REQUEST_TIMEOUT)
+    resp.raise_for_status()
+    encoding = resp.encoding if resp.encoding and resp.encoding.lower() != "iso-8859-1" else None
+
+    (FIXTURES_DIR / f"{name}.html").write_bytes(resp.content)
+    _, draft, _ = RequestsScraper.parse_html(resp.content, resp.url, encoding)
+    (FIXTURES_DIR / f"{name}.golden.txt").write_text(draft + "\n", encoding="utf-8")
+
+    manifest = json.loads(MANIFEST_PATH.read_text(encoding="utf-8"))
+    manifest = [entry for entry in manifest if entry["name"] != name]
+    manifest.append({"name": name, "category": category, "url": resp.url, "encoding": encoding})
+    MANIFEST_PATH.write_text(
+        "[\n" + ",\n".join("  " + json.dumps(e, ensure_ascii=False) for e in manifest) + "\n]\n",
+        encoding="utf-8",
+    )
+    print(f"✓ captured {name} ({len(resp.content)} bytes) — review {name}.golden.txt before committing")
+    return 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Extraction benchmark and regression harness")
+    parser.add_argument("--repeat", type=int, default=20, help="Timed passes over the corpus (default 20)")
+    parser.add_argument("--engine", action="append", choices=sorted(ENGINES), help="Run only these engines")
+    parser.add_argument("--update-baseline", action="store_true", help="Write results as the new baseline")
+    parser.add_argument("--skip-speed", action="store_true", help="Only check accuracy, not speed / memory")
+    parser.add_argument("--overlap-tolerance", type=float, default=OVERLAP_TOLERANCE)
+    parser.add_argument("--speed-tolerance", type=float, default=SPEED_TOLERANCE)
+    parser.add_argument("--memory-tolerance", type=float, default=MEMORY_TOLERANCE)
+    parser.add_argument("--json", metavar="PATH", help="Also write the results as JSON")
+    parser.add_argument("--capture", metavar="URL", help="Add a live page to the corpus")
+    parser.add_argument("--name", help="Fixture name for --capture")
+    parser.add_argument("--category", help="Fixture category for --capture (mediawiki, blog, spa, news_zh)")
+    args = parser.parse_args()
+
+    if args.capture:
+        if not args.name or not args.category:
+            parser.error("--capture requires --name and --category")
+        return capture_fixture(args.capture, args.name, args.category)
+
+    corpus = load_corpus()
+    engines = {name: ENGINES[name] for name in (args.engine or ENGINES)}
+    print(f"Corpus: {len(corpus)} fixtures, {args.repeat} timed passes\n")
+
+    results = {name: run_engine(engine, corpus, args.repeat) for name, engine in engines.items()}
+    print_report(results, corpus)
+
+    if args.json:
+        Path(args.json).write_text(json.dumps(results, indent=2, ensure_ascii=False), encoding="utf-8")
+
+    if args.update_baseline:
+        baseline = json.loads(BASELINE_PATH.read_text(encoding="utf-8")) if BASELINE_PATH.exists() else {}
+        baseline.update(results)
+        BASELINE_PATH.write_text(json.dumps(baseline, indent=2, ensure_ascii=False) + "\n", encoding="utf-8")
+        print(f"\n✓ baseline written to {BASELINE_PATH.name}")
+        return 0
+
+    if not BASELINE_PATH.exists():
+        print("\n· no baseline yet — run with --update-baseline to record one")
+        return 0
+
+    problems = check_regressions(
+        results,
+        json.loads(BASELINE_PATH.read_text(encoding="utf-8")),
+        overlap_tol=args.overlap_tolerance,
+        speed_tol=args.speed_tolerance,
+        memory_tol=args.memory_tolerance,
+        skip_speed=args.skip_speed,
+    )
+    if problems:
+        print("\n✗ regressions against baseline:")
+        for problem in problems:
+            print(f"   - {problem}")
+        return 1
+    print("\n✓ no regressions against baseline")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,346 @@
+#!/usr/bin/env python3
+"""
+LLM-layer benchmark against the local stub server.
+
+Starts `benchmarks/llm_stub_server.py` in-process, points DeepSeek, OpenAI
+and Ollama at it and summarizes copies of the fixture corpus (the golden
+texts in `benchmarks/fixtures/`) through ContentProcessor or
+WebContentExtractor. No request leaves the machine. Reports:
+
+    * summaries/sec and p50 / p95 / p99 per-summary time
+    * per backend: client calls, answers, server-side requests, SDK retries,
+      429s, 5xx errors, peak concurrency and the final adaptive limit
+    * summaries that fell through to the extractive FallbackSummarizer
+    * hedges, with --hedge
+    * pages, mean time and cost per route, with --routing
+
+A scenario (--scenario) sets the backends' latency distributions and
+faults; --profile adjusts one backend on top of it. Latencies and faults
+are drawn per prompt and attempt from --seed, so two runs of the same
+scenario see the same backend behaviour and differ only by the code under
+test. Save a run with --json and diff a later one against it with
+--compare.
+
+Run:
+
+    cd python_scripts
+    python benchmarks/bench_llm.py                                  # healthy backends
+    python benchmarks/bench_llm.py --scenario slow-tail --hedge --json /tmp/hedge.json
+    python benchmarks/bench_llm.py --scenario slow-tail --compare /tmp/hedge.json
+    python benchmarks/bench_llm.py --scenario rate-limited --max-concurrency 8
+    python benchmarks/bench_llm.py --routing --compare /tmp/baseline.json
+    python benchmarks/bench_llm.py --profile deepseek "latency=uniform(0.1,2)" error_rate=0.1
+    python benchmarks/bench_llm.py --target extractor --documents 20
+
+Recorded answers: --record deepseek=https://api.deepseek.com --cassette
+FILE forwards that backend to the real API (with the key from .env) and
+records its answers; later runs with --cassette FILE replay them, and
+`--profile deepseek latency=recorded` replays the recorded latencies too.
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import io
+import json
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+BENCH_DIR = Path(__file__).resolve().parent
+SCRIPT_DIR = BENCH_DIR.parent
+
+sys.path.insert(0, str(SCRIPT_DIR))
+
+from benchmarks.bench_extraction import FIXTURES_DIR, MANIFEST_PATH, percentile  # noqa: E402
+from benchmarks.llm_stub_server import Cassette, Profile, StubServer  # noqa: E402
+from web_content_system import WebContentExtractor  # noqa: E402
+from web_content_system.config import APIConfig, BrowserConfig, Config, DatabaseConfig  # noqa: E402
+from web_content_system.processors import ContentProcessor  # noqa: E402
+
+BACKENDS = ("deepseek", "openai", "ollama")
+
+HEALTHY = {
+    "deepseek": ["latency=lognormal(0.3,0.3)"],
+    "openai": ["latency=lognormal(0.4,0.3)"],
+    "ollama": ["latency=lognormal(0.8,0.2)"],
+}
+
+# Backend behaviour per scenario: profile items over HEALTHY.
+SCENARIOS: dict[str, dict[str, list[str]]] = {
+    "healthy": {},
+    "slow-tail": {"deepseek": ["latency=lognormal(0.3,1.2)"]},
+    "rate-limited": {"deepseek": ["max_concurrency=2", "rate_limit=0.05"]},
+    "flaky": {"deepseek": ["error_rate=0.2"]},
+    "outage": {"deepseek": ["error_rate=1"]},
+}
+
+COMPARED = ("summaries_per_sec", "p50_ms", "p95_ms", "p99_ms", "fallbacks", "cost_per_summary")
+
+
+# ---------------------------------------------------------------------------
+# Setup
+# ---------------------------------------------------------------------------
+def load_documents(count: int) -> list[tuple[str, str]]:
+    """`count` (title, content) pairs, cycling through the golden texts.
+
+    Each copy is marked with its number, so every document is a distinct
+    prompt with its own latency and fault draws.
+    """
+    manifest = json.loads(MANIFEST_PATH.read_text(encoding="utf-8"))
+    texts = [
+        (entry["name"], (FIXTURES_DIR / f"{entry['name']}.golden.txt").read_text(encoding="utf-8"))
+        for entry in manifest
+    ]
+    documents = []
+    for i in range(count):
+        name, text = texts[i % len(texts)]
+        documents.append((f"{name} #{i}", f"{text}\n（第 {i} 篇）"))
+    return documents
+
+
+def build_profiles(scenario: str, overrides: list[list[str]] | None) -> dict[str, Profile]:
+    """Backend profiles of a scenario, with --profile items applied last."""
+    items = {backend: list(HEALTHY[backend]) + SCENARIOS[scenario].get(backend, []) for backend in BACKENDS}
+    for override in overrides or []:
+        items.setdefault(override[0], []).extend(override[1:])
+    return {backend: Profile.parse(values) for backend, values in items.items()}
+
+
+def build_config(stub_url: str, args, upstreams: dict[str, str]) -> APIConfig:
+    """API config pointing every backend at the stub (recorded ones keep their real key)."""
+    env = APIConfig.from_env()
+    return APIConfig(
+        deepseek_api_key=env.deepseek_api_key if "deepseek" in upstreams else "stub",
+        deepseek_base_url=f"{stub_url}/deepseek/v1",
+        deepseek_model=env.deepseek_model,
+        openai_api_key=env.openai_api_key if "openai" in upstreams else "stub",
+        openai_base_url=f"{stub_url}/openai/v1",
+        openai_model=env.openai_model,
+        ollama_api_url=f"{stub_url}/ollama/api/generate",
+        ollama_model=env.ollama_model,
+        max_concurrency=args.max_concurrency,
+        chunk_tokens=args.chunk_tokens,
+        hedge=args.hedge,
+        hedge_max_rate=args.hedge_max_rate,
+        routing=args.routing,
+    )
+
+
+def count_calls(processor: ContentProcessor) -> Counter:
+    """Count the calls each client of a processor gets from now on."""
+    calls: Counter = Counter()
+    lock = threading.Lock()
+
+    def counted(name, method):
+        def call(*args, **kwargs):
+            with lock:
+                calls[name] += 1
+            return method(*args, **kwargs)
+        return call
+
+    for client in processor.llm_clients:
+        # Remote clients are counted per request, the others per summary.
+        attribute = "complete" if client.remote else "generate_summary"
+        setattr(client, attribute, counted(client.name, getattr(client, attribute)))
+    return calls
+
+
+# ---------------------------------------------------------------------------
+# Targets — each summarizes the documents and returns the processor used,
+# the calls per client and the time of each summary.
+# ---------------------------------------------------------------------------
+def run_processor(config: APIConfig, documents: list, workers: int):
+    processor = ContentProcessor(config)
+    calls = count_calls(processor)
+
+    def summarize(document):
+        title, content = document
+        start = time.perf_counter()
+        processor.generate_summary(content, title)
+        return time.perf_counter() - start
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        timings = list(pool.map(summarize, documents))
+    return processor, calls, timings
+
+
+def run_extractor(config: APIConfig, documents: list, workers: int):
+    # The extractor's SQLite connection belongs to one thread: documents go
+    # through manual_input() one at a time (title + summary + save). Its
+    # BrowserScraper starts Chrome if one is installed, but loads no page.
+    with tempfile.TemporaryDirectory() as tmp:
+        extractor = WebContentExtractor(Config(
+            api=config,
+            database=DatabaseConfig(db_path=str(Path(tmp) / "bench.db")),
+            browser=BrowserConfig(),
+        ))
+        try:
+            calls = count_calls(extractor.processor)
+            timings = []
+            for title, content in documents:
+                start = time.perf_counter()
+                extractor.manual_input(title, content, "bench")
+                timings.append(time.perf_counter() - start)
+        finally:
+            extractor.close()
+    return extractor.processor, calls, timings
+
+
+TARGETS = {"processor": run_processor, "extractor": run_extractor}
+
+
+# ---------------------------------------------------------------------------
+# Run, report, compare
+# ---------------------------------------------------------------------------
+def run(args, profiles: dict[str, Profile], cassette: Cassette, upstreams: dict[str, str]) -> dict:
+    """Run one benchmark and collect its results."""
+    documents = load_documents(args.documents)
+    with StubServer(profiles=profiles, cassette=cassette, upstreams=upstreams, seed=args.seed) as stub:
+        config = build_config(stub.url, args, upstreams)
+        started = time.perf_counter()
+        # Clients print every failure; the report below sums them up.
+        with contextlib.redirect_stdout(io.StringIO()):
+            processor, calls, timings = TARGETS[args.target](config, documents, args.workers)
+        elapsed = time.perf_counter() - started
+        server = stub.state.stats()
+
+    answered = Counter()
+    cost = 0.0
+    for key, totals in processor.usage_totals().items():
+        answered[key.split("/", 1)[0]] += totals["calls"]
+        cost += totals["cost"]
+    limits = processor.limit_metrics()
+    backends = {}
+    for name in BACKENDS:
+        counts = server.get(name, {})
+        backends[name] = {
+            "calls": calls[name],
+            "answered": answered[name],
+            "requests": counts.get("requests", 0),
+            "retries": max(0, counts.get("requests", 0) - calls[name]),
+            "rate_limited": counts.get("rate_limited", 0),
+            "errors": counts.get("errors", 0),
+            "replayed": counts.get("replayed", 0),
+            "peak_in_flight": counts.get("peak_in_flight", 0),
+            "limit": limits.get(name, {}).get("limit"),
+        }
+    return {
+        "scenario": args.scenario,
+        "target": args.target,
+        "documents": len(documents),
+        "workers": args.workers if args.target == "processor" else 1,
+        "seed": args.seed,
+        "summaries_per_sec": round(len(timings) / elapsed, 2),
+        "p50_ms": round(percentile(timings, 50) * 1000, 1),
+        "p95_ms": round(percentile(timings, 95) * 1000, 1),
+        "p99_ms": round(percentile(timings, 99) * 1000, 1),
+        "mean_ms": round(statistics.mean(timings) * 1000, 1),
+        "fallbacks": calls["fallback"],
+        "cost_per_summary": round(cost / len(timings), 7),
+        "backends": backends,
+        "hedging": processor.hedge_metrics(),
+        "routing": processor.routing_metrics(),
+    }
+
+
+def print_report(result: dict) -> None:
+    print(
+        f"Scenario {result['scenario']} · {result['target']} · {result['documents']} summaries · "
+        f"{result['workers']} worker(s) · seed {result['seed']}\n"
+    )
+    print(f"{'summaries/s':>11} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'fallbacks':>10} {'$/summary':>10}")
+    print("-" * 63)
+    print(
+        f"{result['summaries_per_sec']:>11} {result['p50_ms']:>9} {result['p95_ms']:>9} "
+        f"{result['p99_ms']:>9} {result['fallbacks']:>10} {result['cost_per_summary']:>10.7f}"
+    )
+
+    print(f"\n{'backend':<10} {'calls':>6} {'answered':>9} {'requests':>9} {'retries':>8} "
+          f"{'429':>5} {'5xx':>5} {'replayed':>9} {'peak':>5} {'limit':>6}")
+    print("-" * 80)
+    for name, b in result["backends"].items():
+        print(
+            f"{name:<10} {b['calls']:>6} {b['answered']:>9} {b['requests']:>9} {b['retries']:>8} "
+            f"{b['rate_limited']:>5} {b['errors']:>5} {b['replayed']:>9} {b['peak_in_flight']:>5} "
+            f"{b['limit'] if b['limit'] is not None else '-':>6}"
+        )
+
+    hedging = result["hedging"]
+    if hedging:
+        print(f"\nhedged {hedging['hedges']} of {hedging['calls']} calls, {hedging['hedge_wins']} won")
+
+    if result.get("routing"):
+        print(f"\n{'route':<10} {'pages':>6} {'calls':>6} {'mean ms':>9} {'$/page':>10}")
+        print("-" * 45)
+        for route, t in result["routing"].items():
+            print(f"{route:<10} {t['pages']:>6} {t['calls']:>6} {t['avg_latency_ms']:>9} {t['avg_cost']:>10.7f}")
+
+
+def print_comparison(result: dict, before: dict) -> None:
+    """Print the main numbers of a run next to an earlier one."""
+    print(f"\n{'vs. earlier run':<18} {'before':>10} {'after':>10} {'change':>8}")
+    print("-" * 49)
+    rows = [(metric, before.get(metric), result[metric]) for metric in COMPARED]
+    for name, b in result["backends"].items():
+        old = before.get("backends", {}).get(name, {})
+        rows += [(f"{name} retries", old.get("retries"), b["retries"]),
+                 (f"{name} 429", old.get("rate_limited"), b["rate_limited"])]
+    for metric, old, new in rows:
+        if old is None or old == new == 0:
+            continue
+        change = f"{(new - old) / old * 100:+.0f}%" if old else ("=" if new == old else "new")
+        print(f"{metric:<18} {old:>10} {new:>10} {change:>8}")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="LLM-layer benchmark against the local stub server")
+    parser.add_argument("--scenario", choices=sorted(SCENARIOS), default="healthy",
+                        help="Backend latencies and faults (default healthy)")
+    parser.add_argument("--profile", nargs="+", action="append", metavar="BACKEND [KEY=VALUE]",
+                        help="Adjust a backend: latency=SPEC error_rate=F rate_limit=F max_concurrency=N "
+                             "retry_after=S (repeatable)")
+    parser.add_argument("--target", choices=sorted(TARGETS), default="processor",
+                        help="Drive ContentProcessor.generate_summary or WebContentExtractor.manual_input")
+    parser.add_argument("--documents", type=int, default=100, help="Summaries to make (default 100)")
+    parser.add_argument("--workers", type=int, default=8, help="Concurrent summaries (processor target)")
+    parser.add_argument("--max-concurrency", type=int, default=APIConfig.max_concurrency,
+                        help="APIConfig.max_concurrency, the upper bound of each backend's limit")
+    parser.add_argument("--chunk-tokens", type=int, default=APIConfig.chunk_tokens)
+    parser.add_argument("--hedge", action="store_true", help="Enable hedged requests")
+    parser.add_argument("--hedge-max-rate", type=float, default=APIConfig.hedge_max_rate)
+    parser.add_argument("--routing", action="store_true", help="Route pages by the default routing policy")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of latency and fault draws")
+    parser.add_argument("--cassette", help="Replay recorded answers from this JSONL file")
+    parser.add_argument("--record", action="append", metavar="BACKEND=URL", default=[],
+                        help="Forward a backend to a real API and record into --cassette")
+    parser.add_argument("--json", metavar="PATH", help="Also write the results as JSON")
+    parser.add_argument("--compare", metavar="PATH", help="Compare with the JSON of an earlier run")
+    args = parser.parse_args()
+
+    try:
+        profiles = build_profiles(args.scenario, args.profile)
+    except ValueError as exc:
+        parser.error(str(exc))
+    upstreams = dict(item.split("=", 1) for item in args.record)
+    if upstreams and not args.cassette:
+        parser.error("--record needs --cassette")
+    cassette = Cassette(args.cassette)
+
+    result = run(args, profiles, cassette, upstreams)
+    print_report(result)
+    if args.json:
+        Path(args.json).write_text(json.dumps(result, indent=2, ensure_ascii=False) + "\n", encoding="utf-8")
+    if args.compare:
+        print_comparison(result, json.loads(Path(args.compare).read_text(encoding="utf-8")))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
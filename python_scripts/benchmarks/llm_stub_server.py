@@ -0,0 +1,639 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the LLM APIs the pipeline talks to.
+
+Serves, on one port and without any network access:
+
+    POST /v1/chat/completions          OpenAI / DeepSeek chat completions
+    POST /v1/files                     batch input upload (multipart)
+    GET  /v1/files/{id}/content        batch output download (JSONL)
+    POST /v1/batches                   create a batch
+    GET  /v1/batches/{id}              poll a batch
+    POST /v1/batches/{id}/cancel       cancel a batch
+    POST /api/generate                 Ollama
+    GET  /stub/stats                   request and fault counts per backend
+
+A leading path segment names the backend, so several providers can be
+told apart on one port: ``/deepseek/v1/chat/completions`` is backend
+"deepseek", ``/ollama/api/generate`` backend "ollama". Without one, chat
+completions count as "openai" and /api/generate as "ollama".
+
+Answers are deterministic: a short "summary" naming the prompt's size,
+with token usage counted like llm_clients.count_tokens. A batch moves from
+``validating`` through ``in_progress`` to ``completed`` over
+``batch_polls`` status requests, then its output file holds one answer
+per input line.
+
+Each backend can be given a Profile: a latency distribution, a share of
+HTTP 500 errors and of 429s, and a concurrency limit above which requests
+get 429. Latencies and faults are drawn from a random generator seeded by
+(seed, backend, prompt, attempt), so a run is reproducible whatever the
+order of concurrent requests, while a retried request gets a fresh draw.
+
+A Cassette replays recorded answers: a request whose prompt was recorded
+gets the recorded response instead of the synthetic one. With an upstream
+set for a backend, its chat / generate requests are forwarded to the real
+API and the answers recorded.
+
+Use it from tests:
+
+    with StubServer() as stub:
+        client = OpenAI(api_key="stub", base_url=stub.url + "/v1")
+
+or run it by hand and point OPENAI_BASE_URL / OLLAMA_API_URL at it:
+
+    cd python_scripts
+    python benchmarks/llm_stub_server.py --port 8765
+    python benchmarks/llm_stub_server.py --profile deepseek "latency=lognormal(0.4,0.8)" rate_limit=0.05
+    python benchmarks/llm_stub_server.py --cassette llm.jsonl --record deepseek=https://api.deepseek.com
+"""
+
+from __future__ import annotations
+
+import argparse
+import email.parser
+import email.policy
+import hashlib
+import itertools
+import json
+import math
+import random
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass, fields
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any
+
+import requests
+
+SCRIPT_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(SCRIPT_DIR))
+
+from web_content_system.llm_clients.long_document import count_tokens  # noqa: E402
+
+BATCH_POLLS = 2  # status requests before a batch completes
+UPSTREAM_TIMEOUT = 120  # seconds, recording mode
+
+LATENCY_RE = re.compile(r"^(\w+)\(([^)]*)\)$")
+ROOT_SEGMENTS = ("v1", "api", "stub")  # first path segments that are not a backend name
+CONVERTERS = {"str": str, "int": int, "float": float}  # Profile field types, by annotation
+
+
+def stub_answer(prompt: str) -> str:
+    """Deterministic answer to a prompt."""
+    return f"（模拟摘要）本文约 {count_tokens(prompt)} 个 token。"
+
+
+def chat_completion(body: dict[str, Any], ids: itertools.count) -> dict[str, Any]:
+    """OpenAI-style chat completion for a request body."""
+    prompt = "\n".join(str(m.get("content", "")) for m in body.get("messages", []))
+    answer = stub_answer(prompt)
+    prompt_tokens = count_tokens(prompt)
+    completion_tokens = count_tokens(answer)
+    return {
+        "id": f"chatcmpl-{next(ids)}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": body.get("model", "stub"),
+        "choices": [{
+            "index": 0,
+            "message": {"role": "assistant", "content": answer},
+            "finish_reason": "stop",
+        }],
+        "usage": {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+        },
+    }
+
+
+def ollama_generate(body: dict[str, Any]) -> dict[str, Any]:
+    """Ollama /api/generate answer for a request body."""
+    prompt = body.get("prompt", "")
+    answer = stub_answer(prompt) if prompt else ""
+    return {
+        "model": body.get("model", "stub"),
+        "response": answer,
+        "done": True,
+        "prompt_eval_count": count_tokens(prompt),
+        "eval_count": count_tokens(answer),
+    }
+
+
+def prompt_of(kind: str, body: dict[str, Any]) -> str:
+    """Prompt text of a chat or generate request."""
+    if kind == "chat":
+        return "\n".join(str(m.get("content", "")) for m in body.get("messages", []))
+    return str(body.get("prompt", ""))
+
+
+def error_body(message: str, error_type: str, code: str) -> dict[str, Any]:
+    return {"error": {"message": message, "type": error_type, "code": code}}
+
+
+def sample_latency(spec: str, rnd: random.Random, recorded: float | None = None) -> float:
+    """
+    Seconds to wait before answering, drawn from a latency spec.
+
+    Specs: a number or ``fixed(s)``; ``uniform(low,high)``;
+    ``normal(mean,sd)``; ``lognormal(median,sigma)`` for a long tail;
+    ``recorded`` for the recorded latency of a replayed answer (else 0).
+
+    Raises:
+        ValueError: for an unknown spec
+    """
+    spec = spec.strip()
+    if spec == "recorded":
+        return recorded or 0.0
+    try:
+        return max(0.0, float(spec))
+    except ValueError:
+        pass
+    match = LATENCY_RE.match(spec)
+    if not match:
+        raise ValueError(f"bad latency spec: {spec!r}")
+    name, args = match.group(1), [float(a) for a in match.group(2).split(",") if a.strip()]
+    if name == "fixed" and len(args) == 1:
+        value = args[0]
+    elif name == "uniform" and len(args) == 2:
+        value = rnd.uniform(*args)
+    elif name == "normal" and len(args) == 2:
+        value = rnd.gauss(*args)
+    elif name == "lognormal" and len(args) == 2:
+        value = rnd.lognormvariate(math.log(args[0]), args[1])
+    else:
+        raise ValueError(f"bad latency spec: {spec!r}")
+    return max(0.0, value)
+
+
+@dataclass
+class Profile:
+    """Behaviour of one stubbed backend."""
+
+    latency: str = "0"          # latency spec, see sample_latency()
+    error_rate: float = 0.0     # share of requests answered with HTTP 500
+    rate_limit: float = 0.0     # share of requests answered with HTTP 429
+    max_concurrency: int = 0    # requests in flight beyond this get 429 (0 = no limit)
+    retry_after: float = 0.2    # Retry-After of 429 answers, seconds
+
+    @classmethod
+    def parse(cls, items: list[str]) -> "Profile":
+        """
+        Profile from ``key=value`` items, e.g. ``["latency=uniform(0.1,0.3)", "rate_limit=0.05"]``.
+
+        Raises:
+            ValueError: for an unknown key or a bad value
+        """
+        types = {f.name: f.type for f in fields(cls)}
+        values: dict[str, Any] = {}
+        for item in items:
+            key, _, value = item.partition("=")
+            key = key.strip().replace("-", "_")
+            if key not in types:
+                raise ValueError(f"unknown profile setting: {key!r}")
+            values[key] = CONVERTERS[types[key]](value.strip())
+        profile = cls(**values)
+        sample_latency(profile.latency, random.Random(0))
+        return profile
+
+
+class Cassette:
+    """
+    Recorded answers by prompt, kept in a JSONL file.
+
+    Each line holds the request kind ("chat" or "generate"), a key hashed
+    from the prompt, the upstream latency and the response body.
+    """
+
+    def __init__(self, path: str | Path | None = None):
+        """
+        Initialize cassette.
+
+        Args:
+            path: JSONL file to load and append to (None keeps it in memory)
+        """
+        self.path = Path(path) if path else None
+        self.entries: dict[str, dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        if self.path is not None and self.path.exists():
+            with self.path.open(encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        entry = json.loads(line)
+                        self.entries[entry["key"]] = entry
+
+    @staticmethod
+    def key(kind: str, prompt: str) -> str:
+        """Lookup key of a prompt."""
+        return hashlib.sha256(f"{kind}\n{prompt}".encode("utf-8")).hexdigest()[:32]
+
+    def get(self, key: str) -> dict[str, Any] | None:
+        """Recorded entry of a key, if any."""
+        return self.entries.get(key)
+
+    def add(self, key: str, kind: str, response: dict[str, Any], latency: float):
+        """Record an answer (and append it to the file)."""
+        entry = {"key": key, "kind": kind, "latency": round(latency, 4), "response": response}
+        with self._lock:
+            self.entries[key] = entry
+            if self.path is not None:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                with self.path.open("a", encoding="utf-8") as f:
+                    f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+
+@dataclass
+class Plan:
+    """What the server does with one chat / generate request."""
+
+    backend: str
+    key: str
+    status: int = 200
+    latency: float = 0.0
+    recorded: dict[str, Any] | None = None
+
+
+def multipart_fields(content_type: str, body: bytes) -> dict[str, bytes]:
+    """Fields of a multipart/form-data body, by name."""
+    message = email.parser.BytesParser(policy=email.policy.HTTP).parsebytes(
+        b"Content-Type: " + content_type.encode("latin-1") + b"\r\n\r\n" + body
+    )
+    return {
+        part.get_param("name", header="content-disposition"): part.get_payload(decode=True)
+        for part in message.iter_parts()
+    }
+
+
+class StubState:
+    """Files, batches, backend profiles and counters of one server."""
+
+    def __init__(
+        self,
+        batch_polls: int = BATCH_POLLS,
+        profiles: dict[str, Profile] | None = None,
+        cassette: Cassette | None = None,
+        upstreams: dict[str, str] | None = None,
+        seed: int = 0,
+    ):
+        self.batch_polls = batch_polls
+        self.profiles = dict(profiles or {})
+        self.cassette = cassette if cassette is not None else Cassette()
+        self.upstreams = {name: url.rstrip("/") for name, url in (upstreams or {}).items()}
+        self.seed = seed
+        self.files: dict[str, bytes] = {}
+        self.batches: dict[str, dict[str, Any]] = {}
+        self.polls: dict[str, int] = {}
+        self.requests: list[str] = []  # "METHOD /path" of every request
+        self.attempts: Counter = Counter()  # (backend, key) -> requests so far
+        self.in_flight: Counter = Counter()
+        self.counters: dict[str, Counter] = {}
+        self.ids = itertools.count(1)
+        self.lock = threading.Lock()
+
+    def admit(self, backend: str, kind: str, prompt: str) -> Plan:
+        """Decide the status and latency of a request (and count it in flight)."""
+        profile = self.profiles.get(backend) or Profile()
+        key = Cassette.key(kind, prompt)
+        recorded = self.cassette.get(key)
+        with self.lock:
+            self.attempts[backend, key] += 1
+            attempt = self.attempts[backend, key]
+            counters = self.counters.setdefault(backend, Counter())
+            counters["requests"] += 1
+            self.in_flight[backend] += 1
+            counters["peak_in_flight"] = max(counters["peak_in_flight"], self.in_flight[backend])
+            over_limit = profile.max_concurrency and self.in_flight[backend] > profile.max_concurrency
+        rnd = random.Random(f"{self.seed}:{backend}:{key}:{attempt}")
+        plan = Plan(backend, key, recorded=recorded)
+        draw = rnd.random()
+        if over_limit or draw < profile.rate_limit:
+            plan.status = 429
+        elif draw < profile.rate_limit + profile.error_rate:
+            plan.status = 500
+        if plan.status != 429 and backend not in self.upstreams:
+            plan.latency = sample_latency(profile.latency, rnd, recorded and recorded.get("latency"))
+        return plan
+
+    def done(self, plan: Plan, outcome: str):
+        """Count a finished request by outcome (ok, replayed, recorded, rate_limited, errors)."""
+        with self.lock:
+            self.in_flight[plan.backend] -= 1
+            self.counters[plan.backend][outcome] += 1
+
+    def stats(self) -> dict[str, dict[str, int]]:
+        """Request and outcome counts per backend."""
+        with self.lock:
+            return {backend: dict(counters) for backend, counters in sorted(self.counters.items())}
+
+    def add_file(self, data: bytes) -> str:
+        file_id = f"file-{next(self.ids)}"
+        self.files[file_id] = data
+        return file_id
+
+    def file_object(self, file_id: str, purpose: str) -> dict[str, Any]:
+        return {
+            "id": file_id,
+            "object": "file",
+            "bytes": len(self.files[file_id]),
+            "created_at": int(time.time()),
+            "filename": f"{file_id}.jsonl",
+            "purpose": purpose,
+            "status": "processed",
+        }
+
+    def create_batch(self, body: dict[str, Any]) -> dict[str, Any]:
+        lines = self.files[body["input_file_id"]].decode("utf-8").splitlines()
+        batch_id = f"batch_{next(self.ids)}"
+        self.batches[batch_id] = {
+            "id": batch_id,
+            "object": "batch",
+            "endpoint": body.get("endpoint", "/v1/chat/completions"),
+            "input_file_id": body["input_file_id"],
+            "completion_window": body.get("completion_window", "24h"),
+            "status": "validating",
+            "output_file_id": None,
+            "error_file_id": None,
+            "created_at": int(time.time()),
+            "request_counts": {"total": len([l for l in lines if l.strip()]), "completed": 0, "failed": 0},
+        }
+        self.polls[batch_id] = 0
+        return self.batches[batch_id]
+
+    def poll_batch(self, batch_id: str) -> dict[str, Any]:
+        batch = self.batches[batch_id]
+        if batch["status"] in ("completed", "cancelled"):
+            return batch
+        self.polls[batch_id] += 1
+        if self.polls[batch_id] < self.batch_polls:
+            batch["status"] = "in_progress"
+            return batch
+        out = []
+        for line in self.files[batch["input_file_id"]].decode("utf-8").splitlines():
+            if not line.strip():
+                continue
+            request = json.loads(line)
+            out.append(json.dumps({
+                "id": f"batch_req_{next(self.ids)}",
+                "custom_id": request["custom_id"],
+                "response": {
+                    "status_code": 200,
+                    "request_id": f"req_{next(self.ids)}",
+                    "body": chat_completion(request["body"], self.ids),
+                },
+                "error": None,
+            }, ensure_ascii=False))
+        batch["output_file_id"] = self.add_file(("\n".join(out) + "\n").encode("utf-8"))
+        batch["status"] = "completed"
+        batch["request_counts"]["completed"] = len(out)
+        return batch
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """Routes requests to the server's StubState."""
+
+    protocol_version = "HTTP/1.1"
+    server: "_Server"
+
+    def log_message(self, *args):
+        pass
+
+    def _send(
+        self, status: int, payload: Any, content_type: str = "application/json", headers: dict | None = None
+    ):
+        data = payload if isinstance(payload, bytes) else json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _body(self) -> bytes:
+        return self.rfile.read(int(self.headers.get("Content-Length", 0)))
+
+    def _not_found(self) -> tuple:
+        return 404, {"error": {"message": f"no route {self.command} {self.path}", "type": "invalid_request_error"}}
+
+    def do_GET(self):
+        self._send(*self._route_get(self.path.split("?", 1)[0]))
+
+    def do_POST(self):
+        self._send(*self._route_post(self.path.split("?", 1)[0], self._body()))
+
+    @staticmethod
+    def _split_backend(path: str) -> tuple:
+        """(backend named by the first path segment or None, rest of the path)."""
+        parts = path.strip("/").split("/")
+        if parts[0] and parts[0] not in ROOT_SEGMENTS:
+            return parts[0], "/" + "/".join(parts[1:])
+        return None, path
+
+    def _route_get(self, path: str) -> tuple:
+        state = self.server.state
+        with state.lock:
+            state.requests.append(f"GET {path}")
+        if path == "/stub/stats":
+            return 200, state.stats()
+        path = self._split_backend(path)[1]
+        parts = path.strip("/").split("/")
+        with state.lock:
+            if len(parts) == 3 and parts[:2] == ["v1", "batches"] and parts[2] in state.batches:
+                return 200, state.poll_batch(parts[2])
+            if len(parts) == 4 and parts[:2] == ["v1", "files"] and parts[3] == "content" \
+                    and parts[2] in state.files:
+                return 200, state.files[parts[2]], "application/octet-stream"
+        return self._not_found()
+
+    def _route_post(self, path: str, raw: bytes) -> tuple:
+        state = self.server.state
+        with state.lock:
+            state.requests.append(f"POST {path}")
+        backend, path = self._split_backend(path)
+        parts = path.strip("/").split("/")
+        if path == "/v1/chat/completions":
+            return self._complete(backend or "openai", "chat", json.loads(raw))
+        if path == "/api/generate":
+            return self._complete(backend or "ollama", "generate", json.loads(raw))
+        with state.lock:
+            if path == "/v1/files":
+                fields = multipart_fields(self.headers["Content-Type"], raw)
+                file_id = state.add_file(fields["file"])
+                return 200, state.file_object(file_id, fields.get("purpose", b"batch").decode("utf-8"))
+            if path == "/v1/batches":
+                body = json.loads(raw)
+                if body.get("input_file_id") not in state.files:
+                    return 400, {"error": {"message": "unknown input_file_id", "type": "invalid_request_error"}}
+                return 200, state.create_batch(body)
+            if len(parts) == 4 and parts[:2] == ["v1", "batches"] and parts[3] == "cancel" \
+                    and parts[2] in state.batches:
+                state.batches[parts[2]]["status"] = "cancelled"
+                return 200, state.batches[parts[2]]
+        return self._not_found()
+
+    def _complete(self, backend: str, kind: str, body: dict[str, Any]) -> tuple:
+        """Answer a chat / generate request as the backend's profile says."""
+        state = self.server.state
+        plan = state.admit(backend, kind, prompt_of(kind, body))
+        outcome = "errors"
+        try:
+            if plan.status == 429:
+                outcome = "rate_limited"
+                retry_after = (state.profiles.get(backend) or Profile()).retry_after
+                headers = {"Retry-After": str(math.ceil(retry_after)), "retry-after-ms": str(int(retry_after * 1000))}
+                return 429, error_body("Rate limit reached", "requests", "rate_limit_exceeded"), \
+                    "application/json", headers
+            time.sleep(plan.latency)
+            if plan.status == 500:
+                return 500, error_body("The server had an error", "server_error", "internal_error")
+            if backend in state.upstreams:
+                status, payload = self._forward(state.upstreams[backend], kind, body)
+                if status == 200:
+                    outcome = "recorded"
+                return status, payload
+            if plan.recorded is not None:
+                outcome = "replayed"
+                return 200, plan.recorded["response"]
+            outcome = "ok"
+            return 200, chat_completion(body, state.ids) if kind == "chat" else ollama_generate(body)
+        finally:
+            state.done(plan, outcome)
+
+    def _forward(self, upstream: str, kind: str, body: dict[str, Any]) -> tuple:
+        """Send a request to the real API and record a successful answer."""
+        url = upstream + ("/chat/completions" if kind == "chat" else "/api/generate")
+        headers = {"Content-Type": "application/json"}
+        if self.headers.get("Authorization"):
+            headers["Authorization"] = self.headers["Authorization"]
+        if kind == "generate":
+            body = {**body, "stream": False}
+        start = time.monotonic()
+        try:
+            response = requests.post(url, json=body, headers=headers, timeout=UPSTREAM_TIMEOUT)
+        except requests.RequestException as exc:
+            return 502, error_body(f"upstream unreachable: {exc}", "server_error", "bad_gateway")
+        try:
+            payload = response.json()
+        except ValueError:
+            return 502, error_body("upstream answered non-JSON", "server_error", "bad_gateway")
+        if response.status_code == 200:
+            key = Cassette.key(kind, prompt_of(kind, body))
+            self.server.state.cassette.add(key, kind, payload, time.monotonic() - start)
+        return response.status_code, payload
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    state: StubState
+
+
+class StubServer:
+    """Runs the stand-in on a background thread (port 0 = any free port)."""
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        batch_polls: int = BATCH_POLLS,
+        profiles: dict[str, Profile] | None = None,
+        cassette: Cassette | None = None,
+        upstreams: dict[str, str] | None = None,
+        seed: int = 0,
+    ):
+        """
+        Initialize server.
+
+        Args:
+            host: Address to bind
+            port: Port to bind (0 = any free port)
+            batch_polls: Status requests before a batch completes
+            profiles: Behaviour per backend name (default: instant, no faults)
+            cassette: Recorded answers to replay (and to record into)
+            upstreams: Real API base URL per backend name; their requests
+                are forwarded and recorded into the cassette
+            seed: Seed of the latency and fault draws
+        """
+        self._server = _Server((host, port), StubHandler)
+        self._server.state = StubState(batch_polls, profiles, cassette, upstreams, seed)
+        self._thread: threading.Thread | None = None
+
+    @property
+    def state(self) -> StubState:
+        return self._server.state
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "StubServer":
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "StubServer":
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def parse_profiles(specs: list[list[str]] | None) -> dict[str, Profile]:
+    """Profiles from ``--profile BACKEND key=value ...`` arguments."""
+    return {spec[0]: Profile.parse(spec[1:]) for spec in specs or []}
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Local stand-in for the OpenAI / DeepSeek / Ollama APIs.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--batch-polls", type=int, default=BATCH_POLLS,
+                        help=f"Status requests before a batch completes (default {BATCH_POLLS}).")
+    parser.add_argument("--profile", nargs="+", action="append", metavar="BACKEND [KEY=VALUE]",
+                        help="Behaviour of a backend: latency=SPEC error_rate=F rate_limit=F "
+                             "max_concurrency=N retry_after=S (repeatable).")
+    parser.add_argument("--cassette", help="JSONL file of recorded answers to replay.")
+    parser.add_argument("--record", action="append", metavar="BACKEND=URL", default=[],
+                        help="Forward a backend to a real API and record its answers into --cassette.")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of latency and fault draws.")
+    args = parser.parse_args()
+
+    try:
+        profiles = parse_profiles(args.profile)
+    except ValueError as exc:
+        parser.error(str(exc))
+    upstreams = dict(item.split("=", 1) for item in args.record)
+    if upstreams and not args.cassette:
+        parser.error("--record needs --cassette")
+    cassette = Cassette(args.cassette)
+    stub = StubServer(args.host, args.port, args.batch_polls, profiles, cassette, upstreams, args.seed)
+    print(f"LLM stub listening on {stub.url}")
+    print(f"  OPENAI_BASE_URL={stub.url}/v1    DEEPSEEK_BASE_URL={stub.url}/deepseek/v1")
+    print(f"  OLLAMA_API_URL={stub.url}/api/generate")
+    if len(cassette):
+        print(f"  replaying {len(cassette)} recorded answer(s) from {args.cassette}")
+    for backend, url in upstreams.items():
+        print(f"  recording {backend} from {url}")
+    try:
+        stub._server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stub._server.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
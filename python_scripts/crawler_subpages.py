@@ -1,29 +1,50 @@
 #!/usr/bin/env python3
 """
-crawler_subpages.py — fetch each root page + a bounded set of its sub-URLs and
-append them all to python_scripts/web_content.db.
+crawler_subpages.py — crawl each root site a few links deep and append every
+page to python_scripts/web_content.db.
 
 Unlike crawler.py (which wipes the DB on every run), this script:
     * NEVER deletes or modifies existing rows.
     * Inserts the 4 root pages (idempotent via UNIQUE uid).
-    * For each root, discovers same-domain internal links from the rendered
-      HTML, filters out nav / utility / static-asset URLs, and caps the list.
-    * Fetches each sub-URL, summarizes it, and inserts the row.
+    * Keeps its crawl frontier in the DB (crawl_frontier / crawl_roots):
+      every page is fetched once, stored, and its same-site links — minus
+      nav / utility / static-asset URLs — are queued one level deeper.
+    * Crawls shallow, article-like, not-yet-stored pages first, up to a
+      per-root page budget.
+    * Resumes after an interruption without refetching finished pages;
+      pass --fresh to start a new crawl from the roots.
+    * Fetches several hosts concurrently but keeps every host at its own
+      polite rate (POLITE_PAUSE, or a longer robots.txt Crawl-delay). A
+      host that answers quickly gets up to MAX_PER_HOST requests in flight;
+      429 / 503 / timeouts / slower answers halve that and back off.
     * Re-running is safe — INSERT OR IGNORE on the uid unique index.
+    * --incremental skips link following: it streams each site's sitemaps
+      and RSS / Atom feeds and fetches only pages that are new or whose
+      lastmod / updated time is newer than at their last fetch — suitable
+      for a nightly cron job.
+    * Stores the tokens and cost of every DeepSeek call per page
+      (llm_usage) and prints the run's total; --cost-cap stops the run
+      before it spends more, --max-input-tokens trims long pages.
 
 Defaults:
-    * MAX_SUBPAGES_PER_ROOT = 30      (≈ 120 sub-rows max + 4 roots)
-    * MIN_CONTENT_LEN        = 50     (skip essentially-empty pages)
-    * Polite pause of 0.5 s between requests.
+    * MAX_DEPTH          = 2      (root → its links → their links)
+    * MAX_PAGES_PER_ROOT = 200    (fetches per root, including failures)
+    * MIN_CONTENT_LEN    = 50     (skip essentially-empty pages)
+    * Polite pause of 0.5 s between requests to the same host.
+    * WORKERS            = 8      (concurrent requests over all hosts)
+    * MAX_PER_HOST       = 4      (adaptive limit of requests per host)
 
 Usage:
     cd python_scripts
     python crawler_subpages.py
+    python crawler_subpages.py --max-depth 3 --budget 20000
+    python crawler_subpages.py --fresh
+    python crawler_subpages.py --incremental
+    python crawler_subpages.py --cost-cap 0.50 --max-input-tokens 6000
 """
 
 from __future__ import annotations
 
-import hashlib
 import os
 import re
 import sqlite3
@@ -36,12 +57,41 @@ from urllib.parse import urljoin, urlparse
 import requests
 from bs4 import BeautifulSoup
 
+from web_content_system.crawl.frontier import CrawlFrontier
+from web_content_system.crawl.politeness import HostScheduler, RobotsCache
+from web_content_system.crawl.recrawl import ChangeHistory
+from web_content_system.crawl.sitemaps import LastmodIndex, SitemapDiscovery, open_listing
+from web_content_system.crawl.urls import SeenSet, canonical_uid, canonicalize_url
+from web_content_system.database.failure_log import (
+    EMPTY_CONTENT,
+    LLM_ERROR,
+    FailureLog,
+    classify,
+    retry_after,
+)
+from web_content_system.database.migrations import migrate_canonical_uids
+from web_content_system.database.near_duplicates import NearDuplicateIndex, simhash
+from web_content_system.database.raw_archive import RawArchive
+from web_content_system.database.selector_cache import SelectorCache
+from web_content_system.database.call_log import CallLog
+from web_content_system.database.usage_log import UsageLog
+from web_content_system.llm_clients.long_document import (
+    MapReduceSummarizer,
+    count_tokens,
+    truncate_tokens,
+)
+from web_content_system.llm_clients.textrank import TextRankSummarizer
+from web_content_system.llm_clients.usage import BudgetExceeded, Usage, UsageMeter, cost_of
+from web_content_system.telemetry import call_of
+
 # ---------------------------------------------------------------------------
 # Configuration
 # ---------------------------------------------------------------------------
 SCRIPT_DIR = Path(__file__).resolve().parent
 DB_PATH = SCRIPT_DIR / "web_content.db"
+ARCHIVE_DIR = SCRIPT_DIR / "raw_archive"
 ENV_PATH = SCRIPT_DIR.parent / ".env"
+FAILURE_SOURCE = "crawler"  # failure_log.source of this script's failures
 
 ROOT_URLS: list[dict] = [
     {
@@ -66,10 +116,18 @@ ROOT_URLS: list[dict] = [
     },
 ]
 
-MAX_SUBPAGES_PER_ROOT = 30
+MAX_DEPTH = 2
+MAX_PAGES_PER_ROOT = 200
+MAX_LINKS_PER_PAGE = 100
 MIN_CONTENT_LEN = 50
+CHUNK_TOKENS = 3000            # content tokens per DeepSeek prompt; longer pages are map-reduced
+DOCUMENT_TOKEN_BUDGET = 24000  # content tokens summarized per page at most
+SUMMARY_MAX_TOKENS = 400       # completion tokens per DeepSeek call
+FALLBACK_SUMMARIZER = TextRankSummarizer(target_chars=200, max_chars=300)  # when DeepSeek is unavailable
 REQUEST_TIMEOUT = 25
-POLITE_PAUSE = 0.5  # seconds between HTTP calls
+POLITE_PAUSE = 0.5  # seconds between HTTP calls to the same host
+WORKERS = 8         # concurrent HTTP calls over all hosts
+MAX_PER_HOST = 4    # upper bound of each host's adaptive concurrency
 
 HEADERS = {
     "User-Agent": (
@@ -83,7 +141,8 @@ HEADERS = {
     "Accept-Language": "zh-CN,zh-Hans;q=0.9,en;q=0.8",
 }
 
-# Filter — drop these URL path fragments anywhere they appear
+# Filter — drop these URL path fragments anywhere they appear. Sitemaps and
+# feeds are not pages; --incremental reads them through SitemapDiscovery.
 SKIP_PATH_FRAGMENTS = (
     "/login", "/logout", "/signin", "/signup", "/sign-in", "/sign-up",
     "/register", "/admin", "/wp-admin", "/wp-json",
@@ -177,11 +236,15 @@ def ensure_schema(path: Path) -> sqlite3.Connection:
     if "content" not in cols:
         cur.execute("ALTER TABLE content_summary ADD COLUMN content TEXT")
     conn.commit()
+    merged = migrate_canonical_uids(conn)
+    if merged:
+        print(f"✓ merged {merged} duplicate URL row(s)")
     return conn
 
 
 def uid_for(url: str) -> str:
-    return hashlib.md5(url.encode("utf-8")).hexdigest()
+    """Row key: md5 of the canonical URL (http/https, www., tracking params… ignored)."""
+    return canonical_uid(url)
 
 
 def insert_row(
@@ -251,13 +314,41 @@ CONTENT_SELECTORS = [
 ]
 
 
-def extract_main_text(soup: BeautifulSoup) -> str:
+MIN_SELECTOR_TEXT = 60  # a selector "wins" when it yields more than this
+
+
+def _selector_text(soup: BeautifulSoup, selector: str) -> str:
+    el = soup.select_one(selector)
+    return el.get_text(" ", strip=True) if el else ""
+
+
+def extract_main_text(
+    soup: BeautifulSoup,
+    domain: str = "",
+    cache: SelectorCache | None = None,
+) -> str:
+    """Return the main text of a page.
+
+    With a `cache`, the selector that last won for `domain` is tried first;
+    the full CONTENT_SELECTORS search only runs when it yields too little
+    text, and its winner is remembered for the next page of the site.
+    """
+    preferred = cache.get(domain) if cache is not None and domain else None
+    if preferred:
+        text = _selector_text(soup, preferred)
+        if len(text) > MIN_SELECTOR_TEXT:
+            cache.record_hit(domain)
+            return text
+        cache.record_miss(domain)
+
     for selector in CONTENT_SELECTORS:
-        el = soup.select_one(selector)
-        if el:
-            text = el.get_text(" ", strip=True)
-            if len(text) > 60:
-                return text
+        if selector == preferred:
+            continue
+        text = _selector_text(soup, selector)
+        if len(text) > MIN_SELECTOR_TEXT:
+            if cache is not None and domain:
+                cache.record_win(domain, selector)
+            return text
     paras = [
         p.get_text(" ", strip=True)
         for p in soup.find_all("p")
@@ -281,29 +372,75 @@ def extract_title(soup: BeautifulSoup, url: str) -> str:
     return urlparse(url).netloc or url
 
 
-def fetch_page(url: str) -> tuple[str, str, BeautifulSoup] | None:
-    """Fetch a URL and return (title, plain_text, soup) — or None on failure."""
+def download(url: str) -> requests.Response:
+    """GET `url` with the crawler headers; raises on HTTP errors.
+
+    Touches no DB or archive, so it is safe to call from worker threads.
+    """
+    resp = requests.get(
+        url,
+        headers=HEADERS,
+        timeout=REQUEST_TIMEOUT,
+        allow_redirects=True,
+    )
+    resp.raise_for_status()
+    if not resp.encoding or resp.encoding.lower() == "iso-8859-1":
+        resp.encoding = resp.apparent_encoding or "utf-8"
+    return resp
+
+
+def try_download(url: str) -> requests.Response | Exception:
+    """download() that returns the exception instead of raising it."""
     try:
-        resp = requests.get(
+        return download(url)
+    except Exception as exc:  # noqa: BLE001
+        return exc
+
+
+def fetch_page(
+    url: str,
+    archive: RawArchive | None = None,
+    cache: SelectorCache | None = None,
+    resp: requests.Response | None = None,
+) -> tuple[str, str, BeautifulSoup] | None:
+    """Fetch a URL and return (title, plain_text, soup) — or None on failure.
+
+    When `archive` is given the raw response body is stored there first, so
+    the page can be re-extracted later without the network. `cache` is the
+    per-domain selector cache passed on to extract_main_text(). Pass `resp`
+    when the page was already downloaded (e.g. by the host scheduler).
+    """
+    if resp is None:
+        try:
+            resp = download(url)
+        except Exception as exc:  # noqa: BLE001
+            print(f"   ! HTTP error ({type(exc).__name__}): {exc}")
+            return None
+
+    if archive is not None:
+        archive.append(
             url,
-            headers=HEADERS,
-            timeout=REQUEST_TIMEOUT,
-            allow_redirects=True,
+            resp.content,
+            status=resp.status_code,
+            content_type=resp.headers.get("Content-Type", ""),
+            encoding=resp.encoding,
         )
-        resp.raise_for_status()
-    except Exception as exc:  # noqa: BLE001
-        print(f"   ! HTTP error ({type(exc).__name__}): {exc}")
-        return None
 
-    if not resp.encoding or resp.encoding.lower() == "iso-8859-1":
-        resp.encoding = resp.apparent_encoding or "utf-8"
+    return parse_page(resp.text, resp.url or url, cache)
+
 
-    soup = BeautifulSoup(resp.text, "html.parser")
+def parse_page(
+    html: str,
+    url: str,
+    cache: SelectorCache | None = None,
+) -> tuple[str, str, BeautifulSoup]:
+    """Parse decoded HTML into (title, plain_text, soup). No network access."""
+    soup = BeautifulSoup(html, "html.parser")
     for tag in soup(["script", "style", "noscript", "iframe", "svg"]):
         tag.decompose()
 
-    title = extract_title(soup, resp.url or url)
-    content = extract_main_text(soup)
+    title = extract_title(soup, url)
+    content = extract_main_text(soup, _normalize_host(urlparse(url).netloc), cache)
     content = re.sub(r"\s+", " ", content).strip()
     return title, content, soup
 
@@ -345,31 +482,54 @@ def is_skippable_link(href: str) -> bool:
     return False
 
 
+SLUG_RE = re.compile(r"[-_]|\d|\.html?$", re.I)
+
+
+def score_link(url: str, anchor_text: str) -> float:
+    """How article-like a link looks, 0..1.
+
+    Long anchor texts (headlines) and slug-like last path segments score
+    high; short nav labels such as "Home" or "More" score low.
+    """
+    score = min(len(anchor_text.strip()), 40) / 40 * 0.6
+    segments = [seg for seg in urlparse(url).path.split("/") if seg]
+    if segments and (len(segments[-1]) > 12 or SLUG_RE.search(segments[-1])):
+        score += 0.4
+    return round(score, 3)
+
+
 def discover_suburls(
-    root_url: str,
+    page_url: str,
     soup: BeautifulSoup,
-    cap: int = MAX_SUBPAGES_PER_ROOT,
-) -> list[str]:
-    """Pull all internal links from `soup`, normalize and dedupe, exclude root."""
-    root_norm = root_url.rstrip("/")
-    candidates: list[str] = []
+    cap: int = MAX_LINKS_PER_PAGE,
+    root_url: str | None = None,
+) -> list[tuple[str, float]]:
+    """Pull internal links from `soup` as (url, link_score) pairs.
+
+    Links are resolved against `page_url`, deduped, and kept only when they
+    are on the same site as `root_url` (default: the page itself). The page
+    and the root are excluded. Duplicates are detected on the canonical URL,
+    but the URL as linked is returned for fetching.
+    """
+    root_url = root_url or page_url
+    exclude = {canonicalize_url(page_url), canonicalize_url(root_url)}
+    candidates: list[tuple[str, float]] = []
     seen: set[str] = set()
 
     for a in soup.find_all("a", href=True):
         href = a.get("href")
         if is_skippable_link(href):
             continue
-        absolute = urljoin(root_url, href).split("#", 1)[0]
+        absolute = urljoin(page_url, href).split("#", 1)[0]
         if not absolute:
             continue
-        if absolute.rstrip("/") == root_norm:
+        key = canonicalize_url(absolute)
+        if key in exclude or key in seen:
             continue
         if not is_same_site(absolute, root_url):
             continue
-        if absolute in seen:
-            continue
-        seen.add(absolute)
-        candidates.append(absolute)
+        seen.add(key)
+        candidates.append((absolute, score_link(absolute, a.get_text(" ", strip=True))))
         if len(candidates) >= cap:
             break
     return candidates
@@ -378,20 +538,28 @@ def discover_suburls(
 # ---------------------------------------------------------------------------
 # Summarization
 # ---------------------------------------------------------------------------
-def summarize_with_deepseek(title: str, content: str) -> str | None:
+LLM_USAGE = UsageMeter()  # tokens and cost of this run; main() sets its cost cap
+MAX_INPUT_TOKENS: int | None = None  # --max-input-tokens: content is trimmed to this
+
+
+def deepseek_complete(prompt: str, on_error=None, on_usage=None, on_call=None) -> str | None:
+    """Send one prompt to DeepSeek; None if it is not configured or fails.
+
+    Every answered call is added to LLM_USAGE and passed to `on_usage`;
+    every sent call's telemetry (LLMCall) is passed to `on_call`. Raises
+    BudgetExceeded instead of calling when the call could take the run
+    over LLM_USAGE's cost cap.
+    """
     api_key = os.getenv("DEEPSEEK_API_KEY", "").strip()
     if not api_key or api_key.startswith("sk-your-"):
         return None
 
     base_url = os.getenv("DEEPSEEK_BASE_URL", "https://api.deepseek.com").strip()
     model = os.getenv("DEEPSEEK_MODEL", "deepseek-chat").strip()
+    prompt_tokens = count_tokens(prompt)
+    LLM_USAGE.check(cost_of(model, prompt_tokens, SUMMARY_MAX_TOKENS))
 
-    prompt = (
-        "请用 100–200 个汉字为下面这篇网页写一段中文摘要，"
-        "要求客观、抓重点，不要编造内容；如果正文几乎为空，也请如实说明。\n\n"
-        f"标题：{title}\n\n正文：\n{content[:3500]}\n\n摘要："
-    )
-
+    started = time.time()
     try:
         resp = requests.post(
             f"{base_url.rstrip('/')}/v1/chat/completions",
@@ -402,30 +570,81 @@ def summarize_with_deepseek(title: str, content: str) -> str | None:
             json={
                 "model": model,
                 "messages": [{"role": "user", "content": prompt}],
-                "max_tokens": 400,
+                "max_tokens": SUMMARY_MAX_TOKENS,
                 "temperature": 0.3,
             },
             timeout=60,
         )
         resp.raise_for_status()
-        text = resp.json()["choices"][0]["message"]["content"].strip()
-        return text or None
+        data = resp.json()
+        text = data["choices"][0]["message"]["content"].strip()
     except Exception as exc:  # noqa: BLE001
         print(f"   ! DeepSeek failed ({type(exc).__name__}): {exc}")
+        if on_call is not None:
+            on_call(call_of("deepseek", model, started, None, exc))
+        if on_error is not None:
+            on_error(exc)
         return None
 
+    reported = data.get("usage") or {}
+    usage = Usage(
+        "deepseek",
+        model,
+        reported.get("prompt_tokens", prompt_tokens),
+        reported.get("completion_tokens", count_tokens(text)),
+        estimated=not reported,
+    )
+    LLM_USAGE.add(usage)
+    if on_usage is not None:
+        on_usage(usage)
+    if on_call is not None:
+        on_call(call_of("deepseek", model, started, text, usage=usage))
+    return text or None
+
+
+def summarize_with_deepseek(
+    title: str, content: str, on_error=None, on_usage=None, on_call=None
+) -> str | None:
+    """DeepSeek summary of a page. Pages over CHUNK_TOKENS are summarized
+    part by part in parallel and the parts merged (map-reduce), so the
+    whole page is covered rather than only its opening. With
+    MAX_INPUT_TOKENS set, only that many content tokens are sent."""
+    if MAX_INPUT_TOKENS is not None:
+        content = truncate_tokens(content, MAX_INPUT_TOKENS)
+    if count_tokens(content) > CHUNK_TOKENS:
+        errors: list[Exception] = []
+        summarizer = MapReduceSummarizer(
+            [lambda prompt: deepseek_complete(prompt, errors.append, on_usage, on_call)],
+            chunk_tokens=CHUNK_TOKENS,
+            token_budget=DOCUMENT_TOKEN_BUDGET,
+        )
+        summary = summarizer.summarize(content, title)
+        if summary is None and errors and on_error is not None:
+            on_error(errors[-1])
+        return summary
+
+    prompt = (
+        "请用 100–200 个汉字为下面这篇网页写一段中文摘要，"
+        "要求客观、抓重点，不要编造内容；如果正文几乎为空，也请如实说明。\n\n"
+        f"标题：{title}\n\n正文：\n{content}\n\n摘要："
+    )
+    return deepseek_complete(prompt, on_error, on_usage, on_call)
+
 
 def summarize_fallback(title: str, content: str) -> str:
+    """Extractive summary: the TextRank-best sentences of the page."""
     cleaned = re.sub(r"\s+", " ", content).strip()
     if not cleaned:
         return f"无法获取「{title}」的正文内容。"
-    snippet = cleaned[:300]
-    suffix = "…" if len(cleaned) > 300 else ""
-    return f"{title}：{snippet}{suffix}"
+    return f"{title}：{FALLBACK_SUMMARIZER.summarize(cleaned)}"
 
 
-def make_summary(title: str, content: str) -> str:
-    summary = summarize_with_deepseek(title, content)
+def make_summary(title: str, content: str, on_error=None, on_usage=None, on_call=None) -> str:
+    """DeepSeek summary, or the extractive fallback; `on_error(exc)` is
+    called when DeepSeek is configured but the request failed,
+    `on_usage(usage)` for every answered DeepSeek call and `on_call(call)`
+    with the telemetry of every DeepSeek call."""
+    summary = summarize_with_deepseek(title, content, on_error, on_usage, on_call)
     if summary:
         print(f"   summary (DeepSeek): {summary[:120]}…")
         return summary
@@ -437,6 +656,30 @@ def make_summary(title: str, content: str) -> str:
 # ---------------------------------------------------------------------------
 # Main
 # ---------------------------------------------------------------------------
+def stored_uids(
+    conn: sqlite3.Connection,
+    urls: list[str],
+    seen: SeenSet | None = None,
+) -> set[str]:
+    """Return the uids of `urls` that already have a content_summary row.
+
+    With a `seen` set (Bloom filter over content_summary.uid) only the
+    possible hits are looked up in the DB.
+    """
+    uids = [uid_for(u) for u in urls]
+    if seen is not None:
+        return seen.filter_seen(uids)
+    found: set[str] = set()
+    for i in range(0, len(uids), 500):
+        chunk = uids[i:i + 500]
+        cur = conn.execute(
+            f"SELECT uid FROM content_summary WHERE uid IN ({','.join('?' * len(chunk))})",
+            chunk,
+        )
+        found.update(row[0] for row in cur)
+    return found
+
+
 def insert_one(
     conn: sqlite3.Connection,
     url: str,
@@ -444,36 +687,128 @@ def insert_one(
     *,
     label: str,
     update_content: bool = False,
-) -> bool:
-    """Fetch one URL, summarize, insert. Returns True if newly inserted or updated."""
+    archive: RawArchive | None = None,
+    cache: SelectorCache | None = None,
+    resp: requests.Response | None = None,
+    seen: SeenSet | None = None,
+    dedup: NearDuplicateIndex | None = None,
+    history: ChangeHistory | None = None,
+    failures: FailureLog | None = None,
+    usage_log: UsageLog | None = None,
+    call_log: CallLog | None = None,
+) -> tuple[bool, BeautifulSoup | None]:
+    """Fetch one URL (unless `resp` is given), summarize, insert.
+
+    Returns (saved, soup): `saved` is True if the row was newly inserted or
+    updated; `soup` is the parsed page (None when the fetch failed) so the
+    caller can discover links without fetching the page again.
+
+    With a `dedup` index, a page whose content nearly matches a stored one
+    (MediaWiki revisions, print views, …) reuses that row's summary instead
+    of calling the LLM. With a `history`, the fetch is recorded in the
+    per-URL change history that backfill_content.py --budget schedules from.
+    With `failures`, HTTP errors, empty pages and DeepSeek errors are logged
+    for retry.py; a success resolves the URL's earlier failure. With a
+    `usage_log`, the tokens and cost of the row's DeepSeek calls are stored,
+    with a `call_log` their latency and outcome.
+
+    Raises BudgetExceeded (before calling DeepSeek) once the run's cost cap
+    is reached.
+    """
     print(f"\n→ {label} {url}")
-    page = fetch_page(url)
+    if resp is None:
+        resp = try_download(url)
+    if isinstance(resp, Exception):
+        print(f"   ! HTTP error ({type(resp).__name__}): {resp}")
+        log_failure(failures, url, tags, resp)
+        return False, None
+    page = fetch_page(url, archive, cache, resp)
     if page is None:
-        return False
-    title, content, _ = page
+        return False, None
+    title, content, soup = page
     print(f"   title  : {title[:90]}")
     print(f"   chars  : {len(content)}")
 
     if len(content) < MIN_CONTENT_LEN:
         print(f"   skip   : only {len(content)} chars (below min {MIN_CONTENT_LEN})")
-        return False
-
-    summary = make_summary(title, content)
+        log_failure(failures, url, tags, error_class=EMPTY_CONTENT, error=f"only {len(content)} chars")
+        return False, soup
+
+    if history is not None:
+        history.observe(url, content)
+
+    exists = bool(stored_uids(conn, [url], seen))
+    if failures is not None:
+        failures.resolve(url, FAILURE_SOURCE)
+    if exists and not update_content:
+        print("   skip   : already in db")
+        return False, soup
+
+    fingerprint = simhash(content) if dedup is not None else None
+    duplicate = None
+    llm_errors: list[Exception] = []
+    usages: list[Usage] = []
+    calls: list = []
+    if exists:
+        # Updating an existing row only touches `content` — don't pay for a summary.
+        summary = ""
+    else:
+        duplicate = dedup.find(fingerprint, exclude_uid=uid_for(url)) if dedup is not None else None
+        if duplicate is not None:
+            summary = duplicate.summary
+            print(f"   near-dup of {duplicate.url} (distance {duplicate.distance}) — summary reused")
+        else:
+            summary = make_summary(
+                title, content, on_error=llm_errors.append, on_usage=usages.append, on_call=calls.append,
+            )
     row_id = insert_row(conn, url, title, summary, tags, content=content, update_content=update_content)
     if row_id is None:
         print("   skip   : already in db (uid collision)")
-        return False
-    if update_content:
+        return False, soup
+    if exists:
         print(f"   ✓ updated id={row_id}")
     else:
         print(f"   ✓ saved id={row_id}")
-    return True
+    if seen is not None:
+        seen.add(uid_for(url))
+    if dedup is not None:
+        dedup.add(uid_for(url), url, fingerprint, duplicate.uid if duplicate else None)
+    if usage_log is not None and usages:
+        usage_log.record(url, usages, FAILURE_SOURCE)
+    if call_log is not None and calls:
+        call_log.record(url, calls, FAILURE_SOURCE)
+    if llm_errors:
+        # Saved with the fallback summary; retry.py re-summarizes it later.
+        log_failure(failures, url, tags, llm_errors[-1], error_class=LLM_ERROR)
+    return True, soup
+
+
+def log_failure(
+    failures: FailureLog | None,
+    url: str,
+    tags: str,
+    exc: Exception | None = None,
+    *,
+    error_class: str | None = None,
+    error: str = "",
+) -> None:
+    """Record a failure in `failures` (if given) and print when it is retried."""
+    if failures is None:
+        return
+    next_retry = failures.record(
+        url, FAILURE_SOURCE, error_class or classify(exc), error or str(exc or ""),
+        {"tags": tags}, retry_after(exc),
+    )
+    if next_retry is None:
+        print("   giving up (no more retries)")
+    else:
+        print(f"   retry after {datetime.fromtimestamp(next_retry):%Y-%m-%d %H:%M}")
 
 
 def main() -> int:
     import argparse
 
-    parser = argparse.ArgumentParser(description="Crawler — append-only subpage fetcher")
+    parser = argparse.ArgumentParser(description="Crawler — append-only, resumable site crawler")
     parser.add_argument(
         "--update-content",
         action="store_true",
@@ -481,64 +816,312 @@ def main() -> int:
              "column instead of skipping. Useful for refreshing the backup "
              "body without re-running DeepSeek on the summary.",
     )
+    parser.add_argument(
+        "--no-archive",
+        action="store_true",
+        help=f"Do not store raw responses in {ARCHIVE_DIR.name}/ "
+             "(they allow offline re-extraction via reextract.py).",
+    )
+    parser.add_argument(
+        "--max-depth",
+        type=int,
+        default=MAX_DEPTH,
+        help=f"Follow links this many levels below each root (default {MAX_DEPTH}).",
+    )
+    parser.add_argument(
+        "--budget",
+        type=int,
+        default=MAX_PAGES_PER_ROOT,
+        help=f"Fetch at most N pages per root (default {MAX_PAGES_PER_ROOT}).",
+    )
+    parser.add_argument(
+        "--delay",
+        type=float,
+        default=POLITE_PAUSE,
+        help=f"Seconds between requests to the same host (default {POLITE_PAUSE}); "
+             "a longer robots.txt Crawl-delay wins.",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=WORKERS,
+        help=f"Concurrent requests over all hosts (default {WORKERS}).",
+    )
+    parser.add_argument(
+        "--max-per-host",
+        type=int,
+        default=MAX_PER_HOST,
+        help=f"Upper bound of the adaptive per-host concurrency (default {MAX_PER_HOST}; "
+             "1 = strictly one request at a time).",
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Read each root site's sitemaps and RSS / Atom feeds and fetch only "
+             "pages that are new or whose lastmod changed since the last fetch "
+             "(no link following; --budget caps pages per root).",
+    )
+    parser.add_argument(
+        "--fresh",
+        action="store_true",
+        help="Discard the saved crawl frontier and start again from the roots. "
+             "Without it an interrupted or finished crawl is resumed.",
+    )
+    parser.add_argument(
+        "--cost-cap",
+        type=float,
+        default=None,
+        help="Stop the run before a DeepSeek call would take its cost over this "
+             "many USD (pages already fetched stay queued for the next run).",
+    )
+    parser.add_argument(
+        "--max-input-tokens",
+        type=int,
+        default=None,
+        help="Trim each page to this many tokens before summarizing "
+             f"(default: map-reduce up to {DOCUMENT_TOKEN_BUDGET}).",
+    )
     args = parser.parse_args()
 
+    global MAX_INPUT_TOKENS
+    LLM_USAGE.cost_cap = args.cost_cap
+    MAX_INPUT_TOKENS = args.max_input_tokens
     load_env(ENV_PATH)
 
+    mode = " [incremental]" if args.incremental else ""
+    if args.update_content:
+        mode += " [update-content]"
     print("=" * 60)
-    print(f"Crawler (subpages) — append-only{' [update-content]' if args.update_content else ''}")
+    print(f"Crawler (subpages) — append-only{mode}")
     print("=" * 60)
     print(f"DB: {DB_PATH}  (will append, never wipe)")
 
     conn = ensure_schema(DB_PATH)
-    print("✓ schema verified\n")
-
-    grand_inserted = 0
-    grand_skipped = 0
-    grand_failed = 0
+    archive = None if args.no_archive else RawArchive(ARCHIVE_DIR)
+    cache = SelectorCache(conn, "crawler_subpages")
+    seen = SeenSet(conn, "content_summary")
+    robots = RobotsCache(HEADERS["User-Agent"])
+    dedup = NearDuplicateIndex(conn)
+    history = ChangeHistory(conn)
+    failures = FailureLog(conn)
+    usage_log = UsageLog(conn)
+    call_log = CallLog(conn, usage_log.run_id)
+    print("✓ schema verified")
+    fingerprinted = dedup.backfill()
+    if fingerprinted:
+        print(f"✓ fingerprinted {fingerprinted} stored page(s) for near-duplicate detection")
 
     try:
-        for root in ROOT_URLS:
-            root_url = root["url"]
-            root_tags = root.get("tags", "")
-
-            print(f"\n══════ ROOT  {root_url}  ══════")
-
-            # 1) Insert the root page itself
-            inserted = insert_one(conn, root_url, root_tags, label="ROOT  ", update_content=args.update_content)
-            grand_inserted += int(bool(inserted))
-            grand_skipped += int(not inserted)
-
-            # 2) Discover same-domain sub-URLs from the root page
-            page = fetch_page(root_url)
-            if page is None:
-                grand_failed += 1
-                continue
-            _title, _content, root_soup = page
-
-            suburls = discover_suburls(root_url, root_soup)
-            print(f"\n   discovered {len(suburls)} candidate sub-URL(s)")
-            sub_tags = root_tags + ",subpage"
-            for i, sub_url in enumerate(suburls, 1):
-                time.sleep(POLITE_PAUSE)
-                ok = insert_one(conn, sub_url, sub_tags, label=f"SUB   [{i:>2}/{len(suburls)}]", update_content=args.update_content)
-                if ok:
-                    grand_inserted += 1
-                else:
-                    grand_skipped += 1
+        crawl = crawl_incremental if args.incremental else crawl_frontier
+        inserted, skipped, failed = crawl(
+            conn, args, archive, cache, seen, robots, dedup, history, failures, usage_log, call_log,
+        )
+        print_usage(usage_log)
     finally:
+        call_log.flush()
+        conn.commit()
         conn.close()
+        if archive is not None:
+            archive.close()
 
     print("\n" + "=" * 60)
     print(
-        f"Done — inserted {grand_inserted}, "
-        f"skipped {grand_skipped} (already in db), "
-        f"failed {grand_failed} (network/empty)"
+        f"Done — {'inserted / updated' if args.incremental else 'inserted'} {inserted}, "
+        f"skipped {skipped} (already in db / empty), "
+        f"failed {failed} (network)"
     )
     print("=" * 60)
     return 0
 
 
+def crawl_frontier(
+    conn, args, archive, cache, seen, robots, dedup, history, failures, usage_log, call_log=None,
+) -> tuple[int, int, int]:
+    """Crawl the roots link by link through the persistent frontier.
+
+    Stops early when the cost cap is reached; the page being processed
+    stays in the frontier and is resumed next run.
+
+    Returns (inserted, skipped, failed).
+    """
+    frontier = CrawlFrontier(conn)
+    if args.fresh:
+        frontier.reset()
+    recovered = frontier.recover()
+    for root in ROOT_URLS:
+        frontier.add_root(
+            root["url"], root.get("tags", ""), max_depth=args.max_depth, budget=args.budget,
+        )
+    pending = frontier.stats().get("pending", 0)
+    print(f"✓ frontier: {pending} pending" + (f" ({recovered} resumed)" if recovered else "") + "\n")
+    if not frontier.runnable():
+        # Roots are only queued once, so a finished crawl stays finished.
+        reason = "every root's budget is spent" if pending else "every queued page was crawled"
+        print(f"Nothing to crawl: {reason} in the saved frontier.")
+        print("Pass --fresh to start again from the roots, or --incremental to fetch only new pages.")
+        print("\nFrontier: " + ", ".join(f"{k}={v}" for k, v in sorted(frontier.stats().items())))
+        return 0, 0, 0
+
+    grand_inserted = 0
+    grand_skipped = 0
+    grand_failed = 0
+    fetched = 0
+
+    scheduler = HostScheduler(args.delay, robots=robots, max_per_host=args.max_per_host)
+
+    def refill() -> None:
+        # Keep a few URLs per worker queued so idle hosts can be interleaved.
+        while scheduler.pending() < args.workers * 4:
+            entry = frontier.pop()
+            if entry is None:
+                return
+            scheduler.push(entry.url, entry)
+
+    for entry, resp in scheduler.run(try_download, workers=args.workers, refill=refill):
+        fetched += 1
+        if entry.depth == 0:
+            print(f"\n══════ ROOT  {entry.url}  ══════")
+            label, tags = "ROOT  ", entry.tags
+        else:
+            label, tags = f"SUB d{entry.depth} [{fetched}]", entry.tags + ",subpage"
+
+        if isinstance(resp, Exception):
+            print(f"\n→ {label} {entry.url}")
+            print(f"   ! HTTP error ({type(resp).__name__}): {resp}")
+            log_failure(failures, entry.url, tags, resp)
+            grand_failed += 1
+            frontier.complete(entry, ok=False)
+            continue
+
+        try:
+            inserted, soup = insert_one(
+                conn, entry.url, tags, label=label,
+                update_content=args.update_content, archive=archive, cache=cache, resp=resp,
+                seen=seen, dedup=dedup, history=history, failures=failures, usage_log=usage_log,
+                call_log=call_log,
+            )
+        except BudgetExceeded as exc:
+            print(f"\n■ {exc} — stopping")
+            break
+        if inserted:
+            grand_inserted += 1
+        else:
+            grand_skipped += 1
+
+        # Queue the links of this page one level deeper — no second fetch.
+        max_depth, _ = frontier.root_limits(entry.root_url)
+        if soup is not None and entry.depth < max_depth:
+            links = discover_suburls(entry.url, soup, root_url=entry.root_url)
+            known = stored_uids(conn, [u for u, _ in links], seen)
+            added = frontier.add_many(
+                ((u, score, uid_for(u) in known) for u, score in links),
+                entry.root_url, entry.depth + 1, parent_url=entry.url,
+            )
+            if added:
+                print(f"   queued {added} new link(s) at depth {entry.depth + 1}")
+        frontier.complete(entry, ok=soup is not None)
+
+    print("\nFrontier: " + ", ".join(f"{k}={v}" for k, v in sorted(frontier.stats().items())))
+    print_host_limits(scheduler)
+    return grand_inserted, grand_skipped, grand_failed
+
+
+def print_host_limits(scheduler: HostScheduler) -> None:
+    """Print each host's adaptive concurrency limit and delay at the end of a run."""
+    metrics = scheduler.metrics()
+    if not metrics:
+        return
+    print("\nPer-host limits:")
+    for host, m in metrics.items():
+        latency = f"{m['latency_ms']:.0f} ms" if m["latency_ms"] is not None else "n/a"
+        print(
+            f"  {host:<32} limit {m['limit']}  delay {m['delay']}s  "
+            f"latency {latency}  ok {m['successes']}  overloaded {m['overloads']}"
+        )
+
+
+def print_usage(usage_log: UsageLog) -> None:
+    """Print this run's DeepSeek tokens and cost."""
+    totals = usage_log.totals()
+    if not totals:
+        return
+    print("\nLLM usage this run:")
+    for key, t in totals.items():
+        print(
+            f"  {key:<32} calls {t['calls']}  prompt {t['prompt_tokens']}  "
+            f"completion {t['completion_tokens']}  ${t['cost']:.4f}"
+        )
+
+
+def crawl_incremental(
+    conn, args, archive, cache, seen, robots, dedup, history, failures, usage_log, call_log=None,
+) -> tuple[int, int, int]:
+    """Fetch only pages that sitemaps / feeds list as new or changed.
+
+    Each root site's robots.txt sitemaps (or /sitemap.xml), nested sitemap
+    indexes and common RSS / Atom feed paths are streamed; a page is fetched
+    when it is not stored yet or its lastmod / updated time is newer than at
+    its last fetch. Changed pages get their `content` refreshed (summary
+    kept); new pages are summarized and inserted. Links are not followed.
+    Stops early when the cost cap is reached; unfetched pages stay listed
+    as changed for the next run.
+
+    Returns (inserted_or_updated, skipped, failed).
+    """
+    discovery = SitemapDiscovery(
+        robots, open_stream=lambda u: open_listing(u, REQUEST_TIMEOUT, HEADERS), delay=args.delay,
+    )
+    index = LastmodIndex(conn)
+    scheduler = HostScheduler(args.delay, robots=robots, max_per_host=args.max_per_host)
+    queued = 0
+    for root in ROOT_URLS:
+        root_url = root["url"]
+        listed = [
+            entry for entry in discovery.discover(root_url)
+            if is_same_site(entry.url, root_url) and not is_skippable_link(entry.url)
+        ]
+        index.record(listed)
+        todo = index.changed(listed)[: args.budget]
+        print(f"   {root_url}\n      listed {len(listed)}, new or changed {len(todo)}")
+        for entry in todo:
+            scheduler.push(entry.url, (entry, root_url, root.get("tags", "")))
+        queued += len(todo)
+    print(f"✓ {queued} page(s) to fetch\n")
+
+    grand_inserted = 0
+    grand_skipped = 0
+    grand_failed = 0
+    results = scheduler.run(try_download, workers=args.workers)
+    for i, ((entry, root_url, root_tags), resp) in enumerate(results, 1):
+        label = f"CHANGED [{i}/{queued}]"
+        is_root = canonicalize_url(entry.url) == canonicalize_url(root_url)
+        tags = root_tags if is_root else root_tags + ",subpage"
+        if isinstance(resp, Exception):
+            print(f"\n→ {label} {entry.url}")
+            print(f"   ! HTTP error ({type(resp).__name__}): {resp}")
+            log_failure(failures, entry.url, tags, resp)
+            grand_failed += 1
+            continue
+        try:
+            inserted, soup = insert_one(
+                conn, entry.url, tags, label=label,
+                update_content=True, archive=archive, cache=cache, resp=resp, seen=seen,
+                dedup=dedup, history=history, failures=failures, usage_log=usage_log,
+                call_log=call_log,
+            )
+        except BudgetExceeded as exc:
+            print(f"\n■ {exc} — stopping")
+            break
+        if soup is not None:
+            index.mark_fetched(entry.url, entry.lastmod)
+        if inserted:
+            grand_inserted += 1
+        else:
+            grand_skipped += 1
+    print_host_limits(scheduler)
+    return grand_inserted, grand_skipped, grand_failed
+
+
 if __name__ == "__main__":
     try:
         sys.exit(main())
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+Embed stored summaries and precompute related rows for the static export.
+
+Each content_summary row is embedded by its title and summary with the
+configured embedder (EMBEDDING_PROVIDER: "local" hashing, "ollama" or
+"openai") and stored in `content_embeddings` as a float32 or int8 BLOB.
+Only rows that are new or whose summary changed since they were embedded
+are sent. The vectors are then indexed (exact below 20 000 rows, IVF
+above) and the nearest rows of every row are written to
+`content_related`, which scripts/generate-data.js exports as `related`.
+
+Remote embedding requests are logged in llm_calls (source "embed").
+
+Run:
+
+    cd python_scripts
+    python embed_summaries.py                   # embed new rows, refresh related
+    python embed_summaries.py --dtype int8      # quarter-size vectors
+    python embed_summaries.py --query "新能源汽车补贴"   # search only
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import requests
+from openai import OpenAIError
+
+import crawler_subpages
+from web_content_system.config import APIConfig
+from web_content_system.database.call_log import CallLog
+from web_content_system.database.embedding_store import EmbeddingStore
+from web_content_system.llm_clients.embeddings import Embedder, make_embedder
+from web_content_system.telemetry import OK, LLMCall, outcome_of
+from web_content_system.vector_index import PROBES, IVFIndex
+
+CHUNK = 1000             # rows embedded and stored per step
+RELATED = 5              # related rows kept per row
+RELATED_MIN_SCORE = 0.3  # less similar rows are not related
+SOURCE = "embed"         # llm_calls.source of embedding requests
+
+
+def embed_pending(store: EmbeddingStore, embedder: Embedder, calls: CallLog, dtype: str, limit: int) -> int:
+    """Embed rows without a current embedding; returns how many were stored."""
+    pending = store.pending(embedder.model, limit)
+    print(f"Rows to embed: {len(pending)} ({embedder.provider}/{embedder.model}, {dtype})")
+    stored = 0
+    for start in range(0, len(pending), CHUNK):
+        chunk = pending[start:start + CHUNK]
+        began = time.time()
+        try:
+            vectors = embedder.embed([text for _, text in chunk])
+        except (OpenAIError, requests.RequestException, KeyError, ValueError) as exc:
+            if embedder.provider != "local":
+                calls.record(None, [LLMCall(embedder.provider, embedder.model, began, time.time() - began,
+                                            outcome_of(exc))], SOURCE)
+            print(f"  ✗ embedding failed ({type(exc).__name__}): {exc}")
+            print("  the remaining rows are embedded by the next run")
+            break
+        if embedder.provider != "local":
+            calls.record(None, [LLMCall(embedder.provider, embedder.model, began, time.time() - began,
+                                        OK, embedder.last_tokens)], SOURCE)
+        store.put(embedder.model, [uid for uid, _ in chunk], [text for _, text in chunk], vectors, dtype)
+        stored += len(chunk)
+        print(f"  ✓ {stored}/{len(pending)} embedded")
+    return stored
+
+
+def refresh_related(store: EmbeddingStore, model: str, probes: int, k: int, min_score: float) -> None:
+    """Index the stored vectors of `model` and store every row's nearest rows."""
+    began = time.perf_counter()
+    index = store.index(model, probes)
+    if not len(index):
+        print("No embeddings stored.")
+        return
+    kind = f"IVF, {index.lists} lists, {index.probes} probed" if isinstance(index, IVFIndex) else "exact"
+    print(f"Index: {len(index)} vectors ({kind}), built in {time.perf_counter() - began:.1f}s")
+
+    sample = index.vectors[:: max(1, len(index) // 100)][:100]
+    began = time.perf_counter()
+    for vector in sample:
+        index.search(vector, 10)
+    print(f"  query latency: {(time.perf_counter() - began) / len(sample) * 1000:.2f} ms (top 10)")
+
+    began = time.perf_counter()
+    neighbours = index.neighbours(k, min_score)
+    store.save_related(model, dict(zip(index.ids, neighbours)))
+    linked = sum(1 for items in neighbours if items)
+    print(f"  ✓ related rows stored for {linked}/{len(index)} rows in {time.perf_counter() - began:.1f}s")
+
+
+def search(store: EmbeddingStore, embedder: Embedder, conn, query: str, k: int) -> None:
+    """Print the rows nearest to a query."""
+    vector = embedder.embed([query])[0]
+    store.index(embedder.model)
+    began = time.perf_counter()
+    hits = store.search(embedder.model, vector, k)
+    elapsed = (time.perf_counter() - began) * 1000
+    for uid, score in hits:
+        title, url = conn.execute(
+            "SELECT title, original_url FROM content_summary WHERE uid = ?", (uid,)
+        ).fetchone()
+        print(f"{score:.3f}  {title[:50]}  {url}")
+    print(f"\n{len(hits)} result(s) in {elapsed:.2f} ms")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Embed summaries and precompute related rows.")
+    parser.add_argument("--db", default=str(crawler_subpages.DB_PATH), help="SQLite database (default web_content.db)")
+    parser.add_argument("--limit", type=int, default=0, help="Embed at most N rows (default all).")
+    parser.add_argument("--dtype", choices=["float32", "int8"], help="Stored vector type (default EMBEDDING_DTYPE).")
+    parser.add_argument("--related", type=int, default=RELATED, help=f"Related rows per row (default {RELATED}).")
+    parser.add_argument("--min-score", type=float, default=RELATED_MIN_SCORE,
+                        help=f"Least similarity of a related row (default {RELATED_MIN_SCORE}).")
+    parser.add_argument("--probes", type=int, default=PROBES, help=f"IVF lists scanned per query (default {PROBES}).")
+    parser.add_argument("--no-related", action="store_true", help="Only embed; keep stored related rows.")
+    parser.add_argument("--query", help="Only search the stored embeddings for this text.")
+    parser.add_argument("-k", type=int, default=10, help="Results of --query (default 10).")
+    args = parser.parse_args()
+
+    crawler_subpages.load_env(crawler_subpages.ENV_PATH)
+    config = APIConfig.from_env()
+    try:
+        embedder = make_embedder(config)
+    except ValueError as exc:
+        print(f"✗ {exc}")
+        return 1
+    conn = crawler_subpages.ensure_schema(Path(args.db))
+    store = EmbeddingStore(conn)
+    calls = CallLog(conn)
+    try:
+        if args.query:
+            search(store, embedder, conn, args.query, args.k)
+            return 0
+        print("=" * 60)
+        print("Embed summaries")
+        print("=" * 60)
+        embed_pending(store, embedder, calls, args.dtype or config.embedding_dtype, args.limit)
+        if not args.no_related:
+            refresh_related(store, embedder.model, args.probes, args.related, args.min_score)
+    finally:
+        calls.flush()
+        conn.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
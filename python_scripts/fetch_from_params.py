@@ -5,27 +5,70 @@ Fetch content from grab_params.json URL entries and add to web_content.db.
 Reads `grab_params.json` in the same directory. For every entry with
 `done: false`, fetches the page, generates a Chinese summary via DeepSeek
 (or Ollama, or a simple extract fallback), and inserts it into
-`content_summary` de-duplicated by `uid` (md5 of URL).
+`content_summary` de-duplicated by `uid` (md5 of the canonical URL).
 
-Saves back to `grab_params.json`, marking successful entries as `done: true`.
+Progress is kept per URL in the `jobs` table (status, attempts, last error,
+timings), so an interrupted run resumes with only the pending entries.
+`grab_params.json` is re-imported only when it changed and is written back
+once at the end, with successful entries marked `done: true`.
 
-Run: cd python_scripts && python fetch_from_params.py
+Tokens and cost of every LLM call are stored per row (llm_usage) and
+summed at the end of the run; --cost-cap stops the run before it spends
+more, --max-input-tokens trims long pages before summarizing.
+
+Run: cd python_scripts && python fetch_from_params.py [--cost-cap 0.50]
 """
 
-import hashlib
+from __future__ import annotations
+
 import json
 import os
 import re
 import sqlite3
+import time
+from dataclasses import replace
 from datetime import datetime
+from functools import lru_cache
 from pathlib import Path
 
 import requests
 from bs4 import BeautifulSoup
 
+from web_content_system.config import APIConfig
+from web_content_system.crawl.urls import canonical_uid
+from web_content_system.database.failure_log import (
+    EMPTY_CONTENT,
+    LLM_ERROR,
+    FailureLog,
+    classify,
+    retry_after,
+)
+from web_content_system.database.job_store import DEFAULT_MAX_ATTEMPTS, JobStore
+from web_content_system.database.migrations import migrate_canonical_uids
+from web_content_system.database.raw_archive import RawArchive
+from web_content_system.database.call_log import CallLog
+from web_content_system.database.usage_log import UsageLog
+from web_content_system.llm_clients.local_model_client import LocalModelClient
+from web_content_system.llm_clients.long_document import (
+    MapReduceSummarizer,
+    count_tokens,
+    truncate_tokens,
+)
+from web_content_system.llm_clients.textrank import TextRankSummarizer
+from web_content_system.llm_clients.usage import BudgetExceeded, Usage, UsageMeter, cost_of
+from web_content_system.telemetry import call_of
+
 DB_PATH = "web_content.db"
 PARAMS_PATH = "grab_params.json"
+ARCHIVE_DIR = "raw_archive"
 ENV_PATH = Path(__file__).resolve().parent.parent / ".env"
+FAILURE_SOURCE = "params"  # failure_log.source of this script's failures
+CHUNK_TOKENS = 3000            # content tokens per prompt; longer pages are map-reduced
+DOCUMENT_TOKEN_BUDGET = 24000  # content tokens summarized per page at most
+SUMMARY_MAX_TOKENS = 300       # completion tokens per summary call
+LLM_USAGE = UsageMeter()       # tokens and cost of this run; main() sets its cost cap
+FALLBACK_SUMMARIZER = TextRankSummarizer()  # extractive summary when no LLM answers
+MAX_INPUT_TOKENS: int | None = None  # --max-input-tokens: content is trimmed to this
 
 
 def load_env_file(path: Path) -> None:
@@ -85,20 +128,30 @@ def ensure_schema(conn):
     cur.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_uid ON content_summary (uid)")
     cur.execute("CREATE INDEX IF NOT EXISTS idx_tags ON content_summary (tags)")
     conn.commit()
+    merged = migrate_canonical_uids(conn)
+    if merged:
+        print(f"✓ merged {merged} duplicate URL row(s)")
 
 
 def uid_of(url: str) -> str:
-    return hashlib.md5(url.encode("utf-8")).hexdigest()
+    return canonical_uid(url)
 
 
-def fetch_content(url: str):
-    """Fetch URL and return (title, content) or (None, None) on failure."""
+def fetch_content(url: str, archive=None, on_error=None):
+    """Fetch URL and return (title, content) or (None, None) on failure.
+
+    When `archive` (a RawArchive) is given the raw response body is stored
+    there as well, so the page can be re-extracted offline later.
+    `on_error(exc)` is called with the HTTP error, if any.
+    """
     print(f"  → Fetching: {url}")
     try:
         resp = requests.get(url, headers=HEADERS, timeout=20, allow_redirects=True)
         resp.raise_for_status()
     except Exception as e:
         print(f"  ✗ HTTP error: {e}")
+        if on_error is not None:
+            on_error(e)
         return None, None
 
     # Use apparent_encoding which is more reliable than server's charset
@@ -108,6 +161,15 @@ def fetch_content(url: str):
     elif resp.encoding is None:
         resp.encoding = "utf-8"
 
+    if archive is not None:
+        archive.append(
+            url,
+            resp.content,
+            status=resp.status_code,
+            content_type=resp.headers.get("Content-Type", ""),
+            encoding=resp.encoding,
+        )
+
     soup = BeautifulSoup(resp.text, "html.parser")
     for tag in soup(["script", "style", "nav", "footer", "header", "aside", "noscript"]):
         tag.decompose()
@@ -142,63 +204,133 @@ def fetch_content(url: str):
     return title, content
 
 
-def generate_summary(title: str, content: str) -> str:
-    """Generate Chinese summary using DeepSeek → Ollama → extractive fallback."""
-    if not content:
-        return "无法获取内容"
+def track_usage(usage: Usage, on_usage=None) -> None:
+    """Add one answered call to LLM_USAGE and pass it to `on_usage`."""
+    LLM_USAGE.add(usage)
+    if on_usage is not None:
+        on_usage(usage)
 
-    prompt = (
-        "请为以下网页内容生成100-200字的中文摘要：\n\n"
-        f"标题：{title}\n\n"
-        f"内容：{content[:3000]}\n\n"
-        "摘要要求：\n- 简洁准确\n- 突出重点\n- 100-200字\n\n摘要："
-    )
 
-    # 1. DeepSeek
-    deepseek_key = os.getenv("DEEPSEEK_API_KEY")
-    if deepseek_key:
-        try:
-            from openai import OpenAI
-
-            client = OpenAI(api_key=deepseek_key, base_url="https://api.deepseek.com")
-            response = client.chat.completions.create(
-                model="deepseek-chat",
-                messages=[{"role": "user", "content": prompt}],
-                max_tokens=300,
-                temperature=0.5,
-            )
-            summary = (response.choices[0].message.content or "").strip()
-            if summary:
-                print(f"  ✓ Summary (DeepSeek): {summary[:80]}...")
-                return summary
-        except Exception as e:
-            print(f"  ⚠ DeepSeek failed: {e}")
-    else:
-        print("  · DEEPSEEK_API_KEY not set, skipping DeepSeek")
+def deepseek_complete(prompt: str, on_error=None, on_usage=None, on_call=None) -> str | None:
+    """Send one prompt to DeepSeek; None if it is not configured or fails.
 
-    # 2. Ollama
-    ollama_url = os.getenv("OLLAMA_API_URL", "http://localhost:11434")
+    The call's telemetry (LLMCall) is passed to `on_call`. Raises
+    BudgetExceeded instead of calling when the call could take the run
+    over LLM_USAGE's cost cap.
+    """
+    deepseek_key = os.getenv("DEEPSEEK_API_KEY")
+    if not deepseek_key:
+        return None
+    prompt_tokens = count_tokens(prompt)
+    LLM_USAGE.check(cost_of("deepseek-chat", prompt_tokens, SUMMARY_MAX_TOKENS))
+    started = time.time()
     try:
-        resp = requests.post(
-            f"{ollama_url}/api/chat",
-            json={
-                "model": "llama3",
-                "messages": [{"role": "user", "content": prompt}],
-                "stream": False,
-            },
-            timeout=60,
+        from openai import OpenAI
+
+        client = OpenAI(api_key=deepseek_key, base_url="https://api.deepseek.com")
+        response = client.chat.completions.create(
+            model="deepseek-chat",
+            messages=[{"role": "user", "content": prompt}],
+            max_tokens=SUMMARY_MAX_TOKENS,
+            temperature=0.5,
         )
-        if resp.status_code == 200:
-            result = resp.json()
-            summary = (result.get("message", {}) or {}).get("content", "").strip()
-            if summary:
-                print(f"  ✓ Summary (Ollama): {summary[:80]}...")
-                return summary
+        text = (response.choices[0].message.content or "").strip()
     except Exception as e:
-        print(f"  · Ollama not available: {e}")
+        print(f"  ⚠ DeepSeek failed: {e}")
+        if on_call is not None:
+            on_call(call_of("deepseek", "deepseek-chat", started, None, e))
+        if on_error is not None:
+            on_error(e)
+        return None
+    reported = getattr(response, "usage", None)
+    usage = Usage(
+        "deepseek", "deepseek-chat",
+        reported.prompt_tokens if reported else prompt_tokens,
+        reported.completion_tokens if reported else count_tokens(text),
+        estimated=reported is None,
+    )
+    track_usage(usage, on_usage)
+    if on_call is not None:
+        on_call(call_of("deepseek", "deepseek-chat", started, text, usage=usage))
+    return text or None
+
+
+@lru_cache(maxsize=None)
+def ollama_client() -> LocalModelClient:
+    """Shared pooled Ollama client (OLLAMA_API_URL / OLLAMA_MODEL /
+    OLLAMA_KEEP_ALIVE / OLLAMA_NUM_PARALLEL), created after .env is loaded."""
+    return LocalModelClient(replace(APIConfig.from_env(), timeout=60))
+
+
+def ollama_complete(prompt: str, on_usage=None, on_call=None) -> str | None:
+    """Send one prompt to a local Ollama; None if it is not running or fails."""
+    client = ollama_client()
+    started = time.time()
+    text = client.complete(prompt, SUMMARY_MAX_TOKENS)
+    if text and client.last_usage is not None:
+        track_usage(client.last_usage, on_usage)
+    if on_call is not None:
+        on_call(call_of(
+            client.name, client.model, started, text, client.last_error, client.last_usage if text else None,
+        ))
+    return text
+
+
+def generate_summary(title: str, content: str, on_error=None, on_usage=None, on_call=None) -> str:
+    """Generate Chinese summary using DeepSeek → Ollama → extractive fallback.
+
+    Content over CHUNK_TOKENS is summarized part by part in parallel over
+    DeepSeek and Ollama, and the parts are merged (map-reduce), so long
+    pages are covered in full; with MAX_INPUT_TOKENS set, content is first
+    trimmed to that many tokens. `on_error(exc)` is called when DeepSeek is
+    configured but fails, `on_usage(usage)` for every answered LLM call and
+    `on_call(call)` with the telemetry of every LLM call.
+    """
+    if not content:
+        return "无法获取内容"
+
+    if MAX_INPUT_TOKENS is not None:
+        content = truncate_tokens(content, MAX_INPUT_TOKENS)
+    if count_tokens(content) > CHUNK_TOKENS:
+        errors: list[Exception] = []
+        summarizer = MapReduceSummarizer(
+            [
+                lambda p: deepseek_complete(p, errors.append, on_usage, on_call),
+                lambda p: ollama_complete(p, on_usage, on_call),
+            ],
+            chunk_tokens=CHUNK_TOKENS,
+            token_budget=DOCUMENT_TOKEN_BUDGET,
+        )
+        summary = summarizer.summarize(content, title)
+        if summary:
+            print(f"  ✓ Summary (map-reduce): {summary[:80]}...")
+            return summary
+        if errors and on_error is not None:
+            on_error(errors[-1])
+    else:
+        prompt = (
+            "请为以下网页内容生成100-200字的中文摘要：\n\n"
+            f"标题：{title}\n\n"
+            f"内容：{content}\n\n"
+            "摘要要求：\n- 简洁准确\n- 突出重点\n- 100-200字\n\n摘要："
+        )
+
+        # 1. DeepSeek
+        if not os.getenv("DEEPSEEK_API_KEY"):
+            print("  · DEEPSEEK_API_KEY not set, skipping DeepSeek")
+        summary = deepseek_complete(prompt, on_error, on_usage, on_call)
+        if summary:
+            print(f"  ✓ Summary (DeepSeek): {summary[:80]}...")
+            return summary
+
+        # 2. Ollama
+        summary = ollama_complete(prompt, on_usage, on_call)
+        if summary:
+            print(f"  ✓ Summary (Ollama): {summary[:80]}...")
+            return summary
 
     # 3. Extractive fallback
-    summary = content[:200] + ("..." if len(content) > 200 else "")
+    summary = FALLBACK_SUMMARIZER.summarize(content)
     print(f"  · Summary (fallback): {summary[:80]}...")
     return summary
 
@@ -259,6 +391,75 @@ def update_content_only(conn, url: str, content: str) -> bool:
     return cur.rowcount > 0
 
 
+def log_failure(failures, url: str, tags: str, exc=None, error_class=None, error: str = "") -> None:
+    """Record a failure in `failures` (if given) for retry.py."""
+    if failures is None:
+        return
+    next_retry = failures.record(
+        url, FAILURE_SOURCE, error_class or classify(exc), error or str(exc or ""),
+        {"tags": tags}, retry_after(exc),
+    )
+    if next_retry is None:
+        print("  · Giving up (no more retries)")
+    else:
+        print(f"  · Retry after {datetime.fromtimestamp(next_retry):%Y-%m-%d %H:%M}")
+
+
+def process_url(
+    conn, url: str, tags: str, archive=None, failures=None, usage_log=None, call_log=None
+) -> tuple[bool, str]:
+    """Fetch, summarise and store one URL.
+
+    Returns (saved, note): `note` is "saved" or "already in DB" when the URL
+    needs no more work, otherwise what went wrong. With `failures` (a
+    FailureLog) errors are classified and scheduled for retry.py, and a
+    success resolves the URL's earlier failure. With `usage_log` (a
+    UsageLog) the tokens and cost of the summary are stored for the row,
+    with `call_log` (a CallLog) the latency and outcome of its LLM calls.
+
+    Raises BudgetExceeded (before calling DeepSeek) once the run's cost cap
+    is reached.
+    """
+    errors = []
+    title, content = fetch_content(url, archive, on_error=errors.append)
+    if not title and not content:
+        print(f"  ✗ No content fetched")
+        exc = errors[-1] if errors else None
+        log_failure(failures, url, tags, exc, None if exc else EMPTY_CONTENT, "no content fetched")
+        return False, "no content fetched"
+
+    if failures is not None:
+        failures.resolve(url, FAILURE_SOURCE)
+    existing_uid = conn.execute(
+        "SELECT 1 FROM content_summary WHERE uid = ?", (uid_of(url),)
+    ).fetchone()
+    if existing_uid:
+        print(f"  · Already in DB, marking as done")
+        return False, "already in DB"
+
+    if not content or len(content) < MIN_CONTENT_LEN:
+        note = f"content too short ({len(content or '')} chars)"
+        print(f"  ⚠ Content too short ({len(content or '')} chars), skipping save")
+        log_failure(failures, url, tags, error_class=EMPTY_CONTENT, error=note)
+        return False, note
+
+    usages: list[Usage] = []
+    calls: list = []
+    summary = generate_summary(
+        title, content, on_error=errors.append, on_usage=usages.append, on_call=calls.append,
+    )
+    if not save_to_db(conn, url, title, summary, tags, content=content):
+        return False, "already in DB"
+    if usage_log is not None and usages:
+        usage_log.record(url, usages, FAILURE_SOURCE)
+    if call_log is not None and calls:
+        call_log.record(url, calls, FAILURE_SOURCE)
+    if errors:
+        # Saved with a fallback summary; retry.py re-summarizes it later.
+        log_failure(failures, url, tags, errors[-1], LLM_ERROR)
+    return True, "saved"
+
+
 def main():
     import argparse
 
@@ -271,8 +472,38 @@ def main():
              "Skips URL not yet in DB. Preserves summary, title, tags, "
              "created_time, and done flag.",
     )
+    parser.add_argument(
+        "--no-archive",
+        action="store_true",
+        help=f"Do not store raw responses in {ARCHIVE_DIR}/.",
+    )
+    parser.add_argument(
+        "--max-attempts",
+        type=int,
+        default=None,
+        help="Stop retrying an entry after this many attempts "
+             f"(default: JOB_MAX_ATTEMPTS or {DEFAULT_MAX_ATTEMPTS}).",
+    )
+    parser.add_argument(
+        "--cost-cap",
+        type=float,
+        default=None,
+        help="Stop before a DeepSeek call would take this run's cost over this many USD; "
+             "the remaining entries stay pending.",
+    )
+    parser.add_argument(
+        "--max-input-tokens",
+        type=int,
+        default=None,
+        help="Trim each page to this many tokens before summarizing "
+             f"(default: map-reduce up to {DOCUMENT_TOKEN_BUDGET}).",
+    )
     args = parser.parse_args()
 
+    global MAX_INPUT_TOKENS
+    LLM_USAGE.cost_cap = args.cost_cap
+    MAX_INPUT_TOKENS = args.max_input_tokens
+
     print("=" * 60)
     if args.backfill:
         print("Backfill pass — re-fetching content for existing rows")
@@ -280,6 +511,8 @@ def main():
         print("Fetch URLs from grab_params.json → web_content.db")
     print("=" * 60)
     load_env_file(ENV_PATH)
+    if args.max_attempts is None:
+        args.max_attempts = int(os.getenv("JOB_MAX_ATTEMPTS", DEFAULT_MAX_ATTEMPTS))
     if os.getenv("DEEPSEEK_API_KEY"):
         print(f"  · DEEPSEEK_API_KEY loaded (len={len(os.environ['DEEPSEEK_API_KEY'])})")
     else:
@@ -289,85 +522,114 @@ def main():
         print(f"✗ {PARAMS_PATH} not found")
         return 1
 
+    conn = sqlite3.connect(DB_PATH)
+    ensure_schema(conn)
+    if args.backfill:
+        return backfill(conn, args)
+
+    jobs = JobStore(conn)
+    try:
+        added = jobs.import_json(PARAMS_PATH)
+    except ValueError:
+        print("✗ grab_params.json must be a list")
+        return 1
+    counts = jobs.counts(PARAMS_PATH)
+    todo = list(jobs.pending(args.max_attempts, PARAMS_PATH))
+    pending = len(todo)
+    print(f"Total entries: {sum(counts.values())}, pending: {pending} (new: {added})")
+    exhausted = sum(counts.values()) - counts["done"] - pending
+    if exhausted:
+        print(f"  ⚠ {exhausted} entr{'y' if exhausted == 1 else 'ies'} failed {args.max_attempts} times, "
+              "not retried (--max-attempts)")
+    if not pending:
+        print("Nothing to do.")
+        conn.close()
+        return 0
+
+    archive = None if args.no_archive else RawArchive(ARCHIVE_DIR)
+    failures = FailureLog(conn)
+    usage_log = UsageLog(conn)
+    call_log = CallLog(conn, usage_log.run_id)
+    inserted = 0
+    try:
+        for i, job in enumerate(todo, start=1):
+            print(f"\n[{i}/{pending}] {job.url}")
+            jobs.start(job)
+            try:
+                saved, note = process_url(conn, job.url, job.tags, archive, failures, usage_log, call_log)
+            except BudgetExceeded as exc:
+                print(f"\n💰 {exc} — stopping")
+                jobs.release(job)
+                break
+            if note in ("saved", "already in DB"):
+                inserted += saved
+                jobs.finish(job)
+            else:
+                jobs.fail(job, note)
+        for key, t in usage_log.totals().items():
+            print(
+                f"  · LLM {key}: {t['calls']} call(s), {t['prompt_tokens']} + "
+                f"{t['completion_tokens']} tokens, ${t['cost']:.4f}"
+            )
+    finally:
+        call_log.flush()
+        jobs.export_json(PARAMS_PATH)
+        conn.close()
+        if archive is not None:
+            archive.close()
+
+    print(f"\nDone. Inserted {inserted} new rows; updated grab_params.json")
+    return 0
+
+
+def backfill(conn, args) -> int:
+    """Re-fetch every grab_params.json URL and refresh `content` of stored rows."""
     with open(PARAMS_PATH, "r", encoding="utf-8") as f:
         items = json.load(f)
     if not isinstance(items, list):
         print("✗ grab_params.json must be a list")
         return 1
 
-    if args.backfill:
-        target = list(items)  # process ALL entries regardless of done flag
-        print(f"Total entries: {len(items)}, backfill target: {len(target)}")
-    else:
-        target = [it for it in items if not it.get("done", False)]
-        print(f"Total entries: {len(items)}, pending: {len(target)}")
-
+    target = list(items)  # process ALL entries regardless of done flag
+    print(f"Total entries: {len(items)}, backfill target: {len(target)}")
     if not target:
         print("Nothing to do.")
         return 0
 
-    conn = sqlite3.connect(DB_PATH)
-    ensure_schema(conn)
-    inserted = 0
+    archive = None if args.no_archive else RawArchive(ARCHIVE_DIR)
     updated = 0
     skipped = 0
     for i, item in enumerate(target, start=1):
         url = item.get("url")
-        tags = item.get("tags", "")
         if not url:
             print(f"[{i}] ⊘ Skipping entry without url")
             continue
         print(f"\n[{i}/{len(target)}] {url}")
 
         # Backfill: only update existing rows; skip URL not yet in DB
-        if args.backfill:
-            existing = conn.execute(
-                "SELECT 1 FROM content_summary WHERE uid = ?", (uid_of(url),)
-            ).fetchone()
-            if not existing:
-                print(f"  · Not in DB yet, skipping (run without --backfill to insert)")
-                skipped += 1
-                continue
-
-        title, content = fetch_content(url)
-        if not title and not content:
-            print(f"  ✗ No content fetched")
-            continue
-
-        if args.backfill:
-            if update_content_only(conn, url, content):
-                print(f"  ✓ Updated content ({len(content.strip())} chars)")
-                updated += 1
-            else:
-                skipped += 1
-            continue
-
-        # Normal (non-backfill) path — preserve existing logic
-        existing_uid = conn.execute(
+        existing = conn.execute(
             "SELECT 1 FROM content_summary WHERE uid = ?", (uid_of(url),)
         ).fetchone()
-        if existing_uid:
-            print(f"  · Already in DB, marking as done")
-            item["done"] = True
+        if not existing:
+            print(f"  · Not in DB yet, skipping (run without --backfill to insert)")
+            skipped += 1
             continue
 
-        if not content or len(content) < MIN_CONTENT_LEN:
-            print(f"  ⚠ Content too short ({len(content or '')} chars), skipping save")
+        title, content = fetch_content(url, archive)
+        if not title and not content:
+            print(f"  ✗ No content fetched")
             continue
 
-        summary = generate_summary(title, content)
-        if save_to_db(conn, url, title, summary, tags, content=content):
-            inserted += 1
-            item["done"] = True
+        if update_content_only(conn, url, content):
+            print(f"  ✓ Updated content ({len(content.strip())} chars)")
+            updated += 1
+        else:
+            skipped += 1
 
     conn.close()
-
-    if args.backfill:
-        print(f"\nDone. Updated {updated} rows, skipped {skipped} (not in DB).")
-    else:
-        with open(PARAMS_PATH, "w", encoding="utf-8") as f:
-            json.dump(items, f, indent=2, ensure_ascii=False)
-        print(f"\nDone. Inserted {inserted} new rows; updated grab_params.json")
+    if archive is not None:
+        archive.close()
+    print(f"\nDone. Updated {updated} rows, skipped {skipped} (not in DB).")
     return 0
 
 
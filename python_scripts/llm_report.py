@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Report LLM latency, error rates and throughput from the llm_calls table.
+
+crawler_subpages.py, fetch_from_params.py, worker.py, retry.py and the
+modular extractor store every LLM call (provider, model, latency, outcome,
+tokens, the row it served) in `llm_calls`. This script sums them per time
+window and provider/model:
+
+  * calls, answers and the error rate of calls that reached the backend
+    (calls skipped for a full concurrency limit or lost to a hedge are
+    counted, but not as errors)
+  * failures by class (timeout, http_429, http_5xx, connection, ...)
+  * p50 / p95 / p99 latency of answered calls
+  * calls per minute and completion tokens per second
+
+Run:
+
+    cd python_scripts
+    python llm_report.py                        # last 24 h, hourly windows
+    python llm_report.py --since 7d --window 1d
+    python llm_report.py --provider deepseek --since 2h --window 10m
+    python llm_report.py --url https://example.com/a   # calls made for one row
+    python llm_report.py --json /tmp/llm.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sqlite3
+import sys
+from datetime import datetime
+from pathlib import Path
+
+from web_content_system.database.call_log import CallLog
+from web_content_system.telemetry import OK, parse_duration
+
+DB_PATH = Path(__file__).resolve().parent / "web_content.db"
+
+
+def fmt_ms(value: float | None) -> str:
+    return "-" if value is None else f"{value:.0f}"
+
+
+def print_rows(rows: list[dict]) -> None:
+    print(
+        f"{'window':<16} {'provider/model':<28} {'calls':>6} {'err%':>6} {'p50 ms':>7} "
+        f"{'p95 ms':>7} {'p99 ms':>7} {'/min':>6} {'tok/s':>6}  failures"
+    )
+    print("-" * 110)
+    for r in rows:
+        failures = ", ".join(
+            f"{outcome} {n}" for outcome, n in sorted(r["outcomes"].items()) if outcome != OK
+        )
+        print(
+            f"{r['window']:<16} {(r['provider'] + '/' + r['model'])[:28]:<28} {r['calls']:>6} "
+            f"{r['error_rate'] * 100:>6.1f} {fmt_ms(r['p50_ms']):>7} {fmt_ms(r['p95_ms']):>7} "
+            f"{fmt_ms(r['p99_ms']):>7} {r['calls_per_min']:>6} {r['tokens_per_sec']:>6}  {failures}"
+        )
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Report LLM latency, errors and throughput per provider.")
+    parser.add_argument("--db", default=str(DB_PATH), help="SQLite database (default web_content.db)")
+    parser.add_argument("--since", default="24h", help="Only calls of the last N s/m/h/d (default 24h)")
+    parser.add_argument("--window", default="1h", help="Window length, e.g. 10m, 1h, 1d (default 1h)")
+    parser.add_argument("--source", help="Only this pipeline (crawler, params, extractor, ...)")
+    parser.add_argument("--provider", help="Only this provider (deepseek, openai, ollama, ...)")
+    parser.add_argument("--url", help="List the calls made for one URL instead")
+    parser.add_argument("--json", metavar="PATH", help="Also write the windows as JSON")
+    args = parser.parse_args()
+    try:
+        since, window = parse_duration(args.since), parse_duration(args.window)
+    except ValueError as exc:
+        parser.error(str(exc))
+
+    conn = sqlite3.connect(args.db)
+    try:
+        log = CallLog(conn)
+        if args.url:
+            for call in log.for_url(args.url):
+                started = datetime.fromtimestamp(call["started"]).strftime("%Y-%m-%d %H:%M:%S")
+                print(
+                    f"{started}  {call['provider']}/{call['model']}  {call['outcome']:<10} "
+                    f"{call['latency_ms']:>6} ms  {call['prompt_tokens']} + {call['completion_tokens']} tokens"
+                )
+            return 0
+        rows = log.report(window, since, args.source, args.provider)
+        totals = log.report(None, since, args.source, args.provider)
+    finally:
+        conn.close()
+
+    print("=" * 60)
+    print(f"LLM calls — last {args.since}, {args.window} windows")
+    print("=" * 60)
+    if not rows:
+        print("No LLM calls logged.")
+        return 0
+    print_rows(rows)
+    print()
+    for row in totals:
+        row["window"] = f"total {args.since}"
+    print_rows(totals)
+    if args.json:
+        Path(args.json).write_text(
+            json.dumps({"windows": rows, "totals": totals}, ensure_ascii=False, indent=2), encoding="utf-8",
+        )
+        print(f"\n✓ wrote {args.json}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
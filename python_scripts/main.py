@@ -6,6 +6,7 @@ Main CLI entry point for web content extraction system.
 import sys
 
 from web_content_system import WebContentExtractor
+from web_content_system.llm_clients import BudgetExceeded
 
 
 def print_menu():
@@ -32,48 +33,83 @@ def process_batch_scraping(extractor):
         print('[{"url": "...", "tags": "...", "done": false}]')
         return
 
+    # Job state lives in the jobs table; the JSON file is only imported when
+    # it changed and written back once at the end of the run.
+    jobs = extractor.db.jobs()
     try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            items = json.load(f)
-        
-        if not isinstance(items, list):
-            print("❌ JSON格式错误: 根节点必须是列表")
-            return
-            
-        count = 0
-        total = len(items)
-        print(f"\n📦 开始批量处理，共 {total} 个任务")
-        
-        for i, item in enumerate(items):
-            if item.get('done', False):
-                continue
-                
-            url = item.get('url')
-            if not url:
-                print(f"⚠️  跳过无效任务 (缺少URL): 任务 #{i+1}")
-                continue
-                
-            print(f"\n🔄 处理任务 {i+1}/{total}...")
-            tags = item.get('tags', '')
-            
+        added = jobs.import_json(file_path)
+    except ValueError:
+        print("❌ JSON格式错误: 根节点必须是列表")
+        return
+    except json.JSONDecodeError:
+        print("❌ JSON文件解析失败，请检查语法")
+        return
+    
+    # Pages are downloaded ahead on threads and parsed in the process pool;
+    # the browser is only started for pages that yield no valid content.
+    max_attempts = extractor.config.database.job_max_attempts
+    waiting = {job.url: job for job in jobs.pending(max_attempts, file_path)}
+    urls = list(waiting)
+    
+    counts = jobs.counts(file_path)
+    total = sum(counts.values())
+    todo = len(urls)
+    exhausted = total - counts["done"] - todo
+    print(f"\n📦 开始批量处理，共 {total} 个任务，待处理 {todo} 个 (新增 {added} 个)")
+    if exhausted:
+        print(f"⚠️  {exhausted} 个任务已失败 {max_attempts} 次，不再重试 (JOB_MAX_ATTEMPTS)")
+    
+    count = 0
+    try:
+        for i, (url, title, content) in enumerate(extractor.prefetch(urls), start=1):
+            job = waiting[url]
+            print(f"\n🔄 处理任务 {i}/{todo}...")
+            jobs.start(job)
             try:
-                success = extractor.scrape_and_process(url, tags)
-                if success:
-                    item['done'] = True
-                    count += 1
-                    
-                    # Immediate save to prevent data loss
-                    with open(file_path, 'w', encoding='utf-8') as f:
-                        json.dump(items, f, indent=2, ensure_ascii=False)
+                success = extractor.scrape_and_process(job.url, job.tags, page=(title, content))
+            except BudgetExceeded as e:
+                print(f"💰 {e}，停止批量处理")
+                jobs.release(job)
+                break
             except Exception as e:
                 print(f"❌ 处理失败: {e}")
-                
+                jobs.fail(job, str(e))
+                continue
+            if success:
+                jobs.finish(job)
+                count += 1
+            else:
+                jobs.fail(job, "scrape_and_process returned False")
+        
         print(f"\n✅ 批量处理完成! 成功处理 {count} 个新任务")
-            
-    except json.JSONDecodeError:
-        print("❌ JSON文件解析失败，请检查语法")
     except Exception as e:
         print(f"❌ 批量处理出错: {e}")
+    finally:
+        jobs.export_json(file_path)
+        print_usage(extractor)
+
+
+def print_usage(extractor):
+    """Print this run's LLM calls, tokens and cost per provider/model."""
+    extractor.settle()
+    totals = extractor.usage.totals()
+    if not totals:
+        return
+    print("\n🧮 本次运行LLM用量:")
+    for key, t in totals.items():
+        print(
+            f"  {key}: {t['calls']} 次, 输入 {t['prompt_tokens']} / 输出 {t['completion_tokens']} tokens, "
+            f"${t['cost']:.4f}"
+        )
+    routes = extractor.processor.routing_metrics()
+    for route, t in (routes or {}).items():
+        print(
+            f"  路由 {route}: {t['pages']} 页, 平均 {t['avg_latency_ms']:.0f} ms, "
+            f"${t['avg_cost']:.5f}/页"
+        )
+    hedging = extractor.processor.hedge_metrics()
+    if hedging and hedging["hedges"]:
+        print(f"  对冲请求: {hedging['hedges']}/{hedging['calls']} 次, 其中 {hedging['hedge_wins']} 次更快")
 
 
 def print_help():
@@ -86,6 +122,7 @@ def print_help():
     print("• 设置环境变量 OPENAI_API_KEY 来使用OpenAI API")
     print("• 设置环境变量 OLLAMA_API_URL 来使用本地模型")
     print("• 如果未配置API，系统将使用简单摘要算法")
+    print("• 设置 LLM_COST_CAP (美元) 限制每次运行的LLM花费，LLM_INPUT_TOKEN_CEILING 限制每篇输入tokens")
 
 
 def main():
@@ -111,7 +148,10 @@ def main():
                 url = input("\n🔗 请输入网页URL: ").strip()
                 if url:
                     tags = input("🏷️  请输入标签 (可选，多个标签用逗号分隔): ").strip()
-                    extractor.scrape_and_process(url, tags)
+                    try:
+                        extractor.scrape_and_process(url, tags)
+                    except BudgetExceeded as e:
+                        print(f"💰 {e}")
                 else:
                     print("❌ URL不能为空")
             
@@ -120,8 +160,11 @@ def main():
                 content = input("📄 请输入内容: ").strip()
                 if title and content:
                     tags = input("🏷️  请输入标签 (可选，多个标签用逗号分隔): ").strip()
-                    summary = extractor.manual_input(title, content, tags)
-                    print(f"\n📋 生成的摘要: {summary}")
+                    try:
+                        summary = extractor.manual_input(title, content, tags)
+                        print(f"\n📋 生成的摘要: {summary}")
+                    except BudgetExceeded as e:
+                        print(f"💰 {e}")
                 else:
                     print("❌ 标题和内容不能为空")
             
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Re-extract page content from the raw-response archive — no network.
+
+crawler_subpages.py, backfill_content.py and fetch_from_params.py store
+every raw response in `raw_archive/` (compressed segment files plus an
+offset index). This script replays the newest archived response of each
+URL through the current extractor and rewrites the `content` column of the
+matching content_summary row. Title / summary / tags are preserved.
+
+Work is spread over a process pool: each worker reads its record straight
+from the segment file, so only offsets go in and text comes back.
+
+Run:
+
+    cd python_scripts
+    python reextract.py                     # all archived URLs
+    python reextract.py --engine requests   # use RequestsScraper.parse_html
+    python reextract.py --limit 20 --dry-run
+"""
+
+from __future__ import annotations
+
+import argparse
+import sqlite3
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from bs4 import UnicodeDammit
+
+import crawler_subpages
+from web_content_system.crawl.urls import canonical_uid
+from web_content_system.database.raw_archive import RawArchive, read_record
+from web_content_system.scrapers import RequestsScraper
+from web_content_system.scrapers.extraction_pool import available_cores
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+DB_PATH = SCRIPT_DIR / "web_content.db"
+ARCHIVE_DIR = SCRIPT_DIR / "raw_archive"
+
+MAX_CONTENT_LEN = crawler_subpages.MAX_CONTENT_LEN
+COMMIT_EVERY = 500
+MAX_REPORTED_ERRORS = 20  # failed records printed individually
+
+
+def reextract_record(job: tuple) -> tuple[str, str, str, str | None]:
+    """Worker: read one archived record and extract (url, title, content, error).
+
+    A record that cannot be read or parsed (corrupt gzip member, unknown
+    encoding, ...) yields empty text and the error message instead of
+    aborting the whole run.
+    """
+    segment_path, offset, length, url, encoding, engine = job
+    try:
+        _, body = read_record(segment_path, offset, length)
+        if engine == "requests":
+            title, content, _ = RequestsScraper.parse_html(body, url, encoding)
+            return url, title, content, None
+        if encoding:
+            html = body.decode(encoding, errors="replace")
+        else:
+            html = UnicodeDammit(body).unicode_markup
+        title, content, _ = crawler_subpages.parse_page(html, url)
+        return url, title, content, None
+    except Exception as exc:
+        return url, "", "", f"{type(exc).__name__}: {exc}"
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Re-extract content from the raw archive (offline).")
+    parser.add_argument("--db", default=str(DB_PATH), help="SQLite DB to update")
+    parser.add_argument("--archive", default=str(ARCHIVE_DIR), help="Raw archive directory")
+    parser.add_argument(
+        "--engine",
+        choices=("crawler", "requests"),
+        default="crawler",
+        help="crawler = crawler_subpages.parse_page (default), requests = RequestsScraper.parse_html",
+    )
+    parser.add_argument("--workers", type=int, default=0, help="Worker processes (default: all cores)")
+    parser.add_argument("--limit", type=int, default=0, help="Process at most N URLs. 0 = no limit.")
+    parser.add_argument("--dry-run", action="store_true", help="Extract but do not write to the DB")
+    args = parser.parse_args()
+
+    if not Path(args.archive, "index.sqlite").exists():
+        print(f"✗ no archive at {args.archive}")
+        return 1
+
+    workers = args.workers or available_cores()
+    archive = RawArchive(args.archive)
+    jobs = [
+        (segment_path, offset, length, url, encoding, args.engine)
+        for _, url, encoding, segment_path, offset, length in archive.iter_latest()
+    ]
+    archive.close()
+    if args.limit:
+        jobs = jobs[: args.limit]
+
+    print("=" * 60)
+    print("Re-extract content from raw archive")
+    print(f"  Archive: {args.archive}  ({len(jobs)} URLs)")
+    print(f"  Engine: {args.engine}   Workers: {workers}")
+    print(f"  Mode: {'dry run' if args.dry_run else 'update content column'}")
+    print("=" * 60)
+
+    conn = sqlite3.connect(args.db)
+    cur = conn.cursor()
+    updated = 0
+    missing = 0
+    empty = 0
+    failed = 0
+    started = time.perf_counter()
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for i, (url, title, content, error) in enumerate(pool.map(reextract_record, jobs, chunksize=16), start=1):
+            if error:
+                failed += 1
+                if failed <= MAX_REPORTED_ERRORS:
+                    print(f"   ✗ {url}: {error}")
+                continue
+            if len(content) < crawler_subpages.MIN_CONTENT_LEN:
+                empty += 1
+                continue
+            body = content
+            if len(body) > MAX_CONTENT_LEN:
+                body = body[:MAX_CONTENT_LEN] + "\n\n[…truncated at MAX_CONTENT_LEN]"
+            if args.dry_run:
+                updated += 1
+                continue
+            cur.execute(
+                "UPDATE content_summary SET content = ? WHERE uid = ?",
+                (body, canonical_uid(url)),
+            )
+            if cur.rowcount:
+                updated += 1
+            else:
+                missing += 1
+            if i % COMMIT_EVERY == 0:
+                conn.commit()
+                print(f"   … {i}/{len(jobs)}")
+
+    conn.commit()
+    conn.close()
+    elapsed = time.perf_counter() - started
+
+    print("\n" + "=" * 60)
+    print(
+        f"Done in {elapsed:.1f}s ({len(jobs) / elapsed if elapsed else 0:.0f} pages/s). "
+        f"updated={updated} not_in_db={missing} too_short={empty} failed={failed}"
+    )
+    print("=" * 60)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
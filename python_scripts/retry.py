@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+"""
+Retry failed URLs whose backoff has expired.
+
+crawler_subpages.py, fetch_from_params.py and the modular extractor log
+every failure in the `failure_log` table, classified as timeout,
+connection error, HTTP 5xx / 429 / 4xx, empty content or LLM error. Each
+class has its own retry limit, and the wait doubles after every failure.
+This script processes only the items that are due now, through the same
+pipeline that failed:
+
+  * LLM errors: the row was saved with a fallback summary, so only the
+    summary is regenerated from the stored content; nothing is re-fetched.
+  * crawler / params / extractor: the URL is fetched and stored again.
+
+A success resolves the entry; another failure schedules the next retry or
+gives up once the class's limit is reached.
+
+Run:
+
+    cd python_scripts
+    python retry.py                    # everything that is due
+    python retry.py --list             # counts per class + due items, no network
+    python retry.py --source crawler --limit 20
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from datetime import datetime
+
+import crawler_subpages
+import fetch_from_params
+from web_content_system.database.failure_log import LLM_ERROR, FailedItem, FailureLog, classify, retry_after
+from web_content_system.database.job_store import JobStore
+from web_content_system.database.raw_archive import RawArchive
+from web_content_system.database.call_log import CallLog
+from web_content_system.database.usage_log import UsageLog
+from web_content_system.extractor import FAILURE_SOURCE as EXTRACTOR_SOURCE
+from web_content_system.llm_clients.usage import BudgetExceeded
+
+PAUSE = 0.5  # seconds between two network retries
+
+
+def resummarize(
+    conn,
+    failures: FailureLog,
+    item: FailedItem,
+    usage_log: UsageLog | None = None,
+    call_log: CallLog | None = None,
+) -> None:
+    """Regenerate the summary of a row that was saved with the fallback."""
+    row = conn.execute(
+        "SELECT title, content FROM content_summary WHERE uid = ?",
+        (crawler_subpages.uid_for(item.url),),
+    ).fetchone()
+    if row is None or not row[1]:
+        print("   · row or stored content gone, nothing to re-summarize")
+        failures.resolve(item.url, item.source)
+        return
+    errors: list[Exception] = []
+    usages: list = []
+    calls: list = []
+    summary = crawler_subpages.summarize_with_deepseek(
+        row[0] or "", row[1], on_error=errors.append, on_usage=usages.append, on_call=calls.append,
+    )
+    if usage_log is not None and usages:
+        usage_log.record(item.url, usages, item.source)
+    if call_log is not None and calls:
+        call_log.record(item.url, calls, item.source)
+    if not summary:
+        error = errors[-1] if errors else RuntimeError("DeepSeek is not configured")
+        failures.record(item.url, item.source, LLM_ERROR, str(error))
+        return
+    conn.execute(
+        "UPDATE content_summary SET summary = ? WHERE uid = ?",
+        (summary, crawler_subpages.uid_for(item.url)),
+    )
+    conn.commit()
+    failures.resolve(item.url, item.source)
+    print(f"   ✓ new summary: {summary[:80]}…")
+
+
+class Retrier:
+    """Dispatches due failures to the pipeline they came from."""
+
+    def __init__(self, conn, failures: FailureLog, archive: RawArchive | None):
+        self.conn = conn
+        self.failures = failures
+        self.archive = archive
+        self.usage_log = UsageLog(conn)
+        self.call_log = CallLog(conn, self.usage_log.run_id)
+        self._extractor = None
+
+    def retry(self, item: FailedItem) -> bool:
+        """Run the item through its pipeline; True if its failure is resolved."""
+        tags = item.payload.get("tags", "")
+        if item.error_class == LLM_ERROR:
+            resummarize(self.conn, self.failures, item, self.usage_log, self.call_log)
+        elif item.source == crawler_subpages.FAILURE_SOURCE:
+            crawler_subpages.insert_one(
+                self.conn, item.url, tags, label="RETRY", archive=self.archive, failures=self.failures,
+                usage_log=self.usage_log, call_log=self.call_log,
+            )
+        elif item.source == fetch_from_params.FAILURE_SOURCE:
+            _, note = fetch_from_params.process_url(
+                self.conn, item.url, tags, self.archive, self.failures, self.usage_log, self.call_log,
+            )
+            if note in ("saved", "already in DB"):
+                JobStore(self.conn).mark_done(item.url)
+        elif item.source == EXTRACTOR_SOURCE:
+            self.extractor.scrape_and_process(item.url, tags)
+        else:
+            print(f"   ! unknown source {item.source!r}, skipping")
+            return False
+        return self.failures.status(item.url, item.source) == "resolved"
+
+    @property
+    def extractor(self):
+        if self._extractor is None:
+            from web_content_system import WebContentExtractor
+
+            self._extractor = WebContentExtractor()
+        return self._extractor
+
+    def close(self):
+        self.call_log.flush()
+        if self._extractor is not None:
+            self._extractor.close()
+
+
+def retry_due(retrier: Retrier, failures: FailureLog, due: list[FailedItem]) -> int:
+    """Retry the due items in order; return how many were resolved.
+
+    An item whose pipeline raises is logged as failed again and the next
+    one is tried. Reaching the LLM cost cap stops the run and leaves the
+    item due.
+    """
+    recovered = 0
+    for i, item in enumerate(due, 1):
+        print(f"\n[{i}/{len(due)}] {item.source}/{item.error_class} (attempt {item.attempts + 1}) {item.url}")
+        if item.error_class != LLM_ERROR and i > 1:
+            time.sleep(PAUSE)
+        try:
+            resolved = retrier.retry(item)
+        except BudgetExceeded as exc:
+            print(f"\n💰 {exc} — stopping, {len(due) - i + 1} item(s) stay due")
+            break
+        except Exception as exc:
+            print(f"   ✗ {type(exc).__name__}: {exc}")
+            failures.record(item.url, item.source, classify(exc), str(exc), item.payload or None, retry_after(exc))
+            continue
+        if resolved:
+            recovered += 1
+    return recovered
+
+
+def print_overview(failures: FailureLog, due: list[FailedItem]) -> None:
+    stats = failures.stats()
+    if not stats:
+        print("No failures logged.")
+        return
+    for error_class, counts in sorted(stats.items()):
+        print(f"  {error_class:<14} " + ", ".join(f"{k} {v}" for k, v in sorted(counts.items())))
+    print(f"Due now: {len(due)}")
+    for item in due[:50]:
+        print(f"  [{item.source}/{item.error_class} ×{item.attempts}] {item.url}")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Retry failed URLs whose backoff has expired.")
+    parser.add_argument("--list", action="store_true", help="Only show what is logged and due.")
+    parser.add_argument("--source", choices=["crawler", "params", "extractor"], help="Only this pipeline.")
+    parser.add_argument("--limit", type=int, default=0, help="Retry at most N items.")
+    parser.add_argument("--no-archive", action="store_true", help="Do not archive raw responses.")
+    args = parser.parse_args()
+
+    crawler_subpages.load_env(crawler_subpages.ENV_PATH)
+    conn = crawler_subpages.ensure_schema(crawler_subpages.DB_PATH)
+    failures = FailureLog(conn)
+    due = failures.due(args.source, args.limit or None)
+
+    print("=" * 60)
+    print(f"Retry failed URLs — {datetime.now():%Y-%m-%d %H:%M}")
+    print("=" * 60)
+    print_overview(failures, due)
+    if args.list or not due:
+        conn.close()
+        return 0
+
+    archive = None if args.no_archive else RawArchive(crawler_subpages.ARCHIVE_DIR)
+    retrier = Retrier(conn, failures, archive)
+    try:
+        recovered = retry_due(retrier, failures, due)
+    finally:
+        retrier.close()
+        conn.close()
+        if archive is not None:
+            archive.close()
+
+    print(f"\nDone — recovered {recovered} of {len(due)} due item(s)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
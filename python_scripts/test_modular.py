@@ -94,7 +94,7 @@ def test_config():
     print("\n🧪 测试配置管理...")
     
     try:
-        from web_content_system.config import Config, APIConfig
+        from web_content_system.config import Config, APIConfig, BrowserConfig
         
         # 测试默认配置
         config = Config.default()
@@ -107,8 +107,17 @@ def test_config():
         # 测试配置值
         assert config.database.db_path == "web_content.db"
         assert config.browser.headless == True
+        assert config.browser.page_load_strategy == "normal"
         print("✅ 配置值验证成功")
         
+        # 测试精简渲染配置
+        lean = BrowserConfig.lean(disk_cache_dir="/tmp/chrome-cache")
+        assert lean.page_load_strategy == "eager"
+        assert "Image" in lean.blocked_resource_types
+        assert lean.wait_for_settle and lean.url_blocklist
+        assert lean.disk_cache_dir == "/tmp/chrome-cache"
+        print("✅ 精简渲染配置验证成功")
+        
         return True
     except Exception as e:
         print(f"❌ 配置测试失败: {e}")
@@ -188,6 +197,1654 @@ def test_content_processor():
         return False
 
 
+def test_extraction_pool():
+    """测试多进程解析池"""
+    print("\n🧪 测试多进程解析池...")
+    
+    try:
+        from web_content_system.scrapers import ExtractionPool, RequestsScraper
+        
+        html = (
+            "<html><head><title>测试页面</title></head><body>"
+            "<nav><a href='/nav'>导航</a></nav>"
+            "<article><p>这是一段正文内容，用于验证解析池能够在工作进程中提取文本。</p>"
+            "<a href='/next#top'>下一篇</a></article></body></html>"
+        ).encode("utf-8")
+        
+        inline = RequestsScraper.parse_html(html, "https://example.com/a", "utf-8")
+        with ExtractionPool(max_workers=2) as pool:
+            results = list(pool.extract_many([(html, "https://example.com/a", "utf-8")] * 3))
+        
+        assert results == [inline] * 3
+        title, content, links = inline
+        assert title == "测试页面"
+        assert "正文内容" in content
+        assert links == ["https://example.com/nav", "https://example.com/next"]
+        print(f"✅ 解析池结果与单进程一致 ({len(results)} 页)")
+        
+        # scrape_many yields pages as they finish: a slow page comes last
+        import threading
+        import time
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+        
+        class Pages(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path == "/slow":
+                    time.sleep(1.0)
+                body = f"<html><title>{self.path}</title><article>正文 {self.path}</article></html>".encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+            
+            def log_message(self, *args):
+                pass
+        
+        server = ThreadingHTTPServer(("127.0.0.1", 0), Pages)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        try:
+            base = f"http://127.0.0.1:{server.server_port}"
+            urls = [f"{base}/slow"] + [f"{base}/p{i}" for i in range(5)] + ["http://127.0.0.1:1/closed"]
+            with ExtractionPool(max_workers=2) as pool:
+                streamed = list(RequestsScraper().scrape_many(urls, pool=pool, max_fetchers=4))
+        finally:
+            server.shutdown()
+        assert sorted(url for url, _, _ in streamed) == sorted(urls)
+        assert streamed[-1][0] == f"{base}/slow", [url for url, _, _ in streamed]
+        assert ("http://127.0.0.1:1/closed", None, None) in streamed
+        assert all(url.rsplit("/", 1)[1] in content for url, _, content in streamed if content)
+        print("✅ scrape_many 按完成顺序产出结果")
+        
+        return True
+    except Exception as e:
+        print(f"❌ 解析池测试失败: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+
+def test_raw_archive():
+    """测试原始网页归档"""
+    print("\n🧪 测试原始网页归档...")
+    
+    try:
+        import tempfile
+        import threading
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+        from web_content_system.database import RawArchive
+        from web_content_system.scrapers import RequestsScraper
+        
+        with tempfile.TemporaryDirectory() as tmp:
+            # 很小的分段上限，强制每条记录写入新分段
+            with RawArchive(tmp, max_segment_bytes=1) as archive:
+                first = archive.append("https://example.com/a", "<p>旧版本</p>".encode("utf-8"), status=200)
+                archive.append("https://example.com/b", b"<p>b</p>", encoding="utf-8")
+                latest = archive.append("https://example.com/a", "<p>新版本</p>".encode("utf-8"), status=200)
+                archive.append("https://example.com/a", b"<h1>Internal Server Error</h1>", status=500)
+                
+                record = archive.read(first)
+                assert record.body.decode("utf-8") == "<p>旧版本</p>"
+                assert record.status == 200
+                
+                rows = list(archive.iter_latest())
+                assert [row[0] for row in rows if row[1].endswith("/a")] == [latest], "错误响应不取代正常记录"
+                assert len(rows) == 2
+                segments = {row[3] for row in rows}
+                assert len(segments) == 2
+                
+                # 损坏的记录或未知编码只计为失败，不中断重新抽取
+                import reextract
+                _, _, _, segment_path, offset, length = rows[0]
+                assert reextract.reextract_record((segment_path, offset + 1, length, "u", None, "crawler"))[3]
+                assert reextract.reextract_record((segment_path, offset, length, "u", "no-such-codec", "crawler"))[3]
+                assert reextract.reextract_record((segment_path, offset, length, "u", None, "crawler"))[3] is None
+            print(f"✅ 归档写入与回读成功 ({len(rows)} 个URL, {len(segments)} 个分段)")
+        
+        # 多线程抓取共用一个归档
+        class Pages(BaseHTTPRequestHandler):
+            def do_GET(self):
+                body = f"<html><title>{self.path}</title><article>正文 {self.path}</article></html>".encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+            
+            def log_message(self, *args):
+                pass
+        
+        server = ThreadingHTTPServer(("127.0.0.1", 0), Pages)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        try:
+            urls = [f"http://127.0.0.1:{server.server_port}/p{i}" for i in range(12)]
+            with tempfile.TemporaryDirectory() as tmp, RawArchive(tmp) as archive:
+                scraper = RequestsScraper(archive=archive)
+                results = list(scraper.scrape_many(urls, max_fetchers=4))
+                assert sorted(url for url, _, _ in results) == sorted(urls)
+                assert all(content and url.rsplit("/", 1)[1] in content for url, _, content in results), results
+                assert archive.count() == len(urls), "每个线程的响应都写入归档"
+                assert len({row[1] for row in archive.iter_latest()}) == len(urls)
+        finally:
+            server.shutdown()
+        print(f"✅ 多线程抓取写入同一归档 ({len(urls)} 页)")
+        
+        return True
+    except Exception as e:
+        print(f"❌ 原始网页归档测试失败: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+
+def test_selector_cache():
+    """测试按域名学习的正文选择器"""
+    print("\n🧪 测试按域名学习的正文选择器...")
+    
+    try:
+        import sqlite3
+        from bs4 import BeautifulSoup
+        import crawler_subpages
+        from web_content_system.database import SelectorCache
+        
+        conn = sqlite3.connect(":memory:")
+        cache = SelectorCache(conn, "crawler_subpages")
+        body = "正文内容" * 20
+        wiki_page = f"<main>菜单</main><div id='mw-content-text'>{body}</div>"
+        
+        # 第一次完整搜索，记住胜出的选择器
+        text = crawler_subpages.extract_main_text(BeautifulSoup(wiki_page, "html.parser"), "wiki.example", cache)
+        assert text == body
+        assert cache.get("wiki.example") == "#mw-content-text"
+        
+        # 第二次直接命中缓存
+        crawler_subpages.extract_main_text(BeautifulSoup(wiki_page, "html.parser"), "wiki.example", cache)
+        
+        # 缓存的选择器文本过少时回退到完整搜索并更新
+        other_page = f"<article>{body}</article>"
+        text = crawler_subpages.extract_main_text(BeautifulSoup(other_page, "html.parser"), "wiki.example", cache)
+        assert text == body
+        assert cache.get("wiki.example") == "article"
+        
+        # 新连接从数据库读取已学习的结果
+        hits, misses = conn.execute("SELECT hits, misses FROM domain_selectors").fetchone()
+        assert SelectorCache(conn, "crawler_subpages").get("wiki.example") == "article"
+        assert (hits, misses) == (1, 1)
+        print("✅ 选择器学习、命中与回退正常")
+        
+        return True
+    except Exception as e:
+        print(f"❌ 选择器缓存测试失败: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+
+def test_crawl_frontier():
+    """测试可恢复的多层抓取队列"""
+    print("\n🧪 测试可恢复的多层抓取队列...")
+    
+    try:
+        import sqlite3
+        from web_content_system.crawl import CrawlFrontier
+        
+        conn = sqlite3.connect(":memory:")
+        frontier = CrawlFrontier(conn)
+        root = "https://site.example/"
+        frontier.add_root(root, "site", max_depth=1, budget=3)
+        
+        entry = frontier.pop()
+        assert entry.url == root and entry.depth == 0 and entry.tags == "site"
+        added = frontier.add_many(
+            [("https://site.example/nav", 0.0, False),
+             ("https://site.example/a-long-article", 1.0, False),
+             ("https://site.example/old", 1.0, True)],
+            root, depth=1, parent_url=root,
+        )
+        assert added == 3
+        # 超过最大深度的链接不入队，重复链接不重复入队
+        assert frontier.add_many([("https://site.example/deep", 1.0, False)], root, depth=2) == 0
+        assert not frontier.add("https://site.example/nav", root, depth=1)
+        frontier.complete(entry, ok=True)
+        
+        # 优先抓取得分高、未入库的页面
+        entry = frontier.pop()
+        assert entry.url == "https://site.example/a-long-article"
+        
+        # 模拟中断：新的队列对象恢复未完成的页面
+        frontier = CrawlFrontier(conn)
+        assert frontier.recover() == 1
+        entry = frontier.pop()
+        assert entry.url == "https://site.example/a-long-article"
+        frontier.complete(entry, ok=True)
+        frontier.complete(frontier.pop(), ok=False)
+        
+        # 预算耗尽后不再出队
+        assert frontier.pop() is None
+        assert frontier.runnable() == 0
+        assert frontier.stats() == {"done": 2, "failed": 1, "pending": 1}
+        
+        # 重新添加根地址不会重新开始已完成的抓取
+        frontier.add_root(root, "site", max_depth=1, budget=3)
+        assert frontier.runnable() == 0
+        frontier.add_root(root, "site", max_depth=1, budget=4)
+        assert frontier.runnable() == 1
+        print("✅ 深度限制、优先级、预算与断点恢复正常")
+        
+        return True
+    except Exception as e:
+        print(f"❌ 抓取队列测试失败: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+
+def test_host_scheduler():
+    """测试按主机礼貌调度"""
+    print("\n🧪 测试按主机礼貌调度...")
+    
+    try:
+        import threading
+        import time
+        from web_content_system.crawl import HostScheduler, RobotsCache
+        
+        robots = RobotsCache(fetch_text=lambda url: "User-agent: *\nCrawl-delay: 5\n" if "slow" in url else None)
+        assert robots.crawl_delay("https://slow.example/a") == 5
+        assert robots.crawl_delay("https://fast.example/a") is None
+        
+        # robots.txt 以爬虫配置的 User-Agent 请求，并按该 UA 的规则生效
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+        agents = []
+        
+        class Robots(BaseHTTPRequestHandler):
+            def do_GET(self):
+                agents.append(self.headers.get("User-Agent"))
+                body = b"User-agent: TestBot\nCrawl-delay: 7\n\nUser-agent: *\nCrawl-delay: 1\n"
+                self.send_response(200)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+            
+            def log_message(self, *args):
+                pass
+        
+        server = ThreadingHTTPServer(("127.0.0.1", 0), Robots)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        try:
+            delay = RobotsCache("TestBot/2.0 (+https://bot.example)").crawl_delay(
+                f"http://127.0.0.1:{server.server_port}/page"
+            )
+        finally:
+            server.shutdown()
+        assert agents == ["TestBot/2.0 (+https://bot.example)"], agents
+        assert delay == 7
+        
+        lock = threading.Lock()
+        started = {}
+        
+        def fetch(url):
+            with lock:
+                started.setdefault(url.split("/")[2], []).append(time.monotonic())
+            time.sleep(0.01)
+            return url.upper()
+        
+        scheduler = HostScheduler(default_delay=0.2, robots=robots, max_delay=0.3)
+        for host in ("a.example", "b.example", "slow.example"):
+            for i in range(3):
+                scheduler.push(f"https://{host}/{i}")
+        t0 = time.monotonic()
+        results = dict(scheduler.run(fetch, workers=4))
+        elapsed = time.monotonic() - t0
+        
+        assert len(results) == 9 and results["https://a.example/0"] == "HTTPS://A.EXAMPLE/0"
+        # 每个主机仍保持礼貌间隔，robots.txt 的 Crawl-delay（受上限约束）生效
+        for host, times in started.items():
+            gaps = [b - a for a, b in zip(times, times[1:])]
+            assert min(gaps) >= (0.29 if host == "slow.example" else 0.19), (host, gaps)
+        assert scheduler.delay_for("slow.example") == 0.3
+        # 多个主机交错并发：总耗时远小于串行的 9 × 0.2 秒
+        assert elapsed < 1.0, elapsed
+        print(f"✅ 3 个主机 9 个请求耗时 {elapsed:.2f}s，单主机间隔正常")
+        
+        return True
+    except Exception as e:
+        print(f"❌ 主机调度测试失败: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+
+def test_url_canonicalization():
+    """测试URL规范化、重复合并与布隆过滤器"""
+    print("\n🧪 测试URL规范化与去重...")
+    
+    try:
+        import hashlib
+        import sqlite3
+        from web_content_system.crawl import BloomFilter, SeenSet, canonical_uid, canonicalize_url
+        from web_content_system.database.migrations import migrate_canonical_uids
+        
+        variants = [
+            "https://example.com/post?a=1&b=2",
+            "http://www.example.com/post/?b=2&a=1",
+            "https://EXAMPLE.com:443/post?utm_source=feed&a=1&b=2#comments",
+        ]
+        assert {canonicalize_url(u) for u in variants} == {"https://example.com/post?a=1&b=2"}
+        assert canonical_uid(variants[0]) != canonical_uid("https://example.com/post?a=2&b=2")
+        print("✅ URL变体规范化为同一个uid")
+        
+        # 旧数据库：uid 为原始URL的md5，合并重复行
+        conn = sqlite3.connect(":memory:")
+        conn.execute("CREATE TABLE content_summary (id INTEGER PRIMARY KEY, title TEXT, created_time TEXT, "
+                     "summary TEXT, original_url TEXT, tags TEXT, uid TEXT UNIQUE, content TEXT)")
+        for i, (url, tags, content) in enumerate(
+            [(variants[0], "a", "正文"), (variants[1], "b", ""), ("https://example.com/other", "c", "x")], 1
+        ):
+            conn.execute("INSERT INTO content_summary VALUES (?, 't', 'now', 's', ?, ?, ?, ?)",
+                         (i, url, tags, hashlib.md5(url.encode()).hexdigest(), content))
+        assert migrate_canonical_uids(conn) == 1
+        assert migrate_canonical_uids(conn) == 0
+        rows = conn.execute("SELECT id, tags, content, uid FROM content_summary ORDER BY id").fetchall()
+        assert [r[:3] for r in rows] == [(2, "a,b", "正文"), (3, "c", "x")]
+        assert rows[0][3] == canonical_uid(variants[2])
+        print("✅ 迁移合并重复行并保留标签与正文")
+        
+        bloom = BloomFilter(capacity=1000, error_rate=0.01)
+        for i in range(1000):
+            bloom.add(f"key-{i}")
+        assert all(f"key-{i}" in bloom for i in range(1000))
+        false_hits = sum(f"other-{i}" in bloom for i in range(10000))
+        assert false_hits < 300, false_hits
+        seen = SeenSet(conn, "content_summary")
+        assert seen.filter_seen([canonical_uid(variants[1]), canonical_uid("https://new.example/")]) == {
+            canonical_uid(variants[1])
+        }
+        print(f"✅ 布隆过滤器误判率 {false_hits / 100:.2f}%，查库结果正确")
+        
+        return True
+    except Exception as e:
+        print(f"❌ URL规范化测试失败: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+
+def test_sitemap_discovery():
+    """测试站点地图与订阅源发现及增量判断"""
+    print("\n🧪 测试站点地图与订阅源发现...")
+    
+    try:
+        import gzip
+        import io
+        import sqlite3
+        from web_content_system.crawl import LastmodIndex, RobotsCache, SitemapDiscovery
+        
+        docs = {
+            "https://blog.example/robots.txt": b"User-agent: *\nSitemap: https://blog.example/index.xml.gz\n",
+            "https://blog.example/index.xml.gz": gzip.compress(
+                b'<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">'
+                b"<sitemap><loc>https://blog.example/posts.xml</loc></sitemap></sitemapindex>"
+            ),
+            "https://blog.example/posts.xml": (
+                b'<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">'
+                b"<url><loc>https://blog.example/old</loc><lastmod>2020-01-01</lastmod></url>"
+                b"<url><loc>https://blog.example/edited</loc><lastmod>2024-05-01T08:00:00Z</lastmod></url>"
+                b"</urlset>"
+            ),
+            "https://blog.example/feed": (
+                b"<rss><channel><item><link>https://blog.example/new</link>"
+                b"<pubDate>Wed, 01 May 2024 10:00:00 GMT</pubDate></item></channel></rss>"
+            ),
+            "https://blog.example/atom.xml": (
+                b'<feed xmlns="http://www.w3.org/2005/Atom"><entry>'
+                b'<link href="https://blog.example/edited"/><updated>2024-05-01T08:00:00Z</updated>'
+                b"</entry></feed>"
+            ),
+        }
+        
+        def open_stream(url):
+            body = docs.get(url)
+            if body is None:
+                return None
+            return gzip.GzipFile(fileobj=io.BytesIO(body)) if url.endswith(".gz") else io.BytesIO(body)
+        
+        robots = RobotsCache(fetch_text=lambda url: docs.get(url, b"").decode() or None)
+        discovery = SitemapDiscovery(robots, open_stream=open_stream, delay=0)
+        listed = list(discovery.discover("https://blog.example/"))
+        assert [e.url for e in listed] == [
+            "https://blog.example/old", "https://blog.example/edited", "https://blog.example/new",
+        ]
+        assert listed[0].lastmod == "2020-01-01 00:00:00"
+        print(f"✅ 从 robots.txt、站点地图索引和订阅源发现 {len(listed)} 个页面")
+        
+        conn = sqlite3.connect(":memory:")
+        conn.execute("CREATE TABLE content_summary (uid TEXT, created_time TEXT)")
+        index = LastmodIndex(conn)
+        index.record(listed)
+        assert [e.url for e in index.changed(listed)] == [e.url for e in listed]
+        for entry in listed:
+            index.mark_fetched(entry.url, entry.lastmod)
+        assert index.changed(listed) == []
+        
+        # 页面更新后只重新抓取变化的页面
+        listed[1].lastmod = "2024-06-01 00:00:00"
+        assert [e.url for e in index.changed(listed)] == ["https://blog.example/edited"]
+        print("✅ 仅新页面和 lastmod 更新的页面需要抓取")
+        
+        return True
+    except Exception as e:
+        print(f"❌ 站点地图发现测试失败: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+
+def test_near_duplicates():
+    """测试近似重复内容检测"""
+    print("\n🧪 测试近似重复内容检测...")
+    
+    try:
+        import random
+        import sqlite3
+        from web_content_system.database import NearDuplicateIndex
+        from web_content_system.crawl.urls import canonical_uid
+        from web_content_system.database.near_duplicates import hamming, simhash
+        
+        rng = random.Random(7)
+        vocab = [f"词{i}" for i in range(300)] + [f"word{i}" for i in range(300)]
+        article = " ".join(rng.choice(vocab) for _ in range(1500))
+        revision = article.replace(article[600:640], "本页面最后修改于2024年5月1日") + " 打印版本"
+        other = " ".join(rng.choice(vocab) for _ in range(1500))
+        
+        assert simhash("太短") is None
+        assert hamming(simhash(article), simhash(revision)) <= 3
+        assert hamming(simhash(article), simhash(other)) > 10
+        
+        conn = sqlite3.connect(":memory:")
+        conn.execute("CREATE TABLE content_summary (uid TEXT, title TEXT, summary TEXT, original_url TEXT, content TEXT)")
+        conn.execute("INSERT INTO content_summary VALUES ('u1', '条目', '已有摘要', 'https://wiki.example/a', ?)", (article,))
+        index = NearDuplicateIndex(conn)
+        assert index.backfill() == 1
+        
+        found = index.find(simhash(revision), exclude_uid="u2")
+        assert found is not None and found.uid == "u1" and found.summary == "已有摘要"
+        assert index.find(simhash(article), exclude_uid="u1") is None
+        assert index.find(simhash(other)) is None
+        print(f"✅ 修订版本匹配已有摘要 (距离 {found.distance})，不同页面不匹配")
+        
+        # 抓取流程：近似重复页面复用已存的标题与摘要，不调用 LLM
+        import os
+        import tempfile
+        from web_content_system import WebContentExtractor
+        from web_content_system.config import Config
+        
+        def no_llm(*args, **kwargs):
+            raise AssertionError("近似重复页面不应调用 LLM")
+        
+        with tempfile.TemporaryDirectory() as tmp:
+            config = Config.from_env()
+            config.database.db_path = os.path.join(tmp, "dup.db")
+            config.database.raw_archive_dir = None
+            with WebContentExtractor(config) as extractor:
+                extractor.db.save_content_summary("原始条目", "原始摘要", "https://wiki.example/a")
+                extractor.near_duplicates.add(canonical_uid("https://wiki.example/a"), "https://wiki.example/a", simhash(article))
+                extractor.processor.generate_title = no_llm
+                extractor.processor.generate_summary = no_llm
+                assert extractor.scrape_and_process("https://mirror.example/a", page=("镜像标题", revision))
+                row = extractor.conn.execute(
+                    "SELECT title, summary FROM content_summary WHERE original_url = ?", ("https://mirror.example/a",)
+                ).fetchone()
+        assert row == ("原始条目", "原始摘要"), row
+        print("✅ 抓取时近似重复页面直接复用标题和摘要")
+        
+        return True
+    except Exception as e:
+        print(f"❌ 近似重复检测测试失败: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+
+def test_recrawl_scheduler():
+    """测试按变化率的重抓调度"""
+    print("\n🧪 测试按变化率的重抓调度...")
+    
+    try:
+        import random
+        import sqlite3
+        from datetime import datetime, timedelta
+        from web_content_system.crawl import ChangeHistory, canonical_uid
+        from web_content_system.crawl.recrawl import DEFAULT_CHANGE_RATE, estimate_change_rate
+        
+        assert estimate_change_rate(0, 0, 0) == DEFAULT_CHANGE_RATE
+        assert estimate_change_rate(10, 0, 10 * 86400) < estimate_change_rate(10, 5, 10 * 86400)
+        # 每次检查都变化时，估计值高于朴素的 X / (n·I)
+        assert estimate_change_rate(10, 10, 10 * 86400) > 1 / 86400
+        
+        rng = random.Random(3)
+        vocab = [f"词{i}" for i in range(300)] + [f"word{i}" for i in range(300)]
+        page = lambda: " ".join(rng.choice(vocab) for _ in range(800))
+        static = page()
+        
+        conn = sqlite3.connect(":memory:")
+        history = ChangeHistory(conn)
+        start = datetime(2024, 1, 1)
+        news = page()
+        assert history.observe("https://news.example/", news, now=start) is False
+        history.observe("https://wiki.example/a", static, now=start)
+        for day in range(1, 8):
+            now = start + timedelta(days=day)
+            news = page()
+            assert history.observe("https://news.example/", news, now=now) is True
+            assert history.observe("https://wiki.example/a", static + f" 浏览次数 {day}", now=now) is False
+        
+        row = conn.execute("SELECT checks, changes FROM page_changes WHERE url = 'https://wiki.example/a'").fetchone()
+        assert row == (7, 0), row
+        picked = history.select(1, now=start + timedelta(days=8))
+        assert [c.url for c in picked] == ["https://news.example/"]
+        assert picked[0].change_probability > 0.9
+        print(f"✅ 频繁变化页面优先 (p={picked[0].change_probability:.2f})，计数变化不算修改")
+        
+        # 到期筛选走 next_due 索引；预算超过到期页面数时按到期先后补足
+        plan = " ".join(str(r) for r in conn.execute(
+            "EXPLAIN QUERY PLAN SELECT url FROM page_changes WHERE next_due <= ?", ("2024-01-09 00:00:00",)
+        ))
+        assert "idx_page_changes_due" in plan, plan
+        assert [c.url for c in history.select(5, now=start + timedelta(days=7, hours=1))] == [
+            "https://news.example/", "https://wiki.example/a"
+        ]
+        
+        # 初始化历史时不计算 SimHash；首次内容变化时才用库中正文计算
+        conn.execute("CREATE TABLE content_summary (uid TEXT, original_url TEXT, created_time TEXT, content TEXT)")
+        conn.execute(
+            "INSERT INTO content_summary VALUES (?, 'https://blog.example/p', '2024-01-01 00:00:00', ?)",
+            (canonical_uid("https://blog.example/p"), static),
+        )
+        assert history.seed_from_content_summary() == 1
+        assert conn.execute("SELECT simhash FROM page_changes WHERE url = 'https://blog.example/p'").fetchone() == (None,)
+        assert history.observe("https://blog.example/p", static + " 浏览次数 9", now=start + timedelta(days=1)) is False
+        assert conn.execute("SELECT simhash FROM page_changes WHERE url = 'https://blog.example/p'").fetchone()[0] is not None
+        
+        # 旧表自动补充 change_rate / next_due 列
+        old = sqlite3.connect(":memory:")
+        old.execute(
+            "CREATE TABLE page_changes (uid TEXT PRIMARY KEY, url TEXT NOT NULL, content_hash TEXT, simhash INTEGER, "
+            "first_seen TEXT NOT NULL, last_checked TEXT NOT NULL, last_changed TEXT, checks INTEGER NOT NULL DEFAULT 0, "
+            "changes INTEGER NOT NULL DEFAULT 0, observed_seconds REAL NOT NULL DEFAULT 0)"
+        )
+        old.execute("INSERT INTO page_changes (uid, url, first_seen, last_checked) VALUES ('u', 'https://old.example/', "
+                    "'2024-01-01 00:00:00', '2024-01-01 00:00:00')")
+        assert [c.url for c in ChangeHistory(old).select(1, now=start + timedelta(days=30))] == ["https://old.example/"]
+        print("✅ 到期筛选使用索引，SimHash 按需计算，旧表自动迁移")
+        
+        return True
+    except Exception as e:
+        print(f"❌ 重抓调度测试失败: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+
+def test_work_queue():
+    """测试共享工作队列"""
+    print("\n🧪 测试共享工作队列...")
+    
+    try:
+        import os
+        import tempfile
+        import threading
+        import time
+        from web_content_system.database import WorkQueue
+        
+        with tempfile.TemporaryDirectory() as tmp:
+            db_path = os.path.join(tmp, "queue.db")
+            queue = WorkQueue(db_path, worker_id="a", max_attempts=2)
+            urls = [f"https://site{i % 5}.example/p{i}" for i in range(40)]
+            assert queue.enqueue_many([(u, {"tags": "t"}) for u in urls]) == 40
+            assert queue.enqueue("https://www.site0.example/p0/") is False  # 规范化后重复
+            
+            # 多个worker并发领取，不重复
+            claimed, lock = [], threading.Lock()
+            def drain(name):
+                q = WorkQueue(db_path, worker_id=name)
+                while True:
+                    item = q.lease()
+                    if item is None:
+                        break
+                    with lock:
+                        claimed.append(item.url)
+                    assert q.complete(item)
+                q.close()
+            threads = [threading.Thread(target=drain, args=(f"w{n}",)) for n in range(4)]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+            assert sorted(claimed) == sorted(urls), "每个任务恰好被处理一次"
+            assert queue.stats()["done"] == 40
+            
+            # 租约过期后重新分配；超过重试次数进入死信
+            short = WorkQueue(db_path, worker_id="b", lease_seconds=0.05)
+            short.enqueue("https://flaky.example/")
+            first = short.lease()
+            time.sleep(0.1)
+            other = WorkQueue(db_path, worker_id="c")
+            taken = other.lease()
+            assert taken.url == "https://flaky.example/" and taken.attempts == 2
+            assert not short.heartbeat(first) and not short.complete(first)
+            assert short.fail(first, "超时") is None, "失去租约后不能改写他人的任务"
+            assert other.complete(taken)
+            
+            q = WorkQueue(db_path, worker_id="d", max_attempts=2)
+            q.enqueue("https://broken.example/")
+            item = q.lease()
+            assert q.fail(item, "HTTP 500") == "pending"
+            item = q.lease()
+            assert item.attempts == 2 and q.fail(item, "HTTP 500") == "dead"
+            assert [row[1] for row in q.dead_letters()] == ["https://broken.example/"]
+            assert q.requeue_dead() == 1
+            item = q.lease()
+            assert item.url == "https://broken.example/" and item.attempts == 1
+            # 预算用尽时交还任务，不消耗重试次数
+            assert q.release(item) and q.lease().attempts == 1
+            
+            # 重试无益的任务直接进入死信并保留原因
+            sq = WorkQueue(db_path, worker_id="e", max_attempts=3)
+            sq.enqueue("https://short.example/")
+            assert sq.fail(sq.lease(), "skipped: content too short", retry=False) == "dead"
+            assert [row[1:] for row in sq.dead_letters()] == [("https://short.example/", 1, "skipped: content too short")]
+            sq.close()
+            for wq in (queue, short, other, q):
+                wq.close()
+        print("✅ 并发领取无重复，租约过期回收，失败重试后进入死信")
+        
+        # 摘要未写入数据库时 process_item 抛出异常，任务会被重试
+        import sqlite3
+        import fetch_from_params as ffp
+        import worker
+        from web_content_system.database.work_queue import WorkItem
+        
+        conn = sqlite3.connect(":memory:")
+        conn.execute("CREATE TABLE content_summary (uid TEXT)")
+        patched = {
+            "fetch_content": lambda url: ("标题", "正文" * ffp.MIN_CONTENT_LEN),
+            "generate_summary": lambda title, content, **kwargs: "摘要",
+            "save_to_db": lambda *args, **kwargs: False,
+        }
+        saved = {name: getattr(ffp, name) for name in patched}
+        try:
+            for name, value in patched.items():
+                setattr(ffp, name, value)
+            item = WorkItem(1, "scrape", "https://lost.example/", {}, 1, "w")
+            try:
+                worker.process_item(conn, item)
+                raise AssertionError("未保存的摘要不应报告成功")
+            except RuntimeError:
+                pass
+            ffp.fetch_content = lambda url: ("标题", "太短")
+            try:
+                worker.process_item(conn, item)
+                raise AssertionError("内容过短应跳过")
+            except worker.SkipItem:
+                pass
+        finally:
+            for name, value in saved.items():
+                setattr(ffp, name, value)
+        print("✅ 保存失败会重试，内容过短进入死信")
+        
+        return True
+    except Exception as e:
+        print(f"❌ 工作队列测试失败: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+
+def test_job_store():
+    """测试批量任务状态表"""
+    print("\n🧪 测试批量任务状态表...")
+    
+    try:
+        import json
+        import os
+        import sqlite3
+        import tempfile
+        from web_content_system.database import JobStore
+        
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "grab_params.json")
+            items = [
+                {"url": "https://a.example/1", "tags": "AI", "done": True},
+                {"url": "https://a.example/2", "tags": "", "done": False, "note": "保留"},
+                {"url": "https://b.example/3", "tags": "NVIDIA", "done": False},
+            ]
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(items, f, indent=2, ensure_ascii=False)
+            
+            jobs = JobStore(sqlite3.connect(os.path.join(tmp, "jobs.db")))
+            assert jobs.import_json(path) == 3
+            assert jobs.import_json(path) == 0  # 文件未变化，不重复导入
+            
+            first, second = list(jobs.pending())
+            jobs.start(first)
+            jobs.finish(first)
+            jobs.start(second)  # 模拟运行中崩溃
+            assert [j.url for j in jobs.pending()] == ["https://b.example/3"]
+            jobs.fail(second, "HTTP 503")
+            assert jobs.counts() == {"pending": 0, "running": 0, "done": 2, "failed": 1}
+            assert [j.attempts for j in jobs.pending()] == [1]
+            assert list(jobs.pending(max_attempts=1)) == []
+            jobs.start(second)  # 达到花费上限：交还任务，不计入尝试次数
+            jobs.release(second)
+            assert [(j.url, j.attempts) for j in jobs.pending()] == [("https://b.example/3", 1)]
+            assert jobs.counts() == {"pending": 1, "running": 0, "done": 2, "failed": 0}
+            
+            assert jobs.export_json(path) == 3
+            with open(path, encoding="utf-8") as f:
+                exported = json.load(f)
+            assert [e["done"] for e in exported] == [True, True, False]
+            assert exported[1]["note"] == "保留"
+            items[2]["done"] = True
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(items, f, indent=2, ensure_ascii=False)
+            assert jobs.import_json(path) == 0 and jobs.counts()["done"] == 3
+            
+            # 任务按来源文件区分：另一个文件的任务不会导出到本文件，删除的条目不会复现
+            other = os.path.join(tmp, "other.json")
+            with open(other, "w", encoding="utf-8") as f:
+                json.dump([{"url": "https://c.example/4", "tags": ""}, {"url": "https://a.example/2"}], f)
+            assert jobs.import_json(other) == 1
+            assert [j.url for j in jobs.pending(path=other)] == ["https://c.example/4"]
+            assert list(jobs.pending(path=path)) == []
+            assert jobs.counts(other) == {"pending": 1, "running": 0, "done": 1, "failed": 0}
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(items[1:], f)  # 删除第一条
+            jobs.import_json(path)
+            assert jobs.export_json(path) == 2
+            with open(path, encoding="utf-8") as f:
+                assert [e["url"] for e in json.load(f)] == ["https://a.example/2", "https://b.example/3"]
+            assert jobs.export_json(other) == 2
+            with open(other, encoding="utf-8") as f:
+                assert [e["url"] for e in json.load(f)] == ["https://c.example/4", "https://a.example/2"]
+        print("✅ 导入/导出兼容 grab_params.json，崩溃后只恢复未完成任务，按文件隔离")
+        
+        return True
+    except Exception as e:
+        print(f"❌ 任务状态表测试失败: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+
+def test_failure_log():
+    """测试失败分类与退避重试"""
+    print("\n🧪 测试失败分类与退避重试...")
+    
+    try:
+        import sqlite3
+        import requests
+        from web_content_system.database import FailureLog
+        from web_content_system.database.failure_log import classify, retry_after
+        
+        def http_error(status, headers=None):
+            resp = requests.Response()
+            resp.status_code = status
+            resp.headers.update(headers or {})
+            return requests.HTTPError(f"{status}", response=resp)
+        
+        assert classify(http_error(503)) == "http_5xx"
+        assert classify(http_error(429)) == "http_429"
+        assert classify(http_error(404)) == "http_4xx"
+        assert classify(requests.ReadTimeout()) == "timeout"
+        assert classify(requests.ConnectionError()) == "connection"
+        assert retry_after(http_error(429, {"Retry-After": "7200"})) == 7200
+        
+        now = [1_000_000.0]
+        log = FailureLog(sqlite3.connect(":memory:"), clock=lambda: now[0], jitter=0)
+        url = "https://slow.example/a"
+        first = log.record(url, "crawler", "timeout", "read timed out", {"tags": "AI"})
+        second = log.record(url, "crawler", "timeout", "read timed out")
+        assert first - now[0] == 60 and second - now[0] == 120, "指数退避"
+        assert log.record("https://gone.example/", "crawler", "http_4xx", "404") is None, "4xx不重试"
+        assert log.record("https://busy.example/", "params", "http_429", "", retry_after=7200) - now[0] == 7200
+        
+        assert log.due() == []
+        now[0] += 121
+        due = log.due()
+        assert [item.url for item in due] == [url] and due[0].payload == {"tags": "AI"}
+        assert log.due(source="params") == []
+        assert log.resolve(url, "crawler") and log.due() == []
+        assert log.stats()["http_4xx"] == {"gave_up": 1}
+        
+        # retry.py: 单条出错不影响其余条目，达到花费上限时停止并保留到期条目
+        import retry as retry_module
+        from web_content_system.llm_clients import BudgetExceeded
+        
+        class FakeRetrier:
+            def __init__(self, outcomes):
+                self.outcomes = outcomes
+            
+            def retry(self, item):
+                outcome = self.outcomes[item.url]
+                if isinstance(outcome, Exception):
+                    raise outcome
+                return outcome
+        
+        pause, retry_module.PAUSE = retry_module.PAUSE, 0
+        for name in ("a", "b", "c"):
+            log.record(f"https://retry.example/{name}", "extractor", "timeout", "read timed out")
+        now[0] += 61
+        due = log.due(source="extractor")
+        outcomes = {
+            "https://retry.example/a": RuntimeError("boom"),
+            "https://retry.example/b": True,
+            "https://retry.example/c": BudgetExceeded("cost cap reached"),
+        }
+        try:
+            assert retry_module.retry_due(FakeRetrier(outcomes), log, due) == 1
+        finally:
+            retry_module.PAUSE = pause
+        still_due = {item.url: item.attempts for item in log.due(source="extractor")}
+        assert "https://retry.example/a" not in still_due, "异常记为一次失败，推迟下次重试"
+        assert still_due.get("https://retry.example/c") == 1, "达到花费上限的条目保持到期"
+        print("✅ 按类别分类，指数退避，4xx放弃，成功后解除")
+        
+        return True
+    except Exception as e:
+        print(f"❌ 失败重试测试失败: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+
+def test_adaptive_limits():
+    """测试AIMD自适应并发限制"""
+    print("\n🧪 测试AIMD自适应并发限制...")
+    
+    try:
+        import requests
+        from web_content_system.adaptive import AIMDLimiter, is_overload
+        from web_content_system.crawl import HostScheduler
+        from web_content_system.llm_clients import BaseLLMClient, FallbackSummarizer
+        from web_content_system.processors import ContentProcessor
+        
+        def response(status):
+            resp = requests.Response()
+            resp.status_code = status
+            return resp
+        
+        assert is_overload(response(429)) and is_overload(requests.HTTPError(response=response(503)))
+        assert is_overload(requests.ReadTimeout()) and not is_overload(response(200))
+        
+        now = [0.0]
+        limiter = AIMDLimiter(max_limit=8, clock=lambda: now[0])
+        for _ in range(40):
+            assert limiter.try_acquire()
+            now[0] += 1
+            limiter.release(0.1)
+        assert limiter.limit == 8, "健康时加性增长到上限"
+        limiter.release(None, overloaded=True)
+        limiter.release(None, overloaded=True)
+        assert limiter.limit == 4, "过载时乘性减半，同一往返内只减一次"
+        for _ in range(2):
+            now[0] += 1
+            limiter.try_acquire()
+            limiter.release(0.5)
+        assert limiter.limit == 2, "平滑延迟超过基线两倍也算过载"
+        assert limiter.snapshot()["overloads"] == 3
+        
+        def fetch(url):
+            return response(429 if "busy" in url else 200)
+        
+        scheduler = HostScheduler(default_delay=0, max_per_host=4, max_delay=2)
+        for i in range(20):
+            scheduler.push(f"https://ok.example/{i}")
+        for i in range(2):
+            scheduler.push(f"https://busy.example/{i}")
+        assert len(dict(scheduler.run(fetch, workers=8))) == 22
+        metrics = scheduler.metrics()
+        assert metrics["ok.example"]["limit"] > 1 and metrics["ok.example"]["delay"] == 0
+        assert metrics["busy.example"]["limit"] == 1 and scheduler.delay_for("busy.example") == 2
+        
+        class RateLimited(BaseLLMClient):
+            name = "busy-llm"
+            
+            def complete(self, prompt, max_tokens=None):
+                self.last_error = requests.HTTPError(response=response(429))
+                return None
+        
+        processor = ContentProcessor()
+        processor.llm_clients = [RateLimited(), FallbackSummarizer()]
+        assert processor.generate_summary("这是一段足够长的测试内容，用于生成回退摘要。" * 3, "标题")
+        assert processor.limit_metrics()["busy-llm"]["overloads"] == 1
+        assert "fallback" not in processor.limit_metrics()
+        print("✅ 加性增长、乘性退让，按主机和LLM后端分别统计")
+        
+        return True
+    except Exception as e:
+        print(f"❌ 自适应并发测试失败: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+
+def test_long_document_summary():
+    """测试按token分块的长文档map-reduce摘要"""
+    print("\n🧪 测试长文档map-reduce摘要...")
+    
+    try:
+        import threading
+        from web_content_system.config import APIConfig
+        from web_content_system.llm_clients import (
+            BaseLLMClient, FallbackSummarizer, MapReduceSummarizer, count_tokens, split_by_tokens,
+        )
+        from web_content_system.processors import ContentProcessor
+        
+        assert count_tokens("人工智能") == 4 and count_tokens("abcd" * 4) == 4
+        
+        paragraphs = [f"第{i}段：" + "机器学习改变了软件开发的方式。" * 6 for i in range(12)]
+        content = "\n".join(paragraphs)
+        chunks = split_by_tokens(content, 250)
+        assert len(chunks) > 1 and all(count_tokens(c) <= 250 for c in chunks)
+        assert "".join(chunks).replace("\n", "") == content.replace("\n", ""), "分块不丢内容"
+        
+        lock = threading.Lock()
+        calls = {"a": [], "b": []}
+        
+        def completer(name):
+            def complete(prompt):
+                with lock:
+                    calls[name].append(prompt)
+                return "全文摘要" if "各部分按顺序排列" in prompt else f"要点{len(calls[name])}"
+            return complete
+        
+        summarizer = MapReduceSummarizer([completer("a"), completer("b")], chunk_tokens=250)
+        assert summarizer.summarize(content, "标题") == "全文摘要"
+        mapped = [p for p in calls["a"] + calls["b"] if "部分。" in p]
+        assert len(mapped) == len(chunks) and calls["a"] and calls["b"], "分块并行分配到多个后端"
+        assert all(f"第{i}段" in "".join(mapped) for i in range(12)), "全文都被覆盖"
+        
+        calls = {"a": [], "b": []}
+        sampled = MapReduceSummarizer([completer("a")], chunk_tokens=250, token_budget=500)
+        sampled.summarize(content, "标题")
+        mapped = [p for p in calls["a"] if "部分。" in p]
+        assert len(mapped) == 2 and "第0段" in mapped[0] and "第11段" in mapped[1], "超出预算时均匀抽样"
+        
+        class Echo(BaseLLMClient):
+            name = "echo"
+            
+            def complete(self, prompt, max_tokens=None):
+                return "合并摘要" if "各部分按顺序排列" in prompt else "分块要点"
+        
+        processor = ContentProcessor(APIConfig(chunk_tokens=250))
+        processor.llm_clients = [Echo(), FallbackSummarizer()]
+        assert processor.generate_summary(content, "标题") == "合并摘要"
+        assert processor.limit_metrics()["echo"]["successes"] == len(chunks) + 1
+        print(f"✅ {count_tokens(content)} tokens 分为 {len(chunks)} 块并行摘要后合并")
+        
+        return True
+    except Exception as e:
+        print(f"❌ 长文档摘要测试失败: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+
+def test_usage_accounting():
+    """测试LLM token用量、成本记录与预算上限"""
+    print("\n🧪 测试LLM用量与预算...")
+    
+    try:
+        import sqlite3
+        from web_content_system.config import APIConfig
+        from web_content_system.database import UsageLog
+        from web_content_system.llm_clients import (
+            BaseLLMClient, BudgetExceeded, FallbackSummarizer, Usage, UsageMeter, count_tokens,
+        )
+        from web_content_system.llm_clients.usage import cost_of
+        from web_content_system.processors import ContentProcessor
+        
+        assert abs(cost_of("deepseek-chat", 1_000_000, 0) - 0.27) < 1e-9
+        assert cost_of("llama3", 10_000, 10_000) == 0, "本地模型不计费"
+        
+        meter = UsageMeter(cost_cap=0.01)
+        meter.add(Usage("deepseek", "deepseek-chat", 10_000, 2_000))
+        assert meter.calls == 1 and meter.totals()["deepseek/deepseek-chat"]["prompt_tokens"] == 10_000
+        try:
+            meter.check(0.01)
+            assert False, "超出预算应抛出BudgetExceeded"
+        except BudgetExceeded:
+            pass
+        
+        conn = sqlite3.connect(":memory:")
+        log = UsageLog(conn, run_id="run-1")
+        cost = log.record("https://example.com/a", [
+            Usage("deepseek", "deepseek-chat", 1000, 200),
+            Usage("ollama", "llama3", 800, 150, estimated=True),
+        ], "crawler")
+        UsageLog(conn, run_id="run-2").record("https://EXAMPLE.com/a/", [Usage("deepseek", "deepseek-chat", 500, 100)], "retry")
+        assert abs(cost - cost_of("deepseek-chat", 1000, 200)) < 1e-12
+        assert log.for_url("https://example.com/a")["calls"] == 3, "按规范化URL汇总"
+        assert log.totals()["deepseek/deepseek-chat"]["calls"] == 1, "只汇总本次运行"
+        assert log.totals(all_runs=True)["deepseek/deepseek-chat"]["prompt_tokens"] == 1500
+        conn.close()
+        
+        prompts = []
+        
+        class Metered(BaseLLMClient):
+            name = "metered"
+            model = "deepseek-chat"
+            
+            def complete(self, prompt, max_tokens=None):
+                prompts.append(prompt)
+                self.record_usage(prompt, "摘要", prompt_tokens=count_tokens(prompt), completion_tokens=50)
+                return "摘要"
+        
+        content = "机器学习改变了软件开发的方式。" * 400
+        processor = ContentProcessor(APIConfig(input_token_ceiling=300, cost_cap=0.0005))
+        processor.llm_clients = [Metered(), FallbackSummarizer()]
+        usages = []
+        assert processor.generate_summary(content, "标题", on_usage=usages.append) == "摘要"
+        assert len(prompts) == 1 and count_tokens(prompts[0]) < 500, "输入裁剪到token上限"
+        assert usages and processor.usage_totals()["metered/deepseek-chat"]["completion_tokens"] == 50
+        
+        spent = 0
+        try:
+            while True:
+                processor.generate_summary(content, "标题")
+                spent += 1
+        except BudgetExceeded:
+            pass
+        assert processor.meter.cost <= 0.0005 and spent < 20, "达到成本上限后停止"
+        print(f"✅ {processor.meter.calls} 次调用，成本 ${processor.meter.cost:.6f}，上限后停止")
+        
+        # 手工录入的标题与摘要调用同样记入 llm_usage
+        import os
+        import tempfile
+        from web_content_system import WebContentExtractor
+        from web_content_system.config import Config
+        
+        with tempfile.TemporaryDirectory() as tmp:
+            config = Config.from_env()
+            config.database.db_path = os.path.join(tmp, "manual.db")
+            config.database.raw_archive_dir = None
+            with WebContentExtractor(config) as extractor:
+                extractor.processor.llm_clients = [Metered(), FallbackSummarizer()]
+                extractor.manual_input("标题", "手工录入的正文内容。" * 20, "笔记")
+                rows = extractor.conn.execute(
+                    "SELECT source, COUNT(*), SUM(completion_tokens) FROM llm_usage GROUP BY source"
+                ).fetchall()
+        assert rows == [("manual", 2, 100)], rows
+        print("✅ 手工录入的LLM用量已记录")
+        
+        return True
+    except Exception as e:
+        print(f"❌ LLM用量测试失败: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+
+def test_local_model_pool():
+    """测试本地模型客户端的连接池、keep_alive与并行批量请求"""
+    print("\n🧪 测试本地模型连接池...")
+    
+    try:
+        import json
+        import threading
+        import time
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+        from web_content_system.config import APIConfig
+        from web_content_system.llm_clients import LocalModelClient
+        from web_content_system.processors import ContentProcessor
+        
+        lock = threading.Lock()
+        seen = {"active": 0, "peak": 0, "ports": set(), "paths": set(), "keep_alive": set()}
+        
+        class FakeOllama(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                with lock:
+                    seen["active"] += 1
+                    seen["peak"] = max(seen["peak"], seen["active"])
+                    seen["ports"].add(self.client_address[1])
+                    seen["paths"].add(self.path)
+                    seen["keep_alive"].add(body.get("keep_alive"))
+                time.sleep(0.05)
+                with lock:
+                    seen["active"] -= 1
+                answer = json.dumps({
+                    "response": "答:" + body.get("prompt", ""), "prompt_eval_count": 7, "eval_count": 3,
+                }).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(answer)))
+                self.end_headers()
+                self.wfile.write(answer)
+            
+            def log_message(self, *args):
+                pass
+        
+        server = ThreadingHTTPServer(("127.0.0.1", 0), FakeOllama)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        try:
+            config = APIConfig(
+                ollama_api_url=f"http://127.0.0.1:{server.server_port}/api/generate",
+                ollama_keep_alive="-1",
+                ollama_parallel=4,
+            )
+            client = LocalModelClient(config)
+            assert client.load()
+            usages = []
+            prompts = [f"p{i}" for i in range(12)]
+            start = time.monotonic()
+            answers = client.complete_many(prompts, max_tokens=50, on_usage=usages.append)
+            elapsed = time.monotonic() - start
+            client.close()
+        finally:
+            server.shutdown()
+            server.server_close()
+        
+        assert answers == [f"答:p{i}" for i in range(12)], "按顺序返回"
+        assert len(usages) == 12 and usages[0].prompt_tokens == 7 and not usages[0].estimated
+        assert seen["peak"] == 4, f"并发应达到服务端并行槽位: {seen['peak']}"
+        assert len(seen["ports"]) <= 4, f"连接应复用: {len(seen['ports'])}"
+        assert seen["paths"] == {"/api/generate"} and seen["keep_alive"] == {-1}
+        
+        processor = ContentProcessor(APIConfig(ollama_parallel=3, max_concurrency=8))
+        assert processor.limiters.get("ollama").limit == 3, "本地模型直接使用全部槽位"
+        assert processor.limiters.get("deepseek").max_limit == 8
+        print(f"✅ 12个提示 {elapsed:.2f}s，峰值并发 {seen['peak']}，连接 {len(seen['ports'])} 个")
+        
+        return True
+    except Exception as e:
+        print(f"❌ 本地模型连接池测试失败: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+
+def test_batch_summaries():
+    """测试离线批量摘要：提交、轮询、幂等写回与中断恢复"""
+    print("\n🧪 测试离线批量摘要...")
+    
+    try:
+        import argparse
+        import tempfile
+        from pathlib import Path
+        import batch_summarize
+        import crawler_subpages
+        from benchmarks.llm_stub_server import StubServer
+        from web_content_system.config import APIConfig
+        from web_content_system.database import BatchStore, UsageLog
+        from web_content_system.llm_clients.usage import cost_of
+        
+        with tempfile.TemporaryDirectory() as tmp, StubServer(batch_polls=2) as stub:
+            batch_summarize.BATCH_DIR = Path(tmp) / "batches"
+            conn = crawler_subpages.ensure_schema(Path(tmp) / "batch.db")
+            urls = [f"https://example.com/post/{i}" for i in range(3)]
+            for i, url in enumerate(urls):
+                crawler_subpages.insert_row(conn, url, f"标题{i}", "旧摘要", "blog", content="正文内容。" * 50)
+            store = BatchStore(conn)
+            usage_log = UsageLog(conn)
+            config = APIConfig(openai_api_key="stub", openai_base_url=stub.url + "/v1", openai_model="gpt-4o-mini")
+            args = argparse.Namespace(provider="openai", limit=0, tag="", redo=False, size=2)
+            clients = {}
+            
+            assert batch_summarize.submit(conn, store, clients, config, args) == 2, "3行按每批2行提交"
+            assert batch_summarize.submit(conn, store, clients, config, args) == 0, "已在批次中的行不重复提交"
+            assert batch_summarize.collect(conn, store, clients, config, usage_log) == 2, "首次轮询仍在运行"
+            
+            # Interrupted after the batch was recorded, before it reached the provider.
+            extra = store.create("openai", "gpt-4o-mini", str(batch_summarize.BATCH_DIR), [crawler_subpages.uid_for(urls[0])])
+            assert batch_summarize.collect(conn, store, clients, config, usage_log) == 1, "未提交批次在轮询时补交"
+            assert store.open_batches()[0].id == extra.id and store.open_batches()[0].remote_id
+            
+            summaries = [row[0] for row in conn.execute("SELECT summary FROM content_summary ORDER BY id")]
+            assert all(s.startswith("（模拟摘要）") for s in summaries), summaries
+            
+            while batch_summarize.collect(conn, store, clients, config, usage_log):
+                pass
+            assert not store.open_batches()
+            
+            # 无法发送的已记录批次（超过单批上限）被关闭，行可重新提交
+            from web_content_system.llm_clients import batch as batch_module
+            limit, batch_module.MAX_REQUESTS = batch_module.MAX_REQUESTS, 0
+            try:
+                store.create("openai", "gpt-4o-mini", str(batch_summarize.BATCH_DIR), [crawler_subpages.uid_for(urls[1])])
+                assert batch_summarize.collect(conn, store, clients, config, usage_log) == 0
+            finally:
+                batch_module.MAX_REQUESTS = limit
+            assert not store.open_batches()
+            
+            client = clients["openai"]
+            first = stub.state.batches[next(iter(stub.state.batches))]
+            again = store.apply(list(client.results(first["output_file_id"])))
+            assert again[:2] == (0, 0), "重复读取输出文件不重复写入"
+            
+            totals = usage_log.totals()["openai/gpt-4o-mini"]
+            assert totals["calls"] == 4
+            full = cost_of("gpt-4o-mini", totals["prompt_tokens"], totals["completion_tokens"])
+            assert abs(totals["cost"] - full / 2) < 1e-12, "批量调用半价"
+            assert stub.state.requests.count("POST /v1/chat/completions") == 0, "不走交互式接口"
+            conn.close()
+        
+        print(f"✅ 3行分2批提交，4次批量结果写回，成本 ${totals['cost']:.6f}")
+        return True
+    except Exception as e:
+        print(f"❌ 离线批量摘要测试失败: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+
+def test_hedged_requests():
+    """测试慢后端的对冲请求与对冲比例上限"""
+    print("\n🧪 测试对冲请求...")
+    
+    try:
+        import time
+        from web_content_system.config import APIConfig
+        import os
+        import tempfile
+        from web_content_system import WebContentExtractor
+        from web_content_system.config import Config
+        from web_content_system.hedging import HedgePolicy, hedged_call
+        from web_content_system.llm_clients import BaseLLMClient, FallbackSummarizer
+        from web_content_system.processors import ContentProcessor
+        
+        policy = HedgePolicy(min_samples=20)
+        assert policy.delay("a") == policy.initial_delay, "样本不足时用初始延迟"
+        for i in range(1, 21):
+            policy.observe("a", i / 100)
+        assert abs(policy.delay("a") - 0.20) < 1e-9, "按p95延迟对冲"
+        
+        def answer_after(seconds, text):
+            def run(settled, hedge):
+                time.sleep(seconds)
+                return text
+            return run
+        
+        attempts = [("a", answer_after(0.3, "慢")), ("b", answer_after(0.01, "快"))]
+        assert hedged_call(attempts, HedgePolicy(initial_delay=0.05)) == "快"
+        assert hedged_call(attempts, HedgePolicy(initial_delay=0.05), healthy=lambda key: False) == "慢", \
+            "备用后端不健康时不对冲"
+        assert hedged_call([("a", answer_after(0, None)), ("b", answer_after(0, "备用"))], HedgePolicy()) == "备用"
+        
+        class Sleepy(BaseLLMClient):
+            def __init__(self, name, seconds, answer):
+                self.name, self.seconds, self.answer = name, seconds, answer
+            
+            def complete(self, prompt, max_tokens=None):
+                time.sleep(self.seconds)
+                return self.answer
+        
+        processor = ContentProcessor(APIConfig(hedge=True, hedge_initial_delay=0.05, hedge_max_rate=0.25))
+        processor.llm_clients = [Sleepy("slow", 0.3, "慢摘要"), Sleepy("fast", 0.01, "快摘要"), FallbackSummarizer()]
+        content = "这是一段足够长的测试内容，用于生成摘要。" * 3
+        
+        start = time.monotonic()
+        assert processor.generate_summary(content, "标题") == "快摘要"
+        assert time.monotonic() - start < 0.25, "主后端超过对冲延迟后由备用后端回答"
+        summaries = [processor.generate_summary(content, "标题") for _ in range(7)]
+        metrics = processor.hedge_metrics()
+        assert metrics["calls"] == 8 and metrics["hedges"] == 3 == metrics["hedge_wins"], metrics
+        assert summaries.count("快摘要") == 2 and summaries.count("慢摘要") == 5, "对冲比例受上限约束"
+        assert ContentProcessor().hedge_metrics() is None, "默认不对冲"
+        
+        # A page does not wait for the losing call; settle() records it later.
+        with tempfile.TemporaryDirectory() as tmp:
+            config = Config.from_env()
+            config.database.db_path = os.path.join(tmp, "hedge.db")
+            config.database.raw_archive_dir = None
+            config.api.hedge, config.api.hedge_initial_delay, config.api.routing = True, 0.05, False
+            with WebContentExtractor(config) as extractor:
+                extractor.processor.llm_clients = [
+                    Sleepy("slow", 0.3, "慢摘要"), Sleepy("fast", 0.01, "快摘要"), FallbackSummarizer(),
+                ]
+                extractor.processor.generate_title = lambda *args, **kwargs: "标题"
+                start = time.monotonic()
+                assert extractor.scrape_and_process("https://hedge.example/a", page=("标题", content * 3))
+                assert time.monotonic() - start < 0.25, "页面不等待落败的调用"
+                assert extractor.settle(), "settle() 等待落败的调用"
+                extractor.calls.flush()
+                providers = sorted(call["provider"] for call in extractor.calls.for_url("https://hedge.example/a"))
+        assert providers == ["fast", "slow"], providers
+        print(f"✅ {metrics['calls']} 次调用中对冲 {metrics['hedges']} 次，均由备用后端先回答")
+        
+        return True
+    except Exception as e:
+        print(f"❌ 对冲请求测试失败: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+
+def test_llm_stub_benchmark():
+    """测试LLM桩服务的延迟/故障注入、录制回放与基准测试"""
+    print("\n🧪 测试LLM桩服务与基准测试...")
+    
+    try:
+        import argparse
+        import random
+        import tempfile
+        from pathlib import Path
+        import requests
+        from benchmarks import bench_llm
+        from benchmarks.llm_stub_server import Cassette, Profile, StubServer, sample_latency
+        
+        profile = Profile.parse(["latency=lognormal(0.3,0.5)", "rate_limit=0.1", "max_concurrency=2"])
+        assert profile.rate_limit == 0.1 and profile.max_concurrency == 2
+        draws = [sample_latency(profile.latency, random.Random("seed")) for _ in range(2)]
+        assert draws[0] == draws[1] > 0, "同一种子抽样结果相同"
+        
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "cassette.jsonl"
+            Cassette(path).add(Cassette.key("chat", "你好"), "chat", {"choices": [{"message": {"content": "录制的回答"}}]}, 0.01)
+            profiles = {"deepseek": Profile(rate_limit=1.0, retry_after=0.01), "flaky": Profile(error_rate=1.0)}
+            with StubServer(profiles=profiles, cassette=Cassette(path)) as stub:
+                chat = {"messages": [{"role": "user", "content": "你好"}]}
+                limited = requests.post(stub.url + "/deepseek/v1/chat/completions", json=chat)
+                assert limited.status_code == 429 and limited.headers["retry-after-ms"] == "10"
+                assert requests.post(stub.url + "/flaky/v1/chat/completions", json=chat).status_code == 500
+                replayed = requests.post(stub.url + "/v1/chat/completions", json=chat).json()
+                assert replayed["choices"][0]["message"]["content"] == "录制的回答", "按提示词回放录制的回答"
+                stats = requests.get(stub.url + "/stub/stats").json()
+                assert stats["deepseek"]["rate_limited"] == 1 and stats["openai"]["replayed"] == 1
+        
+        args = argparse.Namespace(
+            scenario="healthy", target="processor", documents=6, workers=3, seed=7,
+            max_concurrency=4, chunk_tokens=100_000, hedge=False, hedge_max_rate=0.1, routing=False,
+        )
+        profiles = {"deepseek": Profile(rate_limit=0.5, retry_after=0.01), "openai": Profile(), "ollama": Profile()}
+        results = [bench_llm.run(args, profiles, Cassette(), {}) for _ in range(2)]
+        deepseek, openai = results[0]["backends"]["deepseek"], results[0]["backends"]["openai"]
+        assert deepseek["rate_limited"] > 0 and deepseek["retries"] == deepseek["requests"] - deepseek["calls"]
+        assert deepseek["answered"] + openai["answered"] == 6 and results[0]["fallbacks"] == 0
+        faults = [{name: (b["requests"], b["rate_limited"]) for name, b in r["backends"].items()} for r in results]
+        assert faults[0] == faults[1], "同一种子两次运行的故障相同"
+        print(f"✅ {deepseek['rate_limited']} 次429，SDK重试 {deepseek['retries']} 次，两次运行一致")
+        
+        return True
+    except Exception as e:
+        print(f"❌ LLM桩服务测试失败: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+
+def test_textrank_summarizer():
+    """测试TextRank抽取式摘要"""
+    print("\n🧪 测试TextRank抽取式摘要...")
+    
+    try:
+        import time
+        
+        from web_content_system.llm_clients import FallbackSummarizer, TextRankSummarizer, split_sentences
+        from web_content_system.scrapers import BaseScraper
+        
+        assert split_sentences("第一句。第二句！“第三句？”Fourth one. 第五句；") == [
+            "第一句。", "第二句！", "“第三句？”", "Fourth one.", "第五句；",
+        ]
+        
+        # clean_content已把换行压成空格，旧的按行切分只能截取开头
+        page = BaseScraper.clean_content("""
+            首页 新闻 体育 财经 科技 登录 注册 首页 新闻 体育 财经 科技 登录 注册 首页 新闻 体育 财经 科技。
+            本文作者张三，发布于2024年。
+            深度学习模型的训练需要大量数据和算力，数据质量决定了模型效果的上限。
+            研究人员发现，清洗后的训练数据能让深度学习模型在更少的算力下达到更好的效果。
+            因此，数据清洗和数据质量评估已经成为深度学习模型训练流程中最重要的环节之一。
+            版权所有，转载请注明出处。
+        """)
+        assert "\n" not in page
+        summary = FallbackSummarizer().generate_summary(page, "数据质量")
+        assert not summary.startswith("首页"), "导航文字不应进入摘要"
+        assert "深度学习模型" in summary and summary.endswith("。"), summary
+        print(f"✅ 摘要: {summary[:60]}...")
+        
+        summarizer = TextRankSummarizer()
+        documents = [page, "", "只有一句话", page + " 补充说明：数据清洗的成本也在不断下降。"] * 250
+        started = time.time()
+        batch = summarizer.summarize_many(documents)
+        rate = len(documents) / (time.time() - started)
+        assert batch[:4] == [summarizer.summarize(doc) for doc in documents[:4]], "批量结果与单篇一致"
+        assert batch[1] == "" and batch[2] == "只有一句话"
+        print(f"✅ 批量摘要 {rate:.0f} 篇/秒")
+        
+        return True
+    except Exception as e:
+        print(f"❌ TextRank摘要测试失败: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+
+def test_cost_routing():
+    """测试按成本/延迟路由摘要请求"""
+    print("\n🧪 测试摘要路由策略...")
+    
+    try:
+        import json
+        import tempfile
+        from web_content_system.config import APIConfig
+        from web_content_system.llm_clients import BaseLLMClient, FallbackSummarizer
+        from web_content_system.processors import ContentProcessor
+        from web_content_system.routing import RoutingPolicy
+        
+        policy = RoutingPolicy.from_dict({"routes": [
+            {"name": "official", "clients": ["deepseek"], "domains": ["*.gov.cn"]},
+            {"name": "featured", "clients": ["*"], "tags": ["精选"]},
+            {"name": "trivial", "clients": ["fallback"], "max_chars": 300},
+            {"name": "backlog", "clients": ["ollama"], "min_queue": 8},
+            {"name": "medium", "clients": ["ollama", "*"], "max_chars": 2000},
+        ]})
+        assert policy.decide("短" * 60).route == "trivial"
+        assert policy.decide("短" * 60, tags="新闻，精选").route == "featured", "标签优先于长度"
+        assert policy.decide("短" * 60, url="https://www.beijing.gov.cn/a").route == "official"
+        assert policy.decide("中" * 1000, queue_depth=10).route == "backlog"
+        assert policy.decide("长" * 5000).route == "default"
+        medium = policy.decide("中" * 1000)
+        assert medium.order(["deepseek", "openai", "ollama", "fallback"]) == ["ollama", "deepseek", "openai", "fallback"]
+        try:
+            RoutingPolicy.from_dict({"routes": [{"name": "x", "clients": ["*"], "max_char": 10}]})
+            assert False, "未知字段应报错"
+        except ValueError:
+            pass
+        
+        calls = []
+        
+        class Priced(BaseLLMClient):
+            def __init__(self, name, model):
+                self.name, self.model = name, model
+            
+            def complete(self, prompt, max_tokens=None):
+                calls.append(self.name)
+                self.record_usage(prompt, f"{self.name}摘要", prompt_tokens=1000, completion_tokens=100)
+                return f"{self.name}摘要"
+        
+        with tempfile.TemporaryDirectory() as tmp:
+            log_path = os.path.join(tmp, "routing.jsonl")
+            processor = ContentProcessor(APIConfig(routing=True, routing_log=log_path))
+            processor.llm_clients = [Priced("deepseek", "deepseek-chat"), Priced("ollama", "llama3"), FallbackSummarizer()]
+            
+            stub = "页面很短，只有一句话。"
+            route = processor.route(stub, "新闻", "https://example.com/stub")
+            assert processor.generate_title(stub, route=route) == stub[:20]
+            assert processor.generate_summary(stub, "短页", route=route) == stub and not calls, "短页面不调用LLM"
+            article = "机器学习改变了软件开发的方式，模型训练离不开高质量数据。" * 30
+            assert processor.generate_summary(article, "中等") == "ollama摘要"
+            assert processor.generate_summary(article * 3, "长文") == "deepseek摘要"
+            assert calls == ["ollama", "deepseek"]
+            
+            with open(log_path, encoding="utf-8") as f:
+                entries = [json.loads(line) for line in f]
+            assert [e["route"] for e in entries] == ["trivial", "medium", "rich"]
+            assert entries[0]["answered_by"] == ["fallback"] and entries[0]["domain"] == "example.com"
+            assert entries[2]["answered_by"] == ["deepseek"] and entries[2]["cost"] > 0 and entries[1]["cost"] == 0
+            totals = processor.routing_metrics()
+            assert totals["trivial"]["calls"] == 0 and totals["rich"]["avg_cost"] > 0
+        print(f"✅ 3 个页面走 {len(totals)} 条路由，仅长文调用付费API")
+        
+        return True
+    except Exception as e:
+        print(f"❌ 路由策略测试失败: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+
+def test_llm_call_telemetry():
+    """测试LLM调用遥测与报表"""
+    print("\n🧪 测试LLM调用遥测...")
+    
+    try:
+        import sqlite3
+        import time
+        import requests
+        from web_content_system.config import APIConfig
+        from web_content_system.database import CallLog
+        from web_content_system.llm_clients import BaseLLMClient, FallbackSummarizer
+        from web_content_system.processors import ContentProcessor
+        from web_content_system.telemetry import LLMCall, outcome_of, parse_duration, percentile
+        
+        response = requests.Response()
+        response.status_code = 429
+        assert outcome_of(requests.HTTPError("limited", response=response)) == "http_429"
+        assert outcome_of(requests.Timeout()) == "timeout" and outcome_of(None) == "empty"
+        assert parse_duration("15m") == 900 and percentile([1, 2, 3, 4], 50) == 2
+        
+        class Flaky(BaseLLMClient):
+            name, model = "flaky", "flaky-model"
+            
+            def complete(self, prompt, max_tokens=None):
+                self.last_error = requests.Timeout("slow")
+                return None
+        
+        class Steady(BaseLLMClient):
+            name, model = "steady", "deepseek-chat"
+            
+            def complete(self, prompt, max_tokens=None):
+                self.record_usage(prompt, "摘要", prompt_tokens=500, completion_tokens=80)
+                return "摘要"
+        
+        processor = ContentProcessor(APIConfig())
+        processor.llm_clients = [Flaky(), Steady(), FallbackSummarizer()]
+        calls = []
+        assert processor.generate_summary("人工智能的发展。" * 20, "标题", on_call=calls.append) == "摘要"
+        assert [(c.provider, c.outcome) for c in calls] == [("flaky", "timeout"), ("steady", "ok")]
+        assert calls[1].completion_tokens == 80 and calls[1].latency >= 0
+        processor.llm_clients = [Flaky(), FallbackSummarizer()]
+        processor.generate_summary("人工智能的发展。" * 20, "标题", on_call=calls.append)
+        assert calls[-1].provider == "fallback" and calls[-1].outcome == "ok", "回退摘要也记录来源"
+        
+        conn = sqlite3.connect(":memory:")
+        log = CallLog(conn, run_id="run-1", flush_every=3)
+        log.record("https://example.com/a", calls[:2], "extractor")
+        assert conn.execute("SELECT COUNT(*) FROM llm_calls").fetchone()[0] == 0, "未满批次前只缓冲"
+        now = time.time()
+        log.record("https://example.com/b", [
+            LLMCall("steady", "deepseek-chat", now - 7200 + i, 0.1 * (i + 1), "ok", 100, 10) for i in range(10)
+        ] + [LLMCall("steady", "deepseek-chat", now - 60, 1.0, "http_429"),
+             LLMCall("steady", "deepseek-chat", now - 30, 0.0, "busy")], "extractor")
+        assert conn.execute("SELECT COUNT(*) FROM llm_calls").fetchone()[0] == 14
+        assert [c["outcome"] for c in log.for_url("https://EXAMPLE.com/a/")] == ["timeout", "ok"]
+        
+        steady = [r for r in log.report(None, provider="steady")][0]
+        assert steady["calls"] == 13 and steady["outcomes"]["http_429"] == 1
+        assert abs(steady["error_rate"] - 1 / 12) < 1e-3, "并发已满未发送的调用不计入错误率"
+        windows = log.report(3600, since=3 * 3600, provider="steady")
+        assert len(windows) >= 2 and sum(w["calls"] for w in windows) == 13
+        old = [w for w in windows if w["answered"] >= 10][0]
+        assert old["p50_ms"] == 500 and old["p95_ms"] == 1000 and old["tokens_per_sec"] > 0
+        assert log.report(None, since=600, provider="steady")[0]["calls"] == 3, "按时间范围过滤"
+        conn.close()
+        print(f"✅ {steady['calls']} 次调用，错误率 {steady['error_rate']:.1%}，p95 {steady['p95_ms']} ms")
+        
+        return True
+    except Exception as e:
+        print(f"❌ LLM调用遥测测试失败: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+
+def test_semantic_search():
+    """测试嵌入存储、向量索引与语义搜索"""
+    print("\n🧪 测试语义搜索...")
+    
+    try:
+        import os
+        import tempfile
+        import numpy as np
+        from web_content_system.database import DatabaseManager
+        from web_content_system.database.embedding_store import encode
+        from web_content_system.llm_clients import HashingEmbedder
+        from web_content_system.vector_index import IVFIndex, VectorIndex, build_index
+        
+        embedder = HashingEmbedder()
+        vectors = embedder.embed(["新能源汽车销量大涨", "新能源汽车补贴政策调整", "今天的天气晴朗"])
+        assert np.allclose(np.linalg.norm(vectors, axis=1), 1, atol=1e-5), "单位向量"
+        assert vectors[0] @ vectors[1] > vectors[0] @ vectors[2], "措辞相近的文本更接近"
+        
+        blob, scale = encode(vectors[0], "int8")
+        assert len(blob) == 512, "int8 每维一字节"
+        restored = np.frombuffer(blob, dtype=np.int8) * scale
+        assert restored @ vectors[0] / np.linalg.norm(restored) > 0.99, "int8 量化误差很小"
+        
+        db_path = os.path.join(tempfile.mkdtemp(), "semantic.db")
+        with DatabaseManager(db_path) as db:
+            db.save_content_summary("电动车", "新能源汽车销量大涨，电池成本下降。", "https://a.example/ev")
+            db.save_content_summary("补贴", "新能源汽车补贴政策调整，购车成本变化。", "https://a.example/subsidy")
+            db.save_content_summary("天气", "今天的天气晴朗，适合出门散步。", "https://a.example/weather")
+            store = db.embeddings()
+            assert db.semantic_search("新能源汽车") == [], "未嵌入时没有结果"
+            
+            pending = store.pending(embedder.model)
+            assert len(pending) == 3
+            store.put(embedder.model, [u for u, _ in pending], [t for _, t in pending],
+                      embedder.embed([t for _, t in pending]), "int8")
+            assert store.pending(embedder.model) == [], "已嵌入的行不再待处理"
+            
+            results = db.semantic_search("新能源汽车销量", k=2)
+            assert [row[1] for row in results] == ["电动车", "补贴"], f"按相似度排序: {results}"
+            assert results[0][-1] > results[1][-1] > 0
+            
+            db.save_content_summary("天气", "明天有雨，出门带伞。", "https://a.example/weather")
+            assert len(store.pending(embedder.model)) == 1, "摘要变化后需要重新嵌入"
+            
+            index = store.index(embedder.model)
+            store.save_related(embedder.model, dict(zip(index.ids, index.neighbours(2, 0.1))))
+            related = {uid: [other for other, _ in store.related(uid)] for uid in index.ids}
+            assert all(uid not in others for uid, others in related.items()), "相关条目不含自身"
+            assert any(related.values()), "相似的行互为相关条目"
+        
+        rng = np.random.default_rng(0)
+        centers = rng.normal(size=(50, 32)).astype(np.float32)
+        data = centers[rng.integers(0, 50, 5000)] + 0.3 * rng.normal(size=(5000, 32)).astype(np.float32)
+        data /= np.linalg.norm(data, axis=1, keepdims=True)
+        ids = [str(i) for i in range(len(data))]
+        exact, ivf = VectorIndex(data, ids), IVFIndex(data, ids, lists=50, probes=8)
+        queries = data[:100]
+        recall = np.mean([
+            len({i for i, _ in exact.search(q, 10)} & {i for i, _ in ivf.search(q, 10)}) / 10 for q in queries
+        ])
+        assert recall >= 0.9, f"IVF 召回率 {recall:.2f}"
+        _, batch = ivf.search_many(queries, 10)
+        assert [ivf.ids[p] for p in batch[7]] == [i for i, _ in ivf.search(queries[7], 10)], "批量与单条查询一致"
+        assert all(ids[i] not in {o for o, _ in related} for i, related in zip(range(5), exact.neighbours(5)))
+        assert isinstance(build_index(data, ids), VectorIndex) and not isinstance(build_index(data, ids), IVFIndex)
+        print(f"✅ 语义搜索排序正确，IVF 召回率 {recall:.2f}")
+        
+        return True
+    except Exception as e:
+        print(f"❌ 语义搜索测试失败: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+
 def main():
     """运行所有测试"""
     print("🚀 模块化系统测试")
@@ -199,6 +1856,29 @@ def main():
         ("数据库功能", test_database),
         ("回退摘要生成器", test_fallback_summarizer),
         ("内容处理器", test_content_processor),
+        ("多进程解析池", test_extraction_pool),
+        ("原始网页归档", test_raw_archive),
+        ("域名选择器缓存", test_selector_cache),
+        ("抓取队列", test_crawl_frontier),
+        ("主机礼貌调度", test_host_scheduler),
+        ("URL规范化去重", test_url_canonicalization),
+        ("站点地图增量发现", test_sitemap_discovery),
+        ("近似重复检测", test_near_duplicates),
+        ("变化率重抓调度", test_recrawl_scheduler),
+        ("共享工作队列", test_work_queue),
+        ("批量任务状态", test_job_store),
+        ("失败分类重试", test_failure_log),
+        ("自适应并发限制", test_adaptive_limits),
+        ("长文档分块摘要", test_long_document_summary),
+        ("LLM用量与预算", test_usage_accounting),
+        ("本地模型连接池", test_local_model_pool),
+        ("离线批量摘要", test_batch_summaries),
+        ("对冲请求", test_hedged_requests),
+        ("LLM桩服务与基准", test_llm_stub_benchmark),
+        ("TextRank抽取式摘要", test_textrank_summarizer),
+        ("摘要路由策略", test_cost_routing),
+        ("LLM调用遥测", test_llm_call_telemetry),
+        ("语义搜索", test_semantic_search),
     ]
     
     results = []
@@ -0,0 +1,214 @@
+"""
+AIMD (additive-increase / multiplicative-decrease) concurrency limits.
+
+One limiter is kept per target — a crawled host or an LLM backend. While
+responses are healthy the limit grows by about one slot per round of
+``limit`` requests; a 429 / 503 / timeout, or latency well above the
+target's baseline, halves it. Limits are exposed through snapshot() /
+LimiterRegistry.metrics().
+"""
+
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+import requests
+from openai import APITimeoutError
+
+OVERLOAD_STATUS = (429, 503)
+
+
+def is_overload(result: Any) -> bool:
+    """
+    Tell whether a fetch result says the target is overloaded.
+
+    Args:
+        result: A response or an exception (HTTP and OpenAI SDK errors
+            carry the status code)
+
+    Returns:
+        True for HTTP 429 / 503 and for timeouts
+    """
+    if isinstance(result, (requests.Timeout, APITimeoutError, TimeoutError)):
+        return True
+    response = result if hasattr(result, "status_code") else getattr(result, "response", None)
+    status = getattr(response, "status_code", None)
+    return status in OVERLOAD_STATUS
+
+
+class AIMDLimiter:
+    """
+    Adaptive concurrency limit for one target.
+
+    Thread-safe. Take a slot with acquire() (blocking) or try_acquire()
+    before a request and hand it back with release(), passing the latency
+    and whether the target signalled overload.
+    """
+
+    def __init__(
+        self,
+        initial: float = 1,
+        min_limit: int = 1,
+        max_limit: int = 8,
+        increase: float = 1.0,
+        decrease: float = 0.5,
+        latency_tolerance: float = 2.0,
+        latency_floor: float = 0.05,
+        smoothing: float = 0.2,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """
+        Initialize limiter.
+
+        Args:
+            initial: Starting limit
+            min_limit: Lowest limit
+            max_limit: Highest limit
+            increase: Slots added per round of `limit` healthy requests
+            decrease: Factor applied to the limit on overload
+            latency_tolerance: Smoothed latency above this multiple of the
+                baseline counts as overload
+            latency_floor: Smoothed latency (seconds) below which jitter
+                never counts as overload
+            smoothing: Weight of a new sample in the smoothed latency
+            clock: Monotonic time source
+        """
+        self.min_limit = max(1, min_limit)
+        self.max_limit = max(self.min_limit, max_limit)
+        self.increase = increase
+        self.decrease = decrease
+        self.latency_tolerance = latency_tolerance
+        self.latency_floor = latency_floor
+        self.smoothing = smoothing
+        self.clock = clock
+        self._limit = float(min(max(initial, self.min_limit), self.max_limit))
+        self.in_flight = 0
+        self.latency: Optional[float] = None   # smoothed, seconds
+        self.baseline: Optional[float] = None  # lowest typical latency, seconds
+        self.successes = 0
+        self.overloads = 0
+        self._last_decrease = float("-inf")
+        self._cond = threading.Condition()
+
+    @property
+    def limit(self) -> int:
+        """Current number of concurrent requests allowed."""
+        return int(self._limit)
+
+    def full(self) -> bool:
+        """Tell whether every slot is taken."""
+        with self._cond:
+            return self.in_flight >= self.limit
+
+    def try_acquire(self) -> bool:
+        """Take a slot if one is free."""
+        with self._cond:
+            if self.in_flight >= self.limit:
+                return False
+            self.in_flight += 1
+            return True
+
+    def acquire(self, timeout: Optional[float] = None) -> bool:
+        """
+        Wait for a free slot.
+
+        Args:
+            timeout: Seconds to wait at most (None waits forever)
+
+        Returns:
+            False if the timeout passed first
+        """
+        with self._cond:
+            if not self._cond.wait_for(lambda: self.in_flight < self.limit, timeout):
+                return False
+            self.in_flight += 1
+            return True
+
+    def release(self, latency: Optional[float] = None, overloaded: bool = False):
+        """
+        Give a slot back and adapt the limit to how the request went.
+
+        Args:
+            latency: Seconds the request took (None if it failed before an
+                answer; the limit then only changes on overload)
+            overloaded: The target signalled overload (429, 503, timeout)
+        """
+        with self._cond:
+            self.in_flight = max(0, self.in_flight - 1)
+            if latency is not None or overloaded:
+                self._adapt(latency, overloaded)
+            self._cond.notify_all()
+
+    def _adapt(self, latency: Optional[float], overloaded: bool):
+        if latency is not None and not overloaded:
+            self._observe_latency(latency)
+            if self.latency > max(self.baseline * self.latency_tolerance, self.latency_floor):
+                overloaded = True
+        if overloaded:
+            self.overloads += 1
+            self._shrink()
+        else:
+            self.successes += 1
+            self._limit = min(self.max_limit, self._limit + self.increase / max(self._limit, 1.0))
+
+    def _observe_latency(self, latency: float):
+        a = self.smoothing
+        self.latency = latency if self.latency is None else (1 - a) * self.latency + a * latency
+        if self.baseline is None or latency < self.baseline:
+            self.baseline = latency
+        else:
+            # Let the baseline follow a target that became slower for good.
+            self.baseline += 0.01 * (latency - self.baseline)
+
+    def _shrink(self):
+        # One cut per round trip: a burst of errors from requests that were
+        # already in flight must not collapse the limit to the minimum.
+        now = self.clock()
+        if now - self._last_decrease < (self.latency or 0.0):
+            return
+        self._last_decrease = now
+        self._limit = max(float(self.min_limit), self._limit * self.decrease)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Current limit and observations, for metrics."""
+        with self._cond:
+            return {
+                "limit": self.limit,
+                "in_flight": self.in_flight,
+                "latency_ms": round(self.latency * 1000, 1) if self.latency is not None else None,
+                "baseline_ms": round(self.baseline * 1000, 1) if self.baseline is not None else None,
+                "successes": self.successes,
+                "overloads": self.overloads,
+            }
+
+
+class LimiterRegistry:
+    """Creates and holds one AIMDLimiter per key (host, backend name)."""
+
+    def __init__(self, overrides: Optional[Dict[str, Dict[str, Any]]] = None, **limiter_options):
+        """
+        Initialize registry.
+
+        Args:
+            overrides: Options of particular keys, over limiter_options
+            **limiter_options: Passed to every new AIMDLimiter
+        """
+        self.limiter_options = limiter_options
+        self.overrides = dict(overrides or {})
+        self._limiters: Dict[str, AIMDLimiter] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> AIMDLimiter:
+        """Limiter of a key, created on first use."""
+        with self._lock:
+            limiter = self._limiters.get(key)
+            if limiter is None:
+                options = {**self.limiter_options, **self.overrides.get(key, {})}
+                limiter = self._limiters[key] = AIMDLimiter(**options)
+            return limiter
+
+    def metrics(self) -> Dict[str, Dict[str, Any]]:
+        """Snapshot of every limiter, by key."""
+        with self._lock:
+            limiters = dict(self._limiters)
+        return {key: limiter.snapshot() for key, limiter in sorted(limiters.items())}
@@ -4,7 +4,7 @@ Configuration management for the web content extraction system.
 
 import os
 from dataclasses import dataclass
-from typing import Optional
+from typing import Optional, Tuple
 from dotenv import load_dotenv
 
 # Load environment variables from .env file
@@ -28,11 +28,28 @@ class APIConfig:
     # Local Model Configuration (Ollama)
     ollama_api_url: str = "http://localhost:11434/api/generate"
     ollama_model: str = "llama2"
+    ollama_keep_alive: str = "30m"  # keep the model loaded between calls ("-1" = forever)
+    ollama_parallel: int = 4  # concurrent requests; match the server's OLLAMA_NUM_PARALLEL
     
     # API Settings
     max_tokens: int = 300
     temperature: float = 0.5
     timeout: int = 30
+    max_concurrency: int = 4  # upper bound of each backend's adaptive limit
+    chunk_tokens: int = 3000  # content tokens per prompt; longer content is map-reduced
+    document_token_budget: int = 24000  # content tokens summarized per document at most
+    input_token_ceiling: Optional[int] = None  # budget mode: trim content to this many tokens
+    cost_cap: Optional[float] = None  # budget mode: stop once a run has spent this many USD
+    hedge: bool = False  # race a slow remote backend against the next one
+    hedge_quantile: float = 0.95  # hedge once a call takes longer than this latency quantile
+    hedge_max_rate: float = 0.1  # share of calls that may be hedged at most
+    hedge_initial_delay: float = 3.0  # hedge delay (s) until a backend's latencies are known
+    routing: bool = False  # route pages to clients by length, tags, domain and queue depth
+    routing_policy: Optional[str] = None  # JSON routing policy (built-in tiers if unset)
+    routing_log: Optional[str] = None  # JSONL file of routing decisions and outcomes
+    embedding_provider: str = "local"  # "local" (hashing, no model), "ollama" or "openai"
+    embedding_model: Optional[str] = None  # provider default if unset
+    embedding_dtype: str = "float32"  # stored vector type: "float32" or "int8"
     
     @classmethod
     def from_env(cls) -> "APIConfig":
@@ -46,6 +63,24 @@ class APIConfig:
             deepseek_model=os.getenv("DEEPSEEK_MODEL", cls.deepseek_model),
             ollama_api_url=os.getenv("OLLAMA_API_URL", cls.ollama_api_url),
             ollama_model=os.getenv("OLLAMA_MODEL", cls.ollama_model),
+            ollama_keep_alive=os.getenv("OLLAMA_KEEP_ALIVE", cls.ollama_keep_alive),
+            ollama_parallel=int(os.getenv("OLLAMA_NUM_PARALLEL", cls.ollama_parallel)),
+            max_tokens=int(os.getenv("LLM_MAX_TOKENS", cls.max_tokens)),
+            max_concurrency=int(os.getenv("LLM_MAX_CONCURRENCY", cls.max_concurrency)),
+            chunk_tokens=int(os.getenv("LLM_CHUNK_TOKENS", cls.chunk_tokens)),
+            document_token_budget=int(os.getenv("LLM_DOCUMENT_TOKEN_BUDGET", cls.document_token_budget)),
+            input_token_ceiling=int(os.getenv("LLM_INPUT_TOKEN_CEILING", "0")) or None,
+            cost_cap=float(os.getenv("LLM_COST_CAP", "0")) or None,
+            hedge=os.getenv("LLM_HEDGE", "false").lower() == "true",
+            hedge_quantile=float(os.getenv("LLM_HEDGE_QUANTILE", cls.hedge_quantile)),
+            hedge_max_rate=float(os.getenv("LLM_HEDGE_MAX_RATE", cls.hedge_max_rate)),
+            hedge_initial_delay=float(os.getenv("LLM_HEDGE_INITIAL_DELAY", cls.hedge_initial_delay)),
+            routing=os.getenv("LLM_ROUTING", "false").lower() == "true",
+            routing_policy=os.getenv("LLM_ROUTING_POLICY") or None,
+            routing_log=os.getenv("LLM_ROUTING_LOG") or None,
+            embedding_provider=os.getenv("EMBEDDING_PROVIDER", cls.embedding_provider),
+            embedding_model=os.getenv("EMBEDDING_MODEL") or None,
+            embedding_dtype=os.getenv("EMBEDDING_DTYPE", cls.embedding_dtype),
         )
 
 
@@ -54,15 +89,46 @@ class DatabaseConfig:
     """Configuration for database operations."""
     
     db_path: str = "web_content.db"
+    raw_archive_dir: Optional[str] = None  # archive raw responses here if set
+    job_max_attempts: int = 3  # batch jobs attempted this often are no longer retried
     
     @classmethod
     def from_env(cls) -> "DatabaseConfig":
         """Create configuration from environment variables."""
         return cls(
-            db_path=os.getenv("DB_PATH", cls.db_path)
+            db_path=os.getenv("DB_PATH", cls.db_path),
+            raw_archive_dir=os.getenv("RAW_ARCHIVE_DIR") or None,
+            job_max_attempts=int(os.getenv("JOB_MAX_ATTEMPTS", cls.job_max_attempts)),
         )
 
 
+# Resource types blocked by the lean rendering profile. Names follow the
+# Chrome DevTools Protocol ``Network.ResourceType`` values.
+LEAN_BLOCKED_RESOURCE_TYPES: Tuple[str, ...] = ("Image", "Font", "Stylesheet", "Media")
+
+# Third-party trackers / ad networks that never contribute to article text.
+DEFAULT_URL_BLOCKLIST: Tuple[str, ...] = (
+    "*google-analytics.com*",
+    "*googletagmanager.com*",
+    "*doubleclick.net*",
+    "*googlesyndication.com*",
+    "*facebook.net*",
+    "*connect.facebook.com*",
+    "*hotjar.com*",
+    "*hm.baidu.com*",
+    "*cnzz.com*",
+    "*scorecardresearch.com*",
+)
+
+
+def _env_list(name: str, default: Tuple[str, ...]) -> Tuple[str, ...]:
+    """Read a comma-separated environment variable as a tuple."""
+    raw = os.getenv(name)
+    if raw is None:
+        return default
+    return tuple(item.strip() for item in raw.split(",") if item.strip())
+
+
 @dataclass
 class BrowserConfig:
     """Configuration for browser scraping."""
@@ -76,13 +142,52 @@ class BrowserConfig:
         "Chrome/120.0.0.0 Safari/537.36"
     )
     
+    # Rendering profile (all defaults keep the original full-render behaviour)
+    page_load_strategy: str = "normal"  # "normal", "eager" or "none"
+    blocked_resource_types: Tuple[str, ...] = ()
+    url_blocklist: Tuple[str, ...] = ()
+    wait_for_settle: bool = False  # wait until body text stops growing
+    settle_interval: float = 0.3  # seconds between settle polls
+    disk_cache_dir: Optional[str] = None  # shared Chrome disk cache
+    
+    @classmethod
+    def lean(cls, **overrides) -> "BrowserConfig":
+        """Create a lean rendering profile for text extraction.
+        
+        Blocks images, fonts, stylesheets, media and known trackers, uses the
+        eager page-load strategy and waits for the content to settle instead
+        of only waiting for ``<body>``.
+        """
+        values = dict(
+            page_load_strategy="eager",
+            blocked_resource_types=LEAN_BLOCKED_RESOURCE_TYPES,
+            url_blocklist=DEFAULT_URL_BLOCKLIST,
+            wait_for_settle=True,
+        )
+        values.update(overrides)
+        return cls(**values)
+    
     @classmethod
     def from_env(cls) -> "BrowserConfig":
         """Create configuration from environment variables."""
+        lean = os.getenv("BROWSER_LEAN", "false").lower() == "true"
         return cls(
             headless=os.getenv("BROWSER_HEADLESS", "true").lower() == "true",
             window_size=os.getenv("BROWSER_WINDOW_SIZE", cls.window_size),
             timeout=int(os.getenv("BROWSER_TIMEOUT", str(cls.timeout))),
+            page_load_strategy=os.getenv(
+                "BROWSER_PAGE_LOAD_STRATEGY", "eager" if lean else cls.page_load_strategy
+            ),
+            blocked_resource_types=_env_list(
+                "BROWSER_BLOCKED_RESOURCES", LEAN_BLOCKED_RESOURCE_TYPES if lean else ()
+            ),
+            url_blocklist=_env_list(
+                "BROWSER_URL_BLOCKLIST", DEFAULT_URL_BLOCKLIST if lean else ()
+            ),
+            wait_for_settle=os.getenv(
+                "BROWSER_WAIT_FOR_SETTLE", "true" if lean else "false"
+            ).lower() == "true",
+            disk_cache_dir=os.getenv("BROWSER_DISK_CACHE_DIR") or None,
         )
 
 
@@ -0,0 +1,25 @@
+"""
+Crawl scheduling package.
+"""
+
+from .frontier import CrawlFrontier, FrontierEntry
+from .politeness import HostScheduler, RobotsCache
+from .recrawl import ChangeHistory, RecrawlCandidate
+from .sitemaps import DiscoveredURL, LastmodIndex, SitemapDiscovery
+from .urls import BloomFilter, SeenSet, canonical_uid, canonicalize_url
+
+__all__ = [
+    "CrawlFrontier",
+    "FrontierEntry",
+    "HostScheduler",
+    "RobotsCache",
+    "ChangeHistory",
+    "RecrawlCandidate",
+    "DiscoveredURL",
+    "LastmodIndex",
+    "SitemapDiscovery",
+    "BloomFilter",
+    "SeenSet",
+    "canonical_uid",
+    "canonicalize_url",
+]
@@ -0,0 +1,295 @@
+"""
+Persistent, resumable crawl frontier stored in SQLite.
+"""
+
+import sqlite3
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, Iterable, Optional, Tuple
+
+from .urls import canonical_uid
+
+# Priority weights — lower priority values are crawled first.
+DEPTH_WEIGHT = 1.0       # each level deeper costs one unit
+LINK_SCORE_WEIGHT = 0.5  # link_score is expected in [0, 1]
+FRESHNESS_WEIGHT = 0.5   # bonus for pages we have never stored
+
+
+@dataclass
+class FrontierEntry:
+    """A URL handed out by the frontier."""
+
+    uid: str
+    url: str
+    root_url: str
+    depth: int
+    tags: str = ""
+
+
+def compute_priority(depth: int, link_score: float = 0.0, known: bool = False) -> float:
+    """
+    Compute the crawl priority of a URL (lower is sooner).
+
+    Args:
+        depth: Link distance from the root page
+        link_score: How article-like the link looks, 0..1
+        known: True if the page is already stored (no freshness bonus)
+
+    Returns:
+        Priority value
+    """
+    priority = depth * DEPTH_WEIGHT - link_score * LINK_SCORE_WEIGHT
+    if not known:
+        priority -= FRESHNESS_WEIGHT
+    return priority
+
+
+class CrawlFrontier:
+    """
+    Queue of URLs to crawl, with depth limits and per-root budgets.
+
+    Every state change is committed immediately, so an interrupted crawl
+    resumes where it stopped: call recover() on start-up to return pages
+    that were being fetched at the time of the crash to the queue. The
+    table doubles as the crawl's seen-set — a URL is only ever queued once.
+    """
+
+    def __init__(self, conn: sqlite3.Connection):
+        """
+        Initialize crawl frontier.
+
+        Args:
+            conn: Open SQLite connection
+        """
+        self.conn = conn
+        self._create_tables()
+        self._roots: Dict[str, Tuple[int, int]] = {}
+
+    def _create_tables(self):
+        """Create frontier and root tables."""
+        cursor = self.conn.cursor()
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS crawl_roots (
+                root_url TEXT PRIMARY KEY,
+                tags TEXT,
+                max_depth INTEGER NOT NULL,
+                budget INTEGER NOT NULL,
+                fetched INTEGER NOT NULL DEFAULT 0
+            )
+        ''')
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS crawl_frontier (
+                uid TEXT PRIMARY KEY,
+                url TEXT NOT NULL,
+                root_url TEXT NOT NULL,
+                depth INTEGER NOT NULL,
+                priority REAL NOT NULL,
+                link_score REAL NOT NULL DEFAULT 0,
+                status TEXT NOT NULL DEFAULT 'pending',
+                parent_url TEXT,
+                discovered_time TEXT NOT NULL,
+                fetched_time TEXT
+            )
+        ''')
+        cursor.execute(
+            'CREATE INDEX IF NOT EXISTS idx_frontier_pending ON crawl_frontier (status, priority)'
+        )
+        self.conn.commit()
+
+    @staticmethod
+    def uid_for(url: str) -> str:
+        """Frontier key of a URL (URL variants of one page share it)."""
+        return canonical_uid(url)
+
+    @staticmethod
+    def _now() -> str:
+        return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+    def add_root(self, root_url: str, tags: str = "", max_depth: int = 2, budget: int = 200):
+        """
+        Register a crawl root and queue it at depth 0.
+
+        Re-adding an existing root updates its limits but keeps its progress.
+
+        Args:
+            root_url: Start URL
+            tags: Tags for pages of this root
+            max_depth: Deepest link level to follow
+            budget: Maximum number of pages to fetch for this root
+        """
+        self.conn.execute('''
+            INSERT INTO crawl_roots (root_url, tags, max_depth, budget)
+            VALUES (?, ?, ?, ?)
+            ON CONFLICT(root_url) DO UPDATE SET
+              tags=excluded.tags,
+              max_depth=excluded.max_depth,
+              budget=excluded.budget
+        ''', (root_url, tags, max_depth, budget))
+        self._roots[root_url] = (max_depth, budget)
+        self.add(root_url, root_url, depth=0, link_score=1.0)
+
+    def root_limits(self, root_url: str) -> Tuple[int, int]:
+        """Return (max_depth, budget) of a root."""
+        if root_url not in self._roots:
+            row = self.conn.execute(
+                "SELECT max_depth, budget FROM crawl_roots WHERE root_url = ?", (root_url,)
+            ).fetchone()
+            self._roots[root_url] = (row[0], row[1]) if row else (0, 0)
+        return self._roots[root_url]
+
+    def add(
+        self,
+        url: str,
+        root_url: str,
+        depth: int,
+        link_score: float = 0.0,
+        parent_url: Optional[str] = None,
+        known: bool = False,
+    ) -> bool:
+        """
+        Queue a URL unless it has been seen before or is too deep.
+
+        Args:
+            url: URL to crawl
+            root_url: Root the URL was discovered under
+            depth: Link distance from the root
+            link_score: How article-like the link looks, 0..1
+            parent_url: Page the link was found on
+            known: True if the page is already stored
+
+        Returns:
+            True if the URL was newly queued
+        """
+        max_depth, _ = self.root_limits(root_url)
+        if depth > max_depth:
+            return False
+        cursor = self.conn.cursor()
+        cursor.execute('''
+            INSERT OR IGNORE INTO crawl_frontier
+                (uid, url, root_url, depth, priority, link_score, parent_url, discovered_time)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        ''', (
+            self.uid_for(url), url, root_url, depth,
+            compute_priority(depth, link_score, known), link_score, parent_url, self._now(),
+        ))
+        self.conn.commit()
+        return cursor.rowcount > 0
+
+    def add_many(
+        self,
+        links: Iterable[Tuple[str, float, bool]],
+        root_url: str,
+        depth: int,
+        parent_url: Optional[str] = None,
+    ) -> int:
+        """
+        Queue many links found on one page in a single transaction.
+
+        Args:
+            links: Iterable of (url, link_score, known) tuples
+            root_url: Root the links were discovered under
+            depth: Link distance of the links from the root
+            parent_url: Page the links were found on
+
+        Returns:
+            Number of newly queued URLs
+        """
+        max_depth, _ = self.root_limits(root_url)
+        if depth > max_depth:
+            return 0
+        now = self._now()
+        before = self.conn.total_changes
+        self.conn.executemany('''
+            INSERT OR IGNORE INTO crawl_frontier
+                (uid, url, root_url, depth, priority, link_score, parent_url, discovered_time)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        ''', [
+            (self.uid_for(url), url, root_url, depth,
+             compute_priority(depth, score, known), score, parent_url, now)
+            for url, score, known in links
+        ])
+        self.conn.commit()
+        return self.conn.total_changes - before
+
+    def pop(self) -> Optional[FrontierEntry]:
+        """
+        Take the best pending URL whose root still has budget left.
+
+        The URL is charged to its root's budget right away, so several URLs
+        can be handed out before any of them completes. It stays marked
+        in-progress until complete() is called.
+
+        Returns:
+            FrontierEntry or None when the crawl is finished
+        """
+        cursor = self.conn.cursor()
+        cursor.execute('''
+            SELECT f.uid, f.url, f.root_url, f.depth, COALESCE(r.tags, '')
+            FROM crawl_frontier f
+            JOIN crawl_roots r ON r.root_url = f.root_url
+            WHERE f.status = 'pending' AND r.fetched < r.budget
+            ORDER BY f.priority, f.discovered_time
+            LIMIT 1
+        ''')
+        row = cursor.fetchone()
+        if not row:
+            return None
+        cursor.execute("UPDATE crawl_frontier SET status = 'in_progress' WHERE uid = ?", (row[0],))
+        cursor.execute("UPDATE crawl_roots SET fetched = fetched + 1 WHERE root_url = ?", (row[2],))
+        self.conn.commit()
+        return FrontierEntry(*row)
+
+    def complete(self, entry: FrontierEntry, ok: bool):
+        """
+        Record the outcome of a fetched URL.
+
+        Args:
+            entry: Entry returned by pop()
+            ok: True if the page was fetched successfully
+        """
+        self.conn.execute(
+            "UPDATE crawl_frontier SET status = ?, fetched_time = ? WHERE uid = ?",
+            ("done" if ok else "failed", self._now(), entry.uid),
+        )
+        self.conn.commit()
+
+    def recover(self) -> int:
+        """
+        Return URLs left in progress by an interrupted run to the queue.
+
+        Their budget charge is refunded.
+
+        Returns:
+            Number of recovered URLs
+        """
+        cursor = self.conn.cursor()
+        cursor.execute('''
+            UPDATE crawl_roots SET fetched = fetched - (
+                SELECT COUNT(*) FROM crawl_frontier f
+                WHERE f.root_url = crawl_roots.root_url AND f.status = 'in_progress'
+            )
+        ''')
+        cursor.execute("UPDATE crawl_frontier SET status = 'pending' WHERE status = 'in_progress'")
+        self.conn.commit()
+        return cursor.rowcount
+
+    def reset(self):
+        """Forget all crawl progress (the next run starts from the roots)."""
+        self.conn.execute("DELETE FROM crawl_frontier")
+        self.conn.execute("DELETE FROM crawl_roots")
+        self.conn.commit()
+        self._roots.clear()
+
+    def runnable(self) -> int:
+        """Number of pending URLs whose root still has budget left (what pop() can hand out)."""
+        return self.conn.execute('''
+            SELECT COUNT(*) FROM crawl_frontier f
+            JOIN crawl_roots r ON r.root_url = f.root_url
+            WHERE f.status = 'pending' AND r.fetched < r.budget
+        ''').fetchone()[0]
+
+    def stats(self) -> Dict[str, int]:
+        """Number of frontier URLs per status."""
+        cursor = self.conn.cursor()
+        cursor.execute("SELECT status, COUNT(*) FROM crawl_frontier GROUP BY status")
+        return dict(cursor.fetchall())
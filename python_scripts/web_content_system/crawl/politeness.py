@@ -0,0 +1,350 @@
+"""
+Per-host politeness: robots.txt crawl delays and a host-interleaving fetch scheduler.
+"""
+
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Any, Callable, Deque, Dict, Iterator, List, Optional, Tuple
+from urllib.parse import urlparse
+from urllib.robotparser import RobotFileParser
+
+import requests
+
+from ..adaptive import AIMDLimiter, LimiterRegistry, is_overload
+
+DEFAULT_DELAY = 0.5     # seconds between two requests to the same host
+MAX_CRAWL_DELAY = 60.0  # ignore absurd robots.txt Crawl-delay values above this
+ROBOTS_TIMEOUT = 10
+
+
+def host_of(url: str) -> str:
+    """Scheduling key of a URL: lower-cased host, port included."""
+    return urlparse(url).netloc.lower()
+
+
+@dataclass
+class _Robots:
+    """What we use from one host's robots.txt."""
+
+    delay: Optional[float] = None
+    sitemaps: List[str] = field(default_factory=list)
+
+
+class RobotsCache:
+    """
+    Fetches robots.txt once per host and answers its crawl delay and sitemaps.
+
+    Thread-safe; the first caller for a host fetches the file, concurrent
+    callers for the same host wait for that result.
+    """
+
+    def __init__(
+        self,
+        user_agent: str = "*",
+        timeout: float = ROBOTS_TIMEOUT,
+        fetch_text: Optional[Callable[[str], Optional[str]]] = None,
+    ):
+        """
+        Initialize robots cache.
+
+        Args:
+            user_agent: The crawler's User-Agent; sent when fetching
+                robots.txt and looked up in it ("*" sends the requests default)
+            timeout: Request timeout for robots.txt
+            fetch_text: Callable returning the robots.txt body of a URL, or
+                None when it is missing (defaults to an HTTP GET)
+        """
+        self.user_agent = user_agent
+        self.timeout = timeout
+        self._fetch_text = fetch_text or self._http_get
+        self._entries: Dict[str, _Robots] = {}
+        self._locks: Dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    def _http_get(self, robots_url: str) -> Optional[str]:
+        try:
+            headers = {"User-Agent": self.user_agent} if self.user_agent != "*" else None
+            resp = requests.get(robots_url, headers=headers, timeout=self.timeout)
+        except requests.RequestException:
+            return None
+        if resp.status_code != 200:
+            return None
+        return resp.text
+
+    def crawl_delay(self, url: str) -> Optional[float]:
+        """
+        Get the robots.txt delay for the host of a URL.
+
+        Both ``Crawl-delay`` and ``Request-rate`` are honoured.
+
+        Args:
+            url: Any URL on the host
+
+        Returns:
+            Delay in seconds, or None if robots.txt sets none
+        """
+        return self._entry(url).delay
+
+    def sitemaps(self, url: str) -> List[str]:
+        """
+        Get the ``Sitemap:`` URLs listed in the robots.txt of a URL's host.
+
+        Args:
+            url: Any URL on the host
+
+        Returns:
+            Sitemap URLs (empty if none are listed)
+        """
+        return list(self._entry(url).sitemaps)
+
+    def _entry(self, url: str) -> _Robots:
+        host = host_of(url)
+        with self._lock:
+            if host in self._entries:
+                return self._entries[host]
+            host_lock = self._locks.setdefault(host, threading.Lock())
+        with host_lock:
+            if host not in self._entries:
+                self._entries[host] = self._load(url)
+            return self._entries[host]
+
+    def _load(self, url: str) -> _Robots:
+        parsed = urlparse(url)
+        text = self._fetch_text(f"{parsed.scheme or 'https'}://{parsed.netloc}/robots.txt")
+        if not text:
+            return _Robots()
+        parser = RobotFileParser()
+        parser.parse(text.splitlines())
+        delay = parser.crawl_delay(self.user_agent)
+        rate = parser.request_rate(self.user_agent)
+        if rate and rate.requests:
+            delay = max(float(delay or 0), rate.seconds / rate.requests)
+        return _Robots(float(delay) if delay else None, parser.site_maps() or [])
+
+
+@dataclass
+class _HostState:
+    """Token bucket, concurrency limit and pending queue of one host."""
+
+    delay: float
+    base_delay: float
+    burst: int
+    tokens: float
+    updated: float
+    limiter: AIMDLimiter
+    queue: Deque[Tuple[str, Any]] = field(default_factory=deque)
+
+    def refill(self, now: float):
+        if self.delay <= 0:
+            self.tokens = self.burst
+        else:
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) / self.delay)
+        self.updated = now
+
+    def ready_in(self, now: float) -> float:
+        """Seconds until this host may be requested again."""
+        self.refill(now)
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) * self.delay
+
+
+class HostScheduler:
+    """
+    Interleaves requests across hosts while keeping each host at a polite rate.
+
+    Every host gets its own queue, token bucket (one token per ``delay``
+    seconds, at most ``burst`` saved up) and AIMD concurrency limit
+    (starting at one request in flight, growing up to ``max_per_host``
+    while the host answers quickly, halved on 429 / 503 / timeouts or
+    rising latency). An overloaded host's delay also doubles, and drifts
+    back to its base delay while responses are healthy. run() fetches from
+    whichever hosts are ready on a thread pool, so a run over many domains
+    proceeds at roughly ``workers`` requests at a time while each
+    individual site still sees a rate it can take.
+
+    Only the ``fetch`` callable runs in worker threads; results are yielded
+    to the calling thread, which may push more URLs between results.
+    """
+
+    def __init__(
+        self,
+        default_delay: float = DEFAULT_DELAY,
+        burst: int = 1,
+        robots: Optional[RobotsCache] = None,
+        max_delay: float = MAX_CRAWL_DELAY,
+        clock: Callable[[], float] = time.monotonic,
+        max_per_host: int = 1,
+    ):
+        """
+        Initialize host scheduler.
+
+        Args:
+            default_delay: Seconds between requests to one host
+            burst: Requests a host may receive back to back after idling
+            robots: RobotsCache whose Crawl-delay overrides a shorter default
+            max_delay: Upper bound for robots.txt and backed-off delays
+            clock: Monotonic time source
+            max_per_host: Upper bound of a host's adaptive concurrency limit
+        """
+        self.default_delay = default_delay
+        self.burst = max(1, burst)
+        self.robots = robots
+        self.max_delay = max_delay
+        self.clock = clock
+        self.limiters = LimiterRegistry(max_limit=max(1, max_per_host), clock=clock)
+        self._hosts: Dict[str, _HostState] = {}
+        self._queued = 0
+
+    def _state(self, host: str) -> _HostState:
+        state = self._hosts.get(host)
+        if state is None:
+            state = _HostState(
+                delay=self.default_delay, base_delay=self.default_delay, burst=self.burst,
+                tokens=self.burst, updated=self.clock(), limiter=self.limiters.get(host),
+            )
+            self._hosts[host] = state
+        return state
+
+    def delay_for(self, host: str) -> float:
+        """Current delay between requests to a host."""
+        return self._state(host).delay
+
+    def limit_for(self, host: str) -> int:
+        """Current number of concurrent requests allowed to a host."""
+        return self._state(host).limiter.limit
+
+    def metrics(self) -> Dict[str, Dict[str, Any]]:
+        """Adaptive limit, latency and delay of every host seen so far."""
+        metrics = self.limiters.metrics()
+        for host, state in self._hosts.items():
+            metrics.setdefault(host, {})["delay"] = round(state.delay, 3)
+        return metrics
+
+    def push(self, url: str, item: Any = None):
+        """
+        Queue a URL.
+
+        Args:
+            url: URL to fetch
+            item: Value yielded back with the result (defaults to the URL)
+        """
+        self._state(host_of(url)).queue.append((url, url if item is None else item))
+        self._queued += 1
+
+    def pending(self) -> int:
+        """Number of queued URLs not yet handed to a worker."""
+        return self._queued
+
+    def _take_ready(self) -> Tuple[Optional[Tuple[str, str, Any]], float]:
+        """
+        Take the next URL from the host that is ready soonest.
+
+        Returns:
+            ((host, url, item) or None, seconds until a host becomes ready)
+        """
+        now = self.clock()
+        best_host, best_wait = None, None
+        for host, state in self._hosts.items():
+            if not state.queue or state.limiter.full():
+                continue
+            ready_in = state.ready_in(now)
+            if best_wait is None or ready_in < best_wait:
+                best_host, best_wait = host, ready_in
+        if best_host is None:
+            return None, 0.0
+        if best_wait > 0:
+            return None, best_wait
+        state = self._hosts[best_host]
+        if not state.limiter.try_acquire():
+            return None, 0.0
+        state.tokens -= 1
+        url, item = state.queue.popleft()
+        self._queued -= 1
+        return (best_host, url, item), 0.0
+
+    def _fetch_with_delay(
+        self, fetch: Callable[[str], Any], url: str
+    ) -> Tuple[Optional[float], float, Any]:
+        """Worker: look up the host's robots delay (cached), then fetch and time it."""
+        delay = self.robots.crawl_delay(url) if self.robots is not None else None
+        start = self.clock()
+        result = fetch(url)
+        return delay, self.clock() - start, result
+
+    def _release(
+        self,
+        host: str,
+        robots_delay: Optional[float],
+        latency: Optional[float] = None,
+        overloaded: bool = False,
+    ):
+        state = self._hosts[host]
+        if robots_delay is not None:
+            state.base_delay = max(self.default_delay, min(robots_delay, self.max_delay))
+            state.delay = max(state.delay, state.base_delay)
+        state.limiter.release(latency, overloaded)
+        if overloaded:
+            state.delay = min(self.max_delay, max(1.0, state.delay * 2))
+        elif state.delay > state.base_delay:
+            state.delay = max(state.base_delay, state.delay * 0.9)
+        state.refill(self.clock())
+
+    def run(
+        self,
+        fetch: Callable[[str], Any],
+        workers: int = 8,
+        refill: Optional[Callable[[], None]] = None,
+    ) -> Iterator[Tuple[Any, Any]]:
+        """
+        Fetch every queued URL politely.
+
+        Args:
+            fetch: Thread-safe callable taking a URL; exceptions propagate.
+                Results (or returned exceptions) that are HTTP 429 / 503 or
+                timeouts count as overload of the host.
+            workers: Maximum concurrent requests over all hosts
+            refill: Called before each scheduling round so the caller can
+                push more URLs when pending() runs low
+
+        Yields:
+            Tuples of (item, fetch result) in completion order
+        """
+        in_flight: Dict[Any, Tuple[str, Any]] = {}
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+            while True:
+                if refill is not None:
+                    refill()
+                next_ready = 0.0
+                while len(in_flight) < workers:
+                    taken, next_ready = self._take_ready()
+                    if taken is None:
+                        break
+                    host, url, item = taken
+                    in_flight[pool.submit(self._fetch_with_delay, fetch, url)] = (host, item)
+
+                if not in_flight:
+                    if not self._queued:
+                        return
+                    time.sleep(next_ready)
+                    continue
+
+                done, _ = wait(in_flight, timeout=next_ready or None, return_when=FIRST_COMPLETED)
+                for future in done:
+                    host, item = in_flight.pop(future)
+                    robots_delay, latency, result = None, None, None
+                    overloaded = False
+                    try:
+                        robots_delay, latency, result = future.result()
+                        overloaded = is_overload(result)
+                        if isinstance(result, BaseException) and not overloaded:
+                            latency = None  # refused / 404: says nothing about load
+                    except Exception as exc:
+                        overloaded = is_overload(exc)
+                        raise
+                    finally:
+                        self._release(host, robots_delay, latency, overloaded)
+                    yield item, result
@@ -0,0 +1,295 @@
+"""
+Per-URL change history and change-rate-driven recrawl selection.
+"""
+
+import hashlib
+import math
+import re
+import sqlite3
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import List, Optional
+
+from ..database.near_duplicates import MAX_DISTANCE, hamming, simhash
+from .urls import canonical_uid
+
+TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+DEFAULT_CHANGE_RATE = 1 / (7 * 86400)  # prior: one change a week, per second
+MIN_INTERVAL = 60.0                    # seconds; guards against re-checks in one run
+DUE_PROBABILITY = 0.5                  # a page is due once it changed with this probability
+MAX_DUE_SECONDS = 3650 * 86400.0       # pages that never change are due after ten years
+
+
+def _parse_time(value: Optional[str]) -> Optional[datetime]:
+    try:
+        return datetime.strptime(value, TIME_FORMAT) if value else None
+    except ValueError:
+        return None
+
+
+def content_hash(content: str) -> str:
+    """sha1 of the content with whitespace collapsed."""
+    return hashlib.sha1(re.sub(r"\s+", " ", content or "").strip().encode("utf-8")).hexdigest()
+
+
+def next_due(last_checked: Optional[str], rate: float) -> str:
+    """
+    Time at which a page's change probability reaches DUE_PROBABILITY.
+
+    Stored per page so select() can find due pages with an index instead of
+    scoring every row. An unparseable check time makes the page due now.
+    """
+    previous = _parse_time(last_checked)
+    if previous is None:
+        return ""
+    seconds = -math.log(1 - DUE_PROBABILITY) / rate if rate > 0 else MAX_DUE_SECONDS
+    return (previous + timedelta(seconds=min(seconds, MAX_DUE_SECONDS))).strftime(TIME_FORMAT)
+
+
+def estimate_change_rate(checks: int, changes: int, observed_seconds: float) -> float:
+    """
+    Estimate a page's change rate from periodic checks.
+
+    Uses the bias-reduced Poisson estimator of Cho & Garcia-Molina:
+    ``-ln((n - X + 0.5) / (n + 0.5)) / I`` for X changed intervals out of n
+    checks spaced I seconds apart on average. A check only tells whether the
+    page changed at least once, so the naive X / (n · I) underestimates
+    pages that change more often than they are checked.
+
+    Args:
+        checks: Number of check intervals (re-fetches)
+        changes: Intervals in which the content changed
+        observed_seconds: Total length of those intervals
+
+    Returns:
+        Changes per second (the prior when there is no history yet)
+    """
+    if checks <= 0 or observed_seconds <= 0:
+        return DEFAULT_CHANGE_RATE
+    mean_interval = observed_seconds / checks
+    return -math.log((checks - changes + 0.5) / (checks + 0.5)) / mean_interval
+
+
+@dataclass
+class RecrawlCandidate:
+    """A URL proposed for a revisit."""
+
+    url: str
+    change_probability: float
+    change_rate: float
+    last_checked: Optional[str]
+
+
+class ChangeHistory:
+    """
+    Records, per URL, the content hash and when it last changed.
+
+    Every fetch of a known page is one observation: either the content
+    changed since the previous fetch or it did not. Cosmetic edits (view
+    counters, timestamps) that leave the SimHash within the near-duplicate
+    distance are not counted as changes.
+    """
+
+    def __init__(self, conn: sqlite3.Connection):
+        """
+        Initialize change history.
+
+        Args:
+            conn: Open SQLite connection (the content_summary database)
+        """
+        self.conn = conn
+        self._create_tables()
+
+    def _create_tables(self):
+        """Create the page_changes table and its due-time index."""
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS page_changes (
+                uid TEXT PRIMARY KEY,
+                url TEXT NOT NULL,
+                content_hash TEXT,
+                simhash INTEGER,
+                first_seen TEXT NOT NULL,
+                last_checked TEXT NOT NULL,
+                last_changed TEXT,
+                checks INTEGER NOT NULL DEFAULT 0,
+                changes INTEGER NOT NULL DEFAULT 0,
+                observed_seconds REAL NOT NULL DEFAULT 0,
+                change_rate REAL,
+                next_due TEXT
+            )
+        ''')
+        columns = {row[1] for row in self.conn.execute("PRAGMA table_info(page_changes)")}
+        for column, kind in (("change_rate", "REAL"), ("next_due", "TEXT")):
+            if column not in columns:
+                self.conn.execute(f"ALTER TABLE page_changes ADD COLUMN {column} {kind}")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_page_changes_due ON page_changes (next_due)")
+        # Rows written before the due time was stored
+        rows = self.conn.execute('''
+            SELECT uid, last_checked, checks, changes, observed_seconds FROM page_changes
+            WHERE next_due IS NULL
+        ''').fetchall()
+        updates = []
+        for uid, last_checked, checks, changes, observed in rows:
+            rate = estimate_change_rate(checks, changes, observed)
+            updates.append((rate, next_due(last_checked, rate), uid))
+        self.conn.executemany("UPDATE page_changes SET change_rate = ?, next_due = ? WHERE uid = ?", updates)
+        self.conn.commit()
+
+    @staticmethod
+    def _signed(value: Optional[int]) -> Optional[int]:
+        if value is None:
+            return None
+        return value - (1 << 64) if value >= 1 << 63 else value
+
+    def seed_from_content_summary(self) -> int:
+        """
+        Start a history for stored rows that have none, using created_time.
+
+        Only the content hash is computed here; a row's SimHash is computed
+        by observe() the first time a re-fetch finds its hash changed.
+
+        Returns:
+            Number of rows seeded
+        """
+        columns = [row[1] for row in self.conn.execute("PRAGMA table_info(content_summary)")]
+        content_col = "c.content" if "content" in columns else "NULL"
+        rows = self.conn.execute(f'''
+            SELECT c.uid, c.original_url, c.created_time, {content_col} FROM content_summary c
+            LEFT JOIN page_changes p ON p.uid = c.uid
+            WHERE p.uid IS NULL AND c.uid IS NOT NULL
+        ''').fetchall()
+        self.conn.executemany('''
+            INSERT OR IGNORE INTO page_changes
+                (uid, url, content_hash, first_seen, last_checked, change_rate, next_due)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        ''', [
+            (uid, url, content_hash(content) if content else None, created, created,
+             DEFAULT_CHANGE_RATE, next_due(created, DEFAULT_CHANGE_RATE))
+            for uid, url, created, content in rows
+        ])
+        self.conn.commit()
+        return len(rows)
+
+    def _stored_simhash(self, uid: str) -> Optional[int]:
+        """SimHash of the content stored for a row in content_summary, if any."""
+        columns = [row[1] for row in self.conn.execute("PRAGMA table_info(content_summary)")]
+        if "content" not in columns:
+            return None
+        row = self.conn.execute("SELECT content FROM content_summary WHERE uid = ?", (uid,)).fetchone()
+        return simhash(row[0]) if row and row[0] else None
+
+    def observe(self, url: str, content: str, now: Optional[datetime] = None) -> bool:
+        """
+        Record a fetch of a URL.
+
+        Args:
+            url: Fetched URL
+            content: Extracted content
+            now: Fetch time (defaults to now)
+
+        Returns:
+            True if the content changed since the previous observation
+        """
+        now = now or datetime.now()
+        stamp = now.strftime(TIME_FORMAT)
+        uid = canonical_uid(url)
+        new_hash = content_hash(content)
+        row = self.conn.execute('''
+            SELECT content_hash, simhash, last_checked, checks, changes, observed_seconds
+            FROM page_changes WHERE uid = ?
+        ''', (uid,)).fetchone()
+        if row is None:
+            self.conn.execute('''
+                INSERT INTO page_changes
+                    (uid, url, content_hash, simhash, first_seen, last_checked, last_changed,
+                     change_rate, next_due)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', (
+                uid, url, new_hash, self._signed(simhash(content)), stamp, stamp, stamp,
+                DEFAULT_CHANGE_RATE, next_due(stamp, DEFAULT_CHANGE_RATE),
+            ))
+            self.conn.commit()
+            return False
+
+        old_hash, old_simhash, last_checked, checks, changes, observed = row
+        changed = old_hash is not None and old_hash != new_hash
+        # The SimHash only matters once the exact hash differs; rows seeded
+        # without one get it from the content still stored for them.
+        new_simhash = old_simhash
+        if changed or old_hash is None:
+            new_simhash = self._signed(simhash(content))
+        if changed:
+            if old_simhash is None:
+                old_simhash = self._signed(self._stored_simhash(uid))
+            if old_simhash is not None and new_simhash is not None:
+                changed = hamming(old_simhash & ((1 << 64) - 1), new_simhash & ((1 << 64) - 1)) > MAX_DISTANCE
+        previous = _parse_time(last_checked)
+        interval = (now - previous).total_seconds() if previous else 0.0
+        counted = old_hash is not None and interval >= MIN_INTERVAL
+        if counted:
+            checks, changes, observed = checks + 1, changes + int(changed), observed + interval
+        rate = estimate_change_rate(checks, changes, observed)
+
+        self.conn.execute('''
+            UPDATE page_changes SET
+                content_hash = ?, simhash = ?, last_checked = ?,
+                last_changed = CASE WHEN ? THEN ? ELSE last_changed END,
+                checks = ?, changes = ?, observed_seconds = ?,
+                change_rate = ?, next_due = ?
+            WHERE uid = ?
+        ''', (
+            new_hash, new_simhash, stamp,
+            changed, stamp,
+            checks, changes, observed,
+            rate, next_due(stamp, rate),
+            uid,
+        ))
+        self.conn.commit()
+        return changed
+
+    def select(self, budget: int, now: Optional[datetime] = None) -> List[RecrawlCandidate]:
+        """
+        Pick the URLs most likely to have changed since their last check.
+
+        Each page is modelled as a Poisson process with its estimated rate
+        λ; the chance it changed since the last check t seconds ago is
+        ``1 - exp(-λ t)``. Spending the budget on the highest probabilities
+        finds the most changes per fetch, so static pages are revisited
+        rarely and fast-changing ones often.
+
+        Args:
+            budget: Number of URLs to pick
+            now: Reference time (defaults to now)
+
+        Returns:
+            Candidates, most likely changed first
+        """
+        now = now or datetime.now()
+        stamp = now.strftime(TIME_FORMAT)
+        budget = max(0, budget)
+        # Due pages come from the next_due index, ranked by λ·t (the order
+        # of 1 - exp(-λ t)); if they do not fill the budget, the pages
+        # that fall due soonest follow.
+        rows = self.conn.execute('''
+            SELECT url, last_checked, change_rate FROM page_changes
+            WHERE next_due <= ?
+            ORDER BY change_rate * (julianday(?) - julianday(last_checked)) DESC
+            LIMIT ?
+        ''', (stamp, stamp, budget)).fetchall()
+        if len(rows) < budget:
+            rows += self.conn.execute('''
+                SELECT url, last_checked, change_rate FROM page_changes
+                WHERE next_due > ?
+                ORDER BY next_due
+                LIMIT ?
+            ''', (stamp, budget - len(rows))).fetchall()
+        candidates = []
+        for url, last_checked, rate in rows:
+            previous = _parse_time(last_checked)
+            if previous is None:
+                probability = 1.0
+            else:
+                probability = 1.0 - math.exp(-rate * max(0.0, (now - previous).total_seconds()))
+            candidates.append(RecrawlCandidate(url, probability, rate, last_checked))
+        candidates.sort(key=lambda c: c.change_probability, reverse=True)
+        return candidates
@@ -0,0 +1,341 @@
+"""
+Sitemap and RSS/Atom feed discovery with lastmod-based change detection.
+"""
+
+import gzip
+import io
+import sqlite3
+import time
+import xml.etree.ElementTree as ET
+from dataclasses import dataclass
+from datetime import datetime
+from email.utils import parsedate_to_datetime
+from typing import BinaryIO, Callable, Dict, Iterable, Iterator, List, Optional, Set
+from urllib.parse import urljoin, urlparse
+
+import requests
+
+from .politeness import RobotsCache
+from .urls import canonical_uid, canonicalize_url
+
+# Tried when robots.txt lists no sitemap / as common feed locations.
+DEFAULT_SITEMAP_PATHS = ("/sitemap.xml",)
+DEFAULT_FEED_PATHS = ("/feed", "/rss.xml", "/atom.xml", "/feed.xml", "/index.xml")
+
+MAX_SITEMAPS_PER_SITE = 200
+FETCH_TIMEOUT = 30
+TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+@dataclass
+class DiscoveredURL:
+    """A page (or child sitemap) listed by a sitemap or feed."""
+
+    url: str
+    lastmod: Optional[str] = None  # local time, TIME_FORMAT
+    is_sitemap: bool = False
+
+
+def parse_datetime(text: Optional[str]) -> Optional[str]:
+    """
+    Parse a W3C (sitemaps, Atom) or RFC 822 (RSS) date.
+
+    Args:
+        text: Date string
+
+    Returns:
+        Local time formatted like the DB's created_time, or None
+    """
+    text = (text or "").strip()
+    if not text:
+        return None
+    try:
+        dt = datetime.fromisoformat(text.replace("Z", "+00:00"))
+    except ValueError:
+        try:
+            dt = parsedate_to_datetime(text)
+        except (TypeError, ValueError):
+            return None
+    if dt.tzinfo is not None:
+        dt = dt.astimezone().replace(tzinfo=None)
+    return dt.strftime(TIME_FORMAT)
+
+
+def _local(tag: str) -> str:
+    return tag.rsplit("}", 1)[-1]
+
+
+def _child_text(elem: ET.Element, *names: str) -> Optional[str]:
+    for child in elem:
+        if _local(child.tag) in names and child.text and child.text.strip():
+            return child.text.strip()
+    return None
+
+
+def _atom_link(entry: ET.Element) -> Optional[str]:
+    for child in entry:
+        if _local(child.tag) == "link" and child.get("rel", "alternate") == "alternate":
+            return child.get("href")
+    return None
+
+
+def iter_listing(stream: BinaryIO, base_url: str = "") -> Iterator[DiscoveredURL]:
+    """
+    Stream the URLs out of a sitemap, sitemap index, RSS or Atom document.
+
+    Elements are cleared as soon as they are read, so memory stays flat
+    even for 50 000-URL sitemaps. Malformed XML ends the listing early.
+
+    Args:
+        stream: Binary file-like object with the (decompressed) XML
+        base_url: URL of the document, for resolving relative links
+
+    Yields:
+        DiscoveredURL entries in document order
+    """
+    try:
+        for _, elem in ET.iterparse(stream, events=("end",)):
+            name = _local(elem.tag)
+            found = None
+            if name in ("url", "sitemap"):
+                loc = _child_text(elem, "loc")
+                if loc:
+                    found = DiscoveredURL(
+                        urljoin(base_url, loc), parse_datetime(_child_text(elem, "lastmod")),
+                        is_sitemap=(name == "sitemap"),
+                    )
+            elif name == "item":
+                link = _child_text(elem, "link")
+                if link:
+                    found = DiscoveredURL(
+                        urljoin(base_url, link),
+                        parse_datetime(_child_text(elem, "updated", "pubDate", "date")),
+                    )
+            elif name == "entry":
+                link = _atom_link(elem)
+                if link:
+                    found = DiscoveredURL(
+                        urljoin(base_url, link),
+                        parse_datetime(_child_text(elem, "updated", "published")),
+                    )
+            else:
+                continue
+            elem.clear()
+            if found is not None:
+                yield found
+    except ET.ParseError:
+        return
+
+
+def open_listing(
+    url: str,
+    timeout: float = FETCH_TIMEOUT,
+    headers: Optional[dict] = None,
+) -> Optional[BinaryIO]:
+    """
+    Open a sitemap / feed URL as a decompressed binary stream.
+
+    Args:
+        url: Document URL
+        timeout: Request timeout
+        headers: Extra request headers
+
+    Returns:
+        Readable stream, or None when the document is missing or not XML
+    """
+    try:
+        resp = requests.get(url, timeout=timeout, headers=headers, stream=True)
+    except requests.RequestException:
+        return None
+    content_type = resp.headers.get("Content-Type", "")
+    if resp.status_code != 200 or "html" in content_type:
+        resp.close()
+        return None
+    resp.raw.decode_content = True
+    stream = io.BufferedReader(resp.raw)
+    if stream.peek(2)[:2] == b"\x1f\x8b":  # .xml.gz sitemaps
+        return gzip.GzipFile(fileobj=stream)
+    return stream
+
+
+class SitemapDiscovery:
+    """
+    Lists a site's pages from robots.txt sitemaps, sitemap indexes and feeds.
+
+    Child sitemaps of an index are read right after the index, up to
+    ``max_sitemaps`` documents per site; every document is parsed as a
+    stream.
+    """
+
+    def __init__(
+        self,
+        robots: Optional[RobotsCache] = None,
+        open_stream: Callable[[str], Optional[BinaryIO]] = open_listing,
+        feed_paths: Iterable[str] = DEFAULT_FEED_PATHS,
+        max_sitemaps: int = MAX_SITEMAPS_PER_SITE,
+        delay: float = 0.5,
+    ):
+        """
+        Initialize discovery.
+
+        Args:
+            robots: RobotsCache for ``Sitemap:`` lines (a new one if omitted)
+            open_stream: Callable opening a document URL as a binary stream
+            feed_paths: Feed locations to probe on every site
+            max_sitemaps: Maximum documents read per site
+            delay: Seconds between two document requests to the same site
+        """
+        self.robots = robots or RobotsCache()
+        self.open_stream = open_stream
+        self.feed_paths = tuple(feed_paths)
+        self.max_sitemaps = max_sitemaps
+        self.delay = delay
+
+    def sources(self, root_url: str) -> List[str]:
+        """Sitemap and feed URLs to read for a site."""
+        origin = "{0.scheme}://{0.netloc}".format(urlparse(root_url))
+        sitemaps = self.robots.sitemaps(root_url) or [origin + p for p in DEFAULT_SITEMAP_PATHS]
+        return sitemaps + [origin + p for p in self.feed_paths]
+
+    def discover(self, root_url: str) -> Iterator[DiscoveredURL]:
+        """
+        Yield every page listed for the site of a root URL (deduplicated).
+
+        Args:
+            root_url: Any URL on the site
+
+        Yields:
+            DiscoveredURL page entries
+        """
+        queue = self.sources(root_url)
+        read: Set[str] = set()
+        listed: Set[str] = set()
+        while queue and len(read) < self.max_sitemaps:
+            source = queue.pop(0)
+            key = canonicalize_url(source)
+            if key in read:
+                continue
+            if read:
+                time.sleep(self.delay)
+            read.add(key)
+            stream = self.open_stream(source)
+            if stream is None:
+                continue
+            children = []
+            try:
+                for entry in iter_listing(stream, source):
+                    if entry.is_sitemap:
+                        children.append(entry.url)
+                        continue
+                    page_key = canonicalize_url(entry.url)
+                    if page_key not in listed:
+                        listed.add(page_key)
+                        yield entry
+            finally:
+                stream.close()
+            queue[0:0] = children
+
+
+class LastmodIndex:
+    """
+    Remembers advertised and crawled lastmod times per URL.
+
+    A listed URL needs crawling when it was never fetched (and is not
+    stored yet), or when its advertised lastmod is newer than the one seen
+    at the last successful fetch. Rows stored before this index existed use
+    their created_time as the fetch baseline.
+    """
+
+    def __init__(self, conn: sqlite3.Connection):
+        """
+        Initialize lastmod index.
+
+        Args:
+            conn: Open SQLite connection (the content_summary database)
+        """
+        self.conn = conn
+        self._create_tables()
+
+    def _create_tables(self):
+        """Create the url_lastmod table."""
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS url_lastmod (
+                uid TEXT PRIMARY KEY,
+                url TEXT NOT NULL,
+                lastmod TEXT,
+                fetched_lastmod TEXT,
+                seen_time TEXT NOT NULL
+            )
+        ''')
+        self.conn.commit()
+
+    def record(self, entries: Iterable[DiscoveredURL]):
+        """
+        Store the lastmod times advertised in a listing.
+
+        Args:
+            entries: Listed pages
+        """
+        now = datetime.now().strftime(TIME_FORMAT)
+        self.conn.executemany('''
+            INSERT INTO url_lastmod (uid, url, lastmod, seen_time)
+            VALUES (?, ?, ?, ?)
+            ON CONFLICT(uid) DO UPDATE SET
+              lastmod=COALESCE(excluded.lastmod, url_lastmod.lastmod),
+              seen_time=excluded.seen_time
+        ''', [(canonical_uid(e.url), e.url, e.lastmod, now) for e in entries])
+        self.conn.commit()
+
+    def _baselines(self, uids: List[str]) -> Dict[str, Optional[str]]:
+        """Map uid → fetch baseline time for URLs we have fetched or stored."""
+        baselines: Dict[str, Optional[str]] = {}
+        for i in range(0, len(uids), 500):
+            chunk = uids[i:i + 500]
+            marks = ",".join("?" * len(chunk))
+            for uid, created in self.conn.execute(
+                f"SELECT uid, created_time FROM content_summary WHERE uid IN ({marks})", chunk
+            ):
+                baselines[uid] = created
+            for uid, fetched in self.conn.execute(
+                f"SELECT uid, fetched_lastmod FROM url_lastmod "
+                f"WHERE fetched_lastmod IS NOT NULL AND uid IN ({marks})", chunk
+            ):
+                baselines[uid] = fetched
+        return baselines
+
+    def changed(self, entries: Iterable[DiscoveredURL]) -> List[DiscoveredURL]:
+        """
+        Select the listed pages that are new or changed since their last fetch.
+
+        Args:
+            entries: Listed pages
+
+        Returns:
+            Pages to crawl, in listing order
+        """
+        entries = list(entries)
+        baselines = self._baselines([canonical_uid(e.url) for e in entries])
+        todo = []
+        for entry in entries:
+            uid = canonical_uid(entry.url)
+            if uid not in baselines:
+                todo.append(entry)
+            elif entry.lastmod and entry.lastmod > (baselines[uid] or ""):
+                todo.append(entry)
+        return todo
+
+    def mark_fetched(self, url: str, lastmod: Optional[str] = None):
+        """
+        Record a successful fetch.
+
+        Args:
+            url: Fetched URL
+            lastmod: lastmod the listing advertised (defaults to now)
+        """
+        now = datetime.now().strftime(TIME_FORMAT)
+        self.conn.execute('''
+            INSERT INTO url_lastmod (uid, url, lastmod, fetched_lastmod, seen_time)
+            VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT(uid) DO UPDATE SET fetched_lastmod=excluded.fetched_lastmod
+        ''', (canonical_uid(url), url, lastmod, lastmod or now, now))
+        self.conn.commit()
@@ -0,0 +1,174 @@
+"""
+URL canonicalisation and a compact probabilistic seen-set.
+"""
+
+import hashlib
+import math
+import re
+import sqlite3
+from typing import Iterable, Set
+from urllib.parse import parse_qsl, quote, urlencode, urlsplit, urlunsplit
+
+# Query parameters that only track where a click came from.
+TRACKING_PARAMS = frozenset({
+    "fbclid", "gclid", "dclid", "gbraid", "wbraid", "msclkid", "yclid", "twclid",
+    "igshid", "mc_cid", "mc_eid", "_hsenc", "_hsmi", "mkt_tok", "ref_src",
+    "spm", "scm", "share_source", "share_medium", "share_token", "from_source",
+})
+TRACKING_PREFIXES = ("utm_",)
+
+DEFAULT_PORTS = {"http": "80", "https": "443"}
+_PERCENT_ESCAPE = re.compile(r"%[0-9a-fA-F]{2}")
+_PATH_SAFE = "/%:@!$&'()*+,;=-._~"
+
+
+def _is_tracking(name: str) -> bool:
+    name = name.lower()
+    return name in TRACKING_PARAMS or name.startswith(TRACKING_PREFIXES)
+
+
+def canonicalize_url(url: str) -> str:
+    """
+    Reduce a URL to the form used as its identity.
+
+    http and https, ``www.`` and the bare host, default ports, trailing
+    slashes, fragments, tracking parameters and query-parameter order do
+    not make two URLs different pages. The result is only a key — pages
+    are still fetched from their original URL.
+
+    Args:
+        url: Absolute URL
+
+    Returns:
+        Canonical URL (idempotent: canonicalising it again is a no-op)
+    """
+    url = (url or "").strip()
+    parts = urlsplit(url)
+    scheme = parts.scheme.lower()
+    if scheme not in ("http", "https"):
+        return url
+    host = (parts.hostname or "").rstrip(".").removeprefix("www.")
+    port = parts.port
+    netloc = host if port is None or str(port) in DEFAULT_PORTS.values() else f"{host}:{port}"
+
+    path = quote(parts.path or "/", safe=_PATH_SAFE)
+    path = _PERCENT_ESCAPE.sub(lambda m: m.group(0).upper(), path)
+    if len(path) > 1:
+        path = path.rstrip("/") or "/"
+
+    query = sorted(
+        (k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True) if not _is_tracking(k)
+    )
+    return urlunsplit(("https", netloc, path, urlencode(query), ""))
+
+
+def canonical_uid(url: str) -> str:
+    """Row key of a URL: md5 of its canonical form."""
+    return hashlib.md5(canonicalize_url(url).encode("utf-8")).hexdigest()
+
+
+class BloomFilter:
+    """
+    Fixed-size Bloom filter over string keys.
+
+    Answers "definitely not seen" exactly and "maybe seen" with roughly
+    ``error_rate`` false positives while fewer than ``capacity`` keys are
+    stored; one million keys at 0.1 % take about 1.8 MB.
+    """
+
+    def __init__(self, capacity: int = 1_000_000, error_rate: float = 0.001):
+        """
+        Initialize Bloom filter.
+
+        Args:
+            capacity: Expected number of keys
+            error_rate: Target false-positive rate at capacity
+        """
+        capacity = max(1, capacity)
+        self.num_bits = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.num_hashes = max(1, round(self.num_bits / capacity * math.log(2)))
+        self.bits = bytearray((self.num_bits + 7) // 8)
+        self.count = 0
+
+    def _positions(self, key: str) -> Iterable[int]:
+        digest = hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return ((h1 + i * h2) % self.num_bits for i in range(self.num_hashes))
+
+    def add(self, key: str):
+        """Add a key."""
+        for pos in self._positions(key):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+
+    def __contains__(self, key: str) -> bool:
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(key))
+
+    def __len__(self) -> int:
+        return self.count
+
+
+class SeenSet:
+    """
+    Bloom filter in front of a key column of a SQLite table.
+
+    Keys the filter has never seen are answered without touching the
+    database; only possible hits are confirmed with a query, so checking
+    thousands of discovered links costs a handful of lookups.
+    """
+
+    def __init__(
+        self,
+        conn: sqlite3.Connection,
+        table: str,
+        column: str = "uid",
+        capacity: int = 1_000_000,
+        error_rate: float = 0.001,
+    ):
+        """
+        Initialize seen-set and load the existing keys.
+
+        Args:
+            conn: Open SQLite connection
+            table: Table holding the keys (trusted identifier)
+            column: Key column (trusted identifier)
+            capacity: Minimum Bloom filter capacity
+            error_rate: Bloom filter false-positive rate
+        """
+        self.conn = conn
+        self.table = table
+        self.column = column
+        existing = conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+        self.bloom = BloomFilter(max(capacity, existing * 2), error_rate)
+        for (key,) in conn.execute(f"SELECT {column} FROM {table} WHERE {column} IS NOT NULL"):
+            self.bloom.add(key)
+
+    def add(self, key: str):
+        """Record a key that was just written to the table."""
+        self.bloom.add(key)
+
+    def filter_seen(self, keys: Iterable[str]) -> Set[str]:
+        """
+        Return the subset of keys present in the table.
+
+        Args:
+            keys: Keys to check
+
+        Returns:
+            Keys that exist in the table
+        """
+        maybe = [key for key in set(keys) if key in self.bloom]
+        found: Set[str] = set()
+        for i in range(0, len(maybe), 500):
+            chunk = maybe[i:i + 500]
+            cursor = self.conn.execute(
+                f"SELECT {self.column} FROM {self.table} "
+                f"WHERE {self.column} IN ({','.join('?' * len(chunk))})",
+                chunk,
+            )
+            found.update(row[0] for row in cursor)
+        return found
+
+    def __contains__(self, key: str) -> bool:
+        return bool(self.filter_seen([key]))
@@ -2,6 +2,33 @@
 Database operations package.
 """
 
+from .batch_store import BatchRecord, BatchStore
+from .call_log import CallLog
 from .db_manager import DatabaseManager
+from .embedding_store import EmbeddingStore
+from .failure_log import FailedItem, FailureLog
+from .job_store import Job, JobStore
+from .near_duplicates import NearDuplicate, NearDuplicateIndex
+from .raw_archive import RawArchive
+from .selector_cache import SelectorCache
+from .usage_log import UsageLog
+from .work_queue import WorkItem, WorkQueue
 
-__all__ = ["DatabaseManager"]
+__all__ = [
+    "BatchRecord",
+    "BatchStore",
+    "CallLog",
+    "DatabaseManager",
+    "EmbeddingStore",
+    "FailedItem",
+    "FailureLog",
+    "Job",
+    "JobStore",
+    "NearDuplicate",
+    "NearDuplicateIndex",
+    "RawArchive",
+    "SelectorCache",
+    "UsageLog",
+    "WorkItem",
+    "WorkQueue",
+]
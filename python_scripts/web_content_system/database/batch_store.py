@@ -0,0 +1,245 @@
+"""
+Local state of offline LLM batches, so submission and collection resume.
+"""
+
+import os
+import sqlite3
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from ..llm_clients.batch import BatchResult
+
+TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+# Local batch statuses, besides the provider's own (validating, in_progress, ...).
+PREPARED = "prepared"  # recorded, not submitted yet
+APPLIED = "applied"    # results written back; nothing left to do
+
+# Item statuses.
+PENDING = "pending"
+DONE = "done"
+FAILED = "failed"
+
+
+@dataclass
+class BatchRecord:
+    """One submitted (or about to be submitted) batch."""
+
+    id: int
+    remote_id: Optional[str]
+    provider: str
+    model: str
+    status: str
+    input_path: str
+    requests: int
+
+
+class BatchStore:
+    """
+    Tracks LLM batches in ``llm_batches`` and their rows in ``llm_batch_items``.
+
+    A batch is recorded with its input file before it is submitted, and each
+    item keeps its own status, so an interrupted run picks up where it
+    stopped: prepared batches are submitted, running ones polled, and results
+    already written back are skipped when an output file is read again.
+    """
+
+    def __init__(self, conn: sqlite3.Connection):
+        """
+        Initialize batch store.
+
+        Args:
+            conn: Open SQLite connection (the content_summary database)
+        """
+        self.conn = conn
+        self._create_tables()
+
+    def _create_tables(self):
+        """Create batch and batch item tables."""
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS llm_batches (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                remote_id TEXT,
+                provider TEXT NOT NULL,
+                model TEXT NOT NULL,
+                status TEXT NOT NULL,
+                input_path TEXT NOT NULL,
+                requests INTEGER NOT NULL DEFAULT 0,
+                error TEXT,
+                created_time TEXT NOT NULL,
+                submitted_time TEXT,
+                finished_time TEXT
+            )
+        ''')
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS llm_batch_items (
+                custom_id TEXT PRIMARY KEY,
+                batch_id INTEGER NOT NULL,
+                uid TEXT NOT NULL,
+                status TEXT NOT NULL DEFAULT 'pending',
+                error TEXT
+            )
+        ''')
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_llm_batch_items_uid ON llm_batch_items (uid)")
+        self.conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_llm_batch_items_batch ON llm_batch_items (batch_id, status)"
+        )
+        self.conn.commit()
+
+    @staticmethod
+    def _now() -> str:
+        return datetime.now().strftime(TIME_FORMAT)
+
+    @staticmethod
+    def custom_id(batch_id: int, uid: str) -> str:
+        """Request id of a row within a batch."""
+        return f"{batch_id}-{uid}"
+
+    def create(self, provider: str, model: str, input_dir: str, uids: List[str]) -> BatchRecord:
+        """
+        Record a new batch and its rows (status ``prepared``).
+
+        Args:
+            provider: Provider name
+            model: Model of the requests
+            input_dir: Directory of the batch's JSONL input file
+            uids: content_summary uids in the batch
+
+        Returns:
+            The new batch; its input file is ``<input_dir>/batch-<id>.jsonl``
+        """
+        with self.conn:
+            cursor = self.conn.execute(
+                "INSERT INTO llm_batches (provider, model, status, input_path, requests, created_time) "
+                "VALUES (?, ?, ?, '', ?, ?)",
+                (provider, model, PREPARED, len(uids), self._now()),
+            )
+            batch_id = cursor.lastrowid
+            input_path = os.path.join(input_dir, f"batch-{batch_id}.jsonl")
+            self.conn.execute("UPDATE llm_batches SET input_path = ? WHERE id = ?", (input_path, batch_id))
+            self.conn.executemany(
+                "INSERT INTO llm_batch_items (custom_id, batch_id, uid) VALUES (?, ?, ?)",
+                [(self.custom_id(batch_id, uid), batch_id, uid) for uid in uids],
+            )
+        return BatchRecord(batch_id, None, provider, model, PREPARED, input_path, len(uids))
+
+    def uids(self, batch_id: int) -> List[str]:
+        """Uids of a batch's items, in insertion order."""
+        rows = self.conn.execute(
+            "SELECT uid FROM llm_batch_items WHERE batch_id = ? ORDER BY rowid", (batch_id,)
+        )
+        return [row[0] for row in rows]
+
+    def submitted(self, batch_id: int, remote_id: str, status: str = "validating"):
+        """Record the provider's id of a submitted batch."""
+        self.conn.execute(
+            "UPDATE llm_batches SET remote_id = ?, status = ?, submitted_time = ? WHERE id = ?",
+            (remote_id, status, self._now(), batch_id),
+        )
+        self.conn.commit()
+
+    def set_status(self, batch_id: int, status: str, error: Optional[str] = None):
+        """Record a batch's latest status (APPLIED also stamps the finish time)."""
+        finished = self._now() if status == APPLIED else None
+        self.conn.execute(
+            "UPDATE llm_batches SET status = ?, error = COALESCE(?, error), "
+            "finished_time = COALESCE(?, finished_time) WHERE id = ?",
+            (status, error, finished, batch_id),
+        )
+        self.conn.commit()
+
+    def open_batches(self) -> List[BatchRecord]:
+        """Batches whose results have not been written back yet, oldest first."""
+        rows = self.conn.execute(
+            "SELECT id, remote_id, provider, model, status, input_path, requests "
+            "FROM llm_batches WHERE status <> ? ORDER BY id",
+            (APPLIED,),
+        ).fetchall()
+        return [BatchRecord(*row) for row in rows]
+
+    def claimed_uids(self, include_done: bool = True) -> set:
+        """
+        Uids that need no new batch request.
+
+        Args:
+            include_done: Also count rows already re-summarized by a batch
+
+        Returns:
+            Uids pending in an open batch (and, optionally, done)
+        """
+        statuses = (PENDING, DONE) if include_done else (PENDING,)
+        rows = self.conn.execute(
+            f"SELECT DISTINCT uid FROM llm_batch_items WHERE status IN ({','.join('?' * len(statuses))})",
+            statuses,
+        )
+        return {row[0] for row in rows}
+
+    def apply(self, results: Iterable[BatchResult]) -> Tuple[int, int, List[Tuple[str, BatchResult]]]:
+        """
+        Write answers back to ``content_summary`` in one transaction.
+
+        Items that are not pending (already applied by an earlier, interrupted
+        read of the same output) are skipped, so reading an output file twice
+        changes nothing.
+
+        Args:
+            results: Parsed output lines
+
+        Returns:
+            (applied, failed, [(original_url, result) of each applied answer])
+        """
+        applied, failed, written = 0, 0, []
+        with self.conn:
+            for result in results:
+                row = self.conn.execute(
+                    "SELECT uid, status FROM llm_batch_items WHERE custom_id = ?", (result.custom_id,)
+                ).fetchone()
+                if row is None or row[1] != PENDING:
+                    continue
+                uid = row[0]
+                if result.text:
+                    cursor = self.conn.execute(
+                        "UPDATE content_summary SET summary = ? WHERE uid = ?", (result.text, uid)
+                    )
+                    url = self.conn.execute(
+                        "SELECT original_url FROM content_summary WHERE uid = ?", (uid,)
+                    ).fetchone()
+                    status, error = (DONE, None) if cursor.rowcount else (FAILED, "row deleted")
+                else:
+                    status, error, url = FAILED, result.error, None
+                self.conn.execute(
+                    "UPDATE llm_batch_items SET status = ?, error = ? WHERE custom_id = ?",
+                    (status, error, result.custom_id),
+                )
+                if status == DONE:
+                    applied += 1
+                    if url is not None:
+                        written.append((url[0], result))
+                else:
+                    failed += 1
+        return applied, failed, written
+
+    def release_pending(self, batch_id: int, error: str) -> int:
+        """
+        Fail the items of a finished batch that got no result, so they can
+        be submitted again.
+
+        Returns:
+            Number of items released
+        """
+        cursor = self.conn.execute(
+            "UPDATE llm_batch_items SET status = ?, error = ? WHERE batch_id = ? AND status = ?",
+            (FAILED, error, batch_id, PENDING),
+        )
+        self.conn.commit()
+        return cursor.rowcount
+
+    def counts(self) -> Dict[str, Dict[str, int]]:
+        """Item counts by status, per batch id."""
+        counts: Dict[str, Dict[str, int]] = {}
+        for batch_id, status, n in self.conn.execute(
+            "SELECT batch_id, status, COUNT(*) FROM llm_batch_items GROUP BY batch_id, status"
+        ):
+            counts.setdefault(batch_id, {})[status] = n
+        return counts
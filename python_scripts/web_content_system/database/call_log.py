@@ -0,0 +1,143 @@
+"""
+Per-call LLM telemetry: latency, outcome and tokens of every call.
+"""
+
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional
+
+from ..crawl.urls import canonical_uid
+from ..telemetry import LLMCall, report
+from .usage_log import new_run_id
+
+
+class CallLog:
+    """
+    Stores every LLM call in the compact ``llm_calls`` table.
+
+    A row holds the provider, model, start time, latency, outcome and
+    tokens of one call, plus the content row (uid) it served. Calls are
+    buffered and written ``flush_every`` at a time in one transaction, so
+    recording costs a list append on the hot path; flush() writes the
+    rest (call it before closing the connection).
+    """
+
+    def __init__(self, conn: sqlite3.Connection, run_id: Optional[str] = None, flush_every: int = 200):
+        """
+        Initialize call log.
+
+        Args:
+            conn: Open SQLite connection (the content_summary database)
+            run_id: Run recorded calls belong to (defaults to a new one)
+            flush_every: Buffered calls that trigger a write
+        """
+        self.conn = conn
+        self.run_id = run_id or new_run_id()
+        self.flush_every = flush_every
+        self._buffer: List[tuple] = []
+        self._lock = threading.Lock()
+        self._create_tables()
+
+    def _create_tables(self):
+        """Create the llm_calls table."""
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS llm_calls (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                run_id TEXT NOT NULL,
+                source TEXT NOT NULL,
+                uid TEXT,
+                provider TEXT NOT NULL,
+                model TEXT,
+                started REAL NOT NULL,
+                latency_ms INTEGER NOT NULL,
+                outcome TEXT NOT NULL,
+                prompt_tokens INTEGER NOT NULL DEFAULT 0,
+                completion_tokens INTEGER NOT NULL DEFAULT 0
+            )
+        ''')
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_llm_calls_started ON llm_calls (started)")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_llm_calls_uid ON llm_calls (uid)")
+        self.conn.commit()
+
+    def record(self, url: Optional[str], calls: Iterable[LLMCall], source: str):
+        """
+        Buffer the calls made for one URL in this run.
+
+        Args:
+            url: URL of the content row (None for calls serving no row)
+            calls: LLM calls
+            source: Pipeline that made them ("crawler", "params", "extractor", ...)
+        """
+        uid = canonical_uid(url) if url else None
+        rows = [
+            (self.run_id, source, uid, c.provider, c.model, c.started, int(c.latency * 1000),
+             c.outcome, c.prompt_tokens, c.completion_tokens)
+            for c in calls
+        ]
+        with self._lock:
+            self._buffer.extend(rows)
+            full = len(self._buffer) >= self.flush_every
+        if full:
+            self.flush()
+
+    def flush(self):
+        """Write buffered calls."""
+        with self._lock:
+            rows, self._buffer = self._buffer, []
+        if rows:
+            self.conn.executemany('''
+                INSERT INTO llm_calls
+                    (run_id, source, uid, provider, model, started, latency_ms, outcome,
+                     prompt_tokens, completion_tokens)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', rows)
+            self.conn.commit()
+
+    def for_url(self, url: str) -> List[Dict[str, Any]]:
+        """Stored calls made for one URL, oldest first."""
+        cursor = self.conn.execute(
+            "SELECT provider, model, started, latency_ms, outcome, prompt_tokens, completion_tokens "
+            "FROM llm_calls WHERE uid = ? ORDER BY started",
+            (canonical_uid(url),),
+        )
+        columns = [c[0] for c in cursor.description]
+        return [dict(zip(columns, row)) for row in cursor]
+
+    def report(
+        self,
+        window: Optional[float] = 3600,
+        since: Optional[float] = None,
+        source: Optional[str] = None,
+        provider: Optional[str] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Latency percentiles, error rate and throughput per window and provider/model.
+
+        Args:
+            window: Window length in seconds (None for one window)
+            since: Only calls started in the last `since` seconds
+            source: Only calls of this pipeline
+            provider: Only calls to this provider
+
+        Returns:
+            Rows of telemetry.report(), oldest window first
+        """
+        self.flush()
+        sql = (
+            "SELECT provider, COALESCE(model, ''), started, latency_ms, outcome, prompt_tokens, "
+            "completion_tokens FROM llm_calls"
+        )
+        where: List[str] = []
+        params: List[Any] = []
+        for clause, value in (
+            ("started >= ?", time.time() - since if since else None),
+            ("source = ?", source),
+            ("provider = ?", provider),
+        ):
+            if value is not None:
+                where.append(clause)
+                params.append(value)
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        return report(self.conn.execute(sql, params), window)
@@ -1,21 +1,36 @@
-import hashlib
 import sqlite3
 from datetime import datetime
-from typing import List, Tuple
+from typing import List, Optional, Tuple
+
+from ..crawl.urls import canonical_uid
+from ..llm_clients.embeddings import Embedder, HashingEmbedder
+from .batch_store import BatchStore
+from .call_log import CallLog
+from .embedding_store import EmbeddingStore
+from .failure_log import FailureLog
+from .job_store import JobStore
+from .migrations import migrate_canonical_uids
+from .near_duplicates import NearDuplicateIndex
+from .selector_cache import SelectorCache
+from .usage_log import UsageLog
 
 
 class DatabaseManager:
     """Manages all database operations for the web content extraction system."""
     
-    def __init__(self, db_path: str = "web_content.db"):
+    def __init__(self, db_path: str = "web_content.db", embedder: Optional[Embedder] = None):
         """
         Initialize database manager.
         
         Args:
             db_path: Path to SQLite database file
+            embedder: Embeds semantic_search() queries; must be the model the
+                stored embeddings were made with (local hashing if omitted)
         """
         self.db_path = db_path
+        self.embedder = embedder or HashingEmbedder()
         self.conn = None
+        self._embeddings: Optional[EmbeddingStore] = None
         self._setup_database()
     
     def _setup_database(self):
@@ -56,7 +71,7 @@ class DatabaseManager:
         rows = cursor.fetchall()
         for rid, orig_url in rows:
             if orig_url:
-                uid = hashlib.md5(orig_url.encode('utf-8')).hexdigest()
+                uid = canonical_uid(orig_url)
                 cursor.execute("UPDATE content_summary SET uid = ? WHERE id = ?", (uid, rid))
         
         # Deduplicate by uid keeping the latest id
@@ -78,6 +93,9 @@ class DatabaseManager:
         if to_delete:
             cursor.executemany("DELETE FROM content_summary WHERE id = ?", [(rid,) for rid in to_delete])
         
+        # Merge rows whose URLs differ only in non-identifying parts
+        migrate_canonical_uids(self.conn)
+        
         # Create manual_content table
         cursor.execute('''
             CREATE TABLE IF NOT EXISTS manual_content (
@@ -100,7 +118,7 @@ class DatabaseManager:
         tags: str = ""
     ) -> int:
         """
-        Save content summary to database with upsert on uid (md5 of URL).
+        Save content summary to database with upsert on uid (md5 of canonical URL).
         
         Args:
             title: Content title
@@ -114,7 +132,7 @@ class DatabaseManager:
         cursor = self.conn.cursor()
         created_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         
-        uid = hashlib.md5((url or "").encode('utf-8')).hexdigest()
+        uid = canonical_uid(url or "")
         
         cursor.execute('''
             INSERT INTO content_summary (uid, title, created_time, summary, original_url, tags)
@@ -215,6 +233,116 @@ class DatabaseManager:
         )
         return cursor.fetchall()
     
+    def semantic_search(self, query: str, k: int = 10) -> List[Tuple]:
+        """
+        Search content by meaning: rows whose summary embedding is nearest to the query's.
+        
+        Only rows embedded with this manager's embedder model are found
+        (see embed_summaries.py).
+        
+        Args:
+            query: Search text
+            k: Maximum number of records to return
+            
+        Returns:
+            Matching records, most similar first, each followed by its
+            cosine similarity
+        """
+        hits = self.embeddings().search(self.embedder.model, self.embedder.embed([query])[0], k)
+        if not hits:
+            return []
+        cursor = self.conn.cursor()
+        cursor.execute(
+            f"SELECT * FROM content_summary WHERE uid IN ({','.join('?' * len(hits))})",
+            [uid for uid, _ in hits],
+        )
+        columns = [c[0] for c in cursor.description]
+        rows = {row[columns.index("uid")]: row for row in cursor.fetchall()}
+        return [rows[uid] + (score,) for uid, score in hits if uid in rows]
+    
+    def selector_cache(self, namespace: str) -> SelectorCache:
+        """
+        Get the per-domain extraction selector cache for an extractor.
+        
+        Args:
+            namespace: Extractor name (selectors are not shared between extractors)
+            
+        Returns:
+            SelectorCache backed by this database
+        """
+        return SelectorCache(self.conn, namespace)
+    
+    def near_duplicates(self) -> NearDuplicateIndex:
+        """
+        Get the SimHash index used to spot near-duplicate pages.
+        
+        Returns:
+            NearDuplicateIndex backed by this database
+        """
+        return NearDuplicateIndex(self.conn)
+    
+    def jobs(self) -> JobStore:
+        """
+        Get the batch job table used by grab_params.json runs.
+        
+        Returns:
+            JobStore backed by this database
+        """
+        return JobStore(self.conn)
+    
+    def failures(self) -> FailureLog:
+        """
+        Get the log of failed URLs and their scheduled retries.
+        
+        Returns:
+            FailureLog backed by this database
+        """
+        return FailureLog(self.conn)
+    
+    def batches(self) -> BatchStore:
+        """
+        Get the state of offline LLM batches (see batch_summarize.py).
+        
+        Returns:
+            BatchStore backed by this database
+        """
+        return BatchStore(self.conn)
+    
+    def usage(self) -> UsageLog:
+        """
+        Get the per-row log of LLM token usage and cost.
+        
+        Returns:
+            UsageLog backed by this database
+        """
+        return UsageLog(self.conn)
+    
+    def calls(self, run_id: Optional[str] = None) -> CallLog:
+        """
+        Get the per-call LLM telemetry log (latency, outcome, tokens).
+        
+        Args:
+            run_id: Run recorded calls belong to (defaults to a new one)
+            
+        Returns:
+            CallLog backed by this database
+        """
+        return CallLog(self.conn, run_id)
+    
+    def embeddings(self) -> EmbeddingStore:
+        """
+        Get the store of summary embeddings and related rows.
+        
+        The store is kept for the life of the connection, so its vector
+        index is only rebuilt when the embeddings change.
+        
+        Returns:
+            EmbeddingStore backed by this database
+        """
+        if self._embeddings is None:
+            self._embeddings = EmbeddingStore(self.conn)
+        return self._embeddings
+    
     def get_table_info(self, table_name: str) -> List[Tuple]:
         """
         Get table schema information.
@@ -234,6 +362,7 @@ class DatabaseManager:
         if self.conn:
             self.conn.close()
             self.conn = None
+            self._embeddings = None
     
     def __enter__(self):
         """Context manager entry."""
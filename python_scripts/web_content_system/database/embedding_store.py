@@ -0,0 +1,234 @@
+"""
+Summary embeddings stored as float32/int8 BLOBs, with a cached vector index.
+"""
+
+import hashlib
+import json
+import sqlite3
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from ..llm_clients.embeddings import normalize
+from ..vector_index import PROBES, VectorIndex, build_index
+
+FLOAT32 = "float32"
+INT8 = "int8"
+
+
+def embedding_text(title: Optional[str], summary: Optional[str]) -> str:
+    """Text a row is embedded by: its title and summary."""
+    return f"{title or ''}\n{summary or ''}".strip()
+
+
+def text_hash(text: str) -> str:
+    """Hash telling whether a row's text changed since it was embedded."""
+    return hashlib.md5(text.encode("utf-8")).hexdigest()
+
+
+def encode(vector: np.ndarray, dtype: str = FLOAT32) -> Tuple[bytes, float]:
+    """
+    Encode one vector as a BLOB.
+
+    int8 keeps a quarter of the size: components are scaled so the largest
+    maps to ±127, and the scale is stored next to the BLOB.
+
+    Returns:
+        (blob, scale) — the scale is 1.0 for float32
+    """
+    if dtype == FLOAT32:
+        return np.asarray(vector, dtype=np.float32).tobytes(), 1.0
+    if dtype == INT8:
+        peak = float(np.abs(vector).max()) if len(vector) else 0.0
+        scale = peak / 127 if peak > 0 else 1.0
+        return np.round(np.asarray(vector) / scale).astype(np.int8).tobytes(), scale
+    raise ValueError(f"unknown embedding dtype: {dtype!r} (float32 or int8)")
+
+
+class EmbeddingStore:
+    """
+    Stores summary embeddings in the ``content_embeddings`` table.
+
+    One row per content row and model: the vector BLOB (float32 or int8),
+    its dimension and scale, and the hash of the text it was computed
+    from, so pending() finds rows whose summary changed. index() loads the
+    vectors of a model into a VectorIndex and keeps it until the table
+    changes. Related rows computed from the index are kept in
+    ``content_related`` for the static-data exporter.
+    """
+
+    def __init__(self, conn: sqlite3.Connection):
+        """
+        Initialize embedding store.
+
+        Args:
+            conn: Open SQLite connection (the content_summary database)
+        """
+        self.conn = conn
+        self._index: Optional[Tuple[tuple, tuple, tuple, VectorIndex]] = None
+        self._create_tables()
+
+    def _create_tables(self):
+        """Create embedding and related-row tables."""
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS content_embeddings (
+                uid TEXT NOT NULL,
+                model TEXT NOT NULL,
+                dim INTEGER NOT NULL,
+                dtype TEXT NOT NULL,
+                scale REAL NOT NULL DEFAULT 1.0,
+                text_hash TEXT NOT NULL,
+                vector BLOB NOT NULL,
+                updated REAL NOT NULL,
+                PRIMARY KEY (uid, model)
+            )
+        ''')
+        self.conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_content_embeddings_model ON content_embeddings (model, updated)"
+        )
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS content_related (
+                uid TEXT PRIMARY KEY,
+                model TEXT NOT NULL,
+                related TEXT NOT NULL,
+                updated REAL NOT NULL
+            )
+        ''')
+        self.conn.commit()
+
+    def pending(self, model: str, limit: int = 0) -> List[Tuple[str, str]]:
+        """
+        Rows with a summary but no current embedding of `model`.
+
+        Args:
+            model: Embedding model
+            limit: Most rows to return (0 for all)
+
+        Returns:
+            (uid, text) pairs, oldest row first
+        """
+        cursor = self.conn.execute('''
+            SELECT c.uid, c.title, c.summary, e.text_hash FROM content_summary c
+            LEFT JOIN content_embeddings e ON e.uid = c.uid AND e.model = ?
+            WHERE c.uid IS NOT NULL AND c.uid <> '' AND c.summary <> ''
+            ORDER BY c.id
+        ''', (model,))
+        rows = []
+        for uid, title, summary, stored_hash in cursor:
+            text = embedding_text(title, summary)
+            if stored_hash != text_hash(text):
+                rows.append((uid, text))
+                if limit and len(rows) >= limit:
+                    break
+        return rows
+
+    def put(self, model: str, uids: Sequence[str], texts: Sequence[str], vectors: np.ndarray, dtype: str = FLOAT32):
+        """
+        Store (or replace) the embeddings of rows.
+
+        Args:
+            model: Embedding model
+            uids: Row keys
+            texts: Text each vector was computed from
+            vectors: (len(uids), dim) unit rows
+            dtype: Stored type, "float32" or "int8"
+        """
+        now = time.time()
+        rows = []
+        for uid, text, vector in zip(uids, texts, vectors):
+            blob, scale = encode(vector, dtype)
+            rows.append((uid, model, len(vector), dtype, scale, text_hash(text), blob, now))
+        self.conn.executemany('''
+            INSERT OR REPLACE INTO content_embeddings (uid, model, dim, dtype, scale, text_hash, vector, updated)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        ''', rows)
+        self.conn.commit()
+
+    def load(self, model: str) -> Tuple[List[str], np.ndarray]:
+        """
+        Vectors of `model` for rows still in content_summary.
+
+        Returns:
+            (uids, (n, dim) float32 unit rows)
+        """
+        rows = self.conn.execute('''
+            SELECT e.uid, e.dim, e.dtype, e.scale, e.vector FROM content_embeddings e
+            JOIN content_summary c ON c.uid = e.uid
+            WHERE e.model = ?
+        ''', (model,)).fetchall()
+        if not rows:
+            return [], np.zeros((0, 0), dtype=np.float32)
+        dim = rows[0][1]
+        vectors = np.empty((len(rows), dim), dtype=np.float32)
+        for dtype in (FLOAT32, INT8):
+            picked = [i for i, row in enumerate(rows) if row[2] == dtype]
+            if not picked:
+                continue
+            blob = b"".join(rows[i][4] for i in picked)
+            values = np.frombuffer(blob, dtype=np.float32 if dtype == FLOAT32 else np.int8).reshape(len(picked), dim)
+            if dtype == INT8:
+                values = values * np.array([rows[i][3] for i in picked], dtype=np.float32)[:, None]
+            vectors[picked] = values
+        return [row[0] for row in rows], normalize(vectors)
+
+    def index(self, model: str, probes: int = PROBES) -> VectorIndex:
+        """
+        Vector index over the stored vectors of `model`.
+
+        The index is built on first use and rebuilt once embeddings of
+        the model were added or changed. Rows deleted since are still
+        indexed; callers skip uids they no longer find.
+        """
+        # data_version (commits by other connections) and total_changes
+        # (this one's) are free to read; only after a write is the table
+        # summarised to see whether the embeddings changed.
+        version = (self.conn.execute("PRAGMA data_version").fetchone()[0], self.conn.total_changes)
+        cached = self._index
+        if cached is not None and cached[0] == (model, probes) and cached[1] == version:
+            return cached[3]
+        signature = self.conn.execute(
+            "SELECT COUNT(*), MAX(updated) FROM content_embeddings WHERE model = ?", (model,)
+        ).fetchone()
+        if cached is None or cached[0] != (model, probes) or cached[2] != signature:
+            uids, vectors = self.load(model)
+            cached = ((model, probes), version, signature, build_index(vectors, uids, probes))
+        self._index = ((model, probes), version, signature, cached[3])
+        return cached[3]
+
+    def search(self, model: str, query: np.ndarray, k: int = 10) -> List[Tuple[str, float]]:
+        """
+        Rows whose embedding is nearest to a query vector.
+
+        Args:
+            model: Embedding model the query was embedded with
+            query: Unit query vector
+            k: Rows to return
+
+        Returns:
+            (uid, similarity) pairs, most similar first
+        """
+        index = self.index(model)
+        if not len(index):
+            return []
+        return index.search(query, k)
+
+    def save_related(self, model: str, related: Dict[str, List[Tuple[str, float]]]):
+        """
+        Replace the related rows of rows.
+
+        Args:
+            model: Embedding model the neighbours come from
+            related: {uid: [(related uid, similarity), ...]}
+        """
+        now = time.time()
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO content_related (uid, model, related, updated) VALUES (?, ?, ?, ?)",
+            [(uid, model, json.dumps(items), now) for uid, items in related.items()],
+        )
+        self.conn.commit()
+
+    def related(self, uid: str) -> List[Tuple[str, float]]:
+        """Stored related rows of a row: (uid, similarity), most similar first."""
+        row = self.conn.execute("SELECT related FROM content_related WHERE uid = ?", (uid,)).fetchone()
+        return [tuple(item) for item in json.loads(row[0])] if row else []
@@ -0,0 +1,296 @@
+"""
+Persistent failure log: classified errors with per-class exponential-backoff retries.
+"""
+
+import json
+import random
+import sqlite3
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from email.utils import parsedate_to_datetime
+from typing import Any, Callable, Dict, List, Optional
+
+import requests
+
+from ..crawl.urls import canonical_uid
+
+# Error classes
+TIMEOUT = "timeout"
+CONNECTION = "connection"
+SERVER_ERROR = "http_5xx"
+RATE_LIMITED = "http_429"
+CLIENT_ERROR = "http_4xx"
+EMPTY_CONTENT = "empty_content"
+LLM_ERROR = "llm"
+OTHER = "other"
+
+MAX_BACKOFF = 24 * 3600.0
+TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    """How often, and how soon, a class of failure is retried."""
+
+    max_attempts: int      # failures after which we give up (1 = never retry)
+    base_delay: float      # seconds before the first retry; doubles each time
+
+
+RETRY_POLICIES: Dict[str, RetryPolicy] = {
+    TIMEOUT: RetryPolicy(5, 60),
+    CONNECTION: RetryPolicy(5, 120),
+    SERVER_ERROR: RetryPolicy(5, 300),
+    RATE_LIMITED: RetryPolicy(8, 600),
+    CLIENT_ERROR: RetryPolicy(1, 0),       # 404, 410, 403: retrying will not help
+    EMPTY_CONTENT: RetryPolicy(2, 6 * 3600),
+    LLM_ERROR: RetryPolicy(5, 300),
+    OTHER: RetryPolicy(3, 600),
+}
+
+
+def classify(exc: Optional[BaseException] = None, status_code: Optional[int] = None) -> str:
+    """
+    Map an exception and/or HTTP status to an error class.
+
+    Args:
+        exc: Exception raised while fetching
+        status_code: HTTP status, when known without an exception
+
+    Returns:
+        One of the error class constants
+    """
+    if status_code is None and isinstance(exc, requests.HTTPError) and exc.response is not None:
+        status_code = exc.response.status_code
+    if status_code:
+        if status_code == 429:
+            return RATE_LIMITED
+        if status_code == 408:
+            return TIMEOUT
+        if status_code >= 500:
+            return SERVER_ERROR
+        if status_code >= 400:
+            return CLIENT_ERROR
+    if isinstance(exc, (requests.Timeout, TimeoutError)):
+        return TIMEOUT
+    if isinstance(exc, (requests.ConnectionError, ConnectionError)):
+        return CONNECTION
+    return OTHER
+
+
+def retry_after(exc: Optional[BaseException]) -> Optional[float]:
+    """
+    Seconds requested by a ``Retry-After`` header on an HTTP error, if any.
+
+    Args:
+        exc: Exception raised while fetching
+
+    Returns:
+        Delay in seconds, or None
+    """
+    response = getattr(exc, "response", None)
+    value = response.headers.get("Retry-After") if response is not None else None
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, when.timestamp() - time.time())
+
+
+@dataclass
+class FailedItem:
+    """A failed URL that is due for another attempt."""
+
+    source: str
+    url: str
+    error_class: str
+    error: str
+    attempts: int
+    payload: Dict[str, Any] = field(default_factory=dict)
+
+
+class FailureLog:
+    """
+    Records failures per (source, URL) in the ``failure_log`` table.
+
+    Each failure is classified (timeout, 5xx, 429, 4xx, empty content,
+    LLM error, ...) and scheduled for a retry after
+    ``base_delay · 2^(attempts-1)`` seconds (±10 % jitter, at most a day,
+    never earlier than a 429's Retry-After). After the class's
+    ``max_attempts`` failures the item is given up. A later success
+    resolves the entry.
+    """
+
+    def __init__(
+        self,
+        conn: sqlite3.Connection,
+        policies: Optional[Dict[str, RetryPolicy]] = None,
+        clock: Callable[[], float] = time.time,
+        jitter: float = 0.1,
+    ):
+        """
+        Initialize failure log.
+
+        Args:
+            conn: Open SQLite connection (the content_summary database)
+            policies: Retry policy per error class (defaults to RETRY_POLICIES)
+            clock: Wall-clock time source (epoch seconds)
+            jitter: Relative random spread of retry delays
+        """
+        self.conn = conn
+        self.policies = dict(RETRY_POLICIES, **(policies or {}))
+        self.clock = clock
+        self.jitter = jitter
+        self._create_tables()
+
+    def _create_tables(self):
+        """Create the failure_log table."""
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS failure_log (
+                source TEXT NOT NULL,
+                uid TEXT NOT NULL,
+                url TEXT NOT NULL,
+                payload TEXT,
+                error_class TEXT NOT NULL,
+                error TEXT,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                status TEXT NOT NULL,
+                first_failed TEXT NOT NULL,
+                last_failed TEXT NOT NULL,
+                next_retry REAL,
+                PRIMARY KEY (source, uid)
+            )
+        ''')
+        self.conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_failure_log_due ON failure_log (status, next_retry)"
+        )
+        self.conn.commit()
+
+    def backoff(self, error_class: str, attempts: int) -> float:
+        """Delay in seconds before retry number `attempts` of a class."""
+        policy = self.policies.get(error_class, self.policies[OTHER])
+        delay = min(MAX_BACKOFF, policy.base_delay * 2 ** max(0, attempts - 1))
+        return delay * random.uniform(1 - self.jitter, 1 + self.jitter)
+
+    def record(
+        self,
+        url: str,
+        source: str,
+        error_class: str,
+        error: str = "",
+        payload: Optional[dict] = None,
+        retry_after: Optional[float] = None,
+    ) -> Optional[float]:
+        """
+        Record a failed attempt and schedule the next one.
+
+        Args:
+            url: URL that failed
+            source: Pipeline that failed ("crawler", "params", "extractor", ...)
+            error_class: Result of classify() or another class constant
+            error: Error message
+            payload: What the pipeline needs to retry (e.g. tags)
+            retry_after: Minimum delay requested by the server
+
+        Returns:
+            Epoch time of the next retry, or None if the item was given up
+        """
+        uid = canonical_uid(url)
+        now = self.clock()
+        stamp = datetime.fromtimestamp(now).strftime(TIME_FORMAT)
+        row = self.conn.execute(
+            "SELECT attempts, payload FROM failure_log WHERE source = ? AND uid = ?", (source, uid)
+        ).fetchone()
+        attempts = (row[0] if row else 0) + 1
+        if payload is None and row and row[1]:
+            payload = json.loads(row[1])
+
+        policy = self.policies.get(error_class, self.policies[OTHER])
+        if attempts >= policy.max_attempts:
+            status, next_retry = "gave_up", None
+        else:
+            delay = self.backoff(error_class, attempts)
+            if retry_after is not None:
+                delay = max(delay, retry_after)
+            status, next_retry = "retrying", now + delay
+
+        self.conn.execute('''
+            INSERT INTO failure_log
+                (source, uid, url, payload, error_class, error, attempts, status,
+                 first_failed, last_failed, next_retry)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(source, uid) DO UPDATE SET
+                url = excluded.url, payload = excluded.payload, error_class = excluded.error_class,
+                error = excluded.error, attempts = excluded.attempts, status = excluded.status,
+                last_failed = excluded.last_failed, next_retry = excluded.next_retry
+        ''', (
+            source, uid, url, json.dumps(payload or {}, ensure_ascii=False), error_class,
+            (error or "")[:1000], attempts, status, stamp, stamp, next_retry,
+        ))
+        self.conn.commit()
+        return next_retry
+
+    def resolve(self, url: str, source: str) -> bool:
+        """
+        Mark a URL's failure entry resolved after a success.
+
+        Returns:
+            True if there was an open entry
+        """
+        cursor = self.conn.execute(
+            "UPDATE failure_log SET status = 'resolved', attempts = 0, next_retry = NULL "
+            "WHERE source = ? AND uid = ? AND status <> 'resolved'",
+            (source, canonical_uid(url)),
+        )
+        self.conn.commit()
+        return cursor.rowcount > 0
+
+    def status(self, url: str, source: str) -> Optional[str]:
+        """Status of a URL's entry ('retrying', 'gave_up', 'resolved'), or None."""
+        row = self.conn.execute(
+            "SELECT status FROM failure_log WHERE source = ? AND uid = ?", (source, canonical_uid(url))
+        ).fetchone()
+        return row[0] if row else None
+
+    def due(self, source: Optional[str] = None, limit: Optional[int] = None) -> List[FailedItem]:
+        """
+        List failures whose next retry time has passed, soonest first.
+
+        Args:
+            source: Only this pipeline's failures
+            limit: Maximum items
+
+        Returns:
+            FailedItem entries
+        """
+        sql = (
+            "SELECT source, url, error_class, error, attempts, payload FROM failure_log "
+            "WHERE status = 'retrying' AND next_retry <= ?"
+        )
+        params: list = [self.clock()]
+        if source:
+            sql += " AND source = ?"
+            params.append(source)
+        sql += " ORDER BY next_retry"
+        if limit:
+            sql += " LIMIT ?"
+            params.append(limit)
+        return [
+            FailedItem(src, url, cls, err or "", attempts, json.loads(payload or "{}"))
+            for src, url, cls, err, attempts, payload in self.conn.execute(sql, params)
+        ]
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """Count entries per error class and status."""
+        counts: Dict[str, Dict[str, int]] = {}
+        for error_class, status, count in self.conn.execute(
+            "SELECT error_class, status, COUNT(*) FROM failure_log GROUP BY error_class, status"
+        ):
+            counts.setdefault(error_class, {})[status] = count
+        return counts
@@ -0,0 +1,306 @@
+"""
+Batch job state in SQLite, importable from and exportable to grab_params.json.
+"""
+
+import json
+import os
+import sqlite3
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, Iterator, Optional, Tuple
+
+from ..crawl.urls import canonical_uid
+
+TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+BATCH_SIZE = 500
+DEFAULT_MAX_ATTEMPTS = 3  # attempts after which a failed job is no longer pending
+
+PENDING = "pending"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+
+@dataclass
+class Job:
+    """One URL of a batch."""
+
+    id: int
+    url: str
+    tags: str = ""
+    attempts: int = 0
+    started: Optional[datetime] = None
+
+
+class JobStore:
+    """
+    Tracks batch URLs in the ``jobs`` table.
+
+    Replaces rewriting grab_params.json after every URL: each state change
+    is a single-row UPDATE, pending jobs are found through an index, and
+    the JSON file is only re-imported when it changed on disk and only
+    written back once per run.
+
+    A job is shared by every file that lists its URL; ``job_files`` keeps
+    the jobs each file listed at its last import, in file order. Passing
+    ``path`` to pending() and counts() limits them to that file, and
+    export_json() writes only the file's own entries, so files do not
+    leak jobs into each other and removed entries stay removed.
+    """
+
+    def __init__(self, conn: sqlite3.Connection):
+        """
+        Initialize job store.
+
+        Args:
+            conn: Open SQLite connection (the content_summary database)
+        """
+        self.conn = conn
+        self._create_tables()
+
+    def _create_tables(self):
+        """Create jobs and import-tracking tables."""
+        cursor = self.conn.cursor()
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS jobs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                uid TEXT NOT NULL UNIQUE,
+                url TEXT NOT NULL,
+                tags TEXT,
+                extra TEXT,
+                status TEXT NOT NULL DEFAULT 'pending',
+                attempts INTEGER NOT NULL DEFAULT 0,
+                last_error TEXT,
+                created_time TEXT NOT NULL,
+                started_time TEXT,
+                finished_time TEXT,
+                elapsed_seconds REAL
+            )
+        ''')
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status, id)")
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS job_files (
+                path TEXT NOT NULL,
+                job_id INTEGER NOT NULL,
+                position INTEGER NOT NULL,
+                PRIMARY KEY (path, job_id)
+            )
+        ''')
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS job_imports (
+                path TEXT PRIMARY KEY,
+                mtime REAL NOT NULL,
+                size INTEGER NOT NULL
+            )
+        ''')
+        self.conn.commit()
+
+    @staticmethod
+    def _now() -> str:
+        return datetime.now().strftime(TIME_FORMAT)
+
+    def _file_unchanged(self, path: str) -> bool:
+        stat = os.stat(path)
+        row = self.conn.execute('''
+            SELECT mtime, size, EXISTS (SELECT 1 FROM job_files f WHERE f.path = job_imports.path)
+            FROM job_imports WHERE path = ?
+        ''', (os.path.abspath(path),)).fetchone()
+        # A file last imported before job_files existed has no entries there yet.
+        return row is not None and row[0] == stat.st_mtime and row[1] == stat.st_size and bool(row[2])
+
+    @staticmethod
+    def _scope(path: Optional[str]) -> Tuple[str, tuple]:
+        """JOIN limiting a query on ``jobs j`` to the jobs of one file, and its parameters."""
+        if path is None:
+            return "", ()
+        return "JOIN job_files f ON f.job_id = j.id AND f.path = ?", (os.path.abspath(path),)
+
+    def _remember_file(self, path: str):
+        stat = os.stat(path)
+        self.conn.execute(
+            "INSERT OR REPLACE INTO job_imports (path, mtime, size) VALUES (?, ?, ?)",
+            (os.path.abspath(path), stat.st_mtime, stat.st_size),
+        )
+        self.conn.commit()
+
+    def import_json(self, path: str, force: bool = False) -> int:
+        """
+        Import a grab_params.json list (``[{"url", "tags", "done"}, ...]``).
+
+        New URLs become jobs; entries marked done there are marked done
+        here. Jobs already done in the database stay done. The file's job
+        list is replaced by its current entries. Skipped when the file is
+        unchanged since the last import or export.
+
+        Args:
+            path: JSON file
+            force: Import even if the file looks unchanged
+
+        Returns:
+            Number of new jobs
+
+        Raises:
+            ValueError: if the root of the document is not a list
+        """
+        if not force and self._file_unchanged(path):
+            return 0
+        with open(path, "r", encoding="utf-8") as f:
+            items = json.load(f)
+        if not isinstance(items, list):
+            raise ValueError("grab_params.json must be a list")
+
+        now = self._now()
+        rows = []
+        for item in items:
+            url = item.get("url")
+            if not url:
+                continue
+            extra = {k: v for k, v in item.items() if k not in ("url", "tags", "done")}
+            rows.append((
+                canonical_uid(url), url, item.get("tags", ""),
+                json.dumps(extra, ensure_ascii=False) if extra else None,
+                DONE if item.get("done", False) else PENDING, now,
+            ))
+        before = self.conn.execute("SELECT COUNT(*) FROM jobs").fetchone()[0]
+        self.conn.executemany('''
+            INSERT INTO jobs (uid, url, tags, extra, status, created_time)
+            VALUES (?, ?, ?, ?, ?, ?)
+            ON CONFLICT(uid) DO UPDATE SET
+                status = CASE WHEN excluded.status = 'done' THEN 'done' ELSE jobs.status END
+        ''', rows)
+        source = os.path.abspath(path)
+        self.conn.execute("DELETE FROM job_files WHERE path = ?", (source,))
+        self.conn.executemany('''
+            INSERT OR IGNORE INTO job_files (path, job_id, position)
+            SELECT ?, id, ? FROM jobs WHERE uid = ?
+        ''', [(source, position, row[0]) for position, row in enumerate(rows)])
+        self.conn.commit()
+        self._remember_file(path)
+        return self.conn.execute("SELECT COUNT(*) FROM jobs").fetchone()[0] - before
+
+    def export_json(self, path: str) -> int:
+        """
+        Write the jobs of a file back to it in grab_params.json format.
+
+        Only the entries the file listed at its last import are written,
+        in their original order.
+
+        The file is streamed to a temporary file and moved into place, so a
+        crash never leaves a half-written file behind.
+
+        Args:
+            path: JSON file
+
+        Returns:
+            Number of entries written
+        """
+        tmp_path = path + ".tmp"
+        count = 0
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write("[")
+            join, params = self._scope(path)
+            for url, tags, extra, status in self.conn.execute(
+                f"SELECT j.url, j.tags, j.extra, j.status FROM jobs j {join} ORDER BY f.position", params
+            ):
+                entry = {"url": url, "tags": tags or "", "done": status == DONE}
+                if extra:
+                    entry.update(json.loads(extra))
+                body = json.dumps(entry, indent=2, ensure_ascii=False).replace("\n", "\n  ")
+                f.write(("," if count else "") + "\n  " + body)
+                count += 1
+            f.write("\n]" if count else "]")
+        os.replace(tmp_path, path)
+        self._remember_file(path)
+        return count
+
+    def pending(self, max_attempts: Optional[int] = None, path: Optional[str] = None) -> Iterator[Job]:
+        """
+        Iterate jobs that still need work, oldest first.
+
+        Jobs left ``running`` by a crashed run and ``failed`` jobs are
+        included. Rows are read in batches, so the cost is proportional to
+        the number of pending jobs, not to the size of the batch.
+
+        Args:
+            max_attempts: Skip jobs already attempted this many times
+            path: Only jobs listed by this file
+
+        Yields:
+            Job entries
+        """
+        join, params = self._scope(path)
+        limit = max_attempts if max_attempts is not None else -1
+        last_id = 0
+        while True:
+            rows = self.conn.execute(f'''
+                SELECT j.id, j.url, j.tags, j.attempts FROM jobs j {join}
+                WHERE j.status IN ('pending', 'running', 'failed') AND j.id > ?
+                  AND (? < 0 OR j.attempts < ?)
+                ORDER BY j.id LIMIT ?
+            ''', params + (last_id, limit, limit, BATCH_SIZE)).fetchall()
+            if not rows:
+                return
+            for job_id, url, tags, attempts in rows:
+                last_id = job_id
+                yield Job(job_id, url, tags or "", attempts)
+
+    def start(self, job: Job):
+        """Mark a job running and count the attempt."""
+        job.started = datetime.now()
+        job.attempts += 1
+        self.conn.execute(
+            "UPDATE jobs SET status = 'running', attempts = ?, started_time = ? WHERE id = ?",
+            (job.attempts, job.started.strftime(TIME_FORMAT), job.id),
+        )
+        self.conn.commit()
+
+    def _finish(self, job: Job, status: str, error: Optional[str]):
+        finished = datetime.now()
+        elapsed = (finished - job.started).total_seconds() if job.started else None
+        self.conn.execute('''
+            UPDATE jobs SET status = ?, last_error = ?, finished_time = ?, elapsed_seconds = ?
+            WHERE id = ?
+        ''', (status, error, finished.strftime(TIME_FORMAT), elapsed, job.id))
+        self.conn.commit()
+
+    def finish(self, job: Job):
+        """Mark a job done."""
+        self._finish(job, DONE, None)
+
+    def fail(self, job: Job, error: str = ""):
+        """Record a failed attempt; the job is retried on the next run."""
+        self._finish(job, FAILED, (error or "")[:1000])
+
+    def release(self, job: Job):
+        """Give a started job back untried, without using up an attempt."""
+        job.attempts = max(job.attempts - 1, 0)
+        job.started = None
+        self.conn.execute(
+            "UPDATE jobs SET status = 'pending', attempts = ? WHERE id = ?", (job.attempts, job.id)
+        )
+        self.conn.commit()
+
+    def mark_done(self, url: str) -> bool:
+        """
+        Mark the job of a URL done when it was processed elsewhere.
+
+        Returns:
+            True if a job was updated
+        """
+        cursor = self.conn.execute(
+            "UPDATE jobs SET status = 'done', last_error = NULL, finished_time = ? "
+            "WHERE uid = ? AND status <> 'done'",
+            (self._now(), canonical_uid(url)),
+        )
+        self.conn.commit()
+        return cursor.rowcount > 0
+
+    def counts(self, path: Optional[str] = None) -> Dict[str, int]:
+        """Count jobs per status (only those listed by ``path`` if given)."""
+        join, params = self._scope(path)
+        counts = {PENDING: 0, RUNNING: 0, DONE: 0, FAILED: 0}
+        for status, count in self.conn.execute(
+            f"SELECT j.status, COUNT(*) FROM jobs j {join} GROUP BY j.status", params
+        ):
+            counts[status] = count
+        return counts
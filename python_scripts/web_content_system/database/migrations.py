@@ -0,0 +1,97 @@
+"""
+One-off data migrations, tracked with SQLite's ``PRAGMA user_version``.
+"""
+
+import sqlite3
+from collections import defaultdict
+from typing import Dict, List, Tuple
+
+from ..crawl.urls import canonical_uid
+
+CANONICAL_UID_VERSION = 1
+
+# Most advanced frontier state wins when two queued URLs turn out to be one.
+_FRONTIER_STATUS_RANK = {"done": 3, "in_progress": 2, "failed": 1, "pending": 0}
+
+
+def _table_exists(conn: sqlite3.Connection, table: str) -> bool:
+    row = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (table,)
+    ).fetchone()
+    return row is not None
+
+
+def _merge_tags(rows: List[Tuple]) -> str:
+    tags: List[str] = []
+    for row in rows:
+        for tag in (row[3] or "").split(","):
+            tag = tag.strip()
+            if tag and tag not in tags:
+                tags.append(tag)
+    return ",".join(tags)
+
+
+def _rekey_content_summary(conn: sqlite3.Connection) -> int:
+    """Merge content_summary rows whose URLs share a canonical form."""
+    columns = [row[1] for row in conn.execute("PRAGMA table_info(content_summary)")]
+    has_content = "content" in columns
+    groups: Dict[str, List[Tuple]] = defaultdict(list)
+    for row in conn.execute(
+        f"SELECT id, uid, original_url, tags, {'content' if has_content else 'NULL'} FROM content_summary"
+    ):
+        groups[canonical_uid(row[2] or "")].append(row)
+
+    merged = 0
+    for uid, rows in groups.items():
+        rows.sort(key=lambda r: r[0])
+        keep = rows[-1]  # latest row wins, as in the uid dedup
+        duplicates = rows[:-1]
+        if duplicates:
+            conn.executemany("DELETE FROM content_summary WHERE id = ?", [(r[0],) for r in duplicates])
+            conn.execute("UPDATE content_summary SET tags = ? WHERE id = ?", (_merge_tags(rows), keep[0]))
+            if has_content and not keep[4]:
+                content = max((r[4] or "" for r in duplicates), key=len)
+                conn.execute("UPDATE content_summary SET content = ? WHERE id = ?", (content, keep[0]))
+            merged += len(duplicates)
+        if keep[1] != uid:
+            conn.execute("UPDATE content_summary SET uid = ? WHERE id = ?", (uid, keep[0]))
+    return merged
+
+
+def _rekey_frontier(conn: sqlite3.Connection):
+    """Merge crawl_frontier entries whose URLs share a canonical form."""
+    groups: Dict[str, List[Tuple]] = defaultdict(list)
+    for row in conn.execute("SELECT uid, url, status FROM crawl_frontier"):
+        groups[canonical_uid(row[1])].append(row)
+
+    for uid, rows in groups.items():
+        rows.sort(key=lambda r: _FRONTIER_STATUS_RANK.get(r[2], 0))
+        keep = rows[-1]
+        conn.executemany("DELETE FROM crawl_frontier WHERE uid = ?", [(r[0],) for r in rows[:-1]])
+        if keep[0] != uid:
+            conn.execute("UPDATE crawl_frontier SET uid = ? WHERE uid = ?", (uid, keep[0]))
+
+
+def migrate_canonical_uids(conn: sqlite3.Connection) -> int:
+    """
+    Re-key rows from md5(raw URL) to md5(canonical URL), merging duplicates.
+
+    Runs once per database; later calls return immediately.
+
+    Args:
+        conn: Open SQLite connection
+
+    Returns:
+        Number of duplicate content_summary rows merged away
+    """
+    version = conn.execute("PRAGMA user_version").fetchone()[0]
+    if version >= CANONICAL_UID_VERSION:
+        return 0
+    merged = 0
+    if _table_exists(conn, "content_summary"):
+        merged = _rekey_content_summary(conn)
+    if _table_exists(conn, "crawl_frontier"):
+        _rekey_frontier(conn)
+    conn.execute(f"PRAGMA user_version = {CANONICAL_UID_VERSION}")
+    conn.commit()
+    return merged
@@ -0,0 +1,205 @@
+"""
+SimHash fingerprints of page content with an LSH band index for near-duplicate lookup.
+"""
+
+import hashlib
+import re
+import sqlite3
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Iterable, List, Optional
+
+# CJK characters count as one token each; Latin words and numbers as one.
+TOKEN_RE = re.compile(r"[㐀-鿿豈-﫿]|[A-Za-z0-9]+")
+
+FINGERPRINT_BITS = 64
+BANDS = 4                 # 4 × 16-bit bands: distance ≤ 3 always shares a band
+MAX_DISTANCE = 3          # Hamming distance treated as "same page"
+MIN_TOKENS = 40           # shorter texts give unstable fingerprints
+
+_BAND_BITS = FINGERPRINT_BITS // BANDS
+_BAND_MASK = (1 << _BAND_BITS) - 1
+
+
+def _shingles(text: str) -> Iterable[str]:
+    tokens = [tok.lower() for tok in TOKEN_RE.findall(text)]
+    return (f"{a} {b}" for a, b in zip(tokens, tokens[1:]))
+
+
+def simhash(text: str) -> Optional[int]:
+    """
+    Compute the 64-bit SimHash of a text over token bigrams.
+
+    Args:
+        text: Extracted page content
+
+    Returns:
+        Unsigned 64-bit fingerprint, or None if the text is too short
+    """
+    weights = [0] * FINGERPRINT_BITS
+    count = 0
+    for shingle in _shingles(text):
+        h = int.from_bytes(hashlib.blake2b(shingle.encode("utf-8"), digest_size=8).digest(), "big")
+        for bit in range(FINGERPRINT_BITS):
+            weights[bit] += 1 if h >> bit & 1 else -1
+        count += 1
+    if count + 1 < MIN_TOKENS:
+        return None
+    return sum(1 << bit for bit, weight in enumerate(weights) if weight > 0)
+
+
+def hamming(a: int, b: int) -> int:
+    """Number of differing bits between two fingerprints."""
+    return bin(a ^ b).count("1")
+
+
+def _to_signed(value: int) -> int:
+    """SQLite integers are signed 64-bit."""
+    return value - (1 << 64) if value >= 1 << 63 else value
+
+
+def _to_unsigned(value: int) -> int:
+    return value + (1 << 64) if value < 0 else value
+
+
+def _bands(fingerprint: int) -> List[int]:
+    return [fingerprint >> (i * _BAND_BITS) & _BAND_MASK for i in range(BANDS)]
+
+
+@dataclass
+class NearDuplicate:
+    """A stored page whose content nearly matches a new one."""
+
+    uid: str
+    url: str
+    distance: int
+    title: Optional[str] = None
+    summary: Optional[str] = None
+
+
+class NearDuplicateIndex:
+    """
+    Finds stored pages whose content is nearly identical to a new page.
+
+    Each page's SimHash is split into 4 bands of 16 bits and stored in the
+    ``simhash_bands`` table. Two fingerprints within Hamming distance 3
+    share at least one band exactly, so a lookup only has to compare
+    against rows that match a band — a few indexed queries, however large
+    the table grows.
+    """
+
+    def __init__(self, conn: sqlite3.Connection, max_distance: int = MAX_DISTANCE):
+        """
+        Initialize near-duplicate index.
+
+        Args:
+            conn: Open SQLite connection (the content_summary database)
+            max_distance: Largest Hamming distance treated as a duplicate
+                (at most 3 with 4 bands)
+        """
+        self.conn = conn
+        self.max_distance = min(max_distance, BANDS - 1)
+        self._create_tables()
+
+    def _create_tables(self):
+        """Create fingerprint and band tables."""
+        cursor = self.conn.cursor()
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS content_fingerprints (
+                uid TEXT PRIMARY KEY,
+                url TEXT NOT NULL,
+                simhash INTEGER NOT NULL,
+                duplicate_of TEXT,
+                created_time TEXT NOT NULL
+            )
+        ''')
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS simhash_bands (
+                band INTEGER NOT NULL,
+                value INTEGER NOT NULL,
+                uid TEXT NOT NULL,
+                PRIMARY KEY (band, value, uid)
+            )
+        ''')
+        self.conn.commit()
+
+    def find(self, fingerprint: Optional[int], exclude_uid: Optional[str] = None) -> Optional[NearDuplicate]:
+        """
+        Find the closest stored page within max_distance.
+
+        Args:
+            fingerprint: SimHash of the new page (None never matches)
+            exclude_uid: uid of the new page itself
+
+        Returns:
+            NearDuplicate with the stored title and summary, or None
+        """
+        if fingerprint is None:
+            return None
+        candidates = set()
+        for band, value in enumerate(_bands(fingerprint)):
+            cursor = self.conn.execute(
+                "SELECT uid FROM simhash_bands WHERE band = ? AND value = ?", (band, value)
+            )
+            candidates.update(row[0] for row in cursor)
+        candidates.discard(exclude_uid)
+
+        best = None
+        for uid in candidates:
+            row = self.conn.execute(
+                "SELECT f.url, f.simhash, c.title, c.summary FROM content_fingerprints f "
+                "LEFT JOIN content_summary c ON c.uid = f.uid WHERE f.uid = ?",
+                (uid,),
+            ).fetchone()
+            if not row or not row[3]:
+                continue
+            distance = hamming(fingerprint, _to_unsigned(row[1]))
+            if distance <= self.max_distance and (best is None or distance < best.distance):
+                best = NearDuplicate(uid, row[0], distance, row[2], row[3])
+        return best
+
+    def add(self, uid: str, url: str, fingerprint: Optional[int], duplicate_of: Optional[str] = None):
+        """
+        Store (or replace) the fingerprint of a page.
+
+        Args:
+            uid: Row key of the page
+            url: Page URL
+            fingerprint: SimHash of its content (None stores nothing)
+            duplicate_of: uid of the page whose summary was reused
+        """
+        if fingerprint is None:
+            return
+        self.conn.execute("DELETE FROM simhash_bands WHERE uid = ?", (uid,))
+        self.conn.execute('''
+            INSERT OR REPLACE INTO content_fingerprints (uid, url, simhash, duplicate_of, created_time)
+            VALUES (?, ?, ?, ?, ?)
+        ''', (uid, url, _to_signed(fingerprint), duplicate_of, datetime.now().strftime("%Y-%m-%d %H:%M:%S")))
+        self.conn.executemany(
+            "INSERT OR IGNORE INTO simhash_bands (band, value, uid) VALUES (?, ?, ?)",
+            [(band, value, uid) for band, value in enumerate(_bands(fingerprint))],
+        )
+        self.conn.commit()
+
+    def backfill(self) -> int:
+        """
+        Fingerprint stored rows that have content but no fingerprint yet.
+
+        Returns:
+            Number of rows fingerprinted
+        """
+        columns = [row[1] for row in self.conn.execute("PRAGMA table_info(content_summary)")]
+        if "content" not in columns:
+            return 0
+        rows = self.conn.execute('''
+            SELECT c.uid, c.original_url, c.content FROM content_summary c
+            LEFT JOIN content_fingerprints f ON f.uid = c.uid
+            WHERE f.uid IS NULL AND c.uid IS NOT NULL AND c.content IS NOT NULL AND c.content <> ''
+        ''').fetchall()
+        added = 0
+        for uid, url, content in rows:
+            fingerprint = simhash(content)
+            if fingerprint is not None:
+                self.add(uid, url, fingerprint)
+                added += 1
+        return added
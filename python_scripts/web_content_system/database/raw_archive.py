@@ -0,0 +1,257 @@
+"""
+Append-only, compressed archive of raw HTTP responses.
+
+Each response is written as one WARC-like record (a small header block
+followed by the body) compressed as an independent gzip member and appended
+to the current segment file. A SQLite index maps every record to its
+``(segment, offset, length)`` so a single record can be read back with one
+seek, without decompressing the rest of the segment.
+
+Only one process should append to an archive at a time; any number of
+processes may read from it concurrently. Within the appending process,
+threads may share one RawArchive (appends are serialised).
+"""
+
+import gzip
+import hashlib
+import os
+import sqlite3
+import threading
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, Iterator, Optional, Tuple
+
+from ..crawl.urls import canonical_uid
+
+SEGMENT_TEMPLATE = "segment-{:05d}.warc.gz"
+DEFAULT_SEGMENT_BYTES = 256 * 1024 * 1024
+
+
+@dataclass
+class ArchivedResponse:
+    """A raw response read back from the archive."""
+
+    url: str
+    body: bytes
+    status: Optional[int]
+    content_type: str
+    encoding: Optional[str]
+    fetched_time: str
+    kind: str
+
+
+def read_record(segment_path: str, offset: int, length: int) -> Tuple[Dict[str, str], bytes]:
+    """
+    Read and decode one record from a segment file.
+
+    Module-level so worker processes can read records themselves instead of
+    receiving the body from the parent.
+
+    Args:
+        segment_path: Path to the segment file
+        offset: Byte offset of the gzip member
+        length: Compressed length of the member
+
+    Returns:
+        Tuple of (header dict, body bytes)
+    """
+    with open(segment_path, "rb") as f:
+        f.seek(offset)
+        data = gzip.decompress(f.read(length))
+    head, _, body = data.partition(b"\r\n\r\n")
+    headers = {}
+    for line in head.decode("utf-8").split("\r\n")[1:]:
+        key, _, value = line.partition(": ")
+        headers[key] = value
+    return headers, body
+
+
+class RawArchive:
+    """Stores raw fetched pages so they can be re-extracted offline."""
+
+    def __init__(self, root_dir: str, max_segment_bytes: int = DEFAULT_SEGMENT_BYTES):
+        """
+        Open (or create) an archive directory.
+
+        Args:
+            root_dir: Directory holding the segment files and index.sqlite
+            max_segment_bytes: Segment size after which a new one is started
+        """
+        self.root_dir = str(root_dir)
+        self.max_segment_bytes = max_segment_bytes
+        os.makedirs(self.root_dir, exist_ok=True)
+        # Fetcher threads append through the same connection; the lock
+        # keeps segment rotation, the write and the index row together.
+        self.conn = sqlite3.connect(os.path.join(self.root_dir, "index.sqlite"), check_same_thread=False)
+        self._lock = threading.Lock()
+        self._create_tables()
+        self._segment_no = self._last_segment_no()
+
+    def _create_tables(self):
+        """Create the offset index."""
+        cursor = self.conn.cursor()
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS raw_archive (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                uid TEXT NOT NULL,
+                url TEXT NOT NULL,
+                fetched_time TEXT NOT NULL,
+                kind TEXT NOT NULL,
+                status INTEGER,
+                content_type TEXT,
+                encoding TEXT,
+                sha1 TEXT NOT NULL,
+                segment TEXT NOT NULL,
+                offset INTEGER NOT NULL,
+                length INTEGER NOT NULL
+            )
+        ''')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_raw_archive_uid ON raw_archive (uid)')
+        self.conn.commit()
+
+    def _last_segment_no(self) -> int:
+        cursor = self.conn.cursor()
+        cursor.execute("SELECT segment FROM raw_archive ORDER BY id DESC LIMIT 1")
+        row = cursor.fetchone()
+        if not row:
+            return 0
+        return int(row[0].split("-")[1].split(".")[0])
+
+    def _segment_path(self, segment: str) -> str:
+        return os.path.join(self.root_dir, segment)
+
+    def _current_segment(self) -> str:
+        """Name of the segment to append to, rotating when it is full."""
+        segment = SEGMENT_TEMPLATE.format(self._segment_no)
+        path = self._segment_path(segment)
+        if os.path.exists(path) and os.path.getsize(path) >= self.max_segment_bytes:
+            self._segment_no += 1
+            segment = SEGMENT_TEMPLATE.format(self._segment_no)
+        return segment
+
+    def append(
+        self,
+        url: str,
+        body: bytes,
+        status: Optional[int] = None,
+        content_type: str = "",
+        encoding: Optional[str] = None,
+        kind: str = "response",
+    ) -> int:
+        """
+        Archive one raw response.
+
+        Args:
+            url: Requested URL (the key rows are stored under)
+            body: Raw response body
+            status: HTTP status code, if known
+            content_type: Content-Type header
+            encoding: Declared encoding, or None if it must be detected
+            kind: "response" for HTTP bodies, "rendered" for browser DOM dumps
+
+        Returns:
+            ID of the index row
+        """
+        fetched_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        sha1 = hashlib.sha1(body).hexdigest()
+        header = (
+            "WARC/1.0\r\n"
+            f"WARC-Type: {kind}\r\n"
+            f"WARC-Target-URI: {url}\r\n"
+            f"WARC-Date: {fetched_time}\r\n"
+            f"WARC-Payload-Digest: sha1:{sha1}\r\n"
+            f"HTTP-Status: {status if status is not None else ''}\r\n"
+            f"Content-Type: {content_type}\r\n"
+            f"Content-Encoding-Declared: {encoding or ''}\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            "\r\n"
+        ).encode("utf-8")
+        member = gzip.compress(header + body, compresslevel=6)
+
+        with self._lock:
+            segment = self._current_segment()
+            with open(self._segment_path(segment), "ab") as f:
+                offset = f.tell()
+                f.write(member)
+
+            cursor = self.conn.cursor()
+            cursor.execute('''
+                INSERT INTO raw_archive
+                    (uid, url, fetched_time, kind, status, content_type, encoding, sha1, segment, offset, length)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', (
+                canonical_uid(url), url, fetched_time, kind,
+                status, content_type, encoding, sha1, segment, offset, len(member),
+            ))
+            self.conn.commit()
+            return cursor.lastrowid
+
+    def read(self, record_id: int) -> Optional[ArchivedResponse]:
+        """
+        Read one archived response by index ID.
+
+        Args:
+            record_id: ID returned by append()
+
+        Returns:
+            ArchivedResponse or None if the ID is unknown
+        """
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT url, fetched_time, kind, status, content_type, encoding, segment, offset, length "
+                "FROM raw_archive WHERE id = ?",
+                (record_id,),
+            ).fetchone()
+        if not row:
+            return None
+        url, fetched_time, kind, status, content_type, encoding, segment, offset, length = row
+        _, body = read_record(self._segment_path(segment), offset, length)
+        return ArchivedResponse(url, body, status, content_type or "", encoding, fetched_time, kind)
+
+    def iter_latest(self) -> Iterator[Tuple[int, str, Optional[str], str, int, int]]:
+        """
+        Iterate the newest record of every archived URL.
+
+        HTTP responses are preferred over rendered DOM dumps of the same URL.
+        Error responses (status outside 2xx) are skipped, so a later 404 or
+        5xx fetch never replaces a good record.
+
+        Yields:
+            Tuples of (id, url, encoding, segment path, offset, length)
+        """
+        with self._lock:
+            rows = self.conn.execute('''
+                SELECT id, uid, url, encoding, segment, offset, length FROM raw_archive
+                WHERE id IN (
+                    SELECT MAX(id) FROM raw_archive
+                    WHERE status IS NULL OR status BETWEEN 200 AND 299
+                    GROUP BY uid, kind
+                )
+                ORDER BY uid, kind = 'rendered', id DESC
+            ''').fetchall()
+        last_uid = None
+        for record_id, uid, url, encoding, segment, offset, length in rows:
+            if uid == last_uid:
+                continue
+            last_uid = uid
+            yield record_id, url, encoding, self._segment_path(segment), offset, length
+
+    def count(self) -> int:
+        """Number of archived records."""
+        with self._lock:
+            return self.conn.execute("SELECT COUNT(*) FROM raw_archive").fetchone()[0]
+
+    def close(self):
+        """Close the index connection."""
+        with self._lock:
+            if self.conn:
+                self.conn.close()
+                self.conn = None
+
+    def __enter__(self):
+        """Context manager entry."""
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        """Context manager exit."""
+        self.close()
@@ -0,0 +1,103 @@
+"""
+Per-domain cache of the extraction selector / strategy that last worked.
+"""
+
+import sqlite3
+from datetime import datetime
+from typing import Dict, Optional
+
+
+class SelectorCache:
+    """
+    Remembers, per domain, which content selector won the full search.
+
+    Pages of one site almost always share a template, so the next page of
+    the same domain tries the remembered selector first and only falls back
+    to the full search when it yields too little text. Entries are kept in
+    the ``domain_selectors`` table and mirrored in memory; hit / miss
+    counters are written without committing and persist with the caller's
+    next commit.
+    """
+
+    def __init__(self, conn: sqlite3.Connection, namespace: str):
+        """
+        Initialize selector cache.
+
+        Args:
+            conn: Open SQLite connection
+            namespace: Extractor name; selectors of different extractors
+                are not interchangeable
+        """
+        self.conn = conn
+        self.namespace = namespace
+        self._create_tables()
+        self._cache: Dict[str, Optional[str]] = {}
+
+    def _create_tables(self):
+        """Create the domain_selectors table."""
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS domain_selectors (
+                namespace TEXT NOT NULL,
+                domain TEXT NOT NULL,
+                selector TEXT NOT NULL,
+                hits INTEGER NOT NULL DEFAULT 0,
+                misses INTEGER NOT NULL DEFAULT 0,
+                updated_time TEXT NOT NULL,
+                PRIMARY KEY (namespace, domain)
+            )
+        ''')
+        self.conn.commit()
+
+    def get(self, domain: str) -> Optional[str]:
+        """
+        Get the remembered selector for a domain.
+
+        Args:
+            domain: Normalized host name
+
+        Returns:
+            Selector / strategy name, or None if nothing has been learned
+        """
+        if domain not in self._cache:
+            row = self.conn.execute(
+                "SELECT selector FROM domain_selectors WHERE namespace = ? AND domain = ?",
+                (self.namespace, domain),
+            ).fetchone()
+            self._cache[domain] = row[0] if row else None
+        return self._cache[domain]
+
+    def record_win(self, domain: str, selector: str):
+        """
+        Store the selector that won a full search.
+
+        Args:
+            domain: Normalized host name
+            selector: Winning selector / strategy name
+        """
+        if self._cache.get(domain) == selector:
+            self.record_hit(domain)
+            return
+        self._cache[domain] = selector
+        self.conn.execute('''
+            INSERT INTO domain_selectors (namespace, domain, selector, hits, misses, updated_time)
+            VALUES (?, ?, ?, 1, 0, ?)
+            ON CONFLICT(namespace, domain) DO UPDATE SET
+              selector=excluded.selector,
+              hits=1,
+              updated_time=excluded.updated_time
+        ''', (self.namespace, domain, selector, datetime.now().strftime("%Y-%m-%d %H:%M:%S")))
+        self.conn.commit()
+
+    def record_hit(self, domain: str):
+        """Count a page where the remembered selector was sufficient."""
+        self.conn.execute(
+            "UPDATE domain_selectors SET hits = hits + 1 WHERE namespace = ? AND domain = ?",
+            (self.namespace, domain),
+        )
+
+    def record_miss(self, domain: str):
+        """Count a page where the remembered selector yielded too little text."""
+        self.conn.execute(
+            "UPDATE domain_selectors SET misses = misses + 1 WHERE namespace = ? AND domain = ?",
+            (self.namespace, domain),
+        )
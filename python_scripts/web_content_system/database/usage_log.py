@@ -0,0 +1,136 @@
+"""
+Per-row LLM token usage and cost, summable per run.
+"""
+
+import os
+import sqlite3
+from datetime import datetime
+from typing import Dict, Iterable, Optional, Tuple
+
+from ..crawl.urls import canonical_uid
+from ..llm_clients.usage import Usage
+
+TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+def new_run_id() -> str:
+    """Identifier of a run: start time and process id."""
+    return f"{datetime.now():%Y%m%d-%H%M%S}-{os.getpid()}"
+
+
+class UsageLog:
+    """
+    Stores the token usage of every LLM call in the ``llm_usage`` table.
+
+    Each call is tied to the content row (uid) it was made for and to the
+    run that made it, so spend can be read per row and summed per run.
+    """
+
+    def __init__(self, conn: sqlite3.Connection, run_id: Optional[str] = None):
+        """
+        Initialize usage log.
+
+        Args:
+            conn: Open SQLite connection (the content_summary database)
+            run_id: Run recorded calls belong to (defaults to a new one)
+        """
+        self.conn = conn
+        self.run_id = run_id or new_run_id()
+        self._create_tables()
+
+    def _create_tables(self):
+        """Create the llm_usage table."""
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS llm_usage (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                run_id TEXT NOT NULL,
+                source TEXT NOT NULL,
+                uid TEXT NOT NULL,
+                provider TEXT NOT NULL,
+                model TEXT,
+                prompt_tokens INTEGER NOT NULL,
+                completion_tokens INTEGER NOT NULL,
+                cost REAL NOT NULL,
+                estimated INTEGER NOT NULL DEFAULT 0,
+                created_time TEXT NOT NULL
+            )
+        ''')
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_llm_usage_uid ON llm_usage (uid)")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_llm_usage_run ON llm_usage (run_id)")
+        self.conn.commit()
+
+    def record(self, url: str, usages: Iterable[Usage], source: str) -> float:
+        """
+        Store the calls made for one URL in this run.
+
+        Args:
+            url: URL of the content row
+            usages: Usage of each answered call
+            source: Pipeline that made them ("crawler", "params", "extractor", ...)
+
+        Returns:
+            Total cost of these calls in USD
+        """
+        return self.record_many(((url, usage) for usage in usages), source)
+
+    def record_many(self, calls: Iterable[Tuple[str, Usage]], source: str) -> float:
+        """
+        Store calls made for several URLs in this run, in one transaction.
+
+        Args:
+            calls: (url, usage) of each answered call
+            source: Pipeline that made them
+
+        Returns:
+            Total cost of these calls in USD
+        """
+        now = datetime.now().strftime(TIME_FORMAT)
+        rows = [
+            (self.run_id, source, canonical_uid(url), u.provider, u.model, u.prompt_tokens,
+             u.completion_tokens, u.cost, int(u.estimated), now)
+            for url, u in calls
+        ]
+        if rows:
+            self.conn.executemany('''
+                INSERT INTO llm_usage
+                    (run_id, source, uid, provider, model, prompt_tokens, completion_tokens,
+                     cost, estimated, created_time)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', rows)
+            self.conn.commit()
+        return sum(row[7] for row in rows)
+
+    def for_url(self, url: str) -> Dict[str, float]:
+        """Calls, tokens and cost spent on one URL over all runs."""
+        calls, prompt, completion, cost = self.conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(prompt_tokens), 0), COALESCE(SUM(completion_tokens), 0), "
+            "COALESCE(SUM(cost), 0) FROM llm_usage WHERE uid = ?",
+            (canonical_uid(url),),
+        ).fetchone()
+        return {"calls": calls, "prompt_tokens": prompt, "completion_tokens": completion, "cost": cost}
+
+    def totals(self, all_runs: bool = False) -> Dict[str, Dict[str, float]]:
+        """
+        Sum calls, tokens and cost per "provider/model".
+
+        Args:
+            all_runs: Sum over every run instead of this one
+
+        Returns:
+            Totals by "provider/model"
+        """
+        sql = (
+            "SELECT provider, model, COUNT(*), SUM(prompt_tokens), SUM(completion_tokens), SUM(cost) "
+            "FROM llm_usage"
+        )
+        params: tuple = ()
+        if not all_runs:
+            sql += " WHERE run_id = ?"
+            params = (self.run_id,)
+        sql += " GROUP BY provider, model ORDER BY provider, model"
+        return {
+            f"{provider}/{model}": {
+                "calls": calls, "prompt_tokens": prompt, "completion_tokens": completion, "cost": cost,
+            }
+            for provider, model, calls, prompt, completion, cost in self.conn.execute(sql, params)
+        }
@@ -0,0 +1,378 @@
+"""
+Shared SQLite work queue with leases, heartbeats, retries and dead-lettering.
+
+Any number of worker processes — on one machine, or on several machines
+sharing the database file — can pull items from the same queue. An item is
+handed to one worker at a time under a lease; a worker that dies simply
+stops renewing its lease, and the item is handed out again once the lease
+expires. Items that keep failing are moved to the ``dead`` state instead of
+being retried forever.
+"""
+
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from ..crawl.urls import canonical_uid
+
+DEFAULT_LEASE_SECONDS = 300.0
+DEFAULT_MAX_ATTEMPTS = 3
+BUSY_TIMEOUT = 30.0  # seconds a connection waits for another writer
+
+PENDING = "pending"
+LEASED = "leased"
+DONE = "done"
+DEAD = "dead"
+
+
+def default_worker_id() -> str:
+    """Worker name unique across machines: ``host:pid``."""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def connect(db_path: str, wal: bool = True) -> sqlite3.Connection:
+    """
+    Open a connection suitable for concurrent queue access.
+
+    Args:
+        db_path: SQLite database file
+        wal: Use write-ahead logging. WAL needs shared memory, so only use
+            it when every worker runs on the same machine; on network
+            storage keep the default rollback journal (``wal=False``).
+
+    Returns:
+        Connection in autocommit mode with a busy timeout
+    """
+    conn = sqlite3.connect(db_path, timeout=BUSY_TIMEOUT, isolation_level=None)
+    if wal:
+        conn.execute("PRAGMA journal_mode=WAL")
+    return conn
+
+
+@dataclass
+class WorkItem:
+    """An item leased to a worker."""
+
+    id: int
+    queue: str
+    url: str
+    payload: Dict[str, Any] = field(default_factory=dict)
+    attempts: int = 0
+    lease_owner: str = ""
+
+
+class WorkQueue:
+    """
+    Lease-based work queue stored in the ``work_queue`` table.
+
+    Leasing runs in a ``BEGIN IMMEDIATE`` transaction, so two workers can
+    never claim the same item. A leased item must be completed, failed or
+    renewed with heartbeat() before ``lease_seconds`` run out; after that it
+    is free for any worker again and counts as a failed attempt. After
+    ``max_attempts`` attempts an item is dead-lettered.
+    """
+
+    def __init__(
+        self,
+        db_path: str,
+        worker_id: Optional[str] = None,
+        lease_seconds: float = DEFAULT_LEASE_SECONDS,
+        max_attempts: int = DEFAULT_MAX_ATTEMPTS,
+        wal: bool = True,
+    ):
+        """
+        Open (or create) the queue.
+
+        Args:
+            db_path: SQLite database file shared by all workers
+            worker_id: Name recorded as lease owner (defaults to host:pid)
+            lease_seconds: How long a lease lasts without a heartbeat
+            max_attempts: Attempts before an item is dead-lettered
+            wal: Use write-ahead logging (see connect())
+        """
+        self.db_path = db_path
+        self.worker_id = worker_id or default_worker_id()
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max(1, max_attempts)
+        self.wal = wal
+        self.conn = connect(db_path, wal)
+        self._create_tables()
+
+    def _create_tables(self):
+        """Create the work_queue table."""
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS work_queue (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                queue TEXT NOT NULL,
+                uid TEXT NOT NULL,
+                url TEXT NOT NULL,
+                payload TEXT,
+                status TEXT NOT NULL DEFAULT 'pending',
+                priority INTEGER NOT NULL DEFAULT 0,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                lease_owner TEXT,
+                lease_expires REAL,
+                last_error TEXT,
+                created_time TEXT NOT NULL,
+                updated_time TEXT NOT NULL,
+                UNIQUE (queue, uid)
+            )
+        ''')
+        self.conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_work_queue_ready ON work_queue (queue, status, priority)"
+        )
+
+    @staticmethod
+    def _now() -> str:
+        return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+    def enqueue(self, url: str, queue: str = "scrape", payload: Optional[dict] = None, priority: int = 0) -> bool:
+        """
+        Add a URL to a queue unless it is already there.
+
+        Args:
+            url: URL to process
+            queue: Queue name (kind of work)
+            payload: JSON-serialisable extra data (e.g. tags)
+            priority: Higher is leased first
+
+        Returns:
+            True if the item was added
+        """
+        return self.enqueue_many([(url, payload)], queue, priority) == 1
+
+    def enqueue_many(
+        self,
+        items: Iterable[Tuple[str, Optional[dict]]],
+        queue: str = "scrape",
+        priority: int = 0,
+    ) -> int:
+        """
+        Add many (url, payload) pairs; URLs already queued are left alone.
+
+        Returns:
+            Number of items added
+        """
+        now = self._now()
+        rows = [
+            (queue, canonical_uid(url), url, json.dumps(payload or {}, ensure_ascii=False), priority, now, now)
+            for url, payload in items
+        ]
+        before = self.conn.total_changes
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            self.conn.executemany('''
+                INSERT OR IGNORE INTO work_queue
+                    (queue, uid, url, payload, priority, created_time, updated_time)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            ''', rows)
+            self.conn.execute("COMMIT")
+        except BaseException:
+            self.conn.execute("ROLLBACK")
+            raise
+        return self.conn.total_changes - before
+
+    def lease(self, queue: str = "scrape") -> Optional[WorkItem]:
+        """
+        Claim the next ready item.
+
+        Expired leases are reclaimed first: items out of attempts are
+        dead-lettered, the rest become available again.
+
+        Args:
+            queue: Queue name
+
+        Returns:
+            Leased WorkItem, or None when nothing is ready
+        """
+        clock = time.time()
+        now = self._now()
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            self.conn.execute('''
+                UPDATE work_queue SET status = CASE WHEN attempts >= ? THEN 'dead' ELSE 'pending' END,
+                    last_error = 'lease expired', lease_owner = NULL,
+                    lease_expires = NULL, updated_time = ?
+                WHERE queue = ? AND status = 'leased' AND lease_expires < ?
+            ''', (self.max_attempts, now, queue, clock))
+            row = self.conn.execute('''
+                SELECT id, url, payload, attempts FROM work_queue
+                WHERE queue = ? AND status = 'pending'
+                ORDER BY priority DESC, id LIMIT 1
+            ''', (queue,)).fetchone()
+            if row is not None:
+                self.conn.execute('''
+                    UPDATE work_queue SET status = 'leased', attempts = attempts + 1,
+                        lease_owner = ?, lease_expires = ?, updated_time = ?
+                    WHERE id = ?
+                ''', (self.worker_id, clock + self.lease_seconds, now, row[0]))
+            self.conn.execute("COMMIT")
+        except BaseException:
+            self.conn.execute("ROLLBACK")
+            raise
+        if row is None:
+            return None
+        item_id, url, payload, attempts = row
+        return WorkItem(item_id, queue, url, json.loads(payload or "{}"), attempts + 1, self.worker_id)
+
+    def _update_owned(self, item: WorkItem, sql: str, params: tuple) -> bool:
+        cursor = self.conn.execute(
+            sql + " WHERE id = ? AND status = 'leased' AND lease_owner = ?",
+            params + (item.id, item.lease_owner),
+        )
+        return cursor.rowcount > 0
+
+    def heartbeat(self, item: WorkItem) -> bool:
+        """
+        Extend the lease of an item still being worked on.
+
+        Returns:
+            False if the lease was lost (expired and taken by another worker)
+        """
+        return self._update_owned(
+            item, "UPDATE work_queue SET lease_expires = ?", (time.time() + self.lease_seconds,)
+        )
+
+    def complete(self, item: WorkItem) -> bool:
+        """
+        Mark a leased item done.
+
+        Returns:
+            False if the lease was lost in the meantime
+        """
+        return self._update_owned(
+            item,
+            "UPDATE work_queue SET status = 'done', lease_owner = NULL, lease_expires = NULL, "
+            "last_error = NULL, updated_time = ?",
+            (self._now(),),
+        )
+
+    def fail(self, item: WorkItem, error: str = "", retry: bool = True) -> Optional[str]:
+        """
+        Give a leased item back after a failed attempt.
+
+        Args:
+            item: Leased item
+            error: Reason, kept as last_error
+            retry: False dead-letters the item regardless of its attempts
+
+        Returns:
+            New status: 'pending' (will be retried) or 'dead', or None if
+            the lease was lost in the meantime (the item was left alone)
+        """
+        status = DEAD if not retry or item.attempts >= self.max_attempts else PENDING
+        owned = self._update_owned(
+            item,
+            "UPDATE work_queue SET status = ?, lease_owner = NULL, lease_expires = NULL, "
+            "last_error = ?, updated_time = ?",
+            (status, (error or "")[:1000], self._now()),
+        )
+        return status if owned else None
+
+    def release(self, item: WorkItem) -> bool:
+        """
+        Give a leased item back untried, without using up an attempt.
+
+        Returns:
+            False if the lease was lost in the meantime
+        """
+        return self._update_owned(
+            item,
+            "UPDATE work_queue SET status = 'pending', attempts = MAX(attempts - 1, 0), "
+            "lease_owner = NULL, lease_expires = NULL, updated_time = ?",
+            (self._now(),),
+        )
+
+    def keep_alive(self, item: WorkItem, interval: Optional[float] = None) -> "Heartbeat":
+        """
+        Renew an item's lease from a background thread while it is processed.
+
+        Use as ``with queue.keep_alive(item): ...``.
+
+        Args:
+            item: Leased item
+            interval: Seconds between renewals (default: a third of the lease)
+        """
+        return Heartbeat(self, item, interval or self.lease_seconds / 3)
+
+    def dead_letters(self, queue: str = "scrape") -> List[Tuple[int, str, int, Optional[str]]]:
+        """List dead items as (id, url, attempts, last_error)."""
+        return self.conn.execute(
+            "SELECT id, url, attempts, last_error FROM work_queue WHERE queue = ? AND status = 'dead' ORDER BY id",
+            (queue,),
+        ).fetchall()
+
+    def requeue_dead(self, queue: str = "scrape") -> int:
+        """
+        Give dead items a fresh set of attempts.
+
+        Returns:
+            Number of items requeued
+        """
+        cursor = self.conn.execute(
+            "UPDATE work_queue SET status = 'pending', attempts = 0, updated_time = ? "
+            "WHERE queue = ? AND status = 'dead'",
+            (self._now(), queue),
+        )
+        return cursor.rowcount
+
+    def stats(self, queue: str = "scrape") -> Dict[str, int]:
+        """Count items per status."""
+        counts = {PENDING: 0, LEASED: 0, DONE: 0, DEAD: 0}
+        for status, count in self.conn.execute(
+            "SELECT status, COUNT(*) FROM work_queue WHERE queue = ? GROUP BY status", (queue,)
+        ):
+            counts[status] = count
+        return counts
+
+    def close(self):
+        """Close the database connection."""
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+class Heartbeat:
+    """Background thread that renews one lease until the block exits."""
+
+    def __init__(self, queue: WorkQueue, item: WorkItem, interval: float):
+        self.queue = queue
+        self.item = item
+        self.interval = interval
+        self.lost = False
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        # sqlite3 connections are per-thread, so the heartbeat opens its own.
+        conn = connect(self.queue.db_path, self.queue.wal)
+        try:
+            while not self._stop.wait(self.interval):
+                cursor = conn.execute(
+                    "UPDATE work_queue SET lease_expires = ? "
+                    "WHERE id = ? AND status = 'leased' AND lease_owner = ?",
+                    (time.time() + self.queue.lease_seconds, self.item.id, self.item.lease_owner),
+                )
+                if cursor.rowcount == 0:
+                    self.lost = True
+                    return
+        finally:
+            conn.close()
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self._stop.set()
+        self._thread.join()
@@ -2,12 +2,20 @@
 Main web content extractor orchestrator.
 """
 
-from typing import Optional, List, Tuple
+from typing import Iterable, Iterator, List, Optional, Tuple
 
 from .config import Config
-from .database import DatabaseManager
-from .scrapers import BrowserScraper, RequestsScraper
+from .crawl.urls import canonical_uid
+from .database import DatabaseManager, RawArchive
+from .database.failure_log import EMPTY_CONTENT, classify, retry_after
+from .database.near_duplicates import simhash
+from .llm_clients import Usage
+from .llm_clients.embeddings import make_embedder
+from .scrapers import BrowserScraper, RequestsScraper, ExtractionPool
 from .processors import ContentProcessor
+from .telemetry import LLMCall
+
+FAILURE_SOURCE = "extractor"  # failure_log.source of scrape_and_process failures
 
 
 class WebContentExtractor:
@@ -27,40 +35,118 @@ class WebContentExtractor:
         self.config = config or Config.from_env()
         
         # Initialize components
-        self.db = DatabaseManager(self.config.database.db_path)
-        self.browser_scraper = BrowserScraper(self.config.browser)
-        self.requests_scraper = RequestsScraper(self.config.browser)
+        try:
+            embedder = make_embedder(self.config.api)
+        except ValueError as e:
+            print(f"⚠️  嵌入模型配置无效，语义搜索改用本地哈希嵌入: {e}")
+            embedder = None
+        self.db = DatabaseManager(self.config.database.db_path, embedder)
+        self.archive = (
+            RawArchive(self.config.database.raw_archive_dir)
+            if self.config.database.raw_archive_dir else None
+        )
+        self.browser_scraper = BrowserScraper(
+            self.config.browser, self.archive, self.db.selector_cache("browser_scraper")
+        )
+        self.requests_scraper = RequestsScraper(self.config.browser, self.archive)
         self.processor = ContentProcessor(self.config.api)
+        self.near_duplicates = self.db.near_duplicates()
+        self.failures = self.db.failures()
+        self.usage = self.db.usage()
+        self.calls = self.db.calls(self.usage.run_id)
+        self._extraction_pool: Optional[ExtractionPool] = None
+        # Rows recorded while a hedge loser was still running (see settle())
+        self._unsettled: List[Tuple[str, str, List[Usage], List[LLMCall], int, int]] = []
+    
+    @property
+    def extraction_pool(self) -> ExtractionPool:
+        """Process pool for HTML extraction, started on first use."""
+        if self._extraction_pool is None:
+            self._extraction_pool = ExtractionPool()
+        return self._extraction_pool
+    
+    def prefetch(self, urls: Iterable[str]) -> Iterator[Tuple[str, Optional[str], Optional[str]]]:
+        """
+        Download pages with requests and parse them in the process pool.
+        
+        Pages arrive as they finish; pass the ones with valid content to
+        scrape_and_process(page=...) to skip the browser for them.
+        
+        Args:
+            urls: URLs to fetch
+            
+        Yields:
+            Tuples of (url, title, content); title and content are None on failure
+        """
+        return self.requests_scraper.scrape_many(urls, pool=self.extraction_pool)
     
-    def scrape_and_process(self, url: str, tags: str = "") -> bool:
+    def scrape_and_process(
+        self, url: str, tags: str = "", page: Optional[Tuple[Optional[str], Optional[str]]] = None
+    ) -> bool:
         """
         Scrape URL, generate summary, and save to database.
         
         Args:
             url: URL to scrape
             tags: Comma-separated tags
+            page: (title, content) already fetched by prefetch(); the
+                browser and requests scrapers are used only if its content
+                is not valid
             
         Returns:
             True if successful, False otherwise
+            
+        Raises:
+            BudgetExceeded: if the run's LLM cost cap is reached
         """
         print(f"🔍 开始抓取: {url}")
         
-        title, content = self.browser_scraper.scrape(url)
+        title, content = page or (None, None)
+        if not content or not self.processor.validate_content(content):
+            title, content = self.browser_scraper.scrape(url)
         
         if not content or not self.processor.validate_content(content):
             title, content = self.requests_scraper.scrape(url)
         
         if not self.processor.validate_content(content):
             print("❌ 无法抓取到有效内容")
+            error = self.requests_scraper.last_error
+            next_retry = self.failures.record(
+                url, FAILURE_SOURCE, classify(error) if error else EMPTY_CONTENT,
+                str(error or "无有效内容"), {"tags": tags}, retry_after(error),
+            )
+            if next_retry is not None:
+                print("🔁 已加入重试队列 (retry.py)")
             return False
+        self.failures.resolve(url, FAILURE_SOURCE)
         
-        title = self.processor.generate_title(content)
-        print(f"✅ 抓取成功 - 标题: {title[:50]}{'...' if len(title) > 50 else ''}")
-        print(f"📊 内容长度: {len(content)} 字符")
-        
-        # Generate summary
-        print("⏳ 正在生成摘要...")
-        summary = self.processor.generate_summary(content, title)
+        # Reuse the title and summary of a near-identical page instead of
+        # calling the LLM; look it up before any LLM call is made.
+        usages, calls = [], []
+        uid = canonical_uid(url)
+        fingerprint = simhash(content)
+        duplicate = self.near_duplicates.find(fingerprint, exclude_uid=uid)
+        if duplicate is not None and not duplicate.summary:
+            duplicate = None
+        if duplicate is not None:
+            title = duplicate.title or title
+            summary = duplicate.summary
+            print(f"✅ 抓取成功 - 标题: {title[:50]}{'...' if len(title) > 50 else ''}")
+            print(f"📊 内容长度: {len(content)} 字符")
+            print(f"♻️ 与已有页面几乎相同 ({duplicate.url}, 距离 {duplicate.distance})，复用标题和摘要")
+        else:
+            route = self.processor.route(content, tags, url)
+            if route is not None:
+                print(f"🧭 路由: {route.route} ({len(content)} 字符)")
+            title = self.processor.generate_title(
+                content, on_usage=usages.append, route=route, on_call=calls.append,
+            )
+            print(f"✅ 抓取成功 - 标题: {title[:50]}{'...' if len(title) > 50 else ''}")
+            print(f"📊 内容长度: {len(content)} 字符")
+            print("⏳ 正在生成摘要...")
+            summary = self.processor.generate_summary(
+                content, title, on_usage=usages.append, route=route, on_call=calls.append,
+            )
         print(f"📋 摘要: {summary}")
         
         # Generate weibo content
@@ -69,6 +155,8 @@ class WebContentExtractor:
         
         # Save to database
         self.db.save_content_summary(title, summary, url, tags)
+        self.near_duplicates.add(uid, url, fingerprint, duplicate.uid if duplicate else None)
+        self._record_llm(url, usages, calls, FAILURE_SOURCE)
         
         return True
     
@@ -84,15 +172,71 @@ class WebContentExtractor:
         Returns:
             Generated summary
         """
-        title = self.processor.generate_title(content)
+        usages, calls = [], []
+        route = self.processor.route(content, tags)
+        title = self.processor.generate_title(
+            content, on_usage=usages.append, route=route, on_call=calls.append,
+        )
         print("⏳ 正在生成摘要...")
-        summary = self.processor.generate_summary(content, title)
+        summary = self.processor.generate_summary(
+            content, title, on_usage=usages.append, route=route, on_call=calls.append,
+        )
         
         # Save to database
-        self.db.save_manual_content(title, content, summary, tags)
+        row_id = self.db.save_manual_content(title, content, summary, tags)
+        
+        # Manual rows have no URL; their usage is keyed by manual://<row id>
+        key = f"manual://{row_id}"
+        self._record_llm(key, usages, calls, "manual")
         
         return summary
     
+    def _record_llm(self, key: str, usages: List[Usage], calls: List[LLMCall], source: str):
+        """
+        Record the LLM usage and calls of one row.
+        
+        A call that lost a hedge may still be running and append to the
+        lists later; the row is then kept for settle().
+        """
+        # Check before copying: a loser that finished by now has appended.
+        running = not self.processor.settled()
+        recorded_usages, recorded_calls = list(usages), list(calls)
+        if running:
+            self._unsettled.append((key, source, usages, calls, len(recorded_usages), len(recorded_calls)))
+        self.calls.record(key, recorded_calls, source)
+        if recorded_usages:
+            cost = self.usage.record(key, recorded_usages, source)
+            tokens = sum(u.prompt_tokens + u.completion_tokens for u in recorded_usages)
+            print(f"🧮 LLM用量: {len(recorded_usages)} 次调用, {tokens} tokens, ${cost:.4f}")
+    
+    def settle(self, timeout: Optional[float] = None) -> bool:
+        """
+        Record the usage and calls hedge losers reported after their row.
+        
+        Pages do not wait for a call that lost a hedge; call this once at
+        the end of a batch, before reading the run's totals. close() does
+        it too.
+        
+        Args:
+            timeout: Seconds to wait for losing calls at most (default:
+                the API timeout)
+            
+        Returns:
+            True if every losing call finished and was recorded
+        """
+        done = self.processor.drain(timeout)
+        unsettled, self._unsettled = self._unsettled, []
+        for key, source, usages, calls, n_usages, n_calls in unsettled:
+            late_usages, late_calls = usages[n_usages:], calls[n_calls:]
+            self.calls.record(key, late_calls, source)
+            if late_usages:
+                self.usage.record(key, late_usages, source)
+            if not done:
+                self._unsettled.append(
+                    (key, source, usages, calls, n_usages + len(late_usages), n_calls + len(late_calls))
+                )
+        return done
+    
     def view_recent_records(self, limit: int = 10):
         """
         Display recent content summaries.
@@ -120,8 +264,15 @@ class WebContentExtractor:
     
     def close(self):
         """Close all resources."""
+        if self.db.conn is not None:
+            self.settle()
+            self.calls.flush()
         self.db.close()
         self.browser_scraper.close()
+        if self._extraction_pool is not None:
+            self._extraction_pool.close()
+        if self.archive is not None:
+            self.archive.close()
     
     def __enter__(self):
         """Context manager entry."""
@@ -0,0 +1,249 @@
+"""
+Hedged calls: ask a second backend when the first one is slow.
+
+If the primary backend has not answered within its usual (p95) latency,
+the same request goes to the next healthy backend and the first answer
+wins. A slow tail then costs one extra call instead of most of the
+request timeout. A token bucket caps the share of calls that may be
+hedged, which bounds the extra cost.
+"""
+
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, wait
+from typing import Any, Callable, Deque, Dict, List, Optional, Sequence, Tuple, TypeVar
+
+T = TypeVar("T")
+
+# One attempt: (backend key, fn(settled, hedge)). `settled` is set once the
+# call has a winner, so an attempt that has not started its request yet can
+# give up; `hedge` tells whether it was started as a hedge.
+Attempt = Tuple[str, Callable[[threading.Event, bool], Optional[T]]]
+
+
+class LatencyTracker:
+    """Recent latencies per key, for quantiles."""
+
+    def __init__(self, window: int = 200):
+        """
+        Initialize tracker.
+
+        Args:
+            window: Latencies kept per key
+        """
+        self.window = window
+        self._samples: Dict[str, Deque[float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, key: str, latency: float):
+        """Record the latency (seconds) of an answered call."""
+        with self._lock:
+            samples = self._samples.get(key)
+            if samples is None:
+                samples = self._samples[key] = deque(maxlen=self.window)
+            samples.append(latency)
+
+    def keys(self) -> List[str]:
+        """Keys with observed latencies."""
+        with self._lock:
+            return sorted(self._samples)
+
+    def count(self, key: str) -> int:
+        """Number of latencies kept for a key."""
+        with self._lock:
+            return len(self._samples.get(key, ()))
+
+    def quantile(self, key: str, q: float) -> Optional[float]:
+        """
+        Latency below which a share `q` of a key's recent calls answered.
+
+        Returns:
+            Seconds, or None if nothing was observed yet
+        """
+        with self._lock:
+            samples = sorted(self._samples.get(key, ()))
+        if not samples:
+            return None
+        return samples[min(len(samples) - 1, int(q * len(samples)))]
+
+
+class HedgePolicy:
+    """
+    When to hedge a call, and how often that is allowed.
+
+    Thread-safe. The hedge delay of a backend is the `quantile` of its
+    recent latencies; until `min_samples` answers are known it is
+    `initial_delay`. Every call adds `max_rate` to a token bucket holding
+    at most `burst` tokens and every hedge takes one, so at most
+    ``burst + max_rate * calls`` calls are ever hedged.
+    """
+
+    def __init__(
+        self,
+        quantile: float = 0.95,
+        max_rate: float = 0.1,
+        initial_delay: float = 3.0,
+        min_delay: float = 0.05,
+        burst: float = 2.0,
+        min_samples: int = 20,
+        window: int = 200,
+    ):
+        """
+        Initialize policy.
+
+        Args:
+            quantile: Latency quantile after which a call is hedged
+            max_rate: Highest long-run share of calls that are hedged
+            initial_delay: Hedge delay (seconds) of a backend with too few
+                observed latencies
+            min_delay: Shortest hedge delay (seconds)
+            burst: Hedges allowed in a row before the rate applies
+            min_samples: Latencies needed before the quantile is used
+            window: Latencies kept per backend
+        """
+        self.quantile = quantile
+        self.max_rate = max_rate
+        self.initial_delay = initial_delay
+        self.min_delay = min_delay
+        self.burst = burst
+        self.min_samples = min_samples
+        self.latencies = LatencyTracker(window)
+        self.calls = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+        self._tokens = burst
+        self._lock = threading.Lock()
+
+    def observe(self, key: str, latency: float):
+        """Record the latency of an answered call to a backend."""
+        self.latencies.observe(key, latency)
+
+    def delay(self, key: str) -> float:
+        """Seconds to wait for a backend before hedging it."""
+        if self.latencies.count(key) < self.min_samples:
+            return max(self.min_delay, self.initial_delay)
+        return max(self.min_delay, self.latencies.quantile(key, self.quantile))
+
+    def start_call(self):
+        """Count a call that may be hedged."""
+        with self._lock:
+            self.calls += 1
+            self._tokens = min(self.burst, self._tokens + self.max_rate)
+
+    def try_hedge(self) -> bool:
+        """Take a hedge from the budget if one is left."""
+        with self._lock:
+            if self._tokens < 1:
+                return False
+            self._tokens -= 1
+            self.hedges += 1
+            return True
+
+    def hedge_won(self):
+        """Count a call answered by a hedge."""
+        with self._lock:
+            self.hedge_wins += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Counts and current hedge delays, for metrics."""
+        with self._lock:
+            counts = {"calls": self.calls, "hedges": self.hedges, "hedge_wins": self.hedge_wins}
+        counts["delay_ms"] = {key: round(self.delay(key) * 1000, 1) for key in self.latencies.keys()}
+        return counts
+
+
+def _start(fn: Callable[..., T], *args) -> "Future[T]":
+    # A daemon thread per attempt: a losing request that cannot be
+    # interrupted keeps neither a pool worker nor the interpreter busy.
+    future: "Future[T]" = Future()
+
+    def run():
+        if not future.set_running_or_notify_cancel():
+            return
+        try:
+            future.set_result(fn(*args))
+        except BaseException as exc:
+            future.set_exception(exc)
+
+    threading.Thread(target=run, daemon=True).start()
+    return future
+
+
+def hedged_call(
+    attempts: Sequence[Attempt],
+    policy: HedgePolicy,
+    healthy: Callable[[str], bool] = lambda key: True,
+    abandoned: Optional[List[Future]] = None,
+) -> Optional[T]:
+    """
+    Run attempts in order until one answers, hedging slow ones.
+
+    The first attempt starts at once. If it has not answered after its
+    backend's hedge delay, the next attempt is started too — provided its
+    backend is healthy and the policy's budget allows a hedge — and so on.
+    An attempt that fails without answering starts the next one right
+    away, as in a plain fallback chain. The first answer wins; the
+    others are cancelled (attempts that have not started their request
+    yet see ``settled`` and stop, requests already sent are abandoned and
+    their answers dropped). Pass ``abandoned`` to wait for those later,
+    e.g. until their usage has been reported.
+
+    Args:
+        attempts: (backend key, fn(settled, hedge)) in priority order;
+            fn returns the answer or None
+        policy: Hedge delays and budget
+        healthy: Tells whether a backend may take a hedge now
+        abandoned: Receives the attempts still running when the call returns
+
+    Returns:
+        The first answer, or None if every attempt failed
+
+    Raises:
+        Exception: what an attempt raised, unless another attempt is
+            still running (its outcome decides then)
+    """
+    policy.start_call()
+    settled = threading.Event()
+    pending: Dict[Future, bool] = {}  # attempt -> started as a hedge
+    next_index = 0
+    deadline: Optional[float] = None  # hedge the latest attempt at this time
+
+    def launch(hedge: bool):
+        nonlocal next_index, deadline
+        key, fn = attempts[next_index]
+        pending[_start(fn, settled, hedge)] = hedge
+        next_index += 1
+        deadline = time.monotonic() + policy.delay(key) if next_index < len(attempts) else None
+
+    if not attempts:
+        return None
+    launch(hedge=False)
+    try:
+        while pending:
+            timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+            done, _ = wait(list(pending), timeout=timeout, return_when=FIRST_COMPLETED)
+            for future in done:
+                hedge = pending.pop(future)
+                if future.exception() is not None and not pending:
+                    raise future.exception()
+                answer = None if future.exception() is not None else future.result()
+                if answer:
+                    if hedge:
+                        policy.hedge_won()
+                    return answer
+            if not done:
+                # The latest attempt is slow: hedge it, or stop timing it.
+                key = attempts[next_index][0]
+                if healthy(key) and policy.try_hedge():
+                    launch(hedge=True)
+                else:
+                    deadline = None
+            elif not pending and next_index < len(attempts):
+                launch(hedge=False)
+        return None
+    finally:
+        settled.set()
+        for future in pending:
+            if not future.cancel() and abandoned is not None:
+                abandoned.append(future)
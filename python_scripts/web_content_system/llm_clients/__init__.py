@@ -3,9 +3,36 @@ LLM client package for summary generation.
 """
 
 from .base_client import BaseLLMClient
+from .batch import BatchClient, BatchResult, BatchStatus
 from .openai_client import OpenAIClient
 from .deepseek_client import DeepSeekClient
 from .local_model_client import LocalModelClient
 from .fallback_summarizer import FallbackSummarizer
+from .embeddings import Embedder, HashingEmbedder, OllamaEmbedder, OpenAIEmbedder, make_embedder
+from .long_document import MapReduceSummarizer, count_tokens, split_by_tokens
+from .textrank import TextRankSummarizer, split_sentences
+from .usage import BudgetExceeded, Usage, UsageMeter
 
-__all__ = ["BaseLLMClient", "OpenAIClient", "DeepSeekClient", "LocalModelClient", "FallbackSummarizer"]
+__all__ = [
+    "BaseLLMClient",
+    "BatchClient",
+    "BatchResult",
+    "BatchStatus",
+    "OpenAIClient",
+    "DeepSeekClient",
+    "LocalModelClient",
+    "FallbackSummarizer",
+    "Embedder",
+    "HashingEmbedder",
+    "OllamaEmbedder",
+    "OpenAIEmbedder",
+    "make_embedder",
+    "MapReduceSummarizer",
+    "count_tokens",
+    "split_by_tokens",
+    "TextRankSummarizer",
+    "split_sentences",
+    "BudgetExceeded",
+    "Usage",
+    "UsageMeter",
+]
@@ -2,14 +2,95 @@
 Base LLM client interface.
 """
 
+import threading
 from abc import ABC, abstractmethod
 from typing import Optional
 
+from .long_document import CHUNK_TOKENS, count_tokens, truncate_tokens
+from .usage import Usage
+
 
 class BaseLLMClient(ABC):
     """Abstract base class for LLM clients."""
     
+    name = "llm"
+    model = ""
+    remote = True  # calls a service whose concurrency is adapted per backend
+    
+    # last_error / last_usage are kept per thread, so one client can serve
+    # the parallel chunk requests of a long document.
+    def _thread_state(self) -> threading.local:
+        return self.__dict__.setdefault("_local", threading.local())
+    
+    @property
+    def last_error(self) -> Optional[Exception]:
+        """Error of this thread's last failed call."""
+        return getattr(self._thread_state(), "error", None)
+    
+    @last_error.setter
+    def last_error(self, error: Optional[Exception]):
+        self._thread_state().error = error
+    
+    @property
+    def last_usage(self) -> Optional[Usage]:
+        """Token usage of this thread's last answered call."""
+        return getattr(self._thread_state(), "usage", None)
+    
+    @last_usage.setter
+    def last_usage(self, usage: Optional[Usage]):
+        self._thread_state().usage = usage
+    
     @abstractmethod
+    def complete(self, prompt: str, max_tokens: Optional[int] = None) -> Optional[str]:
+        """
+        Send one prompt and return the model's answer.
+        
+        Implementations set ``last_error`` on failure and ``last_usage``
+        (see record_usage) on success.
+        
+        Args:
+            prompt: Full prompt text
+            max_tokens: Completion token limit (None for the configured one)
+            
+        Returns:
+            Answer text or None on failure
+        """
+        pass
+    
+    def estimate(self, prompt: str, max_tokens: int) -> Usage:
+        """
+        Upper estimate of a call's usage before it is sent.
+        
+        Args:
+            prompt: Full prompt text
+            max_tokens: Completion token limit
+            
+        Returns:
+            Usage with the estimated prompt tokens and the full completion limit
+        """
+        return Usage(self.name, self.model, count_tokens(prompt), max_tokens, estimated=True)
+    
+    def record_usage(
+        self,
+        prompt: str,
+        answer: str,
+        prompt_tokens: Optional[int] = None,
+        completion_tokens: Optional[int] = None,
+    ):
+        """
+        Set ``last_usage`` from the token counts a backend reported.
+        
+        Counts the backend did not report are estimated locally.
+        """
+        estimated = prompt_tokens is None or completion_tokens is None
+        self.last_usage = Usage(
+            self.name,
+            self.model,
+            prompt_tokens if prompt_tokens is not None else count_tokens(prompt),
+            completion_tokens if completion_tokens is not None else count_tokens(answer),
+            estimated,
+        )
+    
     def generate_summary(self, content: str, title: str) -> Optional[str]:
         """
         Generate summary from content.
@@ -21,22 +102,23 @@ class BaseLLMClient(ABC):
         Returns:
             Generated summary or None on failure
         """
-        pass
+        return self.complete(self.create_prompt(content, title))
     
     @staticmethod
-    def create_prompt(content: str, title: str, max_content_length: int = 3000) -> str:
+    def create_prompt(content: str, title: str, max_content_tokens: int = CHUNK_TOKENS) -> str:
         """
         Create standard prompt for summary generation.
         
         Args:
             content: Full content text
             title: Content title
-            max_content_length: Maximum content length to include
+            max_content_tokens: Maximum content tokens to include; longer
+                content goes through MapReduceSummarizer in ContentProcessor
             
         Returns:
             Formatted prompt
         """
-        truncated_content = content[:max_content_length]
+        truncated_content = truncate_tokens(content, max_content_tokens)
         
         return f"""请作为一个专业的分析助手，为以下文章生成一份简明扼要的摘要。
 
@@ -0,0 +1,230 @@
+"""
+Offline batch submission through an OpenAI-compatible Batch API.
+
+Prompts are written as JSONL request lines, uploaded as one file and run by
+the provider within its completion window, at a discount and outside the
+interactive rate limits. Results are read back as a stream of JSONL lines.
+"""
+
+import json
+import os
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, Iterator, Optional
+
+from openai import OpenAI
+
+from .usage import Usage
+from ..config import APIConfig
+
+ENDPOINT = "/v1/chat/completions"
+COMPLETION_WINDOW = "24h"
+MAX_REQUESTS = 50_000  # provider limit of requests per batch
+
+# Batch statuses after which nothing changes any more.
+FINISHED_STATUSES = ("completed", "failed", "expired", "cancelled")
+
+
+@dataclass
+class BatchStatus:
+    """Provider-side state of one batch."""
+
+    batch_id: str
+    status: str
+    output_file_id: Optional[str] = None
+    error_file_id: Optional[str] = None
+    total: int = 0
+    completed: int = 0
+    failed: int = 0
+
+    @property
+    def finished(self) -> bool:
+        """Tell whether the batch will not change any more."""
+        return self.status in FINISHED_STATUSES
+
+
+@dataclass
+class BatchResult:
+    """Answer to one request of a batch."""
+
+    custom_id: str
+    text: Optional[str] = None
+    usage: Optional[Usage] = None
+    error: str = ""
+
+
+class BatchClient:
+    """
+    Submits chat-completion batches and reads their results.
+
+    Works with any provider that implements the OpenAI Batch API (files +
+    batches endpoints); the provider's interactive config (key, base URL,
+    model, max_tokens, temperature) is reused.
+    """
+
+    def __init__(
+        self,
+        provider: str,
+        api_key: str,
+        base_url: str,
+        model: str,
+        max_tokens: int = 300,
+        temperature: float = 0.5,
+    ):
+        """
+        Initialize batch client.
+
+        Args:
+            provider: Provider name recorded with usage ("openai", "deepseek")
+            api_key: API key
+            base_url: API base URL
+            model: Model of every request
+            max_tokens: Completion token limit per request
+            temperature: Sampling temperature
+        """
+        self.provider = provider
+        self.model = model
+        self.max_tokens = max_tokens
+        self.temperature = temperature
+        self.client = OpenAI(api_key=api_key, base_url=base_url)
+
+    @classmethod
+    def from_config(cls, config: APIConfig, provider: str = "openai") -> "BatchClient":
+        """
+        Create a batch client from a provider's interactive settings.
+
+        Args:
+            config: API configuration
+            provider: "openai" or "deepseek"
+
+        Raises:
+            ValueError: if the provider is unknown or has no API key
+        """
+        if provider not in ("openai", "deepseek"):
+            raise ValueError(f"unknown batch provider: {provider}")
+        api_key = getattr(config, f"{provider}_api_key")
+        if not api_key:
+            raise ValueError(f"{provider.upper()}_API_KEY is not set")
+        return cls(
+            provider,
+            api_key,
+            getattr(config, f"{provider}_base_url"),
+            getattr(config, f"{provider}_model"),
+            config.max_tokens,
+            config.temperature,
+        )
+
+    def request_line(self, custom_id: str, prompt: str) -> Dict[str, Any]:
+        """One JSONL request of a batch input file."""
+        return {
+            "custom_id": custom_id,
+            "method": "POST",
+            "url": ENDPOINT,
+            "body": {
+                "model": self.model,
+                "messages": [{"role": "user", "content": prompt}],
+                "max_tokens": self.max_tokens,
+                "temperature": self.temperature,
+            },
+        }
+
+    def write_input(self, path: str, prompts: Iterable[tuple]) -> int:
+        """
+        Write a batch input file.
+
+        Args:
+            path: JSONL file to create
+            prompts: (custom_id, prompt) pairs
+
+        Returns:
+            Number of requests written
+
+        Raises:
+            ValueError: if there are more than MAX_REQUESTS prompts
+        """
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        count = 0
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            for custom_id, prompt in prompts:
+                count += 1
+                if count > MAX_REQUESTS:
+                    raise ValueError(f"a batch holds at most {MAX_REQUESTS} requests")
+                f.write(json.dumps(self.request_line(custom_id, prompt), ensure_ascii=False) + "\n")
+        os.replace(tmp, path)
+        return count
+
+    def submit(self, path: str) -> str:
+        """
+        Upload an input file and start a batch on it.
+
+        Returns:
+            Provider batch id
+        """
+        with open(path, "rb") as f:
+            uploaded = self.client.files.create(file=(os.path.basename(path), f), purpose="batch")
+        batch = self.client.batches.create(
+            input_file_id=uploaded.id,
+            endpoint=ENDPOINT,
+            completion_window=COMPLETION_WINDOW,
+        )
+        return batch.id
+
+    def status(self, batch_id: str) -> BatchStatus:
+        """Poll a batch."""
+        batch = self.client.batches.retrieve(batch_id)
+        counts = batch.request_counts
+        return BatchStatus(
+            batch_id=batch.id,
+            status=batch.status,
+            output_file_id=batch.output_file_id,
+            error_file_id=batch.error_file_id,
+            total=getattr(counts, "total", 0) if counts else 0,
+            completed=getattr(counts, "completed", 0) if counts else 0,
+            failed=getattr(counts, "failed", 0) if counts else 0,
+        )
+
+    def cancel(self, batch_id: str):
+        """Cancel a running batch."""
+        self.client.batches.cancel(batch_id)
+
+    def results(self, file_id: str) -> Iterator[BatchResult]:
+        """
+        Stream the results of an output (or error) file, line by line.
+
+        Args:
+            file_id: output_file_id or error_file_id of a finished batch
+
+        Yields:
+            One BatchResult per request
+        """
+        with self.client.with_streaming_response.files.content(file_id) as response:
+            for line in response.iter_lines():
+                if line.strip():
+                    yield self.parse_result(json.loads(line))
+
+    def parse_result(self, line: Dict[str, Any]) -> BatchResult:
+        """Turn one output-file line into a BatchResult."""
+        custom_id = line.get("custom_id", "")
+        response = line.get("response") or {}
+        if line.get("error") or response.get("status_code") != 200:
+            error = line.get("error") or (response.get("body") or {}).get("error") or {}
+            message = error.get("message") if isinstance(error, dict) else str(error)
+            return BatchResult(custom_id, error=message or f"HTTP {response.get('status_code')}")
+
+        body = response.get("body") or {}
+        try:
+            text = (body["choices"][0]["message"]["content"] or "").strip()
+        except (KeyError, IndexError, TypeError):
+            return BatchResult(custom_id, error="malformed response body")
+        reported = body.get("usage") or {}
+        usage = Usage(
+            self.provider,
+            self.model,  # the answer names a dated snapshot; price by the requested model
+            reported.get("prompt_tokens", 0),
+            reported.get("completion_tokens", 0),
+            estimated=not reported,
+            batch=True,
+        )
+        if not text:
+            return BatchResult(custom_id, usage=usage, error="empty answer")
+        return BatchResult(custom_id, text, usage)
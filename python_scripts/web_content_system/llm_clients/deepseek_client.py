@@ -12,6 +12,8 @@ from ..config import APIConfig
 class DeepSeekClient(BaseLLMClient):
     """LLM client using DeepSeek API."""
     
+    name = "deepseek"
+    
     def __init__(self, config: Optional[APIConfig] = None):
         """
         Initialize DeepSeek client.
@@ -28,36 +30,47 @@ class DeepSeekClient(BaseLLMClient):
                 base_url=self.config.deepseek_base_url
             )
     
-    def generate_summary(self, content: str, title: str) -> Optional[str]:
+    @property
+    def model(self) -> str:
+        """Model name used for calls and pricing."""
+        return self.config.deepseek_model
+    
+    def complete(self, prompt: str, max_tokens: Optional[int] = None) -> Optional[str]:
         """
-        Generate summary using DeepSeek API.
+        Send one prompt to the DeepSeek API.
         
         Args:
-            content: Full content text
-            title: Content title
+            prompt: Full prompt text
+            max_tokens: Completion token limit (None for the configured one)
             
         Returns:
-            Generated summary or None on failure
+            Answer text or None on failure
         """
+        self.last_error = None
+        self.last_usage = None
         if not self.client:
             return None
         
         try:
-            prompt = self.create_prompt(content, title)
-            
             response = self.client.chat.completions.create(
                 model=self.config.deepseek_model,
                 messages=[
                     {"role": "user", "content": prompt}
                 ],
-                max_tokens=self.config.max_tokens,
+                max_tokens=max_tokens or self.config.max_tokens,
                 temperature=self.config.temperature,
                 stream=False
             )
             
-            summary = response.choices[0].message.content.strip()
-            return summary
+            answer = response.choices[0].message.content.strip()
+            usage = getattr(response, "usage", None)
+            self.record_usage(
+                prompt, answer,
+                getattr(usage, "prompt_tokens", None), getattr(usage, "completion_tokens", None),
+            )
+            return answer
             
         except Exception as e:
+            self.last_error = e
             print(f"⚠️  DeepSeek API调用失败: {e}")
             return None
@@ -0,0 +1,222 @@
+"""
+Text embeddings for semantic search: local hashing, Ollama or an OpenAI-compatible API.
+
+Every embedder returns float32 rows of unit length, so the dot product of
+two rows is their cosine similarity. The local HashingEmbedder needs no
+model or network; the remote ones use the configured provider settings.
+"""
+
+import math
+import threading
+from abc import ABC, abstractmethod
+import zlib
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import requests
+from openai import OpenAI
+
+from .textrank import sentence_terms
+from ..config import APIConfig
+
+HASHING_DIM = 512
+OPENAI_EMBEDDING_MODEL = "text-embedding-3-small"
+OLLAMA_EMBEDDING_MODEL = "nomic-embed-text"
+MAX_CACHED_TERMS = 1 << 20  # term → bucket cache entries of a HashingEmbedder
+
+
+def normalize(vectors: np.ndarray) -> np.ndarray:
+    """Scale rows to unit length in place (zero rows stay zero) and return them."""
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    vectors /= np.where(norms > 0, norms, 1)
+    return vectors
+
+
+class Embedder(ABC):
+    """
+    Turns texts into unit-length float32 vectors.
+
+    ``model`` names the vector space: vectors of different models are
+    stored apart and never compared. ``last_tokens`` is the input token
+    count the backend reported for the last embed() call (0 if unknown).
+    """
+
+    provider = "embedder"
+    model = ""
+    batch_size = 64
+
+    def __init__(self):
+        self.last_tokens = 0
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        """
+        Embed texts.
+
+        Args:
+            texts: Texts to embed
+
+        Returns:
+            (len(texts), dim) float32 array of unit rows
+
+        Raises:
+            Exception: the backend's error if a request fails
+        """
+        self.last_tokens = 0
+        rows = [self._embed_batch(list(texts[i:i + self.batch_size])) for i in range(0, len(texts), self.batch_size)]
+        if not rows:
+            return np.zeros((0, 0), dtype=np.float32)
+        return normalize(np.vstack(rows).astype(np.float32, copy=False))
+
+    @abstractmethod
+    def _embed_batch(self, texts: List[str]) -> np.ndarray:
+        """
+        Embed one batch of at most ``batch_size`` texts.
+
+        Implementations add the reported input tokens to ``last_tokens``.
+
+        Returns:
+            (len(texts), dim) float32 array, not yet normalized
+        """
+        pass
+
+
+class HashingEmbedder(Embedder):
+    """
+    Local embedder: signed feature hashing of TF terms.
+
+    Terms are the TextRank terms (CJK character bigrams, lowercase Latin
+    words), weighted 1 + log(tf) and hashed into ``dim`` buckets with a
+    random sign. Texts that share wording end up close; there is no
+    notion of synonyms, so a real embedding model finds more.
+    """
+
+    provider = "local"
+    batch_size = 4096
+
+    def __init__(self, dim: int = HASHING_DIM):
+        """
+        Initialize hashing embedder.
+
+        Args:
+            dim: Vector length
+        """
+        super().__init__()
+        self.dim = dim
+        self.model = f"hashing-{dim}"
+        self._buckets: Dict[str, Tuple[int, float]] = {}
+
+    def _bucket(self, term: str) -> Tuple[int, float]:
+        # Bucket from the low bits, sign from bit 31; crc32 is stable across runs.
+        bucket = self._buckets.get(term)
+        if bucket is None:
+            h = zlib.crc32(term.encode("utf-8"))
+            bucket = (h % self.dim, -1.0 if h >> 31 else 1.0)
+            if len(self._buckets) < MAX_CACHED_TERMS:
+                self._buckets[term] = bucket
+        return bucket
+
+    def _embed_batch(self, texts: List[str]) -> np.ndarray:
+        rows: List[int] = []
+        cols: List[int] = []
+        weights: List[float] = []
+        for row, text in enumerate(texts):
+            tf: Dict[str, int] = {}
+            for term in sentence_terms(text or ""):
+                tf[term] = tf.get(term, 0) + 1
+            for term, count in tf.items():
+                col, sign = self._bucket(term)
+                rows.append(row)
+                cols.append(col)
+                weights.append(sign * (1 + math.log(count)))
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        np.add.at(vectors, (np.asarray(rows, dtype=np.int64), np.asarray(cols, dtype=np.int64)), weights)
+        return vectors
+
+
+class OpenAIEmbedder(Embedder):
+    """Embeddings endpoint of an OpenAI-compatible API (OPENAI_* settings)."""
+
+    provider = "openai"
+    batch_size = 256
+
+    def __init__(self, config: Optional[APIConfig] = None):
+        """
+        Initialize OpenAI embedder.
+
+        Args:
+            config: API configuration (needs openai_api_key)
+
+        Raises:
+            ValueError: if no API key is configured
+        """
+        super().__init__()
+        self.config = config or APIConfig()
+        if not self.config.openai_api_key:
+            raise ValueError("OPENAI_API_KEY is not set")
+        self.model = self.config.embedding_model or OPENAI_EMBEDDING_MODEL
+        self.client = OpenAI(
+            api_key=self.config.openai_api_key,
+            base_url=self.config.openai_base_url,
+            timeout=self.config.timeout,
+        )
+
+    def _embed_batch(self, texts: List[str]) -> np.ndarray:
+        response = self.client.embeddings.create(model=self.model, input=[t or " " for t in texts])
+        usage = getattr(response, "usage", None)
+        self.last_tokens += getattr(usage, "prompt_tokens", 0) or 0
+        data = sorted(response.data, key=lambda item: item.index)
+        return np.asarray([item.embedding for item in data], dtype=np.float32)
+
+
+class OllamaEmbedder(Embedder):
+    """Ollama's /api/embed endpoint (OLLAMA_API_URL server)."""
+
+    provider = "ollama"
+    batch_size = 64
+
+    def __init__(self, config: Optional[APIConfig] = None):
+        """
+        Initialize Ollama embedder.
+
+        Args:
+            config: API configuration
+        """
+        super().__init__()
+        self.config = config or APIConfig()
+        self.model = self.config.embedding_model or OLLAMA_EMBEDDING_MODEL
+        self.base_url = self.config.ollama_api_url.rstrip("/").split("/api/", 1)[0]
+        self._session = requests.Session()
+        self._lock = threading.Lock()
+
+    def _embed_batch(self, texts: List[str]) -> np.ndarray:
+        with self._lock:
+            response = self._session.post(
+                f"{self.base_url}/api/embed",
+                json={"model": self.model, "input": texts},
+                timeout=self.config.timeout,
+            )
+        response.raise_for_status()
+        result = response.json()
+        self.last_tokens += result.get("prompt_eval_count") or 0
+        return np.asarray(result["embeddings"], dtype=np.float32)
+
+
+def make_embedder(config: Optional[APIConfig] = None) -> Embedder:
+    """
+    Embedder selected by ``config.embedding_provider``.
+
+    Args:
+        config: API configuration ("local", "ollama" or "openai" provider)
+
+    Raises:
+        ValueError: for an unknown provider or an OpenAI embedder without API key
+    """
+    config = config or APIConfig()
+    provider = (config.embedding_provider or "local").lower()
+    if provider == "local":
+        return HashingEmbedder()
+    if provider == "ollama":
+        return OllamaEmbedder(config)
+    if provider == "openai":
+        return OpenAIEmbedder(config)
+    raise ValueError(f"unknown embedding provider: {config.embedding_provider!r} (local, ollama or openai)")
@@ -1,18 +1,45 @@
 """
-Fallback summarizer using simple extractive methods.
+Fallback summarizer using extractive TextRank.
 """
 
-from typing import Optional
+from typing import List, Optional, Sequence
 
 from .base_client import BaseLLMClient
+from .textrank import TextRankSummarizer
 
 
 class FallbackSummarizer(BaseLLMClient):
     """Simple extractive summarizer when APIs are unavailable."""
     
+    name = "fallback"
+    model = "textrank"
+    remote = False
+    
+    def __init__(self, textrank: Optional[TextRankSummarizer] = None):
+        """
+        Initialize summarizer.
+        
+        Args:
+            textrank: Sentence ranker (default settings if omitted)
+        """
+        self.textrank = textrank or TextRankSummarizer()
+    
+    def complete(self, prompt: str, max_tokens: Optional[int] = None) -> Optional[str]:
+        """
+        Extractive summaries cannot follow a prompt.
+        
+        Args:
+            prompt: Full prompt text
+            max_tokens: Ignored
+            
+        Returns:
+            None
+        """
+        return None
+    
     def generate_summary(self, content: str, title: str) -> Optional[str]:
         """
-        Generate summary using simple extractive method.
+        Generate summary using TextRank sentence extraction.
         
         Args:
             content: Full content text
@@ -21,36 +48,23 @@ class FallbackSummarizer(BaseLLMClient):
         Returns:
             Generated summary
         """
-        try:
-            # Split content into paragraphs
-            paragraphs = [p.strip() for p in content.split('\n') if len(p.strip()) > 20]
-            
-            if not paragraphs:
-                # If no paragraphs, just truncate the content
-                return self._truncate_content(content)
-            
-            # Extract first few paragraphs
-            summary_parts = []
-            total_chars = 0
-            target_length = 150  # Target around 150 characters
-            
-            for para in paragraphs:
-                if total_chars >= target_length:
-                    break
-                summary_parts.append(para)
-                total_chars += len(para)
-            
-            summary = " ".join(summary_parts)
-            
-            # Ensure summary is not too long
-            if len(summary) > 200:
-                summary = summary[:200] + "..."
-            
-            return summary
+        return self.generate_summaries([content])[0]
+    
+    def generate_summaries(self, contents: Sequence[str]) -> List[str]:
+        """
+        Summarize a batch of documents in one vectorised pass.
+        
+        Args:
+            contents: Full content texts
             
+        Returns:
+            One summary per content, in order
+        """
+        try:
+            return self.textrank.summarize_many(contents)
         except Exception as e:
             print(f"⚠️  简单摘要生成失败: {e}")
-            return self._truncate_content(content)
+            return [self._truncate_content(content) for content in contents]
     
     @staticmethod
     def _truncate_content(content: str, max_length: int = 200) -> str:
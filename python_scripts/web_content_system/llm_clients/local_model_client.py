@@ -2,15 +2,37 @@
 Local model API client (e.g., Ollama).
 """
 
-from typing import Optional
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Optional, Union
+
 import requests
+from requests.adapters import HTTPAdapter
 
 from .base_client import BaseLLMClient
+from .usage import Usage
 from ..config import APIConfig
 
 
+def _keep_alive_value(keep_alive: str) -> Union[str, int]:
+    # Ollama takes a duration ("30m") or a number of seconds (-1 = forever).
+    try:
+        return int(keep_alive)
+    except ValueError:
+        return keep_alive
+
+
 class LocalModelClient(BaseLLMClient):
-    """LLM client using local model APIs like Ollama."""
+    """
+    LLM client using local model APIs like Ollama.
+    
+    Calls go through one pooled HTTP session, so connections are reused,
+    and carry ``keep_alive`` so the model stays loaded between calls. Up to
+    ``ollama_parallel`` requests run at once — set it to the server's
+    ``OLLAMA_NUM_PARALLEL`` so every slot is used.
+    """
+    
+    name = "ollama"
     
     def __init__(self, config: Optional[APIConfig] = None):
         """
@@ -20,41 +42,130 @@ class LocalModelClient(BaseLLMClient):
             config: API configuration
         """
         self.config = config or APIConfig()
+        self.parallel = max(1, self.config.ollama_parallel)
+        self._session: Optional[requests.Session] = None
+        self._session_lock = threading.Lock()
+    
+    @property
+    def model(self) -> str:
+        """Model name used for calls and pricing."""
+        return self.config.ollama_model
+    
+    @property
+    def base_url(self) -> str:
+        """Server root; OLLAMA_API_URL may name the root or an /api endpoint."""
+        url = self.config.ollama_api_url.rstrip("/")
+        return url.split("/api/", 1)[0]
     
-    def generate_summary(self, content: str, title: str) -> Optional[str]:
+    @property
+    def session(self) -> requests.Session:
+        """Pooled HTTP session with one connection per parallel slot."""
+        with self._session_lock:
+            if self._session is None:
+                session = requests.Session()
+                session.mount("http://", HTTPAdapter(pool_connections=1, pool_maxsize=self.parallel))
+                session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=self.parallel))
+                self._session = session
+            return self._session
+    
+    def load(self) -> bool:
         """
-        Generate summary using local model API.
+        Load the model into memory ahead of the first prompt.
+        
+        Returns:
+            True if the server loaded the model
+        """
+        try:
+            response = self.session.post(
+                f"{self.base_url}/api/generate",
+                json={"model": self.model, "keep_alive": _keep_alive_value(self.config.ollama_keep_alive)},
+                timeout=self.config.timeout,
+            )
+            return response.status_code == 200
+        except requests.RequestException as e:
+            print(f"⚠️  本地模型加载失败: {e}")
+            return False
+    
+    def complete(self, prompt: str, max_tokens: Optional[int] = None) -> Optional[str]:
+        """
+        Send one prompt to the local model API.
         
         Args:
-            content: Full content text
-            title: Content title
+            prompt: Full prompt text
+            max_tokens: Completion token limit (None for no limit)
             
         Returns:
-            Generated summary or None on failure
+            Answer text or None on failure
         """
+        self.last_error = None
+        self.last_usage = None
         try:
-            prompt = self.create_prompt(content, title)
-            
             data = {
-                "model": self.config.ollama_model,
+                "model": self.model,
                 "prompt": prompt,
-                "stream": False
+                "stream": False,
+                "keep_alive": _keep_alive_value(self.config.ollama_keep_alive),
             }
+            if max_tokens:
+                data["options"] = {"num_predict": max_tokens}
             
-            response = requests.post(
-                self.config.ollama_api_url,
+            response = self.session.post(
+                f"{self.base_url}/api/generate",
                 json=data,
                 timeout=self.config.timeout
             )
             
             if response.status_code == 200:
                 result = response.json()
-                summary = result.get("response", "").strip()
-                return summary if summary else None
+                answer = result.get("response", "").strip()
+                if not answer:
+                    return None
+                self.record_usage(prompt, answer, result.get("prompt_eval_count"), result.get("eval_count"))
+                return answer
             else:
+                self.last_error = requests.HTTPError(f"HTTP {response.status_code}", response=response)
                 print(f"⚠️  本地模型API返回错误: {response.status_code}")
                 return None
-                
+        
         except Exception as e:
+            self.last_error = e
             print(f"⚠️  本地模型API调用失败: {e}")
             return None
+    
+    def complete_many(
+        self,
+        prompts: List[str],
+        max_tokens: Optional[int] = None,
+        on_usage: Optional[Callable[[Usage], None]] = None,
+    ) -> List[Optional[str]]:
+        """
+        Send a batch of prompts, ``parallel`` at a time.
+        
+        Ollama answers one prompt per request; the batch is spread over the
+        server's parallel slots so they are all busy.
+        
+        Args:
+            prompts: Full prompt texts
+            max_tokens: Completion token limit (None for no limit)
+            on_usage: Called with the token usage of every answered prompt
+            
+        Returns:
+            Answers in prompt order (None where a prompt failed)
+        """
+        def run(prompt: str) -> Optional[str]:
+            answer = self.complete(prompt, max_tokens)
+            if answer and on_usage is not None and self.last_usage is not None:
+                on_usage(self.last_usage)
+            return answer
+        
+        if len(prompts) <= 1:
+            return [run(prompt) for prompt in prompts]
+        with ThreadPoolExecutor(max_workers=min(self.parallel, len(prompts))) as pool:
+            return list(pool.map(run, prompts))
+    
+    def close(self):
+        """Close the pooled connections."""
+        with self._session_lock:
+            if self._session is not None:
+                self._session.close()
+                self._session = None
@@ -0,0 +1,235 @@
+"""
+Extractive summaries with TF-IDF TextRank, vectorised with NumPy.
+
+Sentences are split at Chinese and Western sentence punctuation (cleaned
+content has no line breaks left), weighted by TF-IDF over CJK character
+bigrams and Latin words, and ranked with TextRank on their cosine
+similarity. The best-ranked sentences are returned in document order.
+"""
+
+import operator
+import re
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+
+DAMPING = 0.85
+TARGET_CHARS = 150      # stop adding sentences at this length
+MAX_CHARS = 200         # cut the summary at this length
+MAX_SENTENCES = 300     # longer documents are ranked on an even sample
+MIN_TERMS = 4           # shorter fragments (menus, bylines) are not sentences
+REDUNDANCY = 0.8        # skip sentences this similar to one already chosen
+RANK_BLOCK = 1 << 22    # padded matrix cells ranked per NumPy call
+
+# A sentence ends at 。！？；!? (or …, or ". " / ";" before a space), plus
+# any closing quotes or brackets.
+_SENTENCE = re.compile(
+    r"[^。！？；!?…\n]*?(?:[。！？；!?]+|…+|[.;](?=\s|$)|\n|$)[”’」』）)\"']*"
+)
+_TERM = re.compile(r"[㐀-䶿一-鿿豈-﫿]+|[A-Za-z0-9]+")
+_WIDE_END = re.compile(r"[　-ヿ㐀-䶿一-鿿＀-￯”’」』）]$")
+
+
+def split_sentences(text: str) -> List[str]:
+    """
+    Split text into sentences at Chinese and Western punctuation.
+
+    Args:
+        text: Any text, with or without line breaks
+
+    Returns:
+        Non-empty, stripped sentences in order
+    """
+    return [s.strip() for s in _SENTENCE.findall(text) if s.strip()]
+
+
+def sentence_terms(sentence: str) -> List[str]:
+    """TF-IDF terms of a sentence: CJK character bigrams and lowercase Latin words."""
+    terms = []
+    for run in _TERM.findall(sentence):
+        if run.isascii():
+            terms.append(run.lower())
+        elif len(run) == 1:
+            terms.append(run)
+        else:
+            terms.extend(map(operator.add, run, run[1:]))
+    return terms
+
+
+class TextRankSummarizer:
+    """
+    Extractive summarizer: TF-IDF sentence similarity ranked with TextRank.
+
+    summarize_many() handles a batch of documents in one call: terms are
+    indexed once for the whole batch, and the documents' TextRank systems
+    are solved together, padded to a common size. A document's summary
+    does not depend on the rest of its batch.
+    """
+
+    def __init__(
+        self,
+        target_chars: int = TARGET_CHARS,
+        max_chars: int = MAX_CHARS,
+        damping: float = DAMPING,
+        max_sentences: int = MAX_SENTENCES,
+        redundancy: float = REDUNDANCY,
+    ):
+        """
+        Initialize summarizer.
+
+        Args:
+            target_chars: Stop adding sentences once the summary is this long
+            max_chars: Cut the summary to this many characters
+            damping: TextRank damping factor
+            max_sentences: Sentences ranked per document at most (sampled
+                evenly over longer documents)
+            redundancy: Cosine similarity above which a sentence repeats
+                one already chosen
+        """
+        self.target_chars = target_chars
+        self.max_chars = max_chars
+        self.damping = damping
+        self.max_sentences = max_sentences
+        self.redundancy = redundancy
+
+    def summarize(self, content: str) -> str:
+        """
+        Summarize one document.
+
+        Args:
+            content: Document text
+
+        Returns:
+            Summary ("" for empty content)
+        """
+        return self.summarize_many([content])[0]
+
+    def summarize_many(self, documents: Sequence[str]) -> List[str]:
+        """
+        Summarize a batch of documents.
+
+        Args:
+            documents: Document texts
+
+        Returns:
+            One summary per document, in order
+        """
+        candidates = [self._candidates(doc) for doc in documents]
+        sentences = [[sentence for sentence, _ in doc] for doc in candidates]
+        similarities = self._similarities(candidates)
+        ranks = self._rank(similarities)
+        return [
+            self._compose(doc, sents, sims, rank)
+            for doc, sents, sims, rank in zip(documents, sentences, similarities, ranks)
+        ]
+
+    def _candidates(self, document: str) -> List[Tuple[str, List[str]]]:
+        """(sentence, terms) worth ranking, evenly sampled down to max_sentences."""
+        candidates = []
+        for sentence in split_sentences(document):
+            terms = sentence_terms(sentence)
+            if len(terms) >= MIN_TERMS:
+                candidates.append((sentence, terms))
+        if len(candidates) > self.max_sentences:
+            keep = np.linspace(0, len(candidates) - 1, self.max_sentences).round().astype(int)
+            candidates = [candidates[i] for i in np.unique(keep)]
+        return candidates
+
+    def _similarities(self, documents: List[List[Tuple[str, List[str]]]]) -> List[np.ndarray]:
+        """Cosine similarity of TF-IDF sentence vectors, per document."""
+        vocabulary: Dict[str, int] = {}
+        lengths: List[int] = []
+        cols: List[int] = []
+        for sentences in documents:
+            for _, terms in sentences:
+                lengths.append(len(terms))
+                cols.extend(vocabulary.setdefault(term, len(vocabulary)) for term in terms)
+        row_ids = np.repeat(np.arange(len(lengths), dtype=np.int64), lengths)
+        col_ids = np.asarray(cols, dtype=np.int64)
+
+        bounds = np.searchsorted(row_ids, np.cumsum([0] + [len(s) for s in documents]))
+        similarities = []
+        first = 0
+        for k, sentences in enumerate(documents):
+            lo, hi = bounds[k], bounds[k + 1]
+            terms, local = np.unique(col_ids[lo:hi], return_inverse=True)
+            weights = np.zeros((len(sentences), len(terms)), dtype=np.float32)
+            np.add.at(weights, (row_ids[lo:hi] - first, local), 1.0)
+            # IDF within the document, so a summary does not depend on its batch.
+            df = np.count_nonzero(weights, axis=0)
+            weights *= np.log((1 + len(sentences)) / (1 + df)) + 1
+            norms = np.linalg.norm(weights, axis=1, keepdims=True)
+            weights /= np.where(norms > 0, norms, 1)
+            sims = weights @ weights.T
+            np.fill_diagonal(sims, 0)
+            similarities.append(sims)
+            first += len(sentences)
+        return similarities
+
+    def _rank(self, similarities: List[np.ndarray]) -> List[np.ndarray]:
+        """TextRank scores per document, solved in padded blocks of similar size."""
+        ranks: List[np.ndarray] = [np.ones(len(s), dtype=np.float64) for s in similarities]
+        order = sorted((k for k, s in enumerate(similarities) if len(s) > 2), key=lambda k: len(similarities[k]))
+        start = 0
+        while start < len(order):
+            size = len(similarities[order[start]])
+            end = start + 1
+            while end < len(order):
+                grown = len(similarities[order[end]])
+                if (end - start + 1) * grown * grown > RANK_BLOCK or grown > 2 * len(similarities[order[start]]):
+                    break
+                size = grown
+                end += 1
+            block = order[start:end]
+            for k, scores in zip(block, self._solve([similarities[k] for k in block], size)):
+                ranks[k] = scores
+            start = end
+        return ranks
+
+    def _solve(self, similarities: List[np.ndarray], size: int) -> np.ndarray:
+        """
+        Solve ``r = (1 - d) / n + d * W^T r`` for a block of documents.
+
+        W is each similarity matrix normalised by row; a sentence similar
+        to no other links to all sentences evenly. Padding rows and
+        columns are left empty, so their rank is 0.
+        """
+        count = len(similarities)
+        lengths = np.array([len(s) for s in similarities])
+        mask = np.arange(size)[None, :] < lengths[:, None]                        # (B, P)
+        links = np.zeros((count, size, size), dtype=np.float64)
+        for k, sims in enumerate(similarities):
+            links[k, :len(sims), :len(sims)] = sims
+        totals = links.sum(axis=2, keepdims=True)
+        even = (mask[:, None, :] & mask[:, :, None]) / lengths[:, None, None]
+        links = np.where(totals > 0, links / np.where(totals > 0, totals, 1), even)
+        system = np.eye(size)[None] - self.damping * links.transpose(0, 2, 1)
+        base = (1 - self.damping) * mask / lengths[:, None]
+        return np.linalg.solve(system, base[..., None])[..., 0]
+
+    def _compose(self, document: str, sentences: List[str], sims: np.ndarray, rank: np.ndarray) -> str:
+        """Best-ranked, non-redundant sentences in document order, cut to max_chars."""
+        if not sentences:
+            return self._cut(re.sub(r"\s+", " ", document).strip())
+        chosen: List[int] = []
+        length = 0
+        for i in np.argsort(-rank[:len(sentences)], kind="stable"):
+            # A sentence similar to no other (a menu, a byline) is off-topic,
+            # and one too similar to a chosen sentence repeats it.
+            if chosen and (not sims[i].any() or sims[i, chosen].max() > self.redundancy):
+                continue
+            chosen.append(int(i))
+            length += len(sentences[i])
+            if length >= self.target_chars:
+                break
+        summary = ""
+        for i in sorted(chosen):
+            if summary and not _WIDE_END.search(summary):
+                summary += " "
+            summary += sentences[i]
+        return self._cut(summary)
+
+    def _cut(self, text: str) -> str:
+        if len(text) <= self.max_chars:
+            return text
+        return text[:self.max_chars] + "..."
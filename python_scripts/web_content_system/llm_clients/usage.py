@@ -0,0 +1,112 @@
+"""
+Token usage and cost accounting for LLM calls.
+"""
+
+import threading
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+
+# USD per million tokens (prompt, completion). Models not listed are free
+# (local models) unless added here.
+PRICES: Dict[str, Tuple[float, float]] = {
+    "deepseek-chat": (0.27, 1.10),
+    "deepseek-reasoner": (0.55, 2.19),
+    "gpt-3.5-turbo": (0.50, 1.50),
+    "gpt-4o-mini": (0.15, 0.60),
+    "gpt-4o": (2.50, 10.00),
+}
+BATCH_DISCOUNT = 0.5  # Batch API calls cost this fraction of the listed price
+
+
+def cost_of(model: str, prompt_tokens: int, completion_tokens: int) -> float:
+    """
+    Price of one call in USD.
+
+    Args:
+        model: Model name (looked up in PRICES)
+        prompt_tokens: Input tokens
+        completion_tokens: Output tokens
+
+    Returns:
+        Cost in USD (0 for unlisted models)
+    """
+    prompt_price, completion_price = PRICES.get(model, (0.0, 0.0))
+    return (prompt_tokens * prompt_price + completion_tokens * completion_price) / 1_000_000
+
+
+@dataclass
+class Usage:
+    """Tokens used by one LLM call."""
+
+    provider: str
+    model: str
+    prompt_tokens: int
+    completion_tokens: int
+    estimated: bool = False  # counted locally, the backend reported no usage
+    batch: bool = False  # made through a Batch API, at BATCH_DISCOUNT
+
+    @property
+    def cost(self) -> float:
+        """Cost of the call in USD."""
+        cost = cost_of(self.model, self.prompt_tokens, self.completion_tokens)
+        return cost * BATCH_DISCOUNT if self.batch else cost
+
+
+class BudgetExceeded(RuntimeError):
+    """Raised before a call that would take a run over its cost cap."""
+
+
+class UsageMeter:
+    """
+    Sums token usage and cost over a run, per provider/model.
+
+    Thread-safe. With a ``cost_cap``, check() refuses calls once the run's
+    cost plus the projected cost of the next call would exceed it.
+    """
+
+    def __init__(self, cost_cap: Optional[float] = None):
+        """
+        Initialize meter.
+
+        Args:
+            cost_cap: Maximum USD per run (None for no cap)
+        """
+        self.cost_cap = cost_cap
+        self.cost = 0.0
+        self.calls = 0
+        self._totals: Dict[str, Dict[str, float]] = {}
+        self._lock = threading.Lock()
+
+    def add(self, usage: Usage):
+        """Account for one call."""
+        with self._lock:
+            self.calls += 1
+            self.cost += usage.cost
+            totals = self._totals.setdefault(
+                f"{usage.provider}/{usage.model}",
+                {"calls": 0, "prompt_tokens": 0, "completion_tokens": 0, "cost": 0.0},
+            )
+            totals["calls"] += 1
+            totals["prompt_tokens"] += usage.prompt_tokens
+            totals["completion_tokens"] += usage.completion_tokens
+            totals["cost"] += usage.cost
+
+    def check(self, projected: float = 0.0):
+        """
+        Make sure a call costing `projected` USD fits the cap.
+
+        Raises:
+            BudgetExceeded: if the cap would be exceeded
+        """
+        if self.cost_cap is None:
+            return
+        with self._lock:
+            if self.cost + projected > self.cost_cap:
+                raise BudgetExceeded(
+                    f"LLM cost cap ${self.cost_cap:.4f} reached (spent ${self.cost:.4f})"
+                )
+
+    def totals(self) -> Dict[str, Dict[str, float]]:
+        """Calls, tokens and cost per "provider/model"."""
+        with self._lock:
+            return {key: dict(value) for key, value in sorted(self._totals.items())}
@@ -2,18 +2,29 @@
 Content processor for summary and weibo generation.
 """
 
-from typing import List, Optional
-from openai import OpenAI
-import requests
+import threading
+import time
+from concurrent.futures import Future, wait
+from functools import partial
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
 from ..llm_clients import (
     BaseLLMClient,
     OpenAIClient,
     DeepSeekClient,
     LocalModelClient,
-    FallbackSummarizer
+    FallbackSummarizer,
+    MapReduceSummarizer,
+    Usage,
+    UsageMeter,
+    count_tokens,
 )
+from ..llm_clients.long_document import truncate_tokens
+from ..adaptive import LimiterRegistry, is_overload
 from ..config import APIConfig
+from ..hedging import HedgePolicy, hedged_call
+from ..routing import RouteDecision, RoutingLog, RoutingPolicy, default_routes
+from ..telemetry import BUSY, CANCELLED, EMPTY, OK, LLMCall, call_of
 
 
 class ContentProcessor:
@@ -28,6 +39,33 @@ class ContentProcessor:
         """
         self.config = config or APIConfig()
         self.llm_clients: List[BaseLLMClient] = []
+        # The local server has a fixed number of parallel slots: use them all
+        # from the start instead of probing up to them.
+        slots = max(1, self.config.ollama_parallel)
+        self.limiters = LimiterRegistry(
+            {LocalModelClient.name: {"initial": slots, "max_limit": slots}},
+            max_limit=self.config.max_concurrency,
+        )
+        self.meter = UsageMeter(self.config.cost_cap)
+        self.hedging: Optional[HedgePolicy] = None
+        if self.config.hedge:
+            self.hedging = HedgePolicy(
+                quantile=self.config.hedge_quantile,
+                max_rate=self.config.hedge_max_rate,
+                initial_delay=self.config.hedge_initial_delay,
+            )
+        self.routing: Optional[RoutingPolicy] = None
+        self.routing_log: Optional[RoutingLog] = None
+        if self.config.routing:
+            self.routing = (
+                RoutingPolicy.load(self.config.routing_policy)
+                if self.config.routing_policy else RoutingPolicy(default_routes(slots))
+            )
+            self.routing_log = RoutingLog(self.config.routing_log)
+        self._in_progress = 0  # summaries being generated, the routing queue depth
+        self._in_progress_lock = threading.Lock()
+        self._abandoned: List[Future] = []  # hedge losers not drained yet
+        self._abandoned_lock = threading.Lock()
         self._setup_clients()
     
     def _setup_clients(self):
@@ -46,26 +84,334 @@ class ContentProcessor:
         # Add fallback summarizer (always available)
         self.llm_clients.append(FallbackSummarizer())
     
-    def generate_summary(self, content: str, title: str) -> str:
+    def route(
+        self, content: str, tags: str = "", url: str = "", queue_depth: Optional[int] = None
+    ) -> Optional[RouteDecision]:
+        """
+        Choose which clients summarize a page (see web_content_system.routing).
+        
+        Args:
+            content: Page content
+            tags: Comma-separated tags
+            url: Page URL
+            queue_depth: Summaries waiting or in progress (default: the
+                ones this processor is generating)
+            
+        Returns:
+            Routing decision, or None if routing is off
+        """
+        if self.routing is None:
+            return None
+        if queue_depth is None:
+            queue_depth = self._in_progress
+        return self.routing.decide(content, tags, url, queue_depth)
+    
+    def _routed_clients(self, route: Optional[RouteDecision]) -> List[BaseLLMClient]:
+        """Clients in the order of a routing decision, closed by the fallback if it has none."""
+        if route is None:
+            return self.llm_clients
+        by_name = {client.name: client for client in self.llm_clients}
+        clients = [by_name[name] for name in route.order(list(by_name))]
+        if all(client.remote for client in clients):
+            clients += [client for client in self.llm_clients if not client.remote][-1:]
+        return clients
+    
+    def generate_summary(
+        self,
+        content: str,
+        title: str,
+        on_usage: Optional[Callable[[Usage], None]] = None,
+        route: Optional[RouteDecision] = None,
+        on_call: Optional[Callable[[LLMCall], None]] = None,
+    ) -> str:
         """
         Generate summary using available LLM clients.
         
-        Tries clients in order until one succeeds.
+        With ``routing`` set, only the clients of the page's route are
+        asked, in route order, and the outcome is logged. Content is
+        first trimmed to ``input_token_ceiling`` tokens when set.
+        Content longer than ``chunk_tokens`` is summarized in map-reduce
+        mode over all remote clients (see summarize_long). Otherwise, or if
+        that fails, clients are tried in order until one succeeds. Calls to
+        a remote backend are bounded by its adaptive concurrency limit; a
+        backend whose slots stay taken for ``timeout`` seconds is skipped.
+        With ``hedge`` set, a remote client that has not answered after its
+        p95 latency is raced against the next one (see _hedged_summary).
         
         Args:
             content: Full content text
             title: Content title
+            on_usage: Called with the token usage of every answered call
+            route: Routing decision of the page (made here if routing is
+                on and none is given)
+            on_call: Called with the telemetry of every call, answered or not
             
         Returns:
             Generated summary
+            
+        Raises:
+            BudgetExceeded: if the next call would exceed ``cost_cap``
         """
-        for client in self.llm_clients:
-            summary = client.generate_summary(content, title)
+        if self.routing is None:
+            return self._summarize(content, title, self.llm_clients, on_usage, on_call)[0]
+        
+        route = route or self.route(content)
+        usages: List[Usage] = []
+        
+        def record(usage: Usage):
+            usages.append(usage)
+            if on_usage is not None:
+                on_usage(usage)
+        
+        with self._in_progress_lock:
+            self._in_progress += 1
+        try:
+            summary, answered_by = self._summarize(content, title, self._routed_clients(route), record, on_call)
+        finally:
+            with self._in_progress_lock:
+                self._in_progress -= 1
+        providers = list(dict.fromkeys(usage.provider for usage in usages))
+        self.routing_log.record(
+            route,
+            providers or [answered_by],
+            calls=len(usages),
+            prompt_tokens=sum(usage.prompt_tokens for usage in usages),
+            completion_tokens=sum(usage.completion_tokens for usage in usages),
+            cost=sum(usage.cost for usage in usages),
+        )
+        return summary
+    
+    def _summarize(
+        self,
+        content: str,
+        title: str,
+        clients: List[BaseLLMClient],
+        on_usage: Optional[Callable[[Usage], None]] = None,
+        on_call: Optional[Callable[[LLMCall], None]] = None,
+    ) -> Tuple[str, str]:
+        """Summary from the first of `clients` that answers, and that client's name."""
+        if self.config.input_token_ceiling:
+            content = truncate_tokens(content, self.config.input_token_ceiling)
+        
+        remote = [client for client in clients if client.remote]
+        if remote and count_tokens(content) > self.config.chunk_tokens:
+            summary = self.summarize_long(content, title, on_usage, remote, on_call)
+            if summary:
+                return summary, "map-reduce"
+        
+        if self.hedging is not None and len(remote) > 1:
+            summary = self._hedged_summary(remote, content, title, on_usage, on_call)
             if summary:
-                return summary
+                return summary, "hedged"
+            clients = [client for client in clients if not client.remote]
+        
+        for client in clients:
+            if client.remote:
+                prompt = client.create_prompt(content, title, self.config.chunk_tokens)
+                summary = self._complete(
+                    client, prompt, wait=self.config.timeout, on_usage=on_usage, on_call=on_call,
+                )
+            else:
+                started = time.time()
+                summary = client.generate_summary(content, title)
+                if on_call is not None:
+                    on_call(LLMCall(
+                        client.name, client.model, started, time.time() - started, OK if summary else EMPTY,
+                    ))
+            if summary:
+                return summary, client.name
         
         # This should never happen since FallbackSummarizer always returns a result
-        return "摘要生成失败"
+        return "摘要生成失败", ""
+    
+    def summarize_long(
+        self,
+        content: str,
+        title: str,
+        on_usage: Optional[Callable[[Usage], None]] = None,
+        clients: Optional[List[BaseLLMClient]] = None,
+        on_call: Optional[Callable[[LLMCall], None]] = None,
+    ) -> Optional[str]:
+        """
+        Summarize a long document chunk by chunk, then merge.
+        
+        Chunks of ``chunk_tokens`` tokens are summarized in parallel,
+        spread over the remote clients; at most ``document_token_budget``
+        tokens of content are used, sampled evenly over the document.
+        
+        Args:
+            content: Full content text
+            title: Content title
+            on_usage: Called with the token usage of every answered call
+            clients: Clients to use (default: all); local ones are skipped
+            on_call: Called with the telemetry of every call
+            
+        Returns:
+            Summary or None if no remote client answered
+        """
+        remote = [client for client in clients or self.llm_clients if client.remote]
+        summarizer = MapReduceSummarizer(
+            [partial(self._complete, client, on_usage=on_usage, on_call=on_call) for client in remote],
+            chunk_tokens=self.config.chunk_tokens,
+            token_budget=self.config.document_token_budget,
+            max_workers=max(1, sum(self.limiters.get(client.name).max_limit for client in remote)),
+        )
+        return summarizer.summarize(content, title)
+    
+    def _hedged_summary(
+        self,
+        clients: List[BaseLLMClient],
+        content: str,
+        title: str,
+        on_usage: Optional[Callable[[Usage], None]] = None,
+        on_call: Optional[Callable[[LLMCall], None]] = None,
+    ) -> Optional[str]:
+        """
+        Ask remote clients in order, hedging a slow one with the next.
+        
+        A hedge only goes to a client with a free concurrency slot, and at
+        most ``hedge_max_rate`` of the calls (plus a small burst) are
+        hedged. The losing call is not waited for: it reports its usage
+        and telemetry whenever it finishes (see settled() and drain()).
+        
+        Returns:
+            The first summary, or None if no remote client answered
+        """
+        def attempt(client: BaseLLMClient):
+            prompt = client.create_prompt(content, title, self.config.chunk_tokens)
+            
+            def run(settled: threading.Event, hedge: bool) -> Optional[str]:
+                # A hedge must not queue behind a busy backend.
+                wait = 0 if hedge else self.config.timeout
+                return self._complete(
+                    client, prompt, wait=wait, on_usage=on_usage, on_call=on_call, cancelled=settled,
+                )
+            
+            return client.name, run
+        
+        abandoned: List[Future] = []
+        try:
+            return hedged_call(
+                [attempt(client) for client in clients],
+                self.hedging,
+                healthy=lambda name: not self.limiters.get(name).full(),
+                abandoned=abandoned,
+            )
+        finally:
+            with self._abandoned_lock:
+                self._abandoned.extend(abandoned)
+    
+    def settled(self) -> bool:
+        """Tell whether every call that lost a hedge has finished."""
+        with self._abandoned_lock:
+            self._abandoned = [future for future in self._abandoned if not future.done()]
+            return not self._abandoned
+    
+    def drain(self, timeout: Optional[float] = None) -> bool:
+        """
+        Wait for the calls that lost a hedge to finish.
+        
+        A losing call still reports its usage and telemetry to the
+        callbacks of its summary when it finishes. Summaries do not wait
+        for it; call this once at the end of a batch.
+        
+        Args:
+            timeout: Seconds to wait at most (default: ``timeout``, the
+                longest a request may take)
+            
+        Returns:
+            True if no losing call is still running
+        """
+        with self._abandoned_lock:
+            abandoned, self._abandoned = self._abandoned, []
+        if not abandoned:
+            return True
+        _, running = wait(abandoned, timeout=self.config.timeout if timeout is None else timeout)
+        with self._abandoned_lock:
+            self._abandoned.extend(running)
+        return not running
+    
+    def _complete(
+        self,
+        client: BaseLLMClient,
+        prompt: str,
+        wait: Optional[float] = None,
+        max_tokens: Optional[int] = None,
+        on_usage: Optional[Callable[[Usage], None]] = None,
+        on_call: Optional[Callable[[LLMCall], None]] = None,
+        cancelled: Optional[threading.Event] = None,
+    ) -> Optional[str]:
+        max_tokens = max_tokens or self.config.max_tokens
+        self.meter.check(client.estimate(prompt, max_tokens).cost)
+        limiter = self.limiters.get(client.name)
+        waited = time.time()
+        if not limiter.acquire(timeout=wait):
+            print(f"⚠️  {client.name} 并发已满，跳过")
+            if on_call is not None:
+                on_call(LLMCall(client.name, client.model, waited, time.time() - waited, BUSY))
+            return None
+        if cancelled is not None and cancelled.is_set():
+            # Another backend answered while this call waited for a slot.
+            limiter.release()
+            if on_call is not None:
+                on_call(LLMCall(client.name, client.model, waited, time.time() - waited, CANCELLED))
+            return None
+        answer, start, started = None, time.monotonic(), time.time()
+        try:
+            answer = client.complete(prompt, max_tokens)
+        finally:
+            # Only answered calls say something about the backend's latency.
+            latency = time.monotonic() - start if answer else None
+            limiter.release(latency, is_overload(client.last_error))
+            if latency is not None and self.hedging is not None:
+                self.hedging.observe(client.name, latency)
+            if on_call is not None:
+                on_call(call_of(
+                    client.name, client.model, started, answer, client.last_error,
+                    client.last_usage if answer else None,
+                ))
+        usage = client.last_usage
+        if answer and usage is not None:
+            self.meter.add(usage)
+            if on_usage is not None:
+                on_usage(usage)
+        return answer
+    
+    def usage_totals(self) -> Dict[str, Dict[str, float]]:
+        """
+        Get the calls, tokens and cost of this run per provider/model.
+        
+        Returns:
+            Totals by "provider/model"
+        """
+        return self.meter.totals()
+    
+    def limit_metrics(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Get the adaptive concurrency limit of each LLM backend used so far.
+        
+        Returns:
+            Limiter snapshots by backend name
+        """
+        return self.limiters.metrics()
+    
+    def routing_metrics(self) -> Optional[Dict[str, Dict[str, float]]]:
+        """
+        Get pages, LLM calls, average latency and cost per route.
+        
+        Returns:
+            RoutingLog totals by route, or None if routing is off
+        """
+        return self.routing_log.totals() if self.routing_log is not None else None
+    
+    def hedge_metrics(self) -> Optional[Dict[str, Any]]:
+        """
+        Get how many calls were hedged and how many hedges won.
+        
+        Returns:
+            HedgePolicy snapshot, or None if hedging is off
+        """
+        return self.hedging.snapshot() if self.hedging is not None else None
     
     def generate_weibo_content(self, title: str, summary: str, url: str) -> str:
         """
@@ -108,49 +454,27 @@ class ContentProcessor:
         content = content.strip()
         return len(content) >= min_length
 
-    def generate_title(self, content: str) -> str:
+    def generate_title(
+        self,
+        content: str,
+        on_usage: Optional[Callable[[Usage], None]] = None,
+        route: Optional[RouteDecision] = None,
+        on_call: Optional[Callable[[LLMCall], None]] = None,
+    ) -> str:
         content = (content or "").strip()
         base_prompt = (
             "请为以下内容生成一个不超过20字的中文标题，要求准确、信息密集、避免标点和引号。\n\n内容：\n"
             + content[:1000]
             + "\n\n标题："
         )
-        if self.config.deepseek_api_key:
-            try:
-                client = OpenAI(api_key=self.config.deepseek_api_key, base_url=self.config.deepseek_base_url)
-                resp = client.chat.completions.create(
-                    model=self.config.deepseek_model,
-                    messages=[{"role": "user", "content": base_prompt}],
-                    max_tokens=64,
-                    temperature=0.3,
-                )
-                title = resp.choices[0].message.content.strip()
+        # A page routed away from the remote clients gets no LLM title either.
+        for client in self._routed_clients(route):
+            if not client.remote:
+                continue
+            title = self._complete(
+                client, base_prompt, wait=self.config.timeout, max_tokens=64, on_usage=on_usage, on_call=on_call,
+            )
+            if title:
                 return title[:20] if len(title) > 20 else title
-            except Exception:
-                pass
-        if self.config.openai_api_key:
-            try:
-                client = OpenAI(api_key=self.config.openai_api_key, base_url=self.config.openai_base_url)
-                resp = client.chat.completions.create(
-                    model=self.config.openai_model,
-                    messages=[{"role": "user", "content": base_prompt}],
-                    max_tokens=64,
-                    temperature=0.3,
-                )
-                title = resp.choices[0].message.content.strip()
-                return title[:20] if len(title) > 20 else title
-            except Exception:
-                pass
-        try:
-            data = {"model": self.config.ollama_model, "prompt": base_prompt, "stream": False}
-            r = requests.post(self.config.ollama_api_url, json=data, timeout=self.config.timeout)
-            if r.status_code == 200:
-                res = r.json()
-                title = (res.get("response", "") or "").strip()
-                title = title[:20] if len(title) > 20 else title
-                if title:
-                    return title
-        except Exception:
-            pass
         fallback = content.splitlines()[0].strip() if content else "未命名"
         return fallback[:20] if len(fallback) > 20 else fallback
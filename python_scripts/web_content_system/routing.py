@@ -0,0 +1,261 @@
+"""
+Cost/latency routing: which LLM clients summarize which page.
+
+A routing policy is an ordered list of routes. The first route whose
+conditions (content length, tags, domain, queue depth) match a page
+names the clients to ask, so a 60-character stub goes to the extractive
+fallback and only rich pages pay for the API. Policies are plain JSON;
+decisions and their outcomes can be appended to a JSONL log.
+"""
+
+import json
+import re
+import threading
+import time
+from dataclasses import asdict, dataclass, field, fields
+from fnmatch import fnmatch
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from urllib.parse import urlparse
+
+ALL_CLIENTS = "*"  # in a route's clients: every client not named yet, in priority order
+
+_TAG_SEPARATOR = re.compile(r"[,，]")
+
+
+@dataclass(frozen=True)
+class Route:
+    """
+    One rule of a routing policy.
+
+    A page matches when all set conditions hold: its length is within
+    [min_chars, max_chars), it has one of `tags`, its host matches one of
+    the `domains` patterns (fnmatch, e.g. "*.gov.cn") and the queue depth
+    is within [min_queue, max_queue).
+    """
+
+    name: str
+    clients: Tuple[str, ...]
+    min_chars: int = 0
+    max_chars: Optional[int] = None
+    tags: Tuple[str, ...] = ()
+    domains: Tuple[str, ...] = ()
+    min_queue: int = 0
+    max_queue: Optional[int] = None
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Route":
+        """
+        Build a route from its JSON form.
+
+        Raises:
+            ValueError: on unknown keys or a route without name or clients
+        """
+        unknown = set(data) - {f.name for f in fields(cls)}
+        if unknown:
+            raise ValueError(f"unknown route keys: {', '.join(sorted(unknown))}")
+        if not data.get("name") or not data.get("clients"):
+            raise ValueError(f"route needs a name and clients: {data}")
+        values = dict(data)
+        for key in ("clients", "tags", "domains"):
+            if key in values:
+                values[key] = tuple(values[key])
+        return cls(**values)
+
+    def matches(self, chars: int, tags: Sequence[str], domain: str, queue_depth: int) -> bool:
+        """Tell whether a page with these properties takes this route."""
+        if chars < self.min_chars or (self.max_chars is not None and chars >= self.max_chars):
+            return False
+        if queue_depth < self.min_queue or (self.max_queue is not None and queue_depth >= self.max_queue):
+            return False
+        if self.tags and not set(self.tags) & set(tags):
+            return False
+        if self.domains and not any(fnmatch(domain, pattern) for pattern in self.domains):
+            return False
+        return True
+
+
+@dataclass
+class RouteDecision:
+    """The route chosen for one page, and what the page looked like."""
+
+    route: str
+    clients: Tuple[str, ...]
+    chars: int
+    tags: Tuple[str, ...] = ()
+    domain: str = ""
+    queue_depth: int = 0
+    url: str = ""
+    started: float = field(default_factory=time.monotonic)
+
+    def order(self, names: Sequence[str]) -> List[str]:
+        """
+        Order available client names by this decision.
+
+        Named clients come first, in route order; ``*`` stands for the
+        remaining ones in their given (priority) order. Clients the
+        route does not name are dropped.
+
+        Args:
+            names: Available client names in priority order
+
+        Returns:
+            Names to ask, in order
+        """
+        ordered: List[str] = []
+        for name in self.clients:
+            if name == ALL_CLIENTS:
+                ordered.extend(n for n in names if n not in self.clients and n not in ordered)
+            elif name in names and name not in ordered:
+                ordered.append(name)
+        return ordered
+
+
+def default_routes(local_slots: int = 4) -> List[Route]:
+    """
+    Built-in tiers: trivial pages are summarized extractively, medium ones
+    by the local model first while it has a free slot, rich ones (and
+    medium ones past the local queue) by the API clients in priority order.
+
+    Args:
+        local_slots: Parallel requests the local model server takes
+    """
+    return [
+        Route("trivial", ("fallback",), max_chars=300),
+        Route("medium", ("ollama", ALL_CLIENTS), max_chars=2000, max_queue=local_slots),
+        Route("rich", (ALL_CLIENTS,)),
+    ]
+
+
+class RoutingPolicy:
+    """Ordered routes; the first match wins, ``*`` if nothing matches."""
+
+    def __init__(self, routes: Optional[Sequence[Route]] = None):
+        """
+        Initialize policy.
+
+        Args:
+            routes: Routes, tried in order (default_routes() if omitted)
+        """
+        self.routes = list(routes) if routes is not None else default_routes()
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "RoutingPolicy":
+        """
+        Build a policy from ``{"routes": [...]}``.
+
+        Raises:
+            ValueError: if a route is invalid
+        """
+        return cls([Route.from_dict(item) for item in data.get("routes", [])])
+
+    @classmethod
+    def load(cls, path: str) -> "RoutingPolicy":
+        """
+        Load a policy from a JSON file.
+
+        Raises:
+            ValueError: if a route is invalid
+        """
+        with open(path, encoding="utf-8") as f:
+            return cls.from_dict(json.load(f))
+
+    def decide(self, content: str, tags: str = "", url: str = "", queue_depth: int = 0) -> RouteDecision:
+        """
+        Choose the route of a page.
+
+        Args:
+            content: Page content
+            tags: Comma-separated tags
+            url: Page URL ("" for manual input)
+            queue_depth: Summaries waiting or in progress
+
+        Returns:
+            Decision naming the route and its clients
+        """
+        chars = len(content.strip()) if content else 0
+        tag_list = tuple(t.strip() for t in _TAG_SEPARATOR.split(tags or "") if t.strip())
+        domain = (urlparse(url).hostname or "") if url else ""
+        for route in self.routes:
+            if route.matches(chars, tag_list, domain, queue_depth):
+                return RouteDecision(route.name, route.clients, chars, tag_list, domain, queue_depth, url)
+        return RouteDecision("default", (ALL_CLIENTS,), chars, tag_list, domain, queue_depth, url)
+
+
+class RoutingLog:
+    """
+    Routing decisions and their outcomes, per route.
+
+    Thread-safe. Totals are kept in memory for metrics; with a path,
+    every decision is also appended to it as one JSON line.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        """
+        Initialize log.
+
+        Args:
+            path: JSONL file to append to (None to keep totals only)
+        """
+        self.path = path
+        self._totals: Dict[str, Dict[str, float]] = {}
+        self._lock = threading.Lock()
+
+    def record(
+        self,
+        decision: RouteDecision,
+        answered_by: Sequence[str],
+        calls: int = 0,
+        prompt_tokens: int = 0,
+        completion_tokens: int = 0,
+        cost: float = 0.0,
+    ):
+        """
+        Record the outcome of a routed summary.
+
+        Args:
+            decision: The page's routing decision
+            answered_by: Clients whose answers make up the summary
+            calls: Answered LLM calls
+            prompt_tokens: Input tokens of those calls
+            completion_tokens: Output tokens of those calls
+            cost: Their cost in USD
+        """
+        latency = time.monotonic() - decision.started
+        entry = {
+            "at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            **{k: v for k, v in asdict(decision).items() if k != "started"},
+            "answered_by": list(answered_by),
+            "latency_ms": round(latency * 1000, 1),
+            "calls": calls,
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "cost": round(cost, 6),
+        }
+        with self._lock:
+            totals = self._totals.setdefault(decision.route, {"pages": 0, "latency": 0.0, "cost": 0.0, "calls": 0})
+            totals["pages"] += 1
+            totals["latency"] += latency
+            totals["cost"] += cost
+            totals["calls"] += calls
+            if self.path:
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+    def totals(self) -> Dict[str, Dict[str, float]]:
+        """
+        Pages, LLM calls, average latency and cost per route.
+
+        Returns:
+            {"route": {"pages", "calls", "avg_latency_ms", "avg_cost", "cost"}}
+        """
+        with self._lock:
+            return {
+                route: {
+                    "pages": t["pages"],
+                    "calls": t["calls"],
+                    "avg_latency_ms": round(t["latency"] / t["pages"] * 1000, 1),
+                    "avg_cost": t["cost"] / t["pages"],
+                    "cost": t["cost"],
+                }
+                for route, t in self._totals.items()
+            }
@@ -5,5 +5,6 @@ Web scraping package.
 from .base_scraper import BaseScraper
 from .browser_scraper import BrowserScraper
 from .requests_scraper import RequestsScraper
+from .extraction_pool import ExtractionPool
 
-__all__ = ["BaseScraper", "BrowserScraper", "RequestsScraper"]
+__all__ = ["BaseScraper", "BrowserScraper", "RequestsScraper", "ExtractionPool"]
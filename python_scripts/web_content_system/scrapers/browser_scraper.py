@@ -2,8 +2,10 @@
 Browser-based web scraper using Selenium.
 """
 
-from typing import Tuple, Optional
+from typing import List, Tuple, Optional
+from urllib.parse import urlparse
 from selenium import webdriver
+from selenium.common.exceptions import TimeoutException
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
@@ -13,17 +15,45 @@ from .base_scraper import BaseScraper
 from ..config import BrowserConfig
 
 
+# URL patterns used to block CDP resource types. Chrome's Network domain can
+# only block by URL, so each resource type maps to its usual file extensions.
+RESOURCE_TYPE_PATTERNS = {
+    "Image": ("*.png", "*.jpg", "*.jpeg", "*.gif", "*.webp", "*.avif",
+              "*.svg", "*.ico", "*.bmp"),
+    "Font": ("*.woff", "*.woff2", "*.ttf", "*.otf", "*.eot"),
+    "Stylesheet": ("*.css",),
+    "Media": ("*.mp4", "*.webm", "*.m4a", "*.mp3", "*.ogg", "*.wav",
+              "*.mov", "*.m3u8"),
+}
+
+# Returns the current length of the rendered body text, or -1 while the
+# document is still being parsed.
+SETTLE_PROBE_SCRIPT = (
+    "return document.readyState === 'loading' || !document.body"
+    " ? -1 : document.body.innerText.length;"
+)
+
+
 class BrowserScraper(BaseScraper):
     """Web scraper using Selenium WebDriver."""
     
-    def __init__(self, config: Optional[BrowserConfig] = None):
+    def __init__(
+        self,
+        config: Optional[BrowserConfig] = None,
+        archive=None,
+        selector_cache=None,
+    ):
         """
         Initialize browser scraper.
         
         Args:
             config: Browser configuration
+            archive: Optional RawArchive that receives the rendered DOM
+            selector_cache: Optional SelectorCache for per-domain strategies
         """
         self.config = config or BrowserConfig()
+        self.archive = archive
+        self.selector_cache = selector_cache
         self.driver = None
         self._setup_browser()
     
@@ -41,6 +71,16 @@ class BrowserScraper(BaseScraper):
         chrome_options.add_argument("--disable-blink-features=AutomationControlled")
         chrome_options.add_experimental_option("excludeSwitches", ["enable-automation"])
         chrome_options.add_experimental_option('useAutomationExtension', False)
+        chrome_options.page_load_strategy = self.config.page_load_strategy
+        
+        if self.config.disk_cache_dir:
+            chrome_options.add_argument(f"--disk-cache-dir={self.config.disk_cache_dir}")
+        
+        if "Image" in self.config.blocked_resource_types:
+            chrome_options.add_argument("--blink-settings=imagesEnabled=false")
+            chrome_options.add_experimental_option(
+                "prefs", {"profile.managed_default_content_settings.images": 2}
+            )
         
         try:
             self.driver = webdriver.Chrome(options=chrome_options)
@@ -48,11 +88,66 @@ class BrowserScraper(BaseScraper):
             self.driver.execute_script(
                 "Object.defineProperty(navigator, 'webdriver', {get: () => undefined})"
             )
+            self._apply_request_blocking()
         except Exception as e:
             print(f"⚠️  无法启动Chrome浏览器: {e}")
             print("请确保已安装Chrome浏览器和ChromeDriver")
             self.driver = None
     
+    def _blocked_url_patterns(self) -> List[str]:
+        """Build the CDP URL block list from the configured profile."""
+        patterns: List[str] = []
+        for resource_type in self.config.blocked_resource_types:
+            patterns.extend(RESOURCE_TYPE_PATTERNS.get(resource_type, ()))
+        patterns.extend(self.config.url_blocklist)
+        return patterns
+    
+    def _apply_request_blocking(self):
+        """Block unwanted resource types and tracker URLs via CDP."""
+        patterns = self._blocked_url_patterns()
+        if not patterns:
+            return
+        try:
+            self.driver.execute_cdp_cmd("Network.enable", {})
+            self.driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": patterns})
+        except Exception as e:
+            print(f"⚠️  无法设置资源拦截: {e}")
+    
+    def _wait_for_content(self):
+        """Wait until the page is ready for extraction.
+        
+        With ``wait_for_settle`` the body text length is polled until two
+        consecutive probes agree (or the timeout expires); otherwise only the
+        presence of ``<body>`` is awaited.
+        """
+        if not self.config.wait_for_settle:
+            WebDriverWait(self.driver, self.config.timeout).until(
+                EC.presence_of_element_located((By.TAG_NAME, "body"))
+            )
+            return
+        
+        last_length = [-1]
+        
+        def settled(driver) -> bool:
+            length = driver.execute_script(SETTLE_PROBE_SCRIPT)
+            stable = length > 0 and length == last_length[0]
+            last_length[0] = length
+            return stable
+        
+        try:
+            WebDriverWait(
+                self.driver, self.config.timeout, poll_frequency=self.config.settle_interval
+            ).until(settled)
+        except TimeoutException:
+            # Still-changing pages (tickers, live feeds) are extracted as-is
+            pass
+    
+    @staticmethod
+    def _domain_of(url: str) -> str:
+        """Host of a URL with any www. prefix removed."""
+        host = (urlparse(url).hostname or "").lower()
+        return host[4:] if host.startswith("www.") else host
+    
     def scrape(self, url: str) -> Tuple[Optional[str], Optional[str]]:
         """
         Scrape content from URL using browser.
@@ -70,15 +165,22 @@ class BrowserScraper(BaseScraper):
             self.driver.get(url)
             
             # Wait for page to load
-            WebDriverWait(self.driver, self.config.timeout).until(
-                EC.presence_of_element_located((By.TAG_NAME, "body"))
-            )
+            self._wait_for_content()
+            
+            if self.archive is not None:
+                self.archive.append(
+                    url,
+                    self.driver.page_source.encode("utf-8"),
+                    content_type="text/html",
+                    encoding="utf-8",
+                    kind="rendered",
+                )
             
             # Get page title
             title = self.driver.title
             
             # Extract content using multiple strategies
-            content = self._extract_content()
+            content = self._extract_content(self._domain_of(url))
             
             return self.clean_title(title), self.clean_content(content)
             
@@ -86,47 +188,76 @@ class BrowserScraper(BaseScraper):
             print(f"⚠️  浏览器抓取失败: {e}")
             return None, None
     
-    def _extract_content(self) -> str:
+    # Extraction strategies in full-search order; "body" always succeeds
+    # and is never remembered per domain.
+    STRATEGIES = ("article", "main", "content_divs", "paragraphs")
+    MIN_STRATEGY_TEXT = 100
+    
+    def _run_strategy(self, name: str) -> str:
         """
-        Extract content from page using multiple strategies.
+        Run one named extraction strategy on the current page.
         
+        Args:
+            name: Strategy name from STRATEGIES
+            
         Returns:
-            Extracted content text
+            Extracted text (possibly empty)
         """
-        content = ""
+        if name == "article":
+            article_elements = self.driver.find_elements(By.TAG_NAME, "article")
+            return " ".join([elem.text for elem in article_elements])
         
-        # Strategy 1: Look for article tags
-        article_elements = self.driver.find_elements(By.TAG_NAME, "article")
-        if article_elements:
-            content = " ".join([elem.text for elem in article_elements])
-            if len(content) > 100:
-                return content
+        if name == "main":
+            main_elements = self.driver.find_elements(By.TAG_NAME, "main")
+            return main_elements[0].text if main_elements else ""
         
-        # Strategy 2: Look for main content area
-        main_elements = self.driver.find_elements(By.TAG_NAME, "main")
-        if main_elements:
-            content = main_elements[0].text
-            if len(content) > 100:
-                return content
+        if name == "content_divs":
+            content_divs = self.driver.find_elements(
+                By.CSS_SELECTOR,
+                "div[class*='content'], div[class*='article'], "
+                "div[class*='post'], div[class*='main']"
+            )
+            return " ".join([elem.text for elem in content_divs])
+        
+        if name == "paragraphs":
+            p_elements = self.driver.find_elements(By.TAG_NAME, "p")
+            return " ".join([p.text for p in p_elements if len(p.text) > 20])
         
-        # Strategy 3: Look for content-related divs
-        content_divs = self.driver.find_elements(
-            By.CSS_SELECTOR,
-            "div[class*='content'], div[class*='article'], "
-            "div[class*='post'], div[class*='main']"
-        )
-        if content_divs:
-            content = " ".join([elem.text for elem in content_divs])
-            if len(content) > 100:
+        raise ValueError(f"unknown extraction strategy: {name}")
+    
+    def _extract_content(self, domain: str = "") -> str:
+        """
+        Extract content from page using multiple strategies.
+        
+        With a selector cache, the strategy that last won for ``domain`` is
+        tried first and the full search only runs when it yields too little
+        text.
+        
+        Args:
+            domain: Normalized host of the current page
+            
+        Returns:
+            Extracted content text
+        """
+        cache = self.selector_cache if domain else None
+        preferred = cache.get(domain) if cache is not None else None
+        if preferred in self.STRATEGIES:
+            content = self._run_strategy(preferred)
+            if len(content) > self.MIN_STRATEGY_TEXT:
+                cache.record_hit(domain)
                 return content
+            cache.record_miss(domain)
         
-        # Strategy 4: Get all paragraphs
-        p_elements = self.driver.find_elements(By.TAG_NAME, "p")
-        content = " ".join([p.text for p in p_elements if len(p.text) > 20])
-        if len(content) > 100:
-            return content
+        for name in self.STRATEGIES:
+            if name == preferred:
+                continue
+            content = self._run_strategy(name)
+            if len(content) > self.MIN_STRATEGY_TEXT:
+                if cache is not None:
+                    cache.record_win(domain, name)
+                return content
         
-        # Strategy 5: Fallback to body
+        # Fallback to body
         body_element = self.driver.find_element(By.TAG_NAME, "body")
         return body_element.text
     
@@ -0,0 +1,100 @@
+"""
+Process pool for CPU-bound HTML parsing and extraction.
+"""
+
+import os
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+from .requests_scraper import RequestsScraper
+
+# (raw body, page URL, declared encoding)
+ExtractionJob = Tuple[bytes, str, Optional[str]]
+# (title, content, links)
+ExtractionResult = Tuple[str, str, List[str]]
+
+
+def available_cores() -> int:
+    """Number of CPU cores this process may run on."""
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def _extract_job(job: ExtractionJob) -> ExtractionResult:
+    """Worker entry point; must stay module-level to be picklable."""
+    raw, url, encoding = job
+    return RequestsScraper.parse_html(raw, url, encoding)
+
+
+class ExtractionPool:
+    """
+    Parses raw HTML in worker processes so extraction scales past the GIL.
+    
+    Only the raw bytes go to the workers and only plain strings come back,
+    which keeps the pickling cost far below the parsing cost.
+    """
+    
+    def __init__(self, max_workers: Optional[int] = None, chunksize: int = 8):
+        """
+        Initialize extraction pool.
+        
+        Args:
+            max_workers: Worker process count (defaults to the available cores)
+            chunksize: Jobs sent to a worker per round trip in extract_many
+        """
+        self.max_workers = max_workers or available_cores()
+        self.chunksize = chunksize
+        self._executor: Optional[ProcessPoolExecutor] = None
+    
+    @property
+    def executor(self) -> ProcessPoolExecutor:
+        """Process pool, started on first use."""
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+        return self._executor
+    
+    def submit(self, raw: bytes, url: str = "", encoding: Optional[str] = None) -> "Future[ExtractionResult]":
+        """
+        Queue one page for extraction.
+        
+        Args:
+            raw: Raw response body
+            url: Page URL, used to resolve relative links
+            encoding: Declared encoding, or None to detect
+            
+        Returns:
+            Future resolving to (title, content, links)
+        """
+        return self.executor.submit(_extract_job, (raw, url, encoding))
+    
+    def extract(self, raw: bytes, url: str = "", encoding: Optional[str] = None) -> ExtractionResult:
+        """Extract one page and wait for the result."""
+        return self.submit(raw, url, encoding).result()
+    
+    def extract_many(self, jobs: Iterable[ExtractionJob]) -> Iterator[ExtractionResult]:
+        """
+        Extract many pages, yielding results in input order.
+        
+        Args:
+            jobs: Iterable of (raw, url, encoding) tuples
+            
+        Yields:
+            (title, content, links) per job
+        """
+        return self.executor.map(_extract_job, jobs, chunksize=self.chunksize)
+    
+    def close(self):
+        """Shut down worker processes."""
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+    
+    def __enter__(self):
+        """Context manager entry."""
+        return self
+    
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        """Context manager exit."""
+        self.close()
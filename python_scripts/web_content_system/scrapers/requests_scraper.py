@@ -3,25 +3,33 @@ Requests-based web scraper using BeautifulSoup.
 """
 
 import re
-from typing import Tuple, Optional
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from itertools import islice
+from typing import Iterable, Iterator, List, Tuple, Optional
+from urllib.parse import urljoin
 import requests
 from bs4 import BeautifulSoup
 
 from .base_scraper import BaseScraper
 from ..config import BrowserConfig
 
+MIN_CONTENT_TEXT = 60  # characters a content area needs to be used
+
 
 class RequestsScraper(BaseScraper):
     """Web scraper using requests and BeautifulSoup."""
     
-    def __init__(self, config: Optional[BrowserConfig] = None):
+    def __init__(self, config: Optional[BrowserConfig] = None, archive=None):
         """
         Initialize requests scraper.
         
         Args:
             config: Browser configuration (for user agent)
+            archive: Optional RawArchive that receives every raw response
         """
         self.config = config or BrowserConfig()
+        self.archive = archive
+        self.last_error: Optional[Exception] = None  # error of the last scrape()
     
     def scrape(self, url: str) -> Tuple[Optional[str], Optional[str]]:
         """
@@ -33,33 +41,157 @@ class RequestsScraper(BaseScraper):
         Returns:
             Tuple of (title, content) or (None, None) on failure
         """
+        self.last_error = None
         try:
-            headers = {
-                'User-Agent': self.config.user_agent
-            }
-            
-            response = requests.get(url, headers=headers, timeout=15)
-            response.encoding = response.apparent_encoding
-            
-            soup = BeautifulSoup(response.text, 'html.parser')
-            
-            # Remove unwanted elements
-            for element in soup(["script", "style", "nav", "header", "footer", "aside"]):
-                element.decompose()
-            
-            # Extract title
-            title = soup.title.string if soup.title else "无标题"
-            
-            # Extract content
-            content = self._extract_content(soup)
-            
-            return self.clean_title(title), self.clean_content(content)
+            raw, encoding, final_url = self.fetch_raw(url)
+            title, content, _ = self.parse_html(raw, final_url, encoding)
+            return title, content
             
         except Exception as e:
+            self.last_error = e
             print(f"⚠️  Requests抓取失败: {e}")
             return "抓取失败", "无法获取页面内容"
     
-    def _extract_content(self, soup: BeautifulSoup) -> str:
+    def fetch_raw(self, url: str) -> Tuple[bytes, Optional[str], str]:
+        """
+        Download a page without parsing it.
+        
+        Args:
+            url: URL to fetch
+            
+        Returns:
+            Tuple of (raw body bytes, declared encoding or None, final URL)
+        """
+        headers = {
+            'User-Agent': self.config.user_agent
+        }
+        
+        response = requests.get(url, headers=headers, timeout=15)
+        
+        # requests reports ISO-8859-1 when the server sent no charset; leave
+        # detection to the parser in that case.
+        encoding = response.encoding
+        if encoding and encoding.lower() == "iso-8859-1":
+            encoding = None
+        
+        if self.archive is not None:
+            self.archive.append(
+                url,
+                response.content,
+                status=response.status_code,
+                content_type=response.headers.get("Content-Type", ""),
+                encoding=encoding,
+            )
+        return response.content, encoding, response.url or url
+    
+    def scrape_many(
+        self,
+        urls: Iterable[str],
+        pool=None,
+        max_fetchers: int = 8,
+    ) -> Iterator[Tuple[str, Optional[str], Optional[str]]]:
+        """
+        Scrape several URLs, fetching on threads and parsing in a process pool.
+        
+        Results are yielded as pages finish, not in input order. At most
+        2 * max_fetchers URLs are in flight, so a caller that stops early
+        has not downloaded the rest.
+        
+        Args:
+            urls: URLs to scrape
+            pool: Optional ExtractionPool; parsing happens inline without one
+            max_fetchers: Number of concurrent download threads
+            
+        Yields:
+            Tuples of (url, title, content); title and content are None on failure
+        """
+        def fetch(url):
+            raw, encoding, final_url = self.fetch_raw(url)
+            if pool is None:
+                return self.parse_html(raw, final_url, encoding)
+            return pool.submit(raw, final_url, encoding)
+        
+        urls = iter(urls)
+        fetchers = ThreadPoolExecutor(max_workers=max_fetchers)
+        in_flight = {}  # fetch or parse future -> url
+        parsing = set()  # the parse futures among them
+        try:
+            for url in islice(urls, 2 * max_fetchers):
+                in_flight[fetchers.submit(fetch, url)] = url
+            while in_flight:
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    url = in_flight.pop(future)
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        if future in parsing:
+                            print(f"⚠️  内容解析失败: {e}")
+                        else:
+                            print(f"⚠️  Requests抓取失败: {e}")
+                        result = None
+                    parsing.discard(future)
+                    if isinstance(result, Future):
+                        # Fetched; wait for the parse in the process pool
+                        in_flight[result] = url
+                        parsing.add(result)
+                        continue
+                    for next_url in islice(urls, 1):
+                        in_flight[fetchers.submit(fetch, next_url)] = next_url
+                    if result is None:
+                        yield url, None, None
+                    else:
+                        title, content, _ = result
+                        yield url, title, content
+        finally:
+            fetchers.shutdown(wait=True, cancel_futures=True)
+    
+    @classmethod
+    def parse_html(
+        cls,
+        raw: bytes,
+        url: str = "",
+        encoding: Optional[str] = None,
+    ) -> Tuple[str, str, List[str]]:
+        """
+        Parse raw HTML into title, content and outgoing links.
+        
+        Pure CPU work with no network access, so it can run in a worker
+        process (see ExtractionPool).
+        
+        Args:
+            raw: Raw response body
+            url: Page URL, used to resolve relative links
+            encoding: Declared encoding; detected from the document if None
+            
+        Returns:
+            Tuple of (title, content, links)
+        """
+        soup = BeautifulSoup(raw, 'html.parser', from_encoding=encoding)
+        
+        # Collect links before navigation elements are removed
+        links = []
+        seen = set()
+        for anchor in soup.find_all('a', href=True):
+            link = urljoin(url, anchor['href'].strip()).split('#', 1)[0]
+            if link.startswith(('http://', 'https://')) and link not in seen:
+                seen.add(link)
+                links.append(link)
+        
+        # Remove unwanted elements
+        for element in soup(["script", "style", "nav", "header", "footer", "aside"]):
+            element.decompose()
+        
+        # Extract title
+        title = soup.title.string if soup.title else "无标题"
+        
+        # Extract content
+        content = cls._extract_content(soup)
+        
+        return cls.clean_title(title), cls.clean_content(content), links
+    
+    @staticmethod
+    def _extract_content(soup: BeautifulSoup) -> str:
         """
         Extract content from BeautifulSoup object.
         
@@ -74,14 +206,19 @@ class RequestsScraper(BaseScraper):
         if article_content:
             return article_content.get_text()
         
-        # Strategy 2: Look for main content area
-        main_content = (
-            soup.find('main') or
-            soup.find('div', class_=re.compile(r'article|content|main|post|entry')) or
-            soup.find('section', class_=re.compile(r'article|content|main|post|entry'))
+        # Strategy 2: Look for main content area. Skip near-empty matches
+        # such as MediaWiki's site notice (class "mw-body-content"), which
+        # come before the article.
+        content_class = re.compile(r'article|content|main|post|entry')
+        candidates = (
+            soup.find_all('main') +
+            soup.find_all('div', class_=content_class) +
+            soup.find_all('section', class_=content_class)
         )
-        if main_content:
-            return main_content.get_text()
+        for main_content in candidates:
+            text = main_content.get_text()
+            if len(text.strip()) > MIN_CONTENT_TEXT:
+                return text
         
         # Strategy 3: Get all paragraphs
         paragraphs = soup.find_all('p')
@@ -0,0 +1,163 @@
+"""
+LLM call telemetry: one small record per call, summed into reports.
+
+Every call to a summary backend yields an LLMCall (provider, model, start,
+latency, outcome, tokens). Pipelines collect the calls of a row next to
+its token usage and store them with CallLog; report() turns stored calls
+into latency percentiles, error rates and throughput per provider and
+time window.
+"""
+
+import math
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from openai import APIConnectionError, APITimeoutError
+
+from .database.failure_log import CONNECTION, TIMEOUT, classify
+
+OK = "ok"
+BUSY = "busy"            # no concurrency slot within the wait; nothing was sent
+CANCELLED = "cancelled"  # another backend answered first; nothing was sent
+EMPTY = "empty"          # the backend answered, but with no text
+
+_DURATION_UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+
+@dataclass
+class LLMCall:
+    """Outcome of one LLM call."""
+
+    provider: str
+    model: str
+    started: float  # Unix time
+    latency: float  # seconds
+    outcome: str = OK
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+
+    @property
+    def failed(self) -> bool:
+        """Tell whether the backend was asked and gave no answer."""
+        return self.outcome not in (OK, BUSY, CANCELLED)
+
+
+def outcome_of(error: Optional[BaseException]) -> str:
+    """
+    Outcome of a call that raised `error`.
+
+    Returns:
+        A failure_log error class ("timeout", "http_429", ...) for an
+        error, EMPTY for a call without error and without answer
+    """
+    if error is None:
+        return EMPTY
+    if isinstance(error, APITimeoutError):
+        return TIMEOUT
+    if isinstance(error, APIConnectionError):
+        return CONNECTION
+    response = getattr(error, "response", None)
+    status = getattr(error, "status_code", None) or getattr(response, "status_code", None)
+    return classify(error, status if isinstance(status, int) else None)
+
+
+def call_of(
+    provider: str,
+    model: str,
+    started: float,
+    answer: Optional[str],
+    error: Optional[BaseException] = None,
+    usage: Any = None,
+) -> LLMCall:
+    """
+    Record of a call that started at `started` (time.time()) and just ended.
+
+    Args:
+        provider: Backend name
+        model: Model name
+        started: Start of the call, Unix time
+        answer: Answer text, or None/"" if there was none
+        error: Error of a failed call
+        usage: Usage of an answered call (tokens are 0 without one)
+    """
+    return LLMCall(
+        provider,
+        model,
+        started,
+        time.time() - started,
+        OK if answer else outcome_of(error),
+        usage.prompt_tokens if usage is not None else 0,
+        usage.completion_tokens if usage is not None else 0,
+    )
+
+
+def parse_duration(text: str) -> float:
+    """
+    Seconds in a duration such as "90s", "15m", "1h" or "7d".
+
+    Raises:
+        ValueError: if the text is not a number with one of those units
+    """
+    text = text.strip().lower()
+    if text and text[-1] in _DURATION_UNITS:
+        return float(text[:-1]) * _DURATION_UNITS[text[-1]]
+    raise ValueError(f"not a duration: {text!r} (use s, m, h or d, e.g. 15m)")
+
+
+def percentile(values: Sequence[float], q: float) -> Optional[float]:
+    """Nearest-rank `q`-th percentile (0-100) of sorted values, None if empty."""
+    if not values:
+        return None
+    return values[min(len(values) - 1, max(0, math.ceil(q / 100 * len(values)) - 1))]
+
+
+def report(
+    calls: Iterable[Tuple[str, str, float, float, str, int, int]],
+    window: Optional[float],
+) -> List[Dict[str, Any]]:
+    """
+    Sum calls per time window and provider/model.
+
+    Args:
+        calls: (provider, model, started, latency_ms, outcome,
+            prompt_tokens, completion_tokens) rows
+        window: Window length in seconds; windows are aligned to it.
+            None puts all calls in one window, labelled "all"
+
+    Returns:
+        One dict per window and provider/model, oldest first: calls,
+        answered, failures, error_rate, outcomes (count per outcome),
+        p50/p95/p99 latency (ms, answered calls), calls per minute and
+        completion tokens per second of answered-call time
+    """
+    groups: Dict[Tuple[float, str, str], List[tuple]] = {}
+    for row in calls:
+        start = row[2] - row[2] % window if window else 0.0
+        groups.setdefault((start, row[0], row[1]), []).append(row)
+    rows = []
+    for (start, provider, model), members in sorted(groups.items()):
+        outcomes: Dict[str, int] = {}
+        for member in members:
+            outcomes[member[4]] = outcomes.get(member[4], 0) + 1
+        answered = [m for m in members if m[4] == OK]
+        sent = len(members) - outcomes.get(BUSY, 0) - outcomes.get(CANCELLED, 0)
+        latencies = sorted(m[3] for m in answered)
+        busy_ms = sum(latencies)
+        span = window or max(60.0, max(m[2] for m in members) - min(m[2] for m in members))
+        rows.append({
+            "window": time.strftime("%Y-%m-%d %H:%M", time.localtime(start)) if window else "all",
+            "provider": provider,
+            "model": model,
+            "calls": len(members),
+            "answered": len(answered),
+            "failures": sent - len(answered),
+            "error_rate": round((sent - len(answered)) / sent, 4) if sent else 0.0,
+            "outcomes": outcomes,
+            "p50_ms": percentile(latencies, 50),
+            "p95_ms": percentile(latencies, 95),
+            "p99_ms": percentile(latencies, 99),
+            "calls_per_min": round(len(members) / (span / 60), 2),
+            "tokens_per_sec": round(sum(m[6] for m in answered) / (busy_ms / 1000), 1) if busy_ms else 0.0,
+        })
+    return rows
@@ -0,0 +1,226 @@
+"""
+In-process nearest-neighbour search over unit embedding vectors.
+
+Vectors are compared by dot product (cosine similarity for unit rows).
+Small corpora are scanned exactly with one matrix product; larger ones go
+through an IVF index: k-means partitions the vectors into lists, and a
+query scans only the lists of its nearest centroids.
+"""
+
+import math
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+IVF_THRESHOLD = 20000  # vectors from which build_index() partitions
+PROBES = 16            # IVF lists scanned per query
+TRAIN_PER_LIST = 64    # k-means training sample: vectors per list
+KMEANS_ITERATIONS = 10
+BLOCK = 4096           # rows per matrix product when scanning in bulk
+
+
+def _top_k(scores: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+    """(scores, columns) of the k best columns per row, best first."""
+    k = min(k, scores.shape[1])
+    if k <= 0:
+        return np.zeros((len(scores), 0), dtype=np.float32), np.zeros((len(scores), 0), dtype=np.int64)
+    if k < scores.shape[1]:
+        cols = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    else:
+        cols = np.broadcast_to(np.arange(k), scores.shape).copy()
+    best = np.take_along_axis(scores, cols, axis=1)
+    order = np.argsort(-best, axis=1, kind="stable")
+    return np.take_along_axis(best, order, axis=1), np.take_along_axis(cols, order, axis=1)
+
+
+def _nearest(vectors: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+    """Index of the most similar centroid of each vector."""
+    nearest = np.empty(len(vectors), dtype=np.int64)
+    for start in range(0, len(vectors), BLOCK):
+        nearest[start:start + BLOCK] = np.argmax(vectors[start:start + BLOCK] @ centroids.T, axis=1)
+    return nearest
+
+
+class VectorIndex:
+    """
+    Exact index: every query is scored against every vector.
+
+    Subclasses override search_many(); search() and neighbours() build on it.
+    """
+
+    def __init__(self, vectors: np.ndarray, ids: Sequence[str]):
+        """
+        Initialize index.
+
+        Args:
+            vectors: (n, dim) float32 unit rows
+            ids: Id of each row
+        """
+        if len(vectors) != len(ids):
+            raise ValueError(f"{len(vectors)} vectors for {len(ids)} ids")
+        self.vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        self.ids = list(ids)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def search_many(self, queries: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        k nearest vectors of each query.
+
+        Args:
+            queries: (q, dim) float32 unit rows
+            k: Neighbours per query
+
+        Returns:
+            (scores, positions), both (q, k), best first; rows with fewer
+            than k candidates are padded with -inf and -1
+        """
+        queries = np.atleast_2d(np.asarray(queries, dtype=np.float32))
+        k = min(k, len(self))
+        scores = np.full((len(queries), k), -np.inf, dtype=np.float32)
+        positions = np.full((len(queries), k), -1, dtype=np.int64)
+        for start in range(0, len(queries), BLOCK):
+            block = queries[start:start + BLOCK] @ self.vectors.T
+            scores[start:start + BLOCK], positions[start:start + BLOCK] = _top_k(block, k)
+        return scores, positions
+
+    def search(self, query: np.ndarray, k: int = 10) -> List[Tuple[str, float]]:
+        """
+        k nearest vectors of one query.
+
+        Returns:
+            (id, similarity) pairs, most similar first
+        """
+        scores, positions = self.search_many(query, k)
+        return [(self.ids[p], float(s)) for s, p in zip(scores[0], positions[0]) if p >= 0]
+
+    def neighbours(self, k: int, min_score: float = 0.0) -> List[List[Tuple[str, float]]]:
+        """
+        k nearest other vectors of every indexed vector.
+
+        Args:
+            k: Neighbours per vector
+            min_score: Drop neighbours less similar than this
+
+        Returns:
+            One (id, similarity) list per indexed id, in index order
+        """
+        scores, positions = self.search_many(self.vectors, k + 1)
+        result = []
+        for row, (row_scores, row_positions) in enumerate(zip(scores, positions)):
+            result.append([
+                (self.ids[p], round(float(s), 4))
+                for s, p in zip(row_scores, row_positions)
+                if p >= 0 and p != row and s >= min_score
+            ][:k])
+        return result
+
+
+class IVFIndex(VectorIndex):
+    """
+    Inverted-file index: vectors grouped by their nearest k-means centroid.
+
+    Vectors are stored sorted by list, so a list is one contiguous slice.
+    A query scans the ``probes`` lists whose centroids are closest to it,
+    about probes / lists of the corpus. Results are approximate: a
+    neighbour filed under an unprobed list is missed.
+    """
+
+    def __init__(
+        self,
+        vectors: np.ndarray,
+        ids: Sequence[str],
+        lists: Optional[int] = None,
+        probes: int = PROBES,
+        seed: int = 0,
+    ):
+        """
+        Initialize index and train its centroids.
+
+        Args:
+            vectors: (n, dim) float32 unit rows
+            ids: Id of each row
+            lists: Number of lists (about sqrt(n) if omitted)
+            probes: Lists scanned per query
+            seed: Seed of the k-means sample and initial centroids
+        """
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        n = len(vectors)
+        self.lists = max(1, min(n, lists or int(math.sqrt(n))))
+        self.probes = max(1, min(probes, self.lists))
+        self.centroids = self._train(vectors, np.random.default_rng(seed))
+        assignment = _nearest(vectors, self.centroids)
+        order = np.argsort(assignment, kind="stable")
+        super().__init__(vectors[order], [ids[i] for i in order])
+        self.offsets = np.searchsorted(assignment[order], np.arange(self.lists + 1))
+
+    def _train(self, vectors: np.ndarray, rng: np.random.Generator) -> np.ndarray:
+        """Spherical k-means centroids on a sample of the vectors."""
+        size = min(len(vectors), self.lists * TRAIN_PER_LIST)
+        sample = vectors[rng.choice(len(vectors), size, replace=False)] if size < len(vectors) else vectors
+        centroids = sample[rng.choice(len(sample), self.lists, replace=False)].copy()
+        for _ in range(KMEANS_ITERATIONS):
+            assignment = _nearest(sample, centroids)
+            order = np.argsort(assignment, kind="stable")
+            bounds = np.searchsorted(assignment[order], np.arange(self.lists + 1))
+            filled = bounds[1:] > bounds[:-1]
+            # An empty list is reseeded with a random sample vector.
+            sums = sample[rng.choice(len(sample), self.lists)].astype(np.float64)
+            sums[filled] = np.add.reduceat(sample[order], bounds[:-1][filled], axis=0, dtype=np.float64)
+            norms = np.linalg.norm(sums, axis=1, keepdims=True)
+            centroids = sums / np.where(norms > 0, norms, 1)
+        return centroids.astype(np.float32)
+
+    def search_many(self, queries: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        queries = np.atleast_2d(np.asarray(queries, dtype=np.float32))
+        k = min(k, len(self))
+        probed = np.argpartition(-(queries @ self.centroids.T), self.probes - 1, axis=1)[:, :self.probes]
+        if len(queries) == 1:
+            # One query: score the probed slices in one product.
+            candidates = np.concatenate([
+                np.arange(self.offsets[l], self.offsets[l + 1]) for l in probed[0]
+            ])
+            hit_scores, hit_cols = _top_k(queries @ self.vectors[candidates].T, k)
+            scores = np.full((1, k), -np.inf, dtype=np.float32)
+            positions = np.full((1, k), -1, dtype=np.int64)
+            scores[:, :hit_scores.shape[1]] = hit_scores
+            positions[:, :hit_cols.shape[1]] = candidates[hit_cols]
+            return scores, positions
+        scores = np.full((len(queries), k), -np.inf, dtype=np.float32)
+        positions = np.full((len(queries), k), -1, dtype=np.int64)
+        # Scan list by list, each against all queries that probe it, and
+        # merge its best hits into the running top k of those queries.
+        query_ids = np.repeat(np.arange(len(queries)), self.probes)
+        lists = probed.ravel()
+        order = np.argsort(lists, kind="stable")
+        lists, query_ids = lists[order], query_ids[order]
+        bounds = np.flatnonzero(np.diff(lists)) + 1
+        for members in np.split(np.arange(len(lists)), bounds):
+            if not len(members):
+                continue
+            lo, hi = self.offsets[lists[members[0]]], self.offsets[lists[members[0]] + 1]
+            if lo == hi:
+                continue
+            rows = query_ids[members]
+            hit_scores, hit_cols = _top_k(queries[rows] @ self.vectors[lo:hi].T, k)
+            merged_scores = np.concatenate([scores[rows], hit_scores], axis=1)
+            merged_positions = np.concatenate([positions[rows], hit_cols + lo], axis=1)
+            best_scores, best_cols = _top_k(merged_scores, k)
+            scores[rows] = best_scores
+            positions[rows] = np.take_along_axis(merged_positions, best_cols, axis=1)
+        return scores, positions
+
+
+def build_index(vectors: np.ndarray, ids: Sequence[str], probes: int = PROBES) -> VectorIndex:
+    """
+    Exact index for small corpora, IVF from IVF_THRESHOLD vectors.
+
+    Args:
+        vectors: (n, dim) float32 unit rows
+        ids: Id of each row
+        probes: Lists scanned per query by an IVF index
+    """
+    if len(vectors) < IVF_THRESHOLD:
+        return VectorIndex(vectors, ids)
+    return IVFIndex(vectors, ids, probes=probes)
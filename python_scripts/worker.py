@@ -0,0 +1,280 @@
+#!/usr/bin/env python3
+"""
+Scale-out scrape + summarise workers over a shared SQLite work queue.
+
+Items live in the `work_queue` table of web_content.db. Any number of
+worker processes — `run --processes N` on one machine, or `run` on several
+machines that share the database file — lease items one at a time, fetch
+and summarise them exactly like fetch_from_params.py, and mark them done.
+A worker that crashes stops renewing its lease and the item goes back to
+the queue; items that fail `--max-attempts` times are dead-lettered, and so
+are items that cannot succeed on retry (too little content), with the reason
+shown by `status`.
+
+Run:
+
+    cd python_scripts
+    python worker.py enqueue                      # pending grab_params.json jobs
+    python worker.py enqueue https://a.example/x --tags 笔记
+    python worker.py run --processes 4            # drain the queue
+    python worker.py run --wait                   # keep polling for new work
+    python worker.py run --cost-cap 2             # stop at $2 of LLM cost
+    python worker.py status
+    python worker.py requeue                      # retry dead-lettered items
+
+Raw responses are not archived by workers: the raw archive supports a
+single writer only.
+"""
+
+from __future__ import annotations
+
+import argparse
+import multiprocessing
+import socket
+import sqlite3
+import sys
+import time
+from pathlib import Path
+
+import fetch_from_params as ffp
+from web_content_system.database.job_store import JobStore
+from web_content_system.database.call_log import CallLog
+from web_content_system.database.usage_log import UsageLog
+from web_content_system.llm_clients.usage import BudgetExceeded
+from web_content_system.database.work_queue import (
+    DEFAULT_LEASE_SECONDS,
+    DEFAULT_MAX_ATTEMPTS,
+    WorkItem,
+    WorkQueue,
+)
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+DB_PATH = SCRIPT_DIR / "web_content.db"
+PARAMS_PATH = SCRIPT_DIR / "grab_params.json"
+QUEUE = "scrape"
+POLL_INTERVAL = 5.0
+
+
+class SkipItem(Exception):
+    """The item cannot succeed on retry (e.g. too little content); it is dead-lettered."""
+
+
+def process_item(
+    conn: sqlite3.Connection,
+    item: WorkItem,
+    usage_log: UsageLog | None = None,
+    call_log: CallLog | None = None,
+) -> str:
+    """
+    Fetch, summarise and store one URL; with `usage_log` the tokens and cost
+    of its summary are stored, with `call_log` the latency and outcome of
+    its LLM calls.
+
+    Returns:
+        Short outcome message
+
+    Raises:
+        SkipItem: when retrying would not help
+        Exception: any other failure, including a summary that was not
+            saved; the item is retried
+    """
+    url = item.url
+    if conn.execute("SELECT 1 FROM content_summary WHERE uid = ?", (ffp.uid_of(url),)).fetchone():
+        return "already in DB"
+
+    title, content = ffp.fetch_content(url)
+    if not title and not content:
+        raise RuntimeError("no content fetched")
+    if not content or len(content) < ffp.MIN_CONTENT_LEN:
+        raise SkipItem(f"content too short ({len(content or '')} chars)")
+
+    usages: list = []
+    calls: list = []
+    summary = ffp.generate_summary(title, content, on_usage=usages.append, on_call=calls.append)
+    # The LLM calls were paid for whether or not the row is written.
+    if usage_log is not None and usages:
+        usage_log.record(url, usages, ffp.FAILURE_SOURCE)
+    if call_log is not None and calls:
+        call_log.record(url, calls, ffp.FAILURE_SOURCE)
+    try:
+        saved = ffp.save_to_db(conn, url, title, summary, item.payload.get("tags", ""), content=content)
+    except sqlite3.IntegrityError:
+        return "stored by another worker"
+    if not saved:
+        raise RuntimeError("summary was not saved to content_summary")
+    return "saved"
+
+
+def work_loop(args: argparse.Namespace) -> tuple[int, int]:
+    """
+    Lease and process items until the queue is empty (or forever with --wait).
+
+    Returns:
+        (done, failed) counts for this worker
+    """
+    ffp.load_env_file(ffp.ENV_PATH)
+    # The run's cap is shared evenly by the worker processes of this machine.
+    ffp.LLM_USAGE.cost_cap = args.cost_cap / max(1, args.processes) if args.cost_cap else None
+    queue = WorkQueue(
+        str(DB_PATH),
+        lease_seconds=args.lease,
+        max_attempts=args.max_attempts,
+        wal=not args.shared_storage,
+    )
+    conn = sqlite3.connect(DB_PATH, timeout=30)
+    jobs = JobStore(conn)
+    usage_log = UsageLog(conn)
+    call_log = CallLog(conn, usage_log.run_id)
+    tag = f"[{queue.worker_id}]"
+    done = failed = 0
+    try:
+        while True:
+            item = queue.lease(QUEUE)
+            if item is None:
+                if not args.wait:
+                    break
+                time.sleep(POLL_INTERVAL)
+                continue
+
+            print(f"\n{tag} {item.url} (attempt {item.attempts}/{queue.max_attempts})")
+            try:
+                with queue.keep_alive(item) as heartbeat:
+                    outcome = process_item(conn, item, usage_log, call_log)
+            except BudgetExceeded as e:
+                queue.release(item)
+                print(f"{tag} 💰 {e} — stopping; the item stays queued")
+                break
+            except SkipItem as e:
+                status = queue.fail(item, f"skipped: {e}", retry=False)
+                failed += 1
+                print(f"{tag} ⊘ {e} → {status or 'lease lost'}")
+                continue
+            except Exception as e:
+                status = queue.fail(item, f"{type(e).__name__}: {e}")
+                failed += 1
+                print(f"{tag} ✗ {e} → {status or 'lease lost'}")
+                continue
+
+            if heartbeat.lost or not queue.complete(item):
+                print(f"{tag} ⚠ lease lost; another worker owns this item now")
+                continue
+            jobs.mark_done(item.url)
+            done += 1
+            print(f"{tag} ✓ {outcome}")
+    finally:
+        call_log.flush()
+        conn.close()
+        queue.close()
+    return done, failed
+
+
+def _worker_main(args: argparse.Namespace):
+    try:
+        work_loop(args)
+    except KeyboardInterrupt:
+        pass
+
+
+def cmd_enqueue(args: argparse.Namespace, queue: WorkQueue) -> int:
+    if args.urls:
+        pairs = [(url, {"tags": args.tags}) for url in args.urls]
+    else:
+        if not PARAMS_PATH.exists():
+            print(f"✗ {PARAMS_PATH.name} not found")
+            return 1
+        with sqlite3.connect(DB_PATH, timeout=30) as conn:
+            jobs = JobStore(conn)
+            jobs.import_json(str(PARAMS_PATH))
+            pairs = [
+                (job.url, {"tags": job.tags})
+                for job in jobs.pending(args.max_attempts, str(PARAMS_PATH))
+            ]
+    added = queue.enqueue_many(pairs, QUEUE)
+    print(f"✓ queued {added} new item(s) ({len(pairs) - added} already queued)")
+    return 0
+
+
+def cmd_run(args: argparse.Namespace, queue: WorkQueue) -> int:
+    processes = max(1, args.processes)
+    print(f"Starting {processes} worker process(es) on {socket.gethostname()}")
+    if processes == 1:
+        _worker_main(args)
+    else:
+        procs = [
+            multiprocessing.Process(target=_worker_main, args=(args,))
+            for _ in range(processes)
+        ]
+        for p in procs:
+            p.start()
+        try:
+            for p in procs:
+                p.join()
+        except KeyboardInterrupt:
+            for p in procs:
+                p.join()
+    if PARAMS_PATH.exists():
+        with sqlite3.connect(DB_PATH, timeout=30) as conn:
+            jobs = JobStore(conn)
+            jobs.import_json(str(PARAMS_PATH))  # no-op unless edited meanwhile
+            jobs.export_json(str(PARAMS_PATH))
+        print(f"✓ wrote job state back to {PARAMS_PATH.name}")
+    return cmd_status(args, queue)
+
+
+def cmd_status(args: argparse.Namespace, queue: WorkQueue) -> int:
+    stats = queue.stats(QUEUE)
+    print("Queue: " + ", ".join(f"{k} {v}" for k, v in stats.items()))
+    for item_id, url, attempts, error in queue.dead_letters(QUEUE)[:20]:
+        print(f"  ✗ #{item_id} {url} ({attempts} attempts): {error}")
+    return 0
+
+
+def cmd_requeue(args: argparse.Namespace, queue: WorkQueue) -> int:
+    print(f"✓ requeued {queue.requeue_dead(QUEUE)} dead item(s)")
+    return 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Shared work queue for scrape + summarise workers.")
+    parser.add_argument(
+        "--shared-storage",
+        action="store_true",
+        help="The database is on network storage shared by several machines: "
+             "use SQLite's rollback journal instead of WAL.",
+    )
+    parser.add_argument("--lease", type=float, default=DEFAULT_LEASE_SECONDS,
+                        help="Lease length in seconds (renewed while an item is processed).")
+    parser.add_argument("--max-attempts", type=int, default=DEFAULT_MAX_ATTEMPTS,
+                        help="Attempts before an item is dead-lettered.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    enqueue = sub.add_parser("enqueue", help="Queue URLs (default: pending grab_params.json entries).")
+    enqueue.add_argument("urls", nargs="*")
+    enqueue.add_argument("--tags", default="")
+
+    run = sub.add_parser("run", help="Process queued items.")
+    run.add_argument("--processes", type=int, default=1, help="Worker processes on this machine.")
+    run.add_argument("--wait", action="store_true", help="Keep polling when the queue is empty.")
+    run.add_argument(
+        "--cost-cap",
+        type=float,
+        default=None,
+        help="Stop before a DeepSeek call would take this run's cost over this many USD "
+             "(split evenly across --processes); unprocessed items stay queued.",
+    )
+
+    sub.add_parser("status", help="Show queue counts and dead-lettered items.")
+    sub.add_parser("requeue", help="Give dead-lettered items a fresh set of attempts.")
+    args = parser.parse_args()
+
+    conn = sqlite3.connect(DB_PATH)
+    ffp.ensure_schema(conn)
+    conn.close()
+
+    commands = {"enqueue": cmd_enqueue, "run": cmd_run, "status": cmd_status, "requeue": cmd_requeue}
+    with WorkQueue(str(DB_PATH), max_attempts=args.max_attempts, wal=not args.shared_storage) as queue:
+        return commands[args.command](args, queue)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
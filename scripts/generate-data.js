@@ -58,12 +58,46 @@ function mergeIncremental(existing, incoming) {
       existing.push(it);
       map.set(k, it);
       added++;
+    } else if (it.related) {
+      // Related items are recomputed on every embedding run
+      map.get(k).related = it.related;
     }
   }
   existing.sort((a, b) => String(b.created_time).localeCompare(String(a.created_time)));
   return { merged: existing, added };
 }
 
+// Attach the related items precomputed by python_scripts/embed_summaries.py
+function attachRelated(db, rows) {
+  let res;
+  try {
+    res = db.exec('SELECT uid, related FROM content_related');
+  } catch (e) {
+    console.log('ℹ️  content_related table not found, skipping related items.');
+    return rows.map(row => {
+      const copy = { ...row };
+      delete copy.uid;
+      return copy;
+    });
+  }
+  const related = new Map(res.length > 0 ? res[0].values : []);
+  const byUid = new Map(rows.map(row => [row.uid, row]));
+  let linked = 0;
+  const result = rows.map(({ uid, ...row }) => {
+    const items = JSON.parse(related.get(uid) || '[]')
+      .filter(([other]) => byUid.has(other))
+      .map(([other, score]) => ({
+        title: byUid.get(other).title,
+        original_url: byUid.get(other).original_url,
+        score,
+      }));
+    if (items.length > 0) linked++;
+    return { ...row, related: items };
+  });
+  console.log(`🔗 Related items attached to ${linked} records`);
+  return result;
+}
+
 async function generateData() {
   console.log('📦 Starting static data generation...');
   console.log(`📂 Database path: ${DB_PATH}`);
@@ -94,6 +128,7 @@ async function generateData() {
       const query = `
         SELECT 
           id,
+          uid,
           title,
           created_time,
           summary,
@@ -112,6 +147,7 @@ async function generateData() {
           }, {});
         });
         console.log(`✅ Found ${result.length} records in content_summary`);
+        result = attachRelated(db, result);
       }
     } catch (e) {
       console.log('ℹ️  content_summary table not found or empty, trying manual_content...');